@@ -0,0 +1,187 @@
+"""レスポンス圧縮ミドルウェア
+
+Accept-Encoding に応じて brotli / gzip を選択する。
+brotli はオプション依存（`pip install colonyforge[compression]`）で、
+未導入の場合は gzip のみで応答する。SSE（text/event-stream）と
+既にエンコード済みのレスポンスは圧縮しない。
+
+Starlette の GZipMiddleware の内部クラスには依存せず、公開 ASGI インターフェース
+（http.response.start / http.response.body）の上で実装する。
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import zlib
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    brotli: Any = importlib.import_module("brotli")
+except ImportError:  # pragma: no cover - オプション依存
+    brotli = None
+
+
+def brotli_available() -> bool:
+    """brotli パッケージが利用可能か"""
+    return brotli is not None
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    """Accept-Encoding ヘッダーから受理されるエンコーディングを抽出（q=0 は除外）"""
+    accepted: set[str] = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    return accepted
+
+
+class _GzipCompressor:
+    """gzip 形式のストリーム圧縮"""
+
+    def __init__(self, level: int) -> None:
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _BrotliCompressor:
+    """brotli 形式のストリーム圧縮"""
+
+    def __init__(self, quality: int) -> None:
+        self._obj: Any = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        out = self._obj.process(data)
+        out += self._obj.finish() if final else self._obj.flush()
+        return bytes(out)
+
+
+class _CompressionResponder:
+    """1件のレスポンスを指定のエンコーディングで圧縮して中継する
+
+    http.response.start は最初の本文チャンクが届くまで保留し、本文が1チャンクで
+    minimum_size 未満なら圧縮せずにそのまま送る。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoding: str,
+        compressor: _GzipCompressor | _BrotliCompressor,
+        minimum_size: int,
+    ) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self._start: Message | None = None
+        self._passthrough = False
+        self._started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, functools.partial(self._send_compressed, send=send))
+
+    async def _send_compressed(self, message: Message, *, send: Send) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith("text/event-stream"):
+                self._passthrough = True
+                await send(message)
+            else:
+                self._start = message
+            return
+        if self._passthrough or self._start is None or message["type"] != "http.response.body":
+            await send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._started:
+            data = self.compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        self._started = True
+        start = self._start
+        if len(body) < self.minimum_size and not more_body:
+            self._passthrough = True
+            await send(start)
+            await send(message)
+            return
+
+        data = self.compressor.compress(body, final=not more_body)
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            if "content-length" in headers:
+                del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await send(start)
+        await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """brotli/gzip をネゴシエーションする圧縮ミドルウェア
+
+    Args:
+        app: ASGIアプリケーション
+        minimum_size: 圧縮対象とする最小バイト数
+        gzip_level: gzip圧縮レベル（1-9）
+        brotli_quality: brotli品質（0-11）
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encodings = _accepted_encodings(accept)
+
+        if "br" in encodings and brotli_available():
+            responder: ASGIApp = _CompressionResponder(
+                self.app, "br", _BrotliCompressor(self.brotli_quality), self.minimum_size
+            )
+        elif "gzip" in encodings:
+            responder = _CompressionResponder(
+                self.app, "gzip", _GzipCompressor(self.gzip_level), self.minimum_size
+            )
+        else:
+            responder = self.app
+        await responder(scope, receive, send)
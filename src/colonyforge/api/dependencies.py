@@ -12,6 +12,7 @@ from fastapi import Depends
 
 from ..core import AkashicRecord, RunProjection, get_settings
 from ..core.ar.hive_storage import HiveStore
+from ..core.ar.lineage_index import LineageIndex
 from ..core.ar.projections import RunProjector
 from ..core.events import BaseEvent
 
@@ -28,6 +29,7 @@ class AppState:
     def __init__(self) -> None:
         self._ar: AkashicRecord | None = None
         self._hive_store: HiveStore | None = None
+        self._lineage_index: LineageIndex | None = None
         self._active_runs: dict[str, RunProjection] = {}
 
     @classmethod
@@ -68,6 +70,18 @@ class AppState:
         """HiveStoreインスタンスを設定"""
         self._hive_store = value
 
+    @property
+    def lineage_index(self) -> LineageIndex:
+        """LineageIndexインスタンスを取得（ARと同じVaultを索引化）"""
+        if self._lineage_index is None or self._lineage_index.vault_path != self.ar.vault_path:
+            self._lineage_index = LineageIndex(self.ar.vault_path)
+        return self._lineage_index
+
+    @lineage_index.setter
+    def lineage_index(self, value: LineageIndex | None) -> None:
+        """LineageIndexインスタンスを設定"""
+        self._lineage_index = value
+
     @property
     def active_runs(self) -> dict[str, RunProjection]:
         """アクティブなRunの辞書を取得"""
@@ -125,6 +139,11 @@ def set_hive_store(store: HiveStore | None) -> None:
     get_app_state().hive_store = store
 
 
+def get_lineage_index() -> LineageIndex:
+    """LineageIndexインスタンスを取得"""
+    return get_app_state().lineage_index
+
+
 def get_active_runs() -> dict[str, RunProjection]:
     """アクティブなRunの辞書を取得（後方互換性）"""
     return get_app_state().active_runs
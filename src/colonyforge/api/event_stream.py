@@ -0,0 +1,95 @@
+"""イベントログのSSE配信ヘルパー
+
+Run・Hive のイベントログを Server-Sent Events で配信する。
+SSE の id にはイベント一覧APIの X-Next-Cursor と同じ不透明カーソルを使い、
+再接続時の Last-Event-ID からそのまま続きを配信できる。
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncGenerator, Callable
+from contextlib import aclosing
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from ..core.events import BaseEvent
+from .models import EventResponse
+from .pagination import decode_cursor, encode_cursor
+
+# keep-alive コメントを送る間隔（秒）
+KEEP_ALIVE_INTERVAL = 15.0
+
+EventBatches = AsyncGenerator[list[tuple[BaseEvent, int]], None]
+
+
+def event_to_response(event: BaseEvent) -> EventResponse:
+    """イベントをAPIレスポンスモデルに変換"""
+    return EventResponse(
+        id=event.id,
+        type=event.type.value if hasattr(event.type, "value") else event.type,
+        timestamp=event.timestamp,
+        actor=event.actor,
+        payload=event.payload,
+        hash=event.hash,
+        prev_hash=event.prev_hash,
+        parents=event.parents,
+    )
+
+
+def resolve_stream_offset(request: Request, cursor: str | None) -> int:
+    """Last-Event-ID ヘッダー または cursor クエリから開始オフセットを解決
+
+    Raises:
+        HTTPException: カーソルが不正な場合（400）
+    """
+    token = request.headers.get("last-event-id") or cursor
+    if not token:
+        return 0
+    offset = decode_cursor(token).get("o")
+    if not isinstance(offset, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def format_sse_batch(batch: list[tuple[BaseEvent, int]]) -> str:
+    """イベントのバッチを1つのSSEフレームに整形
+
+    data はイベントの配列、id は最後のイベント直後のカーソル。
+    """
+    data = [event_to_response(event).model_dump(mode="json") for event, _ in batch]
+    cursor = encode_cursor({"o": batch[-1][1]})
+    return f"id: {cursor}\nevent: events\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_event_log(open_tail: Callable[[int], EventBatches], offset: int) -> StreamingResponse:
+    """イベントログの追従結果をSSEレスポンスとして返す
+
+    Args:
+        open_tail: 開始オフセットを受け取り tail の非同期イテレータを返す関数
+        offset: 開始オフセット
+
+    Raises:
+        HTTPException: オフセットが不正な場合（400）
+    """
+    try:
+        batches = open_tail(offset)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err)) from err
+
+    async def generate() -> AsyncGenerator[str, None]:
+        # 切断時に tail の購読を確実に解除する
+        async with aclosing(batches):
+            async for batch in batches:
+                yield format_sse_batch(batch) if batch else ": keep-alive\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -19,6 +19,7 @@ from .dependencies import (
     get_app_state,
     get_ar,
     get_hive_store,
+    get_lineage_index,
     set_ar,
     set_hive_store,
 )
@@ -31,6 +32,7 @@ __all__ = [
     "set_ar",
     "get_hive_store",
     "set_hive_store",
+    "get_lineage_index",
     "get_active_runs",
     "clear_active_runs",
     "apply_event_to_projection",
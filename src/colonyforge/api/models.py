@@ -4,9 +4,12 @@ FastAPIエンドポイントで使用するPydanticモデル。
 """
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# バッチ系エンドポイントで1リクエストに含められる最大件数
+MAX_BATCH_SIZE = 500
 
 # --- Run モデル ---
 
@@ -112,6 +115,53 @@ class ReportProgressRequest(BaseModel):
     parents: list[str] = Field(default_factory=list, description="親イベントID（因果リンク用）")
 
 
+class BatchCreateTasksRequest(BaseModel):
+    """Task一括作成リクエスト"""
+
+    tasks: list[CreateTaskRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskUpdateItem(BaseModel):
+    """Task一括更新の1件分（完了/失敗/進捗）"""
+
+    task_id: str
+    action: Literal["complete", "fail", "progress"]
+    result: dict[str, Any] = Field(default_factory=dict, description="complete時の結果")
+    error: str | None = Field(default=None, description="fail時のエラー内容")
+    retryable: bool = True
+    progress: int | None = Field(default=None, ge=0, le=100, description="progress時の進捗率")
+    message: str = Field(default="", description="progress時のメッセージ")
+    parents: list[str] = Field(default_factory=list, description="親イベントID（因果リンク用）")
+
+    @model_validator(mode="after")
+    def _check_action_fields(self) -> "TaskUpdateItem":
+        if self.action == "fail" and self.error is None:
+            raise ValueError("error is required for action 'fail'")
+        if self.action == "progress" and self.progress is None:
+            raise ValueError("progress is required for action 'progress'")
+        return self
+
+
+class BatchUpdateTasksRequest(BaseModel):
+    """Task一括更新リクエスト"""
+
+    updates: list[TaskUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskUpdateResult(BaseModel):
+    """Task一括更新の1件分の結果"""
+
+    task_id: str
+    status: str
+    progress: int | None = None
+
+
+class BatchUpdateTasksResponse(BaseModel):
+    """Task一括更新レスポンス"""
+
+    results: list[TaskUpdateResult]
+
+
 # --- Requirement モデル ---
 
 
@@ -143,6 +193,31 @@ class ResolveRequirementRequest(BaseModel):
     comment: str | None = None
 
 
+class RequirementDecision(ResolveRequirementRequest):
+    """確認要請一括解決の1件分"""
+
+    requirement_id: str
+
+
+class BatchResolveRequirementsRequest(BaseModel):
+    """確認要請一括解決リクエスト"""
+
+    decisions: list[RequirementDecision] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class RequirementDecisionResult(BaseModel):
+    """確認要請一括解決の1件分の結果"""
+
+    requirement_id: str
+    approved: bool
+
+
+class BatchResolveRequirementsResponse(BaseModel):
+    """確認要請一括解決レスポンス"""
+
+    results: list[RequirementDecisionResult]
+
+
 # --- Event モデル ---
 
 
@@ -168,6 +243,33 @@ class LineageResponse(BaseModel):
     truncated: bool = Field(default=False, description="結果が切り詰められたか")
 
 
+class LineageNodeResponse(BaseModel):
+    """Lineageグラフのノード"""
+
+    id: str
+    type: str
+    scope: str = Field(..., description="所属ソース（run/hive/honeycomb）")
+    scope_id: str
+    ts: str = Field(default="", description="タイムスタンプ")
+    parents: list[str] = Field(default_factory=list, description="明示的な親ノードID")
+
+
+class LineageEdgeResponse(BaseModel):
+    """Lineageグラフのエッジ（親 → 子）"""
+
+    source: str
+    target: str
+
+
+class LineageGraphResponse(BaseModel):
+    """Vault横断の因果グラフレスポンス"""
+
+    root: str
+    nodes: list[LineageNodeResponse] = Field(default_factory=list)
+    edges: list[LineageEdgeResponse] = Field(default_factory=list)
+    truncated: bool = Field(default=False, description="結果が切り詰められたか")
+
+
 # --- System モデル ---
 
 
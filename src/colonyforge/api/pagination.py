@@ -0,0 +1,98 @@
+"""カーソルページングと条件付きGETのヘルパー
+
+一覧系エンドポイントで共通に使用する:
+- 不透明カーソル（base64url エンコードしたJSON）の生成と解釈
+- 最終イベントハッシュやカタログバージョンからの強いETag生成
+- If-None-Match に基づく 304 Not Modified 判定
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, Request, Response
+
+T = TypeVar("T")
+
+# 次ページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(data: dict[str, Any]) -> str:
+    """カーソル情報を不透明な文字列にエンコード"""
+    raw = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """不透明カーソルをデコード
+
+    Raises:
+        HTTPException: カーソルが不正な場合（400）
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as err:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
+
+
+def compute_etag(*parts: object) -> str:
+    """構成要素から強いETagを生成"""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match がETagに一致するか判定"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    """304 Not Modified レスポンスを生成"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def resolve_after(after: str | None, cursor: str | None) -> str | None:
+    """after（生ID）と cursor（不透明カーソル）から開始位置のIDを解決"""
+    if cursor is not None:
+        value = decode_cursor(cursor).get("after")
+        if not isinstance(value, str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return value
+    return after
+
+
+def paginate(
+    items: Sequence[T],
+    key: Callable[[T], str],
+    after: str | None,
+    limit: int | None,
+) -> tuple[list[T], str | None]:
+    """ID昇順の一覧を after より後から limit 件切り出す
+
+    Args:
+        items: ID昇順に並んだ要素
+        key: 要素からIDを取り出す関数
+        after: このIDより後の要素を返す（Noneで先頭から）
+        limit: 最大件数（Noneで無制限）
+
+    Returns:
+        (ページ, 次ページのカーソル) のタプル。続きがない場合カーソルはNone
+    """
+    page = [item for item in items if after is None or key(item) > after]
+    if limit is None or len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor({"after": key(page[-1])})
@@ -13,6 +13,7 @@ from .guard_bee import router as guard_bee_router
 from .hives import router as hives_router
 from .interventions import router as interventions_router
 from .kpi import router as kpi_router
+from .lineage import router as lineage_router
 from .requirements import router as requirements_router
 from .runs import router as runs_router
 from .system import router as system_router
@@ -28,6 +29,7 @@ __all__ = [
     "conferences_router",
     "interventions_router",
     "kpi_router",
+    "lineage_router",
     "runs_router",
     "tasks_router",
     "requirements_router",
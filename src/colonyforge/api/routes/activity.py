@@ -9,19 +9,24 @@ from __future__ import annotations
 import asyncio
 import json
 from collections.abc import AsyncGenerator
-from typing import Any
+from datetime import datetime
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from ...core.activity_bus import (
+    DEFAULT_SUBSCRIBER_QUEUE_SIZE,
     ActivityBus,
     ActivityEvent,
+    ActivityFilter,
     ActivityType,
     AgentInfo,
     AgentRole,
+    OverflowPolicy,
 )
+from ..pagination import is_not_modified, not_modified_response
 
 router = APIRouter(prefix="/activity", tags=["Activity"])
 
@@ -34,31 +39,36 @@ async def get_recent_events(limit: int = Query(default=100, ge=1, le=1000)) -> d
     return {"events": [e.to_dict() for e in events]}
 
 
-@router.get("/hierarchy")
-async def get_hierarchy() -> dict[str, Any]:
-    """アクティブエージェントの階層構造を取得"""
+@router.get("/hierarchy", response_model=None)
+async def get_hierarchy(
+    request: Request,
+    since_version: Annotated[int | None, Query(ge=0)] = None,
+) -> Response | dict[str, Any]:
+    """アクティブエージェントの階層構造を取得
+
+    レスポンスの version は ETag にも反映され、If-None-Match が一致すれば 304 を返す。
+    since_version を指定すると、そのバージョンからの変更（changes）と
+    変更の有無（changed）のみを返す。変更記録が残っていない場合は全体（hierarchy）を返す。
+    """
     bus = ActivityBus.get_instance()
-    hierarchy = bus.get_hierarchy()
-
-    # AgentInfoをシリアライズ
-    def serialize_hierarchy(h: dict[str, Any]) -> dict[str, Any]:
-        result = {}
-        for hive_id, hive_data in h.items():
-            beekeeper = hive_data.get("beekeeper")
-            colonies = {}
-            for col_id, col_data in hive_data.get("colonies", {}).items():
-                queen = col_data.get("queen_bee")
-                colonies[col_id] = {
-                    "queen_bee": queen.to_dict() if queen else None,
-                    "workers": [w.to_dict() for w in col_data.get("workers", [])],
-                }
-            result[hive_id] = {
-                "beekeeper": beekeeper.to_dict() if beekeeper else None,
-                "colonies": colonies,
-            }
-        return result
-
-    return {"hierarchy": serialize_hierarchy(hierarchy)}
+    version = bus.hierarchy_version
+    etag = f'"hierarchy-{version}"'
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    body: dict[str, Any]
+    changes = bus.get_hierarchy_changes(since_version) if since_version is not None else None
+    if changes is not None:
+        body = {
+            "version": version,
+            "since_version": since_version,
+            "changed": bool(changes),
+            "changes": changes,
+        }
+    else:
+        version, hierarchy = bus.get_hierarchy_snapshot()
+        body = {"version": version, "hierarchy": hierarchy}
+    return JSONResponse(body, headers={"ETag": etag})
 
 
 @router.get("/agents")
@@ -69,6 +79,13 @@ async def get_active_agents() -> dict[str, Any]:
     return {"agents": [a.to_dict() for a in agents]}
 
 
+@router.get("/subscribers")
+async def get_subscribers() -> dict[str, Any]:
+    """購読ごとの遅延（未配信数）・破棄数などのメトリクスを取得"""
+    bus = ActivityBus.get_instance()
+    return {"subscribers": bus.get_subscriber_stats()}
+
+
 # =============================================================================
 # イベント投入 API
 # =============================================================================
@@ -228,9 +245,41 @@ async def seed_demo_data(
     }
 
 
+# 履歴からの再生で1回に読み込むイベント数
+_HISTORY_REPLAY_BATCH = 500
+
+
+def _sse_frame(event: ActivityEvent) -> str:
+    """イベントをSSEフレームに整形（履歴の通番があれば id を付ける）"""
+    data = json.dumps(event.to_dict(), ensure_ascii=False)
+    if event.seq is None:
+        return f"data: {data}\n\n"
+    return f"data: {data}\nid: {event.seq}\n\n"
+
+
 @router.get("/stream")
 async def stream_events(
     replay: int = Query(default=50, ge=0, le=500),
+    queue_size: Annotated[
+        int, Query(ge=1, le=100_000, description="未送信イベントの保持上限")
+    ] = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+    overflow: Annotated[
+        OverflowPolicy, Query(description="キュー満杯時の挙動")
+    ] = OverflowPolicy.DROP_OLDEST,
+    hive_id: Annotated[list[str] | None, Query(description="配信するHive ID")] = None,
+    colony_id: Annotated[list[str] | None, Query(description="配信するColony ID")] = None,
+    agent_id: Annotated[list[str] | None, Query(description="配信するエージェントID")] = None,
+    role: Annotated[list[AgentRole] | None, Query(description="配信するロール")] = None,
+    activity_type: Annotated[
+        list[ActivityType] | None, Query(description="配信するアクティビティ種別")
+    ] = None,
+    sample: Annotated[
+        float, Query(gt=0.0, le=1.0, description="ライフサイクル以外のイベントのサンプリング率")
+    ] = 1.0,
+    since: Annotated[
+        datetime | None, Query(description="この時刻以降を永続化された履歴から再生")
+    ] = None,
+    last_event_id: Annotated[str | None, Header(description="再接続時の最終受信ID")] = None,
 ) -> StreamingResponse:
     """SSEでアクティビティイベントをリアルタイム配信
 
@@ -238,38 +287,89 @@ async def stream_events(
     接続時に直近 replay 件のイベントを即送信し、
     以降はリアルタイムに新規イベントを配信する。
 
+    クライアントごとに有界キューを持ち、受信が追いつかない場合は
+    overflow の方針で古いイベント/新しいイベントを捨てるか、接続を切断する。
+
+    hive_id 等のフィルタ（複数指定はOR、項目間はAND）はサーバー側で適用され、
+    一致しないイベントは送信しない。replay にも同じフィルタを適用する。
+
+    アクティビティ履歴が有効な場合、各イベントに通番の id を付ける。
+    Last-Event-ID ヘッダー（EventSource の自動再接続）または since を指定すると、
+    replay の代わりにリングファイルに残る履歴から続きを再生する。
+
     Args:
-        replay: 接続時に送信する直近イベント数（0で無効）
+        replay: 接続時に送信する直近イベント数（0で無効、フィルタ適用前の件数）
+        queue_size: 未送信イベントの保持上限
+        overflow: キュー満杯時の挙動（drop_oldest/drop_newest/disconnect）
+        hive_id: 配信するHive ID
+        colony_id: 配信するColony ID
+        agent_id: 配信するエージェントID
+        role: 配信するロール
+        activity_type: 配信するアクティビティ種別
+        sample: サンプリング率（0 < sample <= 1）
+        since: 履歴から再生する開始時刻
+        last_event_id: この通番より後を履歴から再生（since より優先）
     """
+    activity_filter = ActivityFilter(
+        hive_ids=frozenset(hive_id or ()),
+        colony_ids=frozenset(colony_id or ()),
+        agent_ids=frozenset(agent_id or ()),
+        roles=frozenset(role or ()),
+        activity_types=frozenset(activity_type or ()),
+        sample_rate=sample,
+    )
 
-    async def event_generator() -> AsyncGenerator[str, None]:
-        bus = ActivityBus.get_instance()
-        queue: asyncio.Queue[ActivityEvent] = asyncio.Queue()
-
-        async def handler(event: ActivityEvent) -> None:
-            await queue.put(event)
+    bus = ActivityBus.get_instance()
+    history = bus.history
+    resume_after: int | None = None
+    if last_event_id is not None:
+        try:
+            resume_after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID") from None
+    elif since is not None and history is not None:
+        resume_after = history.seq_at(since) - 1
 
-        # replay: 既存イベントを先に送信
-        if replay > 0:
+    async def event_generator() -> AsyncGenerator[str, None]:
+        if history is not None and resume_after is not None:
+            # 履歴から続きを再生（空になるまで読み、直後に購読するため取りこぼしなし）
+            last = resume_after
+            agent_ids = activity_filter.agent_ids or None
+            while batch := list(
+                history.read_after(last, agent_ids=agent_ids, limit=_HISTORY_REPLAY_BATCH)
+            ):
+                for seq, past_event in batch:
+                    last = seq
+                    if activity_filter.matches(past_event):
+                        yield _sse_frame(past_event)
+        elif replay > 0:
+            # replay: 既存イベントを先に送信
             recent = bus.get_recent_events(limit=replay)
             for past_event in recent:
-                data = json.dumps(past_event.to_dict(), ensure_ascii=False)
-                yield f"data: {data}\n\n"
+                if not activity_filter.matches(past_event):
+                    continue
+                yield _sse_frame(past_event)
 
         # subscribe は replay 送信後に行う（重複回避）
-        bus.subscribe(handler)
+        subscription = bus.open_subscription(
+            "sse", max_queue=queue_size, policy=overflow, activity_filter=activity_filter
+        )
 
         try:
             while True:
                 try:
                     # 15秒ごとにkeep-alive
-                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
-                    data = json.dumps(event.to_dict(), ensure_ascii=False)
-                    yield f"data: {data}\n\n"
+                    event = await asyncio.wait_for(subscription.get(), timeout=15.0)
                 except TimeoutError:
                     yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    # 受信が追いつかず切断された（クライアントは再接続して replay する）
+                    yield ": disconnected (overflow)\n\n"
+                    return
+                yield _sse_frame(event)
         finally:
-            bus.unsubscribe(handler)
+            bus.unsubscribe(subscription)
 
     return StreamingResponse(
         event_generator(),
@@ -5,9 +5,9 @@ Colony管理用のREST API。
 読み取りはイベント列からの投影（HiveAggregate）により再構築される。
 """
 
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
 
 from colonyforge.core.ar.hive_projections import build_hive_aggregate
@@ -19,6 +19,14 @@ from colonyforge.core.events import (
 )
 
 from ..helpers import get_hive_store
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    paginate,
+    resolve_after,
+)
 
 router = APIRouter(tags=["Colonies"])
 
@@ -123,14 +131,34 @@ async def create_colony(hive_id: str, request: CreateColonyRequest) -> ColonyRes
 
 
 @hive_colonies_router.get("", response_model=list[ColonyResponse])
-async def list_colonies(hive_id: str) -> list[ColonyResponse]:
-    """Hive配下のColony一覧を取得"""
+async def list_colonies(
+    request: Request,
+    response: Response,
+    hive_id: str,
+    after: Annotated[str | None, Query(description="このColony IDより後を取得")] = None,
+    cursor: Annotated[str | None, Query(description="前回レスポンスの X-Next-Cursor")] = None,
+    limit: Annotated[int | None, Query(ge=1, le=1000, description="取得件数上限")] = None,
+) -> list[ColonyResponse] | Response:
+    """Hive配下のColony一覧を取得
+
+    Colony ID昇順で返す。limit を指定すると続きのカーソルを X-Next-Cursor ヘッダーで返す。
+    ETag は対象Hiveのイベントログのバージョンから算出する。
+    """
+    store = get_hive_store()
+    etag = compute_etag("colonies", hive_id, store.catalog_version(hive_id), after, cursor, limit)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
     aggregate = _rebuild_hive(hive_id)
     if aggregate is None:
         raise HTTPException(status_code=404, detail=f"Hive {hive_id} not found")
 
+    colony_ids, next_cursor = paginate(
+        sorted(aggregate.colonies.keys()), str, resolve_after(after, cursor), limit
+    )
     result = []
-    for colony_id, colony in aggregate.colonies.items():
+    for colony_id in colony_ids:
+        colony = aggregate.colonies[colony_id]
         status = _STATE_TO_STATUS.get(colony.state.value, colony.state.value)
         name = colony.metadata.get("name", colony.goal)
         result.append(
@@ -142,6 +170,10 @@ async def list_colonies(hive_id: str) -> list[ColonyResponse]:
                 status=status,
             )
         )
+
+    response.headers["ETag"] = etag
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return result
 
 
@@ -3,44 +3,145 @@
 イベント取得と因果リンクに関するエンドポイント。
 """
 
+from collections.abc import Iterator
+from contextlib import closing
 from datetime import datetime
+from itertools import islice
 from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from ..event_stream import (
+    KEEP_ALIVE_INTERVAL,
+    event_to_response,
+    resolve_stream_offset,
+    stream_event_log,
+)
 from ..helpers import get_ar
 from ..models import EventResponse, LineageResponse
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    compute_etag,
+    decode_cursor,
+    encode_cursor,
+    is_not_modified,
+    not_modified_response,
+)
+from ..serialization import EVENT_LIST_ADAPTER, fast_json_response, ndjson_response
 
 router = APIRouter(prefix="/runs/{run_id}/events", tags=["Events"])
 
+# エクスポート時に1度のロック取得で読み込むイベント数
+_EXPORT_CHUNK_SIZE = 1000
+
 
 @router.get("", response_model=list[EventResponse])
 async def get_events(
+    request: Request,
     run_id: str,
     since: datetime | None = None,
     limit: Annotated[int, Query(ge=1, le=10000, description="取得件数上限")] = 100,
-) -> list[EventResponse]:
-    """イベント一覧を取得"""
+    after: Annotated[str | None, Query(description="このイベントIDより後を取得")] = None,
+    cursor: Annotated[
+        str | None, Query(description="前回レスポンスの X-Next-Cursor（不透明カーソル）")
+    ] = None,
+) -> list[EventResponse] | Response:
+    """イベント一覧を取得
+
+    レスポンスの X-Next-Cursor ヘッダーを次回の cursor に渡すと、
+    前回以降に追記されたイベントだけを先頭からの再読込なしで取得できる。
+    ETag は最終イベントのハッシュから算出され、If-None-Match が一致すれば
+    イベントを読まずに 304 Not Modified を返す。
+    """
+    ar = get_ar()
+    etag = compute_etag("events", run_id, ar.get_last_hash(run_id), since, limit, after, cursor)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    start_offset = 0
+    if cursor is not None:
+        offset = decode_cursor(cursor).get("o")
+        if not isinstance(offset, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start_offset = offset
+        after = None
+
+    events: list[EventResponse] = []
+    next_offset = start_offset
+    found_after = after is None
+    try:
+        for event, end_offset in ar.replay_from(run_id, start_offset):
+            next_offset = end_offset
+            if not found_after:
+                found_after = event.id == after
+                continue
+            if since and event.timestamp < since:
+                continue
+            events.append(event_to_response(event))
+            if len(events) >= limit:
+                break
+    except ValueError as err:
+        if cursor is None:
+            raise
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+
+    if not found_after:
+        raise HTTPException(status_code=404, detail=f"Event {after} not found")
+
+    # 最大10000件になり得るため response_model の再検証を経ずに直接シリアライズする
+    return fast_json_response(
+        EVENT_LIST_ADAPTER,
+        events,
+        headers={"ETag": etag, NEXT_CURSOR_HEADER: encode_cursor({"o": next_offset})},
+    )
+
+
+@router.get("/export")
+async def export_events(run_id: str) -> StreamingResponse:
+    """Runの全イベントを JSON Lines でストリーミング
+
+    件数上限なしで全件をダンプする。一定件数ごとにファイルロックを解放しながら
+    読み込むため、エクスポート中もイベントの追記は妨げられない。
+    """
     ar = get_ar()
-    events = []
-
-    for event in ar.replay(run_id, since=since):
-        events.append(
-            EventResponse(
-                id=event.id,
-                type=event.type.value if hasattr(event.type, "value") else event.type,
-                timestamp=event.timestamp,
-                actor=event.actor,
-                payload=event.payload,
-                hash=event.hash,
-                prev_hash=event.prev_hash,
-                parents=event.parents,
-            )
-        )
-        if len(events) >= limit:
-            break
-
-    return events
+
+    def iter_events() -> Iterator[EventResponse]:
+        offset = 0
+        while True:
+            with closing(ar.replay_from(run_id, offset)) as events:
+                chunk = list(islice(events, _EXPORT_CHUNK_SIZE))
+            if not chunk:
+                return
+            offset = chunk[-1][1]
+            for event, _ in chunk:
+                yield event_to_response(event)
+
+    return ndjson_response(iter_events())
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    run_id: str,
+    cursor: Annotated[
+        str | None, Query(description="開始位置（X-Next-Cursor または SSE の id）")
+    ] = None,
+    max_batch: Annotated[int, Query(ge=1, le=1000, description="1フレームの最大イベント数")] = 100,
+) -> StreamingResponse:
+    """イベントログを追従しSSEで配信
+
+    既存イベントを送信した後、追記されたイベントをリアルタイムに配信する。
+    各フレームの data はイベントの配列で、未読が溜まっている場合は
+    最大 max_batch 件を1フレームにまとめる。フレームの id は
+    X-Next-Cursor と同じカーソルで、再接続時は Last-Event-ID から再開する。
+    """
+    ar = get_ar()
+    offset = resolve_stream_offset(request, cursor)
+    return stream_event_log(
+        lambda start: ar.tail(run_id, start, max_batch=max_batch, heartbeat=KEEP_ALIVE_INTERVAL),
+        offset,
+    )
 
 
 @router.get("/{event_id}/lineage", response_model=LineageResponse)
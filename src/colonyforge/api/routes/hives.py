@@ -5,7 +5,10 @@ Hive管理用のREST API。
 読み取りはイベント列からの投影（HiveAggregate）により再構築される。
 """
 
-from fastapi import APIRouter, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from colonyforge.core.ar.hive_projections import HiveAggregate, build_hive_aggregate
@@ -15,7 +18,16 @@ from colonyforge.core.events import (
     generate_event_id,
 )
 
+from ..event_stream import KEEP_ALIVE_INTERVAL, resolve_stream_offset, stream_event_log
 from ..helpers import get_hive_store
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    paginate,
+    resolve_after,
+)
 
 router = APIRouter(prefix="/hives", tags=["Hives"])
 
@@ -114,15 +126,35 @@ async def create_hive(request: CreateHiveRequest) -> HiveResponse:
 
 
 @router.get("", response_model=list[HiveResponse])
-async def list_hives() -> list[HiveResponse]:
-    """Hive一覧を取得"""
+async def list_hives(
+    request: Request,
+    response: Response,
+    after: Annotated[str | None, Query(description="このHive IDより後を取得")] = None,
+    cursor: Annotated[str | None, Query(description="前回レスポンスの X-Next-Cursor")] = None,
+    limit: Annotated[int | None, Query(ge=1, le=1000, description="取得件数上限")] = None,
+) -> list[HiveResponse] | Response:
+    """Hive一覧を取得
+
+    Hive ID昇順で返す。limit を指定すると続きのカーソルを X-Next-Cursor ヘッダーで返す。
+    ETag はHiveStoreのカタログバージョンから算出する。
+    """
     store = get_hive_store()
-    hive_ids = store.list_hives()
+    etag = compute_etag("hives", store.catalog_version(), after, cursor, limit)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    hive_ids, next_cursor = paginate(
+        sorted(store.list_hives()), str, resolve_after(after, cursor), limit
+    )
     result = []
     for hive_id in hive_ids:
         aggregate = _rebuild_hive(hive_id)
         if aggregate is not None:
             result.append(_aggregate_to_response(hive_id, aggregate))
+
+    response.headers["ETag"] = etag
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return result
 
 
@@ -136,6 +168,27 @@ async def get_hive(hive_id: str) -> HiveResponse:
     return _aggregate_to_response(hive_id, aggregate)
 
 
+@router.get("/{hive_id}/events/stream")
+async def stream_hive_events(
+    request: Request,
+    hive_id: str,
+    cursor: Annotated[str | None, Query(description="開始位置（SSE の id）")] = None,
+    max_batch: Annotated[int, Query(ge=1, le=1000, description="1フレームの最大イベント数")] = 100,
+) -> StreamingResponse:
+    """Hive/Colony イベントログを追従しSSEで配信
+
+    フレーム形式と Last-Event-ID による再開は /runs/{run_id}/events/stream と同じ。
+    """
+    store = get_hive_store()
+    offset = resolve_stream_offset(request, cursor)
+    return stream_event_log(
+        lambda start: store.tail(
+            hive_id, start, max_batch=max_batch, heartbeat=KEEP_ALIVE_INTERVAL
+        ),
+        offset,
+    )
+
+
 @router.post("/{hive_id}/close", response_model=HiveCloseResponse)
 async def close_hive(hive_id: str) -> HiveCloseResponse:
     """Hiveを終了"""
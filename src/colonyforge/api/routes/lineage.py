@@ -0,0 +1,100 @@
+"""Lineage エンドポイント
+
+Run・Hive・Honeycomb エピソードを横断した因果グラフの探索とエクスポート。
+VS Code拡張のグラフ表示向けに JSON / DOT / NDJSONストリームを提供する。
+"""
+
+import json
+from collections.abc import Iterator
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from ...core.lineage import LineageDirection, LineageGraph, LineageSubgraph
+from ..helpers import get_lineage_index
+from ..models import LineageGraphResponse
+
+router = APIRouter(prefix="/lineage", tags=["Lineage"])
+
+DirectionQuery = Annotated[LineageDirection, Query(description="探索方向")]
+MaxDepthQuery = Annotated[int, Query(ge=1, le=1000, description="最大探索深度")]
+MaxNodesQuery = Annotated[int, Query(ge=1, le=100_000, description="最大ノード数")]
+
+
+def _get_graph() -> LineageGraph:
+    """索引を最新化したLineageGraphを取得"""
+    index = get_lineage_index()
+    index.sync()
+    return LineageGraph(index)
+
+
+def _build_subgraph(
+    node_id: str, direction: LineageDirection, max_depth: int, max_nodes: int
+) -> LineageSubgraph:
+    subgraph = _get_graph().subgraph(node_id, direction, max_depth, max_nodes)
+    if subgraph is None:
+        raise HTTPException(status_code=404, detail=f"Lineage node {node_id} not found")
+    return subgraph
+
+
+@router.get("/{node_id}", response_model=LineageGraphResponse)
+async def get_lineage_graph(
+    node_id: str,
+    direction: DirectionQuery = "ancestors",
+    max_depth: MaxDepthQuery = 50,
+    max_nodes: MaxNodesQuery = 1000,
+) -> LineageGraphResponse:
+    """Run・Hive・エピソードを横断した因果サブグラフを取得
+
+    Args:
+        node_id: 起点のイベントID または エピソードID
+        direction: 探索方向（ancestors, descendants, both）
+        max_depth: 最大探索深度
+        max_nodes: 最大ノード数
+    """
+    subgraph = _build_subgraph(node_id, direction, max_depth, max_nodes)
+    return LineageGraphResponse.model_validate(subgraph.to_dict())
+
+
+@router.get("/{node_id}/dot", response_class=PlainTextResponse)
+async def export_lineage_dot(
+    node_id: str,
+    direction: DirectionQuery = "ancestors",
+    max_depth: MaxDepthQuery = 50,
+    max_nodes: MaxNodesQuery = 1000,
+) -> PlainTextResponse:
+    """因果サブグラフをGraphviz DOT形式でエクスポート"""
+    subgraph = _build_subgraph(node_id, direction, max_depth, max_nodes)
+    return PlainTextResponse(subgraph.to_dot(), media_type="text/vnd.graphviz")
+
+
+@router.get("/{node_id}/stream")
+async def stream_lineage(
+    node_id: str,
+    direction: DirectionQuery = "ancestors",
+    max_depth: MaxDepthQuery = 50,
+    max_nodes: MaxNodesQuery = 10_000,
+) -> StreamingResponse:
+    """因果探索の結果を到達順にNDJSONでストリーミング
+
+    各行は到達したノード（depth, via を含む）。最終行は
+    {"done": true, "truncated": ...} のサマリー。
+    """
+    graph = _get_graph()
+    if node_id not in graph.index:
+        raise HTTPException(status_code=404, detail=f"Lineage node {node_id} not found")
+    traversal = graph.traverse(node_id, direction, max_depth, max_nodes)
+
+    def generate() -> Iterator[str]:
+        for step in traversal:
+            line = {
+                **step.node.to_dict(),
+                "depth": step.depth,
+                "via": step.via,
+                "direction": step.direction,
+            }
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "truncated": traversal.truncated}) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException, status
 
 from ...core import build_run_projection, generate_event_id
 from ...core.events import (
+    BaseEvent,
     EventType,
     RequirementApprovedEvent,
     RequirementCreatedEvent,
@@ -16,7 +17,10 @@ from ...core.events import (
 )
 from ..helpers import apply_event_to_projection, get_active_runs, get_ar
 from ..models import (
+    BatchResolveRequirementsRequest,
+    BatchResolveRequirementsResponse,
     CreateRequirementRequest,
+    RequirementDecisionResult,
     RequirementResponse,
     ResolveRequirementRequest,
 )
@@ -43,6 +47,40 @@ def _get_requirement_created_event_id(run_id: str, requirement_id: str) -> str |
     return None
 
 
+def _index_requirement_created_event_ids(run_id: str) -> dict[str, str]:
+    """1回のリプレイで requirement_id→Requirement作成イベントID の対応を取得"""
+    ar = get_ar()
+    created_ids: dict[str, str] = {}
+    for event in ar.replay(run_id):
+        if event.type == EventType.REQUIREMENT_CREATED:
+            requirement_id = event.payload.get("requirement_id")
+            if requirement_id:
+                created_ids.setdefault(requirement_id, event.id)
+    return created_ids
+
+
+def _build_decision_event(
+    run_id: str,
+    requirement_id: str,
+    approved: bool,
+    selected_option: str | None,
+    comment: str | None,
+    parents: list[str],
+) -> RequirementApprovedEvent | RequirementRejectedEvent:
+    """承認/却下イベントを生成"""
+    event_cls = RequirementApprovedEvent if approved else RequirementRejectedEvent
+    return event_cls(
+        run_id=run_id,
+        actor="user",
+        payload={
+            "requirement_id": requirement_id,
+            "selected_option": selected_option,
+            "comment": comment,
+        },
+        parents=parents,
+    )
+
+
 router = APIRouter(prefix="/runs/{run_id}/requirements", tags=["Requirements"])
 
 
@@ -146,29 +184,14 @@ async def resolve_requirement(
     if req_created_id:
         parents = [req_created_id]
 
-    event: RequirementApprovedEvent | RequirementRejectedEvent
-    if request.approved:
-        event = RequirementApprovedEvent(
-            run_id=run_id,
-            actor="user",
-            payload={
-                "requirement_id": requirement_id,
-                "selected_option": request.selected_option,
-                "comment": request.comment,
-            },
-            parents=parents,
-        )
-    else:
-        event = RequirementRejectedEvent(
-            run_id=run_id,
-            actor="user",
-            payload={
-                "requirement_id": requirement_id,
-                "selected_option": request.selected_option,
-                "comment": request.comment,
-            },
-            parents=parents,
-        )
+    event = _build_decision_event(
+        run_id,
+        requirement_id,
+        request.approved,
+        request.selected_option,
+        request.comment,
+        parents,
+    )
 
     ar.append(event, run_id)
 
@@ -177,3 +200,42 @@ async def resolve_requirement(
         "requirement_id": requirement_id,
         "approved": request.approved,
     }
+
+
+@router.post(":batchResolve", response_model=BatchResolveRequirementsResponse)
+async def resolve_requirements_batch(
+    run_id: str, request: BatchResolveRequirementsRequest
+) -> BatchResolveRequirementsResponse:
+    """確認要請を一括解決（承認/却下）
+
+    作成イベントの解決を1回のリプレイで行い、全決定を1回のグループ追記で記録する。
+    存在しない確認要請が含まれる場合は何も記録せず404を返す。
+    """
+    active_runs = get_active_runs()
+    if run_id not in active_runs:
+        raise HTTPException(status_code=404, detail=f"Active run {run_id} not found")
+
+    created_ids = _index_requirement_created_event_ids(run_id)
+    missing = sorted({d.requirement_id for d in request.decisions} - created_ids.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Requirements not found: {', '.join(missing)}")
+
+    events: list[BaseEvent] = [
+        _build_decision_event(
+            run_id,
+            decision.requirement_id,
+            decision.approved,
+            decision.selected_option,
+            decision.comment,
+            [created_ids[decision.requirement_id]],
+        )
+        for decision in request.decisions
+    ]
+    get_ar().append_many(events, run_id)
+
+    return BatchResolveRequirementsResponse(
+        results=[
+            RequirementDecisionResult(requirement_id=d.requirement_id, approved=d.approved)
+            for d in request.decisions
+        ]
+    )
@@ -3,9 +3,9 @@
 Run管理に関するエンドポイント。
 """
 
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from ...core import RunProjection, build_run_projection, generate_event_id
 from ...core.ar.projections import RunState, TaskState
@@ -26,6 +26,14 @@ from ..models import (
     StartRunRequest,
     StartRunResponse,
 )
+from ..pagination import (
+    NEXT_CURSOR_HEADER,
+    compute_etag,
+    is_not_modified,
+    not_modified_response,
+    paginate,
+    resolve_after,
+)
 
 router = APIRouter(prefix="/runs", tags=["Runs"])
 
@@ -72,13 +80,32 @@ async def start_run(request: StartRunRequest) -> StartRunResponse:
 
 
 @router.get("", response_model=list[RunStatusResponse])
-async def list_runs(active_only: bool = True) -> list[RunStatusResponse]:
-    """Run一覧を取得"""
+async def list_runs(
+    request: Request,
+    response: Response,
+    active_only: bool = True,
+    after: Annotated[str | None, Query(description="このRun IDより後を取得")] = None,
+    cursor: Annotated[str | None, Query(description="前回レスポンスの X-Next-Cursor")] = None,
+    limit: Annotated[int | None, Query(ge=1, le=1000, description="取得件数上限")] = None,
+) -> list[RunStatusResponse] | Response:
+    """Run一覧を取得
+
+    Run ID昇順で返す。limit を指定すると続きのカーソルを X-Next-Cursor ヘッダーで返す。
+    ETag はVault内の全Runのカタログバージョンから算出する。
+    """
     ar = get_ar()
     active_runs = get_active_runs()
-    results = []
 
-    run_ids = list(active_runs.keys()) if active_only else ar.list_runs()
+    active_ids = sorted(active_runs.keys())
+    etag = compute_etag(
+        "runs", ar.catalog_version(), ",".join(active_ids), active_only, after, cursor, limit
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    all_ids = active_ids if active_only else ar.list_runs()
+    run_ids, next_cursor = paginate(all_ids, str, resolve_after(after, cursor), limit)
+    results = []
 
     for run_id in run_ids:
         proj: RunProjection | None = None
@@ -107,6 +134,9 @@ async def list_runs(active_only: bool = True) -> list[RunStatusResponse]:
                 )
             )
 
+    response.headers["ETag"] = etag
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return results
 
 
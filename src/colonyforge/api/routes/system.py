@@ -3,7 +3,10 @@
 ヘルスチェックなどシステム系のエンドポイント。
 """
 
+from typing import Any, Literal
+
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 
 from ..helpers import get_active_runs
 from ..models import HealthResponse
@@ -23,3 +26,38 @@ async def health_check() -> HealthResponse:
         version=_version,
         active_runs=len(get_active_runs()),
     )
+
+
+@router.get("/llm/stats")
+async def llm_stats() -> dict[str, Any]:
+    """LLMリクエストの待ち行列・レート制限（モデルごと）と応答キャッシュ・集約・ヘッジの統計"""
+    from ...core.rate_limiter import get_rate_limiter_registry
+    from ...llm.hedging import get_all_hedge_stats
+    from ...llm.inflight import get_inflight_coalescer
+    from ...llm.response_cache import get_all_cache_stats
+    from ...llm.scheduler import get_all_scheduler_stats
+
+    return {
+        "schedulers": get_all_scheduler_stats(),
+        "rate_limiters": get_rate_limiter_registry().get_all_stats(),
+        "response_caches": get_all_cache_stats(),
+        "coalescing": get_inflight_coalescer().get_stats(),
+        "hedging": get_all_hedge_stats(),
+    }
+
+
+@router.get("/llm/metrics", response_model=None)
+async def llm_metrics(
+    format: Literal["json", "prometheus"] = "json",
+) -> dict[str, Any] | PlainTextResponse:
+    """LLM呼び出しの順番待ち・応答時間・トークン数・推定コストのヒストグラム
+
+    provider:model・Hive・Colony・エージェント種別ごとに集計する。
+    format=prometheus なら Prometheus のテキスト形式で返す。
+    """
+    from ...llm.telemetry import get_llm_telemetry
+
+    telemetry = get_llm_telemetry()
+    if format == "prometheus":
+        return PlainTextResponse(telemetry.to_prometheus(), media_type="text/plain; version=0.0.4")
+    return telemetry.snapshot()
@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException, status
 
 from ...core import build_run_projection, generate_event_id
 from ...core.events import (
+    BaseEvent,
     EventType,
     TaskAssignedEvent,
     TaskCompletedEvent,
@@ -19,11 +20,15 @@ from ...core.events import (
 from ..helpers import apply_event_to_projection, get_active_runs, get_ar
 from ..models import (
     AssignTaskRequest,
+    BatchCreateTasksRequest,
+    BatchUpdateTasksRequest,
+    BatchUpdateTasksResponse,
     CompleteTaskRequest,
     CreateTaskRequest,
     FailTaskRequest,
     ReportProgressRequest,
     TaskResponse,
+    TaskUpdateResult,
 )
 
 router = APIRouter(prefix="/runs/{run_id}/tasks", tags=["Tasks"])
@@ -45,6 +50,19 @@ def _get_task_created_event_id(run_id: str, task_id: str) -> str | None:
     return None
 
 
+def _index_run_events(run_id: str) -> tuple[str | None, dict[str, str]]:
+    """1回のリプレイで Run開始イベントID と task_id→TaskCreatedイベントID を取得"""
+    ar = get_ar()
+    run_started_id: str | None = None
+    created_ids: dict[str, str] = {}
+    for event in ar.replay(run_id):
+        if event.type == EventType.RUN_STARTED and run_started_id is None:
+            run_started_id = event.id
+        elif event.type == EventType.TASK_CREATED and event.task_id:
+            created_ids.setdefault(event.task_id, event.id)
+    return run_started_id, created_ids
+
+
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(run_id: str, request: CreateTaskRequest) -> TaskResponse:
     """Taskを作成"""
@@ -88,6 +106,127 @@ async def create_task(run_id: str, request: CreateTaskRequest) -> TaskResponse:
     )
 
 
+@router.post(":batch", response_model=list[TaskResponse], status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(run_id: str, request: BatchCreateTasksRequest) -> list[TaskResponse]:
+    """Taskを一括作成
+
+    全件を検証した後、親イベントの解決を1回だけ行い、
+    1回のグループ追記で全TaskCreatedイベントを記録する。
+    """
+    active_runs = get_active_runs()
+    if run_id not in active_runs:
+        raise HTTPException(status_code=404, detail=f"Active run {run_id} not found")
+
+    default_parents: list[str] = []
+    if any(not item.parents for item in request.tasks):
+        run_started_id = _get_run_started_event_id(run_id)
+        if run_started_id:
+            default_parents = [run_started_id]
+
+    events: list[BaseEvent] = [
+        TaskCreatedEvent(
+            run_id=run_id,
+            task_id=generate_event_id(),
+            actor="api",
+            payload={
+                "title": item.title,
+                "description": item.description,
+                "metadata": item.metadata,
+            },
+            parents=item.parents or default_parents,
+        )
+        for item in request.tasks
+    ]
+    get_ar().append_many(events, run_id)
+
+    # 投影を更新
+    for event in events:
+        apply_event_to_projection(run_id, event)
+
+    tasks = active_runs[run_id].tasks
+    return [
+        TaskResponse(
+            task_id=task.id,
+            title=task.title,
+            state=task.state.value,
+            progress=task.progress,
+            assignee=task.assignee,
+        )
+        for task in (tasks[event.task_id] for event in events if event.task_id)
+    ]
+
+
+@router.post(":batchUpdate", response_model=BatchUpdateTasksResponse)
+async def update_tasks_batch(
+    run_id: str, request: BatchUpdateTasksRequest
+) -> BatchUpdateTasksResponse:
+    """Taskを一括で完了/失敗/進捗更新
+
+    いずれかのTaskが存在しない場合は何も記録せず404を返す。
+    """
+    active_runs = get_active_runs()
+    if run_id not in active_runs:
+        raise HTTPException(status_code=404, detail=f"Active run {run_id} not found")
+
+    proj = active_runs[run_id]
+    missing = sorted({item.task_id for item in request.updates} - proj.tasks.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Tasks not found: {', '.join(missing)}")
+
+    created_ids: dict[str, str] = {}
+    if any(not item.parents for item in request.updates):
+        _, created_ids = _index_run_events(run_id)
+
+    events: list[BaseEvent] = []
+    for item in request.updates:
+        parents = item.parents or (
+            [created_ids[item.task_id]] if item.task_id in created_ids else []
+        )
+        event: BaseEvent
+        if item.action == "complete":
+            event = TaskCompletedEvent(
+                run_id=run_id,
+                task_id=item.task_id,
+                actor="api",
+                payload={"result": item.result},
+                parents=parents,
+            )
+        elif item.action == "fail":
+            event = TaskFailedEvent(
+                run_id=run_id,
+                task_id=item.task_id,
+                actor="api",
+                payload={"error": item.error, "retryable": item.retryable},
+                parents=parents,
+            )
+        else:
+            event = TaskProgressedEvent(
+                run_id=run_id,
+                task_id=item.task_id,
+                actor="api",
+                payload={"progress": item.progress, "message": item.message},
+                parents=parents,
+            )
+        events.append(event)
+    get_ar().append_many(events, run_id)
+
+    # 投影を更新
+    for event in events:
+        apply_event_to_projection(run_id, event)
+
+    statuses = {"complete": "completed", "fail": "failed", "progress": "updated"}
+    return BatchUpdateTasksResponse(
+        results=[
+            TaskUpdateResult(
+                task_id=item.task_id,
+                status=statuses[item.action],
+                progress=proj.tasks[item.task_id].progress,
+            )
+            for item in request.updates
+        ]
+    )
+
+
 @router.get("", response_model=list[TaskResponse])
 async def list_tasks(run_id: str) -> list[TaskResponse]:
     """Task一覧を取得"""
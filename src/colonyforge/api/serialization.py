@@ -0,0 +1,65 @@
+"""大量レスポンス向けの高速シリアライズ
+
+FastAPI の response_model 経由では、返り値の再検証と jsonable_encoder による
+Python オブジェクトへの変換を経てから標準の json でエンコードされる。
+大量の要素を返すエンドポイントでは pydantic-core（Rust）の dump_json で
+直接バイト列に変換し、その手前の処理を省略する。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TypeVar
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+from .models import EventResponse
+
+T = TypeVar("T")
+
+# イベント一覧のシリアライザ（モジュール読み込み時に1度だけ構築）
+EVENT_LIST_ADAPTER: TypeAdapter[list[EventResponse]] = TypeAdapter(list[EventResponse])
+
+
+def fast_json_response(
+    adapter: TypeAdapter[T],
+    content: T,
+    *,
+    headers: Mapping[str, str] | None = None,
+    status_code: int = 200,
+) -> Response:
+    """pydantic-core で直接シリアライズしたJSONレスポンスを生成
+
+    Args:
+        adapter: 対象の型の TypeAdapter
+        content: シリアライズする値（adapter の型であること）
+        headers: 追加のレスポンスヘッダー
+        status_code: ステータスコード
+    """
+    return Response(
+        content=adapter.dump_json(content),
+        status_code=status_code,
+        headers=dict(headers) if headers else None,
+        media_type="application/json",
+    )
+
+
+def ndjson_response(
+    models: Iterable[BaseModel], *, headers: Mapping[str, str] | None = None
+) -> StreamingResponse:
+    """モデルを1行ずつ JSON Lines でストリーミングするレスポンスを生成
+
+    同期イテラブルはスレッドプールで反復されるため、ファイル読み込みを含んでよい。
+    """
+
+    def generate() -> Iterator[str]:
+        for model in models:
+            yield model.model_dump_json() + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers=dict(headers) if headers else None,
+    )
@@ -11,8 +11,11 @@ from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from ..core import AkashicRecord, build_run_projection, get_settings
+from ..core.activity_bus import ActivityBus
+from ..core.activity_history import ActivityHistory
 from ..core.ar.projections import RunState
 from .auth import verify_api_key
+from .compression import CompressionMiddleware
 from .helpers import clear_active_runs, get_active_runs, set_ar
 from .routes import (
     activity_router,
@@ -25,6 +28,7 @@ from .routes import (
     hives_router,
     interventions_router,
     kpi_router,
+    lineage_router,
     requirements_router,
     runs_router,
     system_router,
@@ -51,9 +55,28 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             if projection.state == RunState.RUNNING:
                 active_runs[run_id] = projection
 
+    # アクティビティ履歴（SSE の since / Last-Event-ID による再生用）
+    bus = ActivityBus.get_instance()
+    history_config = settings.server.activity_history
+    if history_config.enabled:
+        bus.attach_history(
+            ActivityHistory(
+                settings.get_vault_path() / "activity" / "history.ring",
+                max_bytes=history_config.max_bytes,
+            )
+        )
+    # 高頻度の途中経過をまとめて配信する時間窓
+    coalescing_config = settings.server.activity_coalescing
+    if coalescing_config.enabled:
+        bus.set_coalesce_window(coalescing_config.window_ms / 1000)
+
     yield
 
     # シャットダウン時
+    bus.set_coalesce_window(0)
+    history = bus.detach_history()
+    if history is not None:
+        history.close()
     set_ar(None)
     clear_active_runs()
 
@@ -80,6 +103,16 @@ if cors_config.enabled:
         allow_headers=cors_config.allow_headers,
     )
 
+# レスポンス圧縮（gzip / brotli）
+compression_config = settings.server.compression
+if compression_config.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_config.minimum_size,
+        gzip_level=compression_config.gzip_level,
+        brotli_quality=compression_config.brotli_quality,
+    )
+
 # ルーターを登録
 app.include_router(system_router)
 app.include_router(activity_router)
@@ -92,6 +125,7 @@ app.include_router(runs_router)
 app.include_router(tasks_router)
 app.include_router(requirements_router)
 app.include_router(events_router)
+app.include_router(lineage_router)
 app.include_router(guard_bee_router)
 app.include_router(kpi_router)
 app.include_router(beekeeper_router)
@@ -121,6 +121,8 @@ class LLMIntegrationMixin:
                 "required": ["colony_id", "task"],
             },
             handler=self._delegate_to_queen,
+            # Colony ごとに独立した Queen Bee が実行するため、複数 Colony へ同時に委譲できる
+            concurrency_safe=True,
         )
 
         # ユーザーに確認を求めるツール
@@ -153,6 +155,7 @@ class LLMIntegrationMixin:
                 },
             },
             handler=self._get_hive_status,
+            concurrency_safe=True,
         )
 
         # Hive一覧を取得するツール
@@ -164,6 +167,7 @@ class LLMIntegrationMixin:
                 "properties": {},
             },
             handler=self._internal_list_hives,
+            concurrency_safe=True,
         )
 
         # タスク特徴量を評価してテンプレートを提案するツール
@@ -194,6 +198,7 @@ class LLMIntegrationMixin:
                 },
             },
             handler=self._internal_evaluate_task,
+            concurrency_safe=True,
         )
 
         self._agent_runner.register_tool(create_hive)
@@ -263,6 +263,13 @@ def run_chat(args: argparse.Namespace) -> None:
     async def _chat() -> None:
         from .beekeeper import BeekeeperMCPServer
         from .core import AkashicRecord, get_settings
+        from .core.activity_bus import (
+            ActivityBus,
+            ActivityEvent,
+            ActivityFilter,
+            ActivityType,
+            AgentRole,
+        )
 
         settings = get_settings()
         vault_path = settings.get_vault_path()
@@ -276,6 +283,25 @@ def run_chat(args: argparse.Namespace) -> None:
         # Beekeeper初期化
         beekeeper = BeekeeperMCPServer(ar=ar)
 
+        # ストリーミング中の応答テキストを届いた順に表示（llm.stream 有効時）
+        streamed = False
+
+        async def _print_delta(event: ActivityEvent) -> None:
+            nonlocal streamed
+            delta = event.detail.get("delta")
+            if isinstance(delta, str):
+                print(delta, end="", flush=True)
+                streamed = True
+
+        bus = ActivityBus.get_instance()
+        subscription = bus.subscribe(
+            _print_delta,
+            activity_filter=ActivityFilter(
+                roles=frozenset({AgentRole.BEEKEEPER}),
+                activity_types=frozenset({ActivityType.LLM_STREAM}),
+            ),
+        )
+
         try:
             # メッセージ送信
             result = await beekeeper.dispatch_tool(
@@ -287,7 +313,10 @@ def run_chat(args: argparse.Namespace) -> None:
                     },
                 },
             )
+            await bus.flush()
 
+            if streamed:
+                print()
             print("-" * 50)
             if result.get("status") == "success":
                 print(f"✅ 完了（アクション: {result.get('actions_taken', 0)}回）")
@@ -295,6 +324,7 @@ def run_chat(args: argparse.Namespace) -> None:
             else:
                 print(f"❌ エラー: {result.get('error', 'Unknown error')}")
         finally:
+            bus.unsubscribe(subscription)
             await beekeeper.close()
 
     asyncio.run(_chat())
@@ -4,20 +4,38 @@
 リアルタイムに購読・配信するイベントバス。
 
 VS Code拡張のAgent Monitorパネルにストリーム配信する基盤。
+
+サブスクライバーごとに有界キューを持ち、emit はキューへ積むだけで即座に戻る。
+キューが溢れた場合の挙動は OverflowPolicy で選択する。遅い購読者が
+エージェント側の処理を遅らせることはない。
+
+購読には ActivityFilter（Hive/Colony/エージェント/ロール/種別/サンプリング率）を
+指定でき、配信先はバス内のルーティング表で絞り込む。
+
+高頻度の途中経過（task.progress / llm.stream）は、設定した時間窓の中で
+エージェント・種別ごとに1件へまとめて配信できる（coalesce_window）。
+
+Hive → Colony → Agent の階層は agent.started / agent.completed ごとに差分更新し、
+バージョン番号と直近の変更記録から、クライアントへ差分のみを返せるようにする。
 """
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import logging
+import zlib
 from collections import deque
 from collections.abc import Awaitable, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import UTC, datetime
 from enum import StrEnum
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
+if TYPE_CHECKING:
+    from .activity_history import ActivityHistory
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,6 +50,7 @@ class ActivityType(StrEnum):
     # LLM関連
     LLM_REQUEST = "llm.request"
     LLM_RESPONSE = "llm.response"
+    LLM_STREAM = "llm.stream"  # ストリーミング中の途中経過（detail.delta に差分テキスト）
 
     # MCP関連
     MCP_TOOL_CALL = "mcp.tool_call"
@@ -51,6 +70,14 @@ class ActivityType(StrEnum):
     TASK_PROGRESS = "task.progress"
 
 
+class OverflowPolicy(StrEnum):
+    """購読キューが満杯のときの挙動"""
+
+    DROP_OLDEST = "drop_oldest"  # 最も古い未配信イベントを捨てる
+    DROP_NEWEST = "drop_newest"  # 新しいイベントを捨てる
+    DISCONNECT = "disconnect"  # 購読を切断する
+
+
 class AgentRole(StrEnum):
     """エージェントの役割"""
 
@@ -84,6 +111,16 @@ class AgentInfo:
             d["colony_id"] = self.colony_id
         return d
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AgentInfo:
+        """to_dict の出力から復元"""
+        return cls(
+            agent_id=data["agent_id"],
+            role=AgentRole(data["role"]),
+            hive_id=data["hive_id"],
+            colony_id=data.get("colony_id"),
+        )
+
 
 @dataclass
 class ActivityEvent:
@@ -98,6 +135,8 @@ class ActivityEvent:
     detail: dict[str, Any] = field(default_factory=dict)
     timestamp: str = field(default_factory=lambda: datetime.now(UTC).isoformat())
     event_id: str = field(default_factory=lambda: str(uuid4())[:8])
+    # 履歴に記録された通番（履歴未設定時は None）。SSE の id として使う
+    seq: int | None = field(default=None, compare=False)
 
     def to_dict(self) -> dict[str, Any]:
         """SSE配信用の辞書に変換"""
@@ -110,9 +149,103 @@ class ActivityEvent:
             "timestamp": self.timestamp,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ActivityEvent:
+        """to_dict の出力から復元"""
+        return cls(
+            activity_type=ActivityType(data["activity_type"]),
+            agent=AgentInfo.from_dict(data["agent"]),
+            summary=data["summary"],
+            detail=data.get("detail", {}),
+            timestamp=data["timestamp"],
+            event_id=data["event_id"],
+        )
+
+
+# 購読フィルタでサンプリング対象外とする種別（モニターの階層表示に必要）
+UNSAMPLED_ACTIVITY_TYPES = frozenset(
+    {ActivityType.AGENT_STARTED, ActivityType.AGENT_COMPLETED, ActivityType.AGENT_ERROR}
+)
+
+
+def sample_point(event_id: str) -> float:
+    """イベントIDから [0, 1) の値を決定的に求める（サンプリング判定用）"""
+    return zlib.crc32(event_id.encode()) / 2**32
+
+
+@dataclass(frozen=True)
+class ActivityFilter:
+    """購読フィルタ
+
+    各項目は空なら無条件、指定時はいずれかに一致するイベントのみ配信する。
+    sample_rate < 1 の場合、エージェントのライフサイクル以外のイベントを
+    イベントIDに基づいて決定的に間引く。
+    """
+
+    hive_ids: frozenset[str] = frozenset()
+    colony_ids: frozenset[str] = frozenset()
+    agent_ids: frozenset[str] = frozenset()
+    roles: frozenset[AgentRole] = frozenset()
+    activity_types: frozenset[ActivityType] = frozenset()
+    sample_rate: float = 1.0
+
+    def __post_init__(self) -> None:
+        if not 0.0 < self.sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1]")
+
+    def dimensions(self) -> dict[str, frozenset[Any]]:
+        """ルーティング表のキーごとの条件"""
+        return {
+            "hive_id": self.hive_ids,
+            "colony_id": self.colony_ids,
+            "agent_id": self.agent_ids,
+            "role": self.roles,
+            "activity_type": self.activity_types,
+        }
+
+    def is_unfiltered(self) -> bool:
+        """条件なし（全イベントを配信）かどうか"""
+        return self.sample_rate >= 1.0 and not any(self.dimensions().values())
+
+    def samples(self, event: ActivityEvent) -> bool:
+        """サンプリングで残すイベントかどうか"""
+        if self.sample_rate >= 1.0 or event.activity_type in UNSAMPLED_ACTIVITY_TYPES:
+            return True
+        return sample_point(event.event_id) < self.sample_rate
+
+    def matches(self, event: ActivityEvent) -> bool:
+        """イベントが条件に一致するか（リプレイなど単発の判定用）"""
+        keys = _routing_keys(event)
+        for dim, allowed in self.dimensions().items():
+            if allowed and keys[dim] not in allowed:
+                return False
+        return self.samples(event)
+
+    def to_dict(self) -> dict[str, Any]:
+        """辞書に変換（指定された条件のみ）"""
+        d: dict[str, Any] = {
+            dim: sorted(str(v) for v in allowed)
+            for dim, allowed in self.dimensions().items()
+            if allowed
+        }
+        if self.sample_rate < 1.0:
+            d["sample_rate"] = self.sample_rate
+        return d
+
+
+def _routing_keys(event: ActivityEvent) -> dict[str, Any]:
+    """イベントのルーティングキー"""
+    return {
+        "hive_id": event.agent.hive_id,
+        "colony_id": event.agent.colony_id,
+        "agent_id": event.agent.agent_id,
+        "role": event.agent.role,
+        "activity_type": event.activity_type,
+    }
+
 
 # =============================================================================
-# ActivityBus
+# 購読
 # =============================================================================
 
 # サブスクライバーの型
@@ -121,9 +254,385 @@ ActivityHandler = Callable[[ActivityEvent], Awaitable[None]]
 # 最近のイベント保持上限（デフォルト値）
 DEFAULT_MAX_RECENT_EVENTS = 100
 
+# 購読キューの上限（デフォルト値）
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 1000
+
 # ハンドラー単位のタイムアウト（秒）
 HANDLER_TIMEOUT = 10.0
 
+# 時間窓の中でまとめて配信する種別（途中経過を頻繁に送るもの）
+COALESCED_ACTIVITY_TYPES = frozenset({ActivityType.TASK_PROGRESS, ActivityType.LLM_STREAM})
+
+# まとめる際に上書きせず連結する detail のキー（ストリーミングの差分テキスト）
+COALESCE_CONCAT_KEYS = ("delta",)
+
+# 階層の差分取得用に保持する変更数
+DEFAULT_HIERARCHY_CHANGE_LOG = 1024
+
+
+class ActivitySubscription:
+    """サブスクライバー単位の有界キュー
+
+    emit からは offer で非ブロッキングに積まれ、消費側は get で取り出す。
+    ハンドラー付きの購読は ActivityBus のディスパッチタスクが消費する。
+
+    Args:
+        name: 購読の識別名（メトリクス表示用）
+        max_queue: キューに保持する未配信イベント数の上限
+        policy: キュー満杯時の挙動
+        handler: イベントごとに呼び出すハンドラー（None=get で取り出す）
+        activity_filter: 購読フィルタ（None=全イベント）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_queue: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        handler: ActivityHandler | None = None,
+        activity_filter: ActivityFilter | None = None,
+    ) -> None:
+        if max_queue < 1:
+            raise ValueError("max_queue must be >= 1")
+        self.name = name
+        self.max_queue = max_queue
+        self.policy = policy
+        self.handler = handler
+        self.activity_filter = activity_filter or ActivityFilter()
+        # 切断通知の番兵(None)の分だけ実容量を1つ多く取る
+        self._queue: asyncio.Queue[ActivityEvent | None] = asyncio.Queue(maxsize=max_queue + 1)
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.peak_lag = 0
+
+    @property
+    def lag(self) -> int:
+        """未配信のイベント数"""
+        return self._queue.qsize() - (1 if self._closed and self._queue.qsize() else 0)
+
+    @property
+    def closed(self) -> bool:
+        """切断済みかどうか"""
+        return self._closed
+
+    def offer(self, event: ActivityEvent) -> bool:
+        """イベントを非ブロッキングで積む
+
+        Returns:
+            購読を継続する場合 True、DISCONNECT で切断した場合 False
+        """
+        if self._closed:
+            return False
+        if self._queue.qsize() >= self.max_queue:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                self.dropped += 1
+                self.close()
+                return False
+            self.dropped += 1
+            if self.policy == OverflowPolicy.DROP_NEWEST:
+                return True
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._queue.put_nowait(event)
+        self.peak_lag = max(self.peak_lag, self._queue.qsize())
+        return True
+
+    async def get(self) -> ActivityEvent | None:
+        """次のイベントを取り出す（切断済みなら None）"""
+        if self._closed and self._queue.empty():
+            return None
+        event = await self._queue.get()
+        self._queue.task_done()
+        if event is not None:
+            self.delivered += 1
+        return event
+
+    async def dispatch(self) -> None:
+        """キューから取り出してハンドラーを順に呼び出す（切断まで継続）
+
+        ハンドラーの完了後に処理済みとするため、join は呼び出し完了まで待つ。
+        """
+        assert self.handler is not None
+        while True:
+            event = await self._queue.get()
+            try:
+                if event is None:
+                    return
+                await asyncio.wait_for(self.handler(event), timeout=HANDLER_TIMEOUT)
+                self.delivered += 1
+            except TimeoutError:
+                logger.warning(f"アクティビティハンドラータイムアウト: {self.name}")
+            except Exception:
+                logger.exception(f"アクティビティハンドラーエラー: {self.name}")
+            finally:
+                self._queue.task_done()
+
+    def close(self) -> None:
+        """購読を切断し、未配信イベントを破棄して消費側を起こす"""
+        if self._closed:
+            return
+        self._closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._queue.put_nowait(None)
+
+    async def join(self) -> None:
+        """積まれたイベントが全て処理されるまで待つ"""
+        await self._queue.join()
+
+    def stats(self) -> dict[str, Any]:
+        """購読ごとのメトリクスを取得"""
+        return {
+            "name": self.name,
+            "policy": str(self.policy),
+            "max_queue": self.max_queue,
+            "lag": self.lag,
+            "peak_lag": self.peak_lag,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "closed": self._closed,
+            "filter": self.activity_filter.to_dict(),
+        }
+
+
+class _RoutingTable:
+    """購読フィルタの索引
+
+    条件ごとに「値 → 購読」の表と「その条件を指定していない購読」の集合を持ち、
+    イベントのキーで引いた集合の積で配信先を求める。購読数に比例する
+    述語ループを避け、条件に一致する購読だけを取り出す。
+    """
+
+    DIMENSIONS = ("hive_id", "colony_id", "agent_id", "role", "activity_type")
+
+    def __init__(self) -> None:
+        self._order: dict[ActivitySubscription, int] = {}
+        self._next = 0
+        self._index: dict[str, dict[Any, set[ActivitySubscription]]] = {
+            dim: {} for dim in self.DIMENSIONS
+        }
+        self._wildcard: dict[str, set[ActivitySubscription]] = {
+            dim: set() for dim in self.DIMENSIONS
+        }
+        self._sampled: set[ActivitySubscription] = set()
+
+    def add(self, subscription: ActivitySubscription) -> None:
+        self._order[subscription] = self._next
+        self._next += 1
+        for dim, allowed in subscription.activity_filter.dimensions().items():
+            if not allowed:
+                self._wildcard[dim].add(subscription)
+            for value in allowed:
+                self._index[dim].setdefault(value, set()).add(subscription)
+        if subscription.activity_filter.sample_rate < 1.0:
+            self._sampled.add(subscription)
+
+    def remove(self, subscription: ActivitySubscription) -> None:
+        if self._order.pop(subscription, None) is None:
+            return
+        for dim, allowed in subscription.activity_filter.dimensions().items():
+            self._wildcard[dim].discard(subscription)
+            for value in allowed:
+                targets = self._index[dim].get(value)
+                if targets is not None:
+                    targets.discard(subscription)
+                    if not targets:
+                        del self._index[dim][value]
+        self._sampled.discard(subscription)
+
+    def route(self, event: ActivityEvent) -> list[ActivitySubscription]:
+        """イベントの配信先を購読順に返す"""
+        keys = _routing_keys(event)
+        candidates: list[set[ActivitySubscription]] = []
+        for dim in self.DIMENSIONS:
+            indexed = self._index[dim].get(keys[dim])
+            wildcard = self._wildcard[dim]
+            if indexed and len(wildcard) < len(self._order):
+                candidates.append(indexed | wildcard)
+            elif indexed is None and len(wildcard) < len(self._order):
+                candidates.append(wildcard)
+        if not candidates:
+            # どの条件でも絞り込みが不要な場合は登録順のまま返す
+            if not self._sampled:
+                return list(self._order)
+            return [
+                s for s in self._order if s not in self._sampled or s.activity_filter.samples(event)
+            ]
+        candidates.sort(key=len)
+        matched = candidates[0].intersection(*candidates[1:])
+        if self._sampled and matched:
+            matched = {
+                s for s in matched if s not in self._sampled or s.activity_filter.samples(event)
+            }
+        return sorted(matched, key=self._order.__getitem__)
+
+
+def is_final_event(event: ActivityEvent) -> bool:
+    """途中経過の最終版か（まとめずに即座に配信する）
+
+    detail.final が真、または detail.progress が100以上のものを最終版とみなす。
+    """
+    if event.detail.get("final") is True:
+        return True
+    progress = event.detail.get("progress")
+    return isinstance(progress, int | float) and progress >= 100
+
+
+class _CoalesceSlot:
+    """エージェント・種別ごとの保留中イベント
+
+    窓の中で届いたイベントのうち最新のものを保持し、連結対象のキーは
+    到着順に連結して、配信時に1件へまとめる。
+    """
+
+    __slots__ = ("count", "last_sent", "parts", "pending", "timer")
+
+    def __init__(self) -> None:
+        self.last_sent = float("-inf")
+        self.pending: ActivityEvent | None = None
+        self.count = 0
+        self.parts: dict[str, list[str]] = {}
+        self.timer: asyncio.TimerHandle | None = None
+
+    def hold(self, event: ActivityEvent) -> None:
+        self.pending = event
+        self.count += 1
+        for key in COALESCE_CONCAT_KEYS:
+            value = event.detail.get(key)
+            if isinstance(value, str):
+                self.parts.setdefault(key, []).append(value)
+
+    def take(self) -> ActivityEvent | None:
+        """保留中のイベントを1件にまとめて取り出す"""
+        event, count, parts = self.pending, self.count, self.parts
+        self.pending, self.count, self.parts = None, 0, {}
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if event is None or count == 1:
+            return event
+        detail = {**event.detail, **{k: "".join(v) for k, v in parts.items()}}
+        detail["coalesced"] = count
+        return replace(event, detail=detail)
+
+
+class _HierarchyIndex:
+    """Hive → Colony → Agent の階層索引
+
+    agent.started / agent.completed のたびに該当エージェントだけを差し替え、
+    変更ごとにバージョンを進める。直近の変更を保持しておき、
+    クライアントが持つバージョンからの差分を返せるようにする。
+    スナップショット（JSON化済み）はバージョンごとに一度だけ組み立てる。
+    """
+
+    def __init__(self, max_changes: int = DEFAULT_HIERARCHY_CHANGE_LOG) -> None:
+        self.version = 0
+        # hive_id -> {"members", "beekeepers", "colonies"}
+        # colony_id -> {"queens", "workers"}（いずれも agent_id -> AgentInfo の登録順辞書）
+        self._hives: dict[str, dict[str, Any]] = {}
+        self._changes: deque[tuple[int, str, AgentInfo]] = deque(maxlen=max_changes)
+        self._snapshot: tuple[int, dict[str, Any]] | None = None
+
+    def add(self, agent: AgentInfo) -> None:
+        hive = self._hives.setdefault(
+            agent.hive_id, {"members": {}, "beekeepers": {}, "colonies": {}}
+        )
+        hive["members"][agent.agent_id] = agent
+        if agent.role == AgentRole.BEEKEEPER:
+            hive["beekeepers"][agent.agent_id] = agent
+        elif agent.colony_id:
+            colony = hive["colonies"].setdefault(agent.colony_id, {"queens": {}, "workers": {}})
+            if agent.role == AgentRole.QUEEN_BEE:
+                colony["queens"][agent.agent_id] = agent
+            elif agent.role == AgentRole.WORKER_BEE:
+                colony["workers"][agent.agent_id] = agent
+        self._record("added", agent)
+
+    def remove(self, agent: AgentInfo) -> None:
+        hive = self._hives.get(agent.hive_id)
+        if hive is None:
+            return
+        hive["members"].pop(agent.agent_id, None)
+        hive["beekeepers"].pop(agent.agent_id, None)
+        colony = hive["colonies"].get(agent.colony_id) if agent.colony_id else None
+        if colony is not None:
+            colony["queens"].pop(agent.agent_id, None)
+            colony["workers"].pop(agent.agent_id, None)
+            if not colony["queens"] and not colony["workers"]:
+                del hive["colonies"][agent.colony_id]
+        if not hive["members"]:
+            del self._hives[agent.hive_id]
+        self._record("removed", agent)
+
+    def _record(self, op: str, agent: AgentInfo) -> None:
+        self.version += 1
+        self._changes.append((self.version, op, agent))
+
+    def tree(self) -> dict[str, Any]:
+        """AgentInfo のままの階層（同じロールが複数いる場合は最後に開始したもの）"""
+        return {
+            hive_id: {
+                "beekeeper": next(reversed(hive["beekeepers"].values()), None),
+                "colonies": {
+                    colony_id: {
+                        "queen_bee": next(reversed(colony["queens"].values()), None),
+                        "workers": list(colony["workers"].values()),
+                    }
+                    for colony_id, colony in hive["colonies"].items()
+                },
+            }
+            for hive_id, hive in self._hives.items()
+        }
+
+    def snapshot(self) -> tuple[int, dict[str, Any]]:
+        """(バージョン, JSON化した階層) を返す"""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            self._snapshot = (self.version, _serialize_tree(self.tree()))
+        return self._snapshot
+
+    def changes_since(self, version: int) -> list[dict[str, Any]] | None:
+        """指定バージョンより後の変更を古い順に返す
+
+        変更記録が残っていない（古すぎる・未来の）バージョンの場合は None。
+        """
+        if version > self.version:
+            return None
+        if version == self.version:
+            return []
+        first = self._changes[0][0] if self._changes else self.version + 1
+        if first > version + 1:
+            return None
+        # 記録のバージョンは連番なので、新しい側から必要な件数だけ取り出す
+        count = self.version - version
+        return [
+            {"version": v, "op": op, "agent": agent.to_dict()}
+            for v, op, agent in (self._changes[-k] for k in range(count, 0, -1))
+        ]
+
+
+def _serialize_tree(tree: dict[str, Any]) -> dict[str, Any]:
+    """AgentInfo を辞書化した階層"""
+    return {
+        hive_id: {
+            "beekeeper": hive["beekeeper"].to_dict() if hive["beekeeper"] else None,
+            "colonies": {
+                colony_id: {
+                    "queen_bee": colony["queen_bee"].to_dict() if colony["queen_bee"] else None,
+                    "workers": [w.to_dict() for w in colony["workers"]],
+                }
+                for colony_id, colony in hive["colonies"].items()
+            },
+        }
+        for hive_id, hive in tree.items()
+    }
+
+
+# =============================================================================
+# ActivityBus
+# =============================================================================
+
 
 class ActivityBus:
     """エージェントアクティビティバス（シングルトン）
@@ -134,15 +643,32 @@ class ActivityBus:
     Args:
         max_recent_events: 保持する最近のイベント数の上限。
             運用環境の流量に応じて調整可能。デフォルトは100。
+        subscriber_queue_size: 購読ごとの未配信イベント数の上限（デフォルト値）
+        overflow_policy: 購読キュー満杯時の挙動（デフォルト値）
+        coalesce_window: 途中経過をまとめる時間窓（秒）。0 でまとめない
     """
 
     _instance: ActivityBus | None = None
 
-    def __init__(self, max_recent_events: int = DEFAULT_MAX_RECENT_EVENTS) -> None:
+    def __init__(
+        self,
+        max_recent_events: int = DEFAULT_MAX_RECENT_EVENTS,
+        subscriber_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        coalesce_window: float = 0.0,
+    ) -> None:
         self._max_recent_events = max_recent_events
-        self._subscribers: list[ActivityHandler] = []
+        self._subscriber_queue_size = subscriber_queue_size
+        self._overflow_policy = overflow_policy
+        self._subscribers: list[ActivitySubscription] = []
+        self._routes = _RoutingTable()
+        self._dispatchers: dict[ActivitySubscription, asyncio.Task[None]] = {}
         self._recent_events: deque[ActivityEvent] = deque(maxlen=max_recent_events)
         self._active_agents: dict[str, AgentInfo] = {}  # agent_id -> AgentInfo
+        self._hierarchy = _HierarchyIndex()
+        self._history: ActivityHistory | None = None
+        self._coalesce_window = coalesce_window
+        self._coalesce: dict[str, dict[ActivityType, _CoalesceSlot]] = {}  # agent_id -> 種別
 
     @classmethod
     def get_instance(cls) -> ActivityBus:
@@ -154,49 +680,223 @@ class ActivityBus:
     @classmethod
     def reset(cls) -> None:
         """シングルトンをリセット（テスト用）"""
+        if cls._instance is not None:
+            cls._instance.close()
         cls._instance = None
 
-    def subscribe(self, handler: ActivityHandler) -> None:
-        """イベントハンドラーを登録"""
-        self._subscribers.append(handler)
-
-    def unsubscribe(self, handler: ActivityHandler) -> None:
-        """イベントハンドラーを解除"""
-        self._subscribers = [h for h in self._subscribers if h is not handler]
+    def subscribe(
+        self,
+        handler: ActivityHandler,
+        *,
+        max_queue: int | None = None,
+        policy: OverflowPolicy | None = None,
+        activity_filter: ActivityFilter | None = None,
+    ) -> ActivitySubscription:
+        """イベントハンドラーを登録
+
+        ハンドラーは購読ごとのディスパッチタスクから順に呼び出される。
+        """
+        return self._add(
+            ActivitySubscription(
+                name=getattr(handler, "__qualname__", repr(handler)),
+                max_queue=max_queue or self._subscriber_queue_size,
+                policy=policy or self._overflow_policy,
+                handler=handler,
+                activity_filter=activity_filter,
+            )
+        )
+
+    def open_subscription(
+        self,
+        name: str,
+        *,
+        max_queue: int | None = None,
+        policy: OverflowPolicy | None = None,
+        activity_filter: ActivityFilter | None = None,
+    ) -> ActivitySubscription:
+        """取り出し型の購読を開く（SSE配信など、消費側が get で読む用途）"""
+        return self._add(
+            ActivitySubscription(
+                name=name,
+                max_queue=max_queue or self._subscriber_queue_size,
+                policy=policy or self._overflow_policy,
+                activity_filter=activity_filter,
+            )
+        )
+
+    def _add(self, subscription: ActivitySubscription) -> ActivitySubscription:
+        self._subscribers.append(subscription)
+        self._routes.add(subscription)
+        return subscription
+
+    def unsubscribe(self, target: ActivityHandler | ActivitySubscription) -> None:
+        """イベントハンドラーまたは購読を解除"""
+        for subscription in [s for s in self._subscribers if s is target or s.handler is target]:
+            self._remove(subscription)
+
+    def _remove(self, subscription: ActivitySubscription) -> None:
+        """購読を切断し、ディスパッチタスクを停止"""
+        self._subscribers = [s for s in self._subscribers if s is not subscription]
+        self._routes.remove(subscription)
+        subscription.close()
+        task = self._dispatchers.pop(subscription, None)
+        if task is not None and not task.done():
+            with contextlib.suppress(RuntimeError):  # ループ終了済み
+                task.cancel()
+
+    def close(self) -> None:
+        """全ての購読を切断し、履歴ファイルを閉じる（保留中の途中経過は破棄）"""
+        for slots in self._coalesce.values():
+            for slot in slots.values():
+                slot.take()
+        self._coalesce.clear()
+        for subscription in list(self._subscribers):
+            self._remove(subscription)
+        history = self.detach_history()
+        if history is not None:
+            history.close()
+
+    @property
+    def history(self) -> ActivityHistory | None:
+        """永続化された履歴（未設定なら None）"""
+        return self._history
+
+    def attach_history(self, history: ActivityHistory) -> None:
+        """以降に発行されるイベントを履歴ファイルへ記録する"""
+        self._history = history
+
+    def detach_history(self) -> ActivityHistory | None:
+        """履歴ファイルへの記録を止め、外した履歴を返す（閉じるのは呼び出し側）"""
+        history, self._history = self._history, None
+        return history
+
+    @property
+    def coalesce_window(self) -> float:
+        """途中経過をまとめる時間窓（秒）"""
+        return self._coalesce_window
+
+    def set_coalesce_window(self, seconds: float) -> None:
+        """途中経過をまとめる時間窓を変更（0 でまとめない。保留中のものは配信する）"""
+        self.flush_coalesced()
+        self._coalesce.clear()
+        self._coalesce_window = max(0.0, seconds)
 
     async def emit(self, event: ActivityEvent) -> None:
         """イベントを発行
 
-        全てのサブスクライバーに並列通知し、履歴に保存する。
-        asyncio.gatherで並列実行し、遅いハンドラーが他をブロックしない。
-        ハンドラー単位でタイムアウト制御を行う。
-        サブスクライバーのエラーは他のサブスクライバーに影響しない。
+        履歴に保存し、フィルタに一致するサブスクライバーのキューへ
+        非ブロッキングに積んで即座に戻る。
+        ハンドラーの呼び出しは購読ごとのディスパッチタスクが行うため、
+        遅いハンドラーやSSEクライアントが発行側や他の購読者を待たせない。
+
+        coalesce_window が設定されている場合、途中経過（COALESCED_ACTIVITY_TYPES）は
+        エージェント・種別ごとに窓あたり最初の1件を即座に配信し、窓の残りで届いたものは
+        窓の終わりに1件へまとめて配信する。まとめたイベントは最後のイベントの内容
+        （summary など）に、連結したキーと detail.coalesced（まとめた件数）を加えたもの。
+        最終版（is_final_event）や同じエージェントの他種別のイベントは、保留中の
+        途中経過を先に配信してから即座に配信する。
         """
+        if self._coalesce_window > 0:
+            if event.activity_type in COALESCED_ACTIVITY_TYPES and not is_final_event(event):
+                if self._hold(event):
+                    return
+            else:
+                self._flush_agent(event.agent.agent_id)
+                if event.activity_type == ActivityType.AGENT_COMPLETED:
+                    self._coalesce.pop(event.agent.agent_id, None)
+        self._deliver(event)
+
+    def _deliver(self, event: ActivityEvent) -> None:
+        """履歴への記録と購読キューへの投入（await しない）"""
         # 履歴に保存
         self._recent_events.append(event)
+        if self._history is not None:
+            try:
+                event.seq = self._history.append(event)
+            except (OSError, ValueError):
+                logger.exception("アクティビティ履歴への記録に失敗しました")
 
         # アクティブエージェントの追跡
         if event.activity_type == ActivityType.AGENT_STARTED:
+            previous = self._active_agents.get(event.agent.agent_id)
+            if previous != event.agent:
+                if previous is not None:
+                    self._hierarchy.remove(previous)
+                self._hierarchy.add(event.agent)
             self._active_agents[event.agent.agent_id] = event.agent
         elif event.activity_type == ActivityType.AGENT_COMPLETED:
-            self._active_agents.pop(event.agent.agent_id, None)
-
-        # サブスクライバーに並列通知（タイムアウト付き）
-        if self._subscribers:
-
-            async def _safe_call(handler: ActivityHandler) -> None:
-                try:
-                    await asyncio.wait_for(handler(event), timeout=HANDLER_TIMEOUT)
-                except TimeoutError:
-                    logger.warning(f"アクティビティハンドラータイムアウト: {handler.__name__}")
-                except Exception:
-                    logger.exception(f"アクティビティハンドラーエラー: {handler.__name__}")
-
-            await asyncio.gather(
-                *[_safe_call(h) for h in self._subscribers],
-                return_exceptions=True,
+            previous = self._active_agents.pop(event.agent.agent_id, None)
+            if previous is not None:
+                self._hierarchy.remove(previous)
+
+        for subscription in self._routes.route(event):
+            if not subscription.offer(event):
+                logger.warning(f"購読キューが溢れたため切断しました: {subscription.name}")
+                self._remove(subscription)
+                continue
+            if subscription.handler is not None:
+                self._ensure_dispatcher(subscription)
+
+    def _hold(self, event: ActivityEvent) -> bool:
+        """途中経過を窓に保留する（即座に配信すべき場合は False）"""
+        slots = self._coalesce.setdefault(event.agent.agent_id, {})
+        slot = slots.get(event.activity_type)
+        if slot is None:
+            slot = slots[event.activity_type] = _CoalesceSlot()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if slot.pending is None and now - slot.last_sent >= self._coalesce_window:
+            slot.last_sent = now
+            return False
+        slot.hold(event)
+        if slot.timer is None:
+            slot.timer = loop.call_later(
+                max(0.0, slot.last_sent + self._coalesce_window - now),
+                self._flush_slot,
+                slot,
+            )
+        return True
+
+    def _flush_slot(self, slot: _CoalesceSlot) -> None:
+        event = slot.take()
+        if event is not None:
+            slot.last_sent = asyncio.get_running_loop().time()
+            self._deliver(event)
+
+    def _flush_agent(self, agent_id: str) -> None:
+        """エージェントの保留中の途中経過を配信"""
+        for slot in self._coalesce.get(agent_id, {}).values():
+            if slot.pending is not None:
+                self._flush_slot(slot)
+
+    def flush_coalesced(self) -> None:
+        """全エージェントの保留中の途中経過を、窓の終わりを待たずに配信"""
+        for agent_id in list(self._coalesce):
+            self._flush_agent(agent_id)
+
+    def _ensure_dispatcher(self, subscription: ActivitySubscription) -> None:
+        """ハンドラー付き購読のディスパッチタスクを起動（未起動時のみ）"""
+        task = self._dispatchers.get(subscription)
+        if task is None or task.done():
+            self._dispatchers[subscription] = asyncio.create_task(
+                subscription.dispatch(),
+                name=f"activity-dispatch:{subscription.name}",
             )
 
+    async def flush(self) -> None:
+        """保留中の途中経過を配信し、積まれたイベントがハンドラーで処理され終わるまで待つ
+
+        取り出し型の購読は消費側が読むまで待つため対象外。
+        """
+        self.flush_coalesced()
+        await asyncio.gather(
+            *(s.join() for s in self._subscribers if s.handler is not None and not s.closed)
+        )
+
+    def get_subscriber_stats(self) -> list[dict[str, Any]]:
+        """購読ごとの遅延・破棄数などのメトリクスを取得"""
+        return [s.stats() for s in self._subscribers]
+
     def get_recent_events(self, limit: int | None = None) -> list[ActivityEvent]:
         """最近のイベント履歴を取得"""
         events = list(self._recent_events)
@@ -210,6 +910,9 @@ class ActivityBus:
     def get_hierarchy(self) -> dict[str, Any]:
         """Hive → Colony → Agent の階層構造を取得
 
+        階層は agent.started / agent.completed ごとに差分更新されており、
+        呼び出しごとにアクティブエージェント全体を走査し直すことはない。
+
         Returns:
             {
                 "hive-id": {
@@ -223,32 +926,22 @@ class ActivityBus:
                 }
             }
         """
-        hierarchy: dict[str, Any] = {}
+        return self._hierarchy.tree()
 
-        for agent in self._active_agents.values():
-            hive_id = agent.hive_id
+    @property
+    def hierarchy_version(self) -> int:
+        """階層のバージョン（エージェントの開始・終了で増える）"""
+        return self._hierarchy.version
 
-            if hive_id not in hierarchy:
-                hierarchy[hive_id] = {
-                    "beekeeper": None,
-                    "colonies": {},
-                }
-
-            hive = hierarchy[hive_id]
-
-            if agent.role == AgentRole.BEEKEEPER:
-                hive["beekeeper"] = agent
-            elif agent.colony_id:
-                if agent.colony_id not in hive["colonies"]:
-                    hive["colonies"][agent.colony_id] = {
-                        "queen_bee": None,
-                        "workers": [],
-                    }
-                colony = hive["colonies"][agent.colony_id]
+    def get_hierarchy_snapshot(self) -> tuple[int, dict[str, Any]]:
+        """(バージョン, JSON化した階層) を取得（同じバージョンの間は再構築しない）"""
+        return self._hierarchy.snapshot()
 
-                if agent.role == AgentRole.QUEEN_BEE:
-                    colony["queen_bee"] = agent
-                elif agent.role == AgentRole.WORKER_BEE:
-                    colony["workers"].append(agent)
+    def get_hierarchy_changes(self, since_version: int) -> list[dict[str, Any]] | None:
+        """since_version より後の階層の変更を取得
 
-        return hierarchy
+        Returns:
+            [{"version": int, "op": "added" | "removed", "agent": {...}}, ...]。
+            変更記録が残っていないバージョンの場合は None（全体の取り直しが必要）
+        """
+        return self._hierarchy.changes_since(since_version)
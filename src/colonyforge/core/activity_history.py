@@ -0,0 +1,296 @@
+"""アクティビティ履歴の永続化
+
+ActivityBus のイベントを、容量固定のリングファイル（mmap）に追記する。
+容量を超えると最も古いイベントから上書きされる。
+
+メモリ上にはイベント本体を持たず、通番ごとのファイル位置と時刻、
+エージェントごとの通番のみを array で保持する（1件あたり約24バイト）。
+これにより、数時間分の履歴でも通番（SSE の Last-Event-ID）や時刻から
+再生位置を二分探索で求められる。
+
+書き込みは単一プロセス（APIサーバー）からのみ行う前提。
+
+ファイル形式:
+    ヘッダー(64バイト): magic, 容量, head, tail, 最古の通番, 次の通番
+    レコード: 長さ(u32), 通番(u64), 時刻(f64), JSON本体
+    データ領域の末尾に収まらないレコードは先頭から書き、末尾には折り返し印を置く。
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Collection, Iterator
+from datetime import datetime
+from pathlib import Path
+
+from .activity_bus import ActivityEvent
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CFACTV1\0"
+_HEADER = struct.Struct("<8sQQQQQ")
+HEADER_SIZE = 64
+_RECORD = struct.Struct("<IQd")
+_WRAP = 0xFFFFFFFF
+
+# 履歴ファイルの既定容量（データ領域）
+DEFAULT_HISTORY_BYTES = 64 * 1024 * 1024
+MIN_HISTORY_BYTES = 64 * 1024
+
+# 退避済み通番の索引をまとめて詰める閾値
+_COMPACT_THRESHOLD = 4096
+
+
+def _event_time(event: ActivityEvent) -> float:
+    """イベントの時刻（UNIX秒）"""
+    try:
+        return datetime.fromisoformat(event.timestamp).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class ActivityHistory:
+    """容量固定のアクティビティ履歴ファイル
+
+    Args:
+        path: 履歴ファイルのパス
+        max_bytes: データ領域の容量。既存ファイルと異なる場合は作り直す
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_HISTORY_BYTES) -> None:
+        if max_bytes < MIN_HISTORY_BYTES:
+            raise ValueError(f"max_bytes must be >= {MIN_HISTORY_BYTES}")
+        self.path = Path(path)
+        self.capacity = max_bytes
+        self._offsets = array("Q")  # 通番 _base_seq + i のレコード位置
+        self._times = array("d")  # 同じく時刻（発行順なのでほぼ単調増加）
+        self._by_agent: dict[str, array[int]] = {}
+        self._base_seq = 0
+        self._open()
+
+    # --- ファイル管理 ---
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER_SIZE + self.capacity
+        fresh = not self.path.exists() or self.path.stat().st_size != size
+        if not fresh:
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+            magic, capacity, *_ = _HEADER.unpack(header)
+            fresh = magic != MAGIC or capacity != self.capacity
+            if fresh:
+                logger.warning(
+                    f"アクティビティ履歴を作り直します（形式/容量の不一致）: {self.path}"
+                )
+        if fresh:
+            with open(self.path, "wb") as f:
+                f.truncate(size)
+        self._file = open(self.path, "r+b")  # noqa: SIM115 - close() で閉じる
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        if fresh:
+            self._head = self._tail = 0
+            self._first_seq = self._next_seq = self._base_seq = 1
+            self._write_header()
+        else:
+            _, _, self._head, self._tail, self._first_seq, self._next_seq = _HEADER.unpack_from(
+                self._mm, 0
+            )
+            self._rebuild_index()
+
+    def close(self) -> None:
+        """ファイルを閉じる"""
+        if self._mm.closed:
+            return
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(
+            self._mm,
+            0,
+            MAGIC,
+            self.capacity,
+            self._head,
+            self._tail,
+            self._first_seq,
+            self._next_seq,
+        )
+
+    def _rebuild_index(self) -> None:
+        """既存ファイルを走査して索引を再構築"""
+        self._base_seq = self._first_seq
+        pos = self._tail
+        try:
+            for seq in range(self._first_seq, self._next_seq):
+                pos = self._normalize(pos)
+                length, rec_seq, ts = _RECORD.unpack_from(self._mm, HEADER_SIZE + pos)
+                if rec_seq != seq:
+                    raise ValueError(f"sequence mismatch at {pos}")
+                agent_id = self._decode(pos, length).agent.agent_id
+                self._index(seq, pos, ts, agent_id)
+                pos += _RECORD.size + length
+        except (ValueError, KeyError, struct.error):
+            logger.warning(f"アクティビティ履歴が破損しているため破棄します: {self.path}")
+            self._reset()
+
+    def _reset(self) -> None:
+        self._head = self._tail = 0
+        self._first_seq = self._next_seq
+        self._offsets = array("Q")
+        self._times = array("d")
+        self._by_agent = {}
+        self._base_seq = self._next_seq
+        self._write_header()
+
+    # --- 書き込み ---
+
+    @property
+    def first_seq(self) -> int:
+        """保持している最古の通番"""
+        return self._first_seq
+
+    @property
+    def last_seq(self) -> int:
+        """最新の通番（空なら first_seq - 1）"""
+        return self._next_seq - 1
+
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+
+    def append(self, event: ActivityEvent) -> int:
+        """イベントを追記し、通番を返す"""
+        payload = json.dumps(event.to_dict(), ensure_ascii=False).encode()
+        size = _RECORD.size + len(payload)
+        if size > self.capacity // 2:
+            raise ValueError(f"activity event too large for history: {size} bytes")
+
+        if self._head + size > self.capacity:
+            # 末尾側に残る古いレコードを退避してから先頭へ折り返す
+            while len(self) and self._tail >= self._head:
+                self._evict_oldest()
+            if self.capacity - self._head >= 4:
+                struct.pack_into("<I", self._mm, HEADER_SIZE + self._head, _WRAP)
+            self._head = 0
+        while len(self) and self._head <= self._tail < self._head + size:
+            self._evict_oldest()
+        if not len(self):
+            self._tail = self._head
+
+        seq = self._next_seq
+        ts = _event_time(event)
+        pos = self._head
+        _RECORD.pack_into(self._mm, HEADER_SIZE + pos, len(payload), seq, ts)
+        start = HEADER_SIZE + pos + _RECORD.size
+        self._mm[start : start + len(payload)] = payload
+        self._head = pos + size
+        self._next_seq += 1
+        self._write_header()
+        self._index(seq, pos, ts, event.agent.agent_id)
+        return seq
+
+    def _index(self, seq: int, pos: int, ts: float, agent_id: str) -> None:
+        self._offsets.append(pos)
+        self._times.append(ts)
+        self._by_agent.setdefault(agent_id, array("Q")).append(seq)
+
+    def _normalize(self, pos: int) -> int:
+        """折り返し位置なら先頭に戻す"""
+        if self.capacity - pos < _RECORD.size:
+            return 0
+        (length,) = struct.unpack_from("<I", self._mm, HEADER_SIZE + pos)
+        return 0 if length == _WRAP else pos
+
+    def _evict_oldest(self) -> None:
+        self._tail = self._normalize(self._tail)
+        (length,) = struct.unpack_from("<I", self._mm, HEADER_SIZE + self._tail)
+        self._tail = self._normalize(self._tail + _RECORD.size + length)
+        self._first_seq += 1
+        stale = self._first_seq - self._base_seq
+        if stale >= _COMPACT_THRESHOLD and stale * 2 >= len(self._offsets):
+            self._compact()
+
+    def _compact(self) -> None:
+        """退避済み通番の索引を詰める"""
+        stale = self._first_seq - self._base_seq
+        del self._offsets[:stale]
+        del self._times[:stale]
+        self._base_seq = self._first_seq
+        for agent_id in list(self._by_agent):
+            seqs = self._by_agent[agent_id]
+            del seqs[: bisect_left(seqs, self._first_seq)]
+            if not seqs:
+                del self._by_agent[agent_id]
+
+    # --- 読み込み ---
+
+    def _decode(self, pos: int, length: int) -> ActivityEvent:
+        start = HEADER_SIZE + pos + _RECORD.size
+        return ActivityEvent.from_dict(json.loads(self._mm[start : start + length]))
+
+    def get(self, seq: int) -> ActivityEvent | None:
+        """通番でイベントを取得（保持範囲外なら None）"""
+        if not self._first_seq <= seq < self._next_seq:
+            return None
+        pos = self._offsets[seq - self._base_seq]
+        length, _, _ = _RECORD.unpack_from(self._mm, HEADER_SIZE + pos)
+        event = self._decode(pos, length)
+        event.seq = seq
+        return event
+
+    def seq_at(self, since: datetime) -> int:
+        """指定時刻以降の最初の通番を求める（該当なしなら last_seq + 1）
+
+        時刻は発行順に記録されるため二分探索で求める。発行元の時計の前後による
+        わずかな逆転は考慮しない。
+        """
+        lo = self._first_seq - self._base_seq
+        index = bisect_left(self._times, since.timestamp(), lo=lo)
+        return self._base_seq + index
+
+    def read_after(
+        self,
+        after_seq: int,
+        *,
+        agent_ids: Collection[str] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[tuple[int, ActivityEvent]]:
+        """after_seq より後のイベントを通番順に返す
+
+        Args:
+            after_seq: この通番より後を返す（保持範囲より前なら最古から）
+            agent_ids: 指定時、これらのエージェントのイベントのみ（索引を使用）
+            limit: 最大件数
+
+        Yields:
+            (通番, イベント)
+        """
+        start = max(after_seq + 1, self._first_seq)
+        end = self._next_seq
+        seqs: Iterator[int]
+        if agent_ids:
+            seqs = heapq.merge(
+                *(
+                    a[bisect_left(a, start) : bisect_right(a, end - 1)]
+                    for agent_id in agent_ids
+                    if (a := self._by_agent.get(agent_id)) is not None
+                )
+            )
+        else:
+            seqs = iter(range(start, end))
+        count = 0
+        for seq in seqs:
+            if limit is not None and count >= limit:
+                return
+            event = self.get(seq)
+            if event is None:  # 読み込み中に上書きされた
+                continue
+            count += 1
+            yield seq, event
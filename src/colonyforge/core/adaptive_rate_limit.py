@@ -0,0 +1,244 @@
+"""適応型レート制限（AIMD）
+
+プロバイダーの応答からレート制限を学習し、RateLimiter の実効値を調整する。
+
+- 429 / タイムアウト: 補充レート（リクエスト/分）と同時実行数を乗算的に下げる
+- 成功: 補充レートと同時実行数を加算的に上げる（上限まで）
+- レート制限ヘッダー（x-ratelimit-* / anthropic-ratelimit-*）が得られれば、
+  その上限値をリクエスト/分とトークン/分の上限として採用する
+
+学習した値はリミッターの鍵（provider:model）ごとの JSON ファイルに保存し、
+再起動後はその値から再開する。ヘッダーが得られない場合の上限は設定値。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .rate_limiter import RateLimitConfig
+
+logger = logging.getLogger(__name__)
+
+# 429 / タイムアウト時に掛ける係数
+DECREASE_FACTOR = 0.5
+# 成功1回あたりのリクエスト/分の増分（上限に対する割合、最低1）
+INCREASE_FRACTION = 0.05
+# 同時に失敗した複数のリクエストで何度も下げないための間隔（秒）
+DECREASE_COOLDOWN = 2.0
+# 成功による増加を保存する最短間隔（秒）。低下と上限の更新は即時保存する
+SAVE_INTERVAL = 10.0
+
+MIN_REQUESTS_PER_MINUTE = 1.0
+MIN_CONCURRENT = 1.0
+
+# ヘッダー名（小文字、llm_provider- 接頭辞を除いたもの）→ RateLimitHeaders の属性
+_HEADER_FIELDS = {
+    "x-ratelimit-limit-requests": "limit_requests",
+    "x-ratelimit-remaining-requests": "remaining_requests",
+    "x-ratelimit-limit-tokens": "limit_tokens",
+    "x-ratelimit-remaining-tokens": "remaining_tokens",
+    "anthropic-ratelimit-requests-limit": "limit_requests",
+    "anthropic-ratelimit-requests-remaining": "remaining_requests",
+    "anthropic-ratelimit-tokens-limit": "limit_tokens",
+    "anthropic-ratelimit-tokens-remaining": "remaining_tokens",
+}
+
+
+@dataclass
+class RateLimitHeaders:
+    """応答ヘッダーから読み取ったレート制限情報（不明な項目は None）"""
+
+    limit_requests: int | None = None
+    remaining_requests: int | None = None
+    limit_tokens: int | None = None
+    remaining_tokens: int | None = None
+    retry_after: float | None = None
+
+
+def _to_number(value: Any) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) and number >= 0 else None
+
+
+def parse_rate_limit_headers(headers: Mapping[str, Any] | None) -> RateLimitHeaders:
+    """レート制限ヘッダーを読み取る
+
+    LiteLLM が転送するヘッダー（llm_provider-{name}）と元のヘッダー名の
+    どちらも受け付ける。数値でない値は無視する。
+    """
+    result = RateLimitHeaders()
+    if not isinstance(headers, Mapping):
+        return result
+    for raw_key, raw_value in headers.items():
+        key = str(raw_key).lower().removeprefix("llm_provider-")
+        number = _to_number(raw_value)
+        if number is None:
+            continue
+        if key == "retry-after":
+            result.retry_after = number
+        elif key == "retry-after-ms":
+            result.retry_after = number / 1000.0
+        elif field_name := _HEADER_FIELDS.get(key):
+            setattr(result, field_name, int(number))
+    return result
+
+
+def limits_file_for(key: str, state_dir: Path | None = None) -> Path:
+    """学習したレート制限の保存先"""
+    from .shared_rate_limiter import state_file_for
+
+    return state_file_for(key, state_dir).with_suffix(".limits.json")
+
+
+class AdaptiveLimits:
+    """AIMD で学習するレート制限値
+
+    Args:
+        key: リミッターの鍵（例: "openai:gpt-4o"）
+        config: 初期値と、ヘッダーが得られない場合の上限
+        path: 学習結果の保存先（None なら保存しない）
+    """
+
+    def __init__(self, key: str, config: RateLimitConfig, path: Path | None = None) -> None:
+        self.key = key
+        self.path = path
+        self.max_requests_per_minute = float(config.requests_per_minute)
+        self.max_concurrent = float(config.max_concurrent)
+        self.requests_per_minute = self.max_requests_per_minute
+        self.concurrency = self.max_concurrent
+        self.tokens_per_minute = config.tokens_per_minute
+        self._last_decrease = -math.inf
+        self._last_save = time.monotonic()
+        self._dirty = False
+        if path is not None:
+            self._load()
+
+    # --- 学習 ---
+
+    def on_success(self, headers: RateLimitHeaders) -> bool:
+        """成功を記録する。実効値が変わった場合は True"""
+        before = self.apply_to(RateLimitConfig())
+        learned = self._learn_ceiling(headers)
+        self.requests_per_minute = min(
+            self.requests_per_minute + max(1.0, self.max_requests_per_minute * INCREASE_FRACTION),
+            self.max_requests_per_minute,
+        )
+        # 同時実行数は TCP の輻輳回避と同様に、1往復あたり約1ずつ増やす
+        self.concurrency = min(self.concurrency + 1.0 / self.concurrency, self.max_concurrent)
+        self._dirty = True
+        if learned or time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+        return self.apply_to(RateLimitConfig()) != before
+
+    def on_congestion(self, headers: RateLimitHeaders | None = None) -> bool:
+        """429 / タイムアウトを記録する。実効値が変わった場合は True
+
+        直前の低下から DECREASE_COOLDOWN 秒以内は、同じ混雑によるものとみなして下げない。
+        """
+        learned = headers is not None and self._learn_ceiling(headers)
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            if learned:
+                self._dirty = True
+                self.save()
+            return learned
+        self._last_decrease = now
+        self.requests_per_minute = max(
+            self.requests_per_minute * DECREASE_FACTOR, MIN_REQUESTS_PER_MINUTE
+        )
+        self.concurrency = max(self.concurrency * DECREASE_FACTOR, MIN_CONCURRENT)
+        logger.info(
+            f"レート制限を引き下げました: {self.key} "
+            f"rpm={self.requests_per_minute:.0f}, concurrent={int(self.concurrency)}"
+        )
+        self._dirty = True
+        self.save()
+        return True
+
+    def _learn_ceiling(self, headers: RateLimitHeaders) -> bool:
+        """ヘッダーの上限値を採用する。上限が変わった場合は True"""
+        changed = False
+        if headers.limit_requests and headers.limit_requests != self.max_requests_per_minute:
+            self.max_requests_per_minute = float(headers.limit_requests)
+            self.requests_per_minute = min(self.requests_per_minute, self.max_requests_per_minute)
+            changed = True
+        if headers.limit_tokens and headers.limit_tokens != self.tokens_per_minute:
+            self.tokens_per_minute = headers.limit_tokens
+            changed = True
+        return changed
+
+    def apply_to(self, config: RateLimitConfig) -> RateLimitConfig:
+        """実効値を反映した設定を返す"""
+        return replace(
+            config,
+            requests_per_minute=max(1, int(self.requests_per_minute)),
+            max_concurrent=max(1, int(self.concurrency)),
+            tokens_per_minute=self.tokens_per_minute,
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        """統計用の現在値"""
+        return {
+            "requests_per_minute": round(self.requests_per_minute, 2),
+            "max_requests_per_minute": self.max_requests_per_minute,
+            "concurrency": round(self.concurrency, 2),
+            "max_concurrent": self.max_concurrent,
+            "tokens_per_minute": self.tokens_per_minute,
+        }
+
+    # --- 永続化 ---
+
+    def save(self) -> None:
+        """学習結果を保存する（一時ファイルに書いてから置き換える）"""
+        self._last_save = time.monotonic()
+        if self.path is None or not self._dirty:
+            return
+        data = {
+            "key": self.key,
+            **self.snapshot(),
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"学習したレート制限を保存できません: {self.path}: {e}")
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("key") != self.key:
+                return
+            max_rpm = float(data["max_requests_per_minute"])
+            rpm = float(data["requests_per_minute"])
+            concurrency = float(data["concurrency"])
+            tpm = int(data["tokens_per_minute"])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"学習したレート制限を読み込めません: {self.path}: {e}")
+            return
+        if max_rpm > 0:
+            self.max_requests_per_minute = max_rpm
+        if tpm > 0:
+            self.tokens_per_minute = tpm
+        self.requests_per_minute = min(
+            max(rpm, MIN_REQUESTS_PER_MINUTE), self.max_requests_per_minute
+        )
+        self.concurrency = min(max(concurrency, MIN_CONCURRENT), self.max_concurrent)
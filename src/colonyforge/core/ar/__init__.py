@@ -7,6 +7,7 @@ from .hive_projections import (
     build_hive_aggregate,
 )
 from .hive_storage import HiveStore
+from .lineage_index import LineageIndex, LineageNode
 from .projections import (
     ColonyState,
     HiveState,
@@ -24,6 +25,8 @@ from .storage import AkashicRecord
 __all__ = [
     "AkashicRecord",
     "HiveStore",
+    "LineageIndex",
+    "LineageNode",
     "HiveAggregate",
     "HiveProjection",
     "ColonyProjection",
@@ -6,14 +6,16 @@ Vault/hives/{hive_id}/events.jsonl に保存する。
 
 from __future__ import annotations
 
-from collections.abc import Iterator
+import hashlib
+from collections.abc import AsyncGenerator, Generator, Iterator
 from pathlib import Path
 from typing import Any
 
 import portalocker
 
 from ..events import BaseEvent, parse_event
-from .storage import _validate_safe_id
+from .storage import _read_events_from, _validate_offset, _validate_safe_id
+from .tail import get_append_notifier, tail_events
 
 
 class HiveStore:
@@ -121,6 +123,7 @@ class HiveStore:
             f.seek(0, 2)
             f.write((updated_event.to_jsonl() + "\n").encode("utf-8"))  # type: ignore[arg-type]
 
+        get_append_notifier().notify(events_file)
         return updated_event
 
     def replay(self, hive_id: str) -> Iterator[BaseEvent]:
@@ -143,6 +146,50 @@ class HiveStore:
                     continue
                 yield parse_event(line)
 
+    def replay_from(
+        self, hive_id: str, offset: int = 0
+    ) -> Generator[tuple[BaseEvent, int], None, None]:
+        """バイトオフセットからイベントをリプレイ
+
+        Args:
+            hive_id: リプレイ対象のHive ID
+            offset: 読み込み開始位置（行頭であること）
+
+        Yields:
+            (イベント, そのイベント行の直後のバイトオフセット) のタプル
+
+        Raises:
+            ValueError: offsetがファイル範囲外または行頭でない場合
+        """
+        return _read_events_from(self._get_events_file(hive_id), offset)
+
+    def tail(
+        self,
+        hive_id: str,
+        offset: int = 0,
+        *,
+        max_batch: int = 100,
+        poll_interval: float = 1.0,
+        heartbeat: float | None = None,
+    ) -> AsyncGenerator[list[tuple[BaseEvent, int]], None]:
+        """イベントログを追従し、追記されたイベントをバッチ単位で配信
+
+        引数と挙動は AkashicRecord.tail と同じ。
+
+        Raises:
+            ValueError: offsetがファイル範囲外または行頭でない場合（呼び出し時に検証）
+        """
+        events_file = self._get_events_file(hive_id)
+        _validate_offset(events_file, offset)
+        return tail_events(
+            events_file,
+            offset,
+            _read_events_from,
+            max_batch=max_batch,
+            poll_interval=poll_interval,
+            heartbeat=heartbeat,
+        )
+
     def list_hives(self) -> list[str]:
         """Hive一覧を取得
 
@@ -158,6 +205,29 @@ class HiveStore:
             if d.is_dir() and (d / "events.jsonl").exists()
         ]
 
+    def catalog_version(self, hive_id: str | None = None) -> str:
+        """Hive一覧（またはHive単体）のバージョン文字列を取得
+
+        イベントファイルのサイズと更新時刻から算出する。
+        一覧系エンドポイントのETagに使用できる。
+
+        Args:
+            hive_id: 指定時はそのHiveのみを対象にする
+
+        Returns:
+            SHA-256ハッシュ（16進文字列）
+        """
+        hive_ids = [hive_id] if hive_id is not None else sorted(self.list_hives())
+        digest = hashlib.sha256()
+        for hid in hive_ids:
+            _validate_safe_id(hid, "hive_id")
+            events_file = self._hives_path / hid / "events.jsonl"
+            if not events_file.exists():
+                continue
+            stat = events_file.stat()
+            digest.update(f"{hid}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
     def count_events(self, hive_id: str) -> int:
         """イベント数をカウント
 
@@ -0,0 +1,396 @@
+"""Lineage インデックス — Vault横断の因果リンク索引
+
+Run (Vault/{run_id}/events.jsonl)、Hive (Vault/hives/{hive_id}/events.jsonl)、
+Honeycomb (Vault/honeycomb/_all.jsonl) の全ソースを横断して、
+ノードID → 親ID の軽量な索引を Vault/_lineage/index.jsonl に永続化する。
+
+各ソースはバイトオフセットのウォーターマークで追跡し、追記分のみを
+インクリメンタルに取り込む。Run/Colony/Hive の階層関係やエピソードと
+Runの対応は論理参照 (refs) として保持し、読み込み時にアンカーイベントへ解決する。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import portalocker
+
+from ..events import EventType
+
+logger = logging.getLogger(__name__)
+
+# 索引ディレクトリ名（Run IDはULIDのため衝突しない）
+LINEAGE_INDEX_DIRNAME = "_lineage"
+
+# エピソードノードの種別名
+EPISODE_NODE_TYPE = "episode"
+
+# 論理参照のキー: (種別, ID)  種別は "run" | "colony" | "hive"
+RefKey = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class LineageNode:
+    """Lineage グラフのノード
+
+    Attributes:
+        node_id: イベントID または エピソードID
+        node_type: イベント種別（エピソードは "episode"）
+        scope: 所属ソース（"run" | "hive" | "honeycomb"）
+        scope_id: Run ID / Hive ID / Colony ID
+        timestamp: ISO 8601 形式のタイムスタンプ
+        parents: 明示的な親ノードID
+        refs: 読み込み時に解決される論理参照
+        anchor: このノードが代表する論理参照（Hive/Colonyの作成イベント）
+    """
+
+    node_id: str
+    node_type: str
+    scope: str
+    scope_id: str
+    timestamp: str = ""
+    parents: tuple[str, ...] = ()
+    refs: tuple[RefKey, ...] = ()
+    anchor: RefKey | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """索引ファイル・API用の辞書に変換"""
+        data: dict[str, Any] = {
+            "id": self.node_id,
+            "type": self.node_type,
+            "scope": self.scope,
+            "scope_id": self.scope_id,
+            "ts": self.timestamp,
+            "parents": list(self.parents),
+            "refs": [list(ref) for ref in self.refs],
+        }
+        if self.anchor is not None:
+            data["anchor"] = list(self.anchor)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LineageNode:
+        """索引ファイルの辞書から復元"""
+        anchor = data.get("anchor")
+        return cls(
+            node_id=data["id"],
+            node_type=data.get("type", ""),
+            scope=data.get("scope", ""),
+            scope_id=data.get("scope_id", ""),
+            timestamp=data.get("ts", ""),
+            parents=tuple(data.get("parents", ())),
+            refs=tuple((str(kind), str(ref_id)) for kind, ref_id in data.get("refs", ())),
+            anchor=(str(anchor[0]), str(anchor[1])) if anchor else None,
+        )
+
+
+@dataclass
+class _Source:
+    """索引対象のJSONLソース"""
+
+    key: str
+    path: Path
+    scope: str
+    scope_id: str
+
+
+@dataclass
+class _IndexState:
+    """メモリ上の索引状態"""
+
+    nodes: dict[str, LineageNode] = field(default_factory=dict)
+    children: dict[str, list[str]] = field(default_factory=dict)
+    ref_children: dict[RefKey, list[str]] = field(default_factory=dict)
+    anchors: dict[RefKey, str] = field(default_factory=dict)
+    anchor_keys: dict[str, set[RefKey]] = field(default_factory=dict)
+
+
+class LineageIndex:
+    """Vault横断の Lineage 索引
+
+    refresh() で各ソースの追記分を索引ファイルに取り込み、
+    load() で索引ファイルの追記分をメモリに反映する。
+    sync() は両方を実行する。複数プロセスからの同時更新は
+    ファイルロックで直列化される。
+
+    Attributes:
+        vault_path: Vaultディレクトリのパス
+    """
+
+    def __init__(self, vault_path: Path | str):
+        """
+        Args:
+            vault_path: Vaultディレクトリのパス
+        """
+        self.vault_path = Path(vault_path)
+        self._index_dir = self.vault_path / LINEAGE_INDEX_DIRNAME
+        self._index_file = self._index_dir / "index.jsonl"
+        self._watermark_file = self._index_dir / "watermarks.json"
+        self._lock_file = self._index_dir / "index.lock"
+        self._loaded_offset = 0
+        self._state = _IndexState()
+
+    # ------------------------------------------------------------------
+    # ソース探索
+    # ------------------------------------------------------------------
+
+    def _iter_sources(self) -> list[_Source]:
+        """索引対象のソースを列挙"""
+        sources: list[_Source] = []
+        if not self.vault_path.exists():
+            return sources
+
+        for path in sorted(self.vault_path.iterdir()):
+            events_file = path / "events.jsonl"
+            if path.is_dir() and events_file.exists():
+                sources.append(_Source(f"run/{path.name}", events_file, "run", path.name))
+
+        hives_path = self.vault_path / "hives"
+        if hives_path.exists():
+            for path in sorted(hives_path.iterdir()):
+                events_file = path / "events.jsonl"
+                if path.is_dir() and events_file.exists():
+                    sources.append(_Source(f"hive/{path.name}", events_file, "hive", path.name))
+
+        episodes_file = self.vault_path / "honeycomb" / "_all.jsonl"
+        if episodes_file.exists():
+            sources.append(_Source("honeycomb/_all", episodes_file, "honeycomb", "_all"))
+
+        return sources
+
+    # ------------------------------------------------------------------
+    # ソース → ノード変換
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _node_from_record(record: dict[str, Any], source: _Source) -> LineageNode | None:
+        """ソースの1レコードからノードを生成"""
+        if source.scope == "honeycomb":
+            episode_id = record.get("episode_id")
+            if not episode_id:
+                return None
+            refs: tuple[RefKey, ...] = ()
+            if record.get("run_id"):
+                refs = (("run", str(record["run_id"])),)
+            return LineageNode(
+                node_id=str(episode_id),
+                node_type=EPISODE_NODE_TYPE,
+                scope=source.scope,
+                scope_id=str(record.get("colony_id", "")),
+                parents=tuple(record.get("parent_episode_ids") or ()),
+                refs=refs,
+            )
+
+        event_id = record.get("id")
+        if not event_id:
+            return None
+        event_type = str(record.get("type", ""))
+        payload = record.get("payload") or {}
+
+        refs = ()
+        anchor: RefKey | None = None
+        if source.scope == "run" and event_type == EventType.RUN_STARTED:
+            colony_id = record.get("colony_id") or payload.get("colony_id")
+            if colony_id:
+                refs = (("colony", str(colony_id)),)
+        elif source.scope == "hive" and event_type == EventType.HIVE_CREATED:
+            anchor = ("hive", source.scope_id)
+        elif source.scope == "hive" and event_type == EventType.COLONY_CREATED:
+            refs = (("hive", source.scope_id),)
+            colony_id = payload.get("colony_id")
+            if colony_id:
+                anchor = ("colony", str(colony_id))
+
+        return LineageNode(
+            node_id=str(event_id),
+            node_type=event_type,
+            scope=source.scope,
+            scope_id=source.scope_id,
+            timestamp=str(record.get("timestamp", "")),
+            parents=tuple(record.get("parents") or ()),
+            refs=refs,
+            anchor=anchor,
+        )
+
+    # ------------------------------------------------------------------
+    # 永続索引の更新
+    # ------------------------------------------------------------------
+
+    def _read_watermarks(self) -> dict[str, int]:
+        if not self._watermark_file.exists():
+            return {}
+        try:
+            data = json.loads(self._watermark_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            logger.warning("Lineage索引のウォーターマークが壊れているため再構築します")
+            return {}
+        return {str(k): int(v) for k, v in data.items()}
+
+    def _write_watermarks(self, watermarks: dict[str, int]) -> None:
+        tmp_file = self._watermark_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(watermarks, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_file, self._watermark_file)
+
+    def refresh(self) -> int:
+        """各ソースの追記分を索引ファイルに取り込む
+
+        末尾の改行で終わっていない行（書き込み途中）は次回に持ち越す。
+
+        Returns:
+            新たに索引化したノード数
+        """
+        self._index_dir.mkdir(parents=True, exist_ok=True)
+        indexed = 0
+
+        with portalocker.Lock(self._lock_file, mode="a", timeout=10):
+            watermarks = self._read_watermarks()
+            if watermarks and not self._index_file.exists():
+                # 索引本体が消えている場合は全ソースを再走査
+                watermarks = {}
+            new_lines: list[str] = []
+
+            for source in self._iter_sources():
+                size = source.path.stat().st_size
+                offset = watermarks.get(source.key, 0)
+                if size < offset:
+                    # ソースが切り詰められた場合は先頭から再走査（重複は読み込み時に除外）
+                    offset = 0
+                if size == offset:
+                    continue
+
+                with open(source.path, "rb") as f:
+                    f.seek(offset)
+                    chunk = f.read(size - offset)
+
+                end = chunk.rfind(b"\n")
+                if end < 0:
+                    continue
+                for raw in chunk[: end + 1].splitlines():
+                    if not raw.strip():
+                        continue
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        logger.warning(f"Lineage索引: 不正な行をスキップ ({source.key})")
+                        continue
+                    node = self._node_from_record(record, source)
+                    if node is not None:
+                        new_lines.append(json.dumps(node.to_dict(), ensure_ascii=False))
+                        indexed += 1
+                watermarks[source.key] = offset + end + 1
+
+            if new_lines:
+                with open(self._index_file, "a", encoding="utf-8") as f:
+                    f.write("\n".join(new_lines) + "\n")
+            self._write_watermarks(watermarks)
+
+        return indexed
+
+    # ------------------------------------------------------------------
+    # メモリへの読み込み
+    # ------------------------------------------------------------------
+
+    def _set_anchor(self, key: RefKey, node_id: str) -> None:
+        state = self._state
+        previous = state.anchors.get(key)
+        if previous is not None:
+            state.anchor_keys.get(previous, set()).discard(key)
+        state.anchors[key] = node_id
+        state.anchor_keys.setdefault(node_id, set()).add(key)
+
+    def _apply(self, node: LineageNode) -> None:
+        state = self._state
+        if node.node_id in state.nodes:
+            return
+        state.nodes[node.node_id] = node
+
+        for parent_id in node.parents:
+            state.children.setdefault(parent_id, []).append(node.node_id)
+        for ref in node.refs:
+            state.ref_children.setdefault(ref, []).append(node.node_id)
+
+        # アンカー: Runは最新イベント、Hive/Colonyは作成イベント
+        if node.scope == "run":
+            self._set_anchor(("run", node.scope_id), node.node_id)
+        elif node.anchor is not None:
+            self._set_anchor(node.anchor, node.node_id)
+
+    def load(self) -> int:
+        """索引ファイルの未読部分をメモリに反映
+
+        Returns:
+            新たに読み込んだノード数
+        """
+        if not self._index_file.exists():
+            return 0
+
+        with open(self._index_file, "rb") as f:
+            f.seek(self._loaded_offset)
+            chunk = f.read()
+
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return 0
+
+        loaded = 0
+        for raw in chunk[: end + 1].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                node = LineageNode.from_dict(json.loads(raw))
+            except (ValueError, KeyError):
+                continue
+            before = len(self._state.nodes)
+            self._apply(node)
+            loaded += len(self._state.nodes) - before
+        self._loaded_offset += end + 1
+        return loaded
+
+    def sync(self) -> int:
+        """ソースの追記分を索引化し、メモリに反映する
+
+        Returns:
+            新たに読み込んだノード数
+        """
+        self.refresh()
+        return self.load()
+
+    # ------------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._state.nodes)
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._state.nodes
+
+    def get(self, node_id: str) -> LineageNode | None:
+        """ノードを取得"""
+        return self._state.nodes.get(node_id)
+
+    def parents_of(self, node_id: str) -> list[str]:
+        """親ノードIDを取得（論理参照を解決済み）"""
+        node = self._state.nodes.get(node_id)
+        if node is None:
+            return []
+        parents = list(node.parents)
+        for ref in node.refs:
+            anchor = self._state.anchors.get(ref)
+            if anchor is not None and anchor not in parents:
+                parents.append(anchor)
+        return parents
+
+    def children_of(self, node_id: str) -> list[str]:
+        """子ノードIDを取得（論理参照を解決済み）"""
+        children = list(self._state.children.get(node_id, ()))
+        for key in self._state.anchor_keys.get(node_id, ()):
+            for child_id in self._state.ref_children.get(key, ()):
+                if child_id not in children:
+                    children.append(child_id)
+        return children
@@ -6,8 +6,9 @@ JSONLファイル + ファイルロックによる実装。
 
 from __future__ import annotations
 
+import hashlib
 import re
-from collections.abc import Iterator
+from collections.abc import AsyncGenerator, Generator, Iterator, Sequence
 from datetime import datetime
 from pathlib import Path
 from typing import Any
@@ -15,6 +16,7 @@ from typing import Any
 import portalocker
 
 from ..events import BaseEvent, parse_event
+from .tail import get_append_notifier, tail_events
 
 # IDに許可される文字パターン（英数字、ハイフン、アンダースコア）
 _SAFE_ID_PATTERN = re.compile(r"^[a-zA-Z0-9_\-]+$")
@@ -37,6 +39,54 @@ def _validate_safe_id(value: str, name: str = "id") -> None:
         )
 
 
+def _validate_offset(events_file: Path, offset: int) -> None:
+    """バイトオフセットがイベントファイルの行頭を指しているか検証
+
+    Raises:
+        ValueError: offsetがファイル範囲外または行頭でない場合
+    """
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {offset}")
+    if offset == 0:
+        return
+    if not events_file.exists() or offset > events_file.stat().st_size:
+        raise ValueError(f"Invalid offset: {offset}")
+    with open(events_file, "rb") as f:
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            raise ValueError(f"Offset {offset} is not at a line boundary")
+
+
+def _read_events_from(
+    events_file: Path, offset: int
+) -> Generator[tuple[BaseEvent, int], None, None]:
+    """イベントファイルをバイトオフセットから読み込む
+
+    書き込み途中（改行で終わっていない）の末尾行は返さない。
+
+    Yields:
+        (イベント, そのイベント行の直後のバイトオフセット) のタプル
+
+    Raises:
+        ValueError: offsetがファイル範囲外または行頭でない場合
+    """
+    _validate_offset(events_file, offset)
+    if not events_file.exists():
+        return
+
+    with portalocker.Lock(events_file, mode="rb", timeout=10) as f:
+        f.seek(offset)
+        position = offset
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            position += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            yield parse_event(line.decode("utf-8")), position
+
+
 class AkashicRecord:
     """イベントログの永続化ストレージ
 
@@ -197,11 +247,65 @@ class AkashicRecord:
             f.seek(0, 2)  # ファイル末尾へ移動
             f.write((updated_event.to_jsonl() + "\n").encode("utf-8"))  # type: ignore[arg-type]
 
+        # 同一プロセス内の追従者（SSEストリーム等）に追記を通知
+        get_append_notifier().notify(events_file)
+
         # キャッシュも更新（同一インスタンス内の最適化用）
         self._last_hash = updated_event.hash
 
         return updated_event
 
+    def append_many(
+        self, events: Sequence[BaseEvent], run_id: str | None = None
+    ) -> list[BaseEvent]:
+        """複数イベントを1回のロック・1回の書き込みでまとめて追記
+
+        末尾ハッシュの取得は1度だけ行い、バッチ内のイベント同士で
+        prev_hash のチェーンを繋ぐ。全イベントを書き込むか、何も書き込まない。
+
+        Args:
+            events: 追記するイベント（この順に追記される）
+            run_id: Run ID（イベントに含まれていない場合に使用）
+
+        Returns:
+            prev_hashが設定されたイベントのリスト
+
+        Raises:
+            ValueError: run_idが特定できない、またはバッチ内でrun_idが異なる場合
+        """
+        if not events:
+            return []
+        actual_run_id = run_id or events[0].run_id
+        if not actual_run_id:
+            raise ValueError("run_id must be specified either in event or as argument")
+        if run_id is None and any(event.run_id != actual_run_id for event in events):
+            raise ValueError("All events in a batch must belong to a single run_id")
+
+        events_file = self._get_events_file(actual_run_id)
+        updated_events: list[BaseEvent] = []
+
+        with portalocker.Lock(events_file, mode="a+b", timeout=10) as f:
+            f.seek(0, 2)
+            file_size = f.tell()
+            last_hash = self._find_last_hash_from_tail(f, file_size) if file_size > 0 else None
+
+            lines: list[str] = []
+            for event in events:
+                event_dict = event.model_dump()
+                event_dict["prev_hash"] = last_hash
+                event_dict["run_id"] = actual_run_id
+                updated_event = parse_event(event_dict)
+                updated_events.append(updated_event)
+                lines.append(updated_event.to_jsonl() + "\n")
+                last_hash = updated_event.hash
+
+            f.seek(0, 2)
+            f.write("".join(lines).encode("utf-8"))
+
+        get_append_notifier().notify(events_file)
+        self._last_hash = last_hash
+        return updated_events
+
     def replay(self, run_id: str, since: datetime | None = None) -> Iterator[BaseEvent]:
         """イベントをリプレイ
 
@@ -229,6 +333,100 @@ class AkashicRecord:
 
                 yield event
 
+    def replay_from(
+        self, run_id: str, offset: int = 0
+    ) -> Generator[tuple[BaseEvent, int], None, None]:
+        """バイトオフセットからイベントをリプレイ
+
+        カーソルページングや追記分の差分取得に使用する。
+        書き込み途中（改行で終わっていない）の末尾行は返さない。
+
+        Args:
+            run_id: リプレイ対象のRun ID
+            offset: 読み込み開始位置（行頭であること）
+
+        Yields:
+            (イベント, そのイベント行の直後のバイトオフセット) のタプル
+
+        Raises:
+            ValueError: offsetがファイル範囲外または行頭でない場合
+        """
+        return _read_events_from(self._get_events_file(run_id), offset)
+
+    def tail(
+        self,
+        run_id: str,
+        offset: int = 0,
+        *,
+        max_batch: int = 100,
+        poll_interval: float = 1.0,
+        heartbeat: float | None = None,
+    ) -> AsyncGenerator[list[tuple[BaseEvent, int]], None]:
+        """イベントログを追従し、追記されたイベントをバッチ単位で配信
+
+        同一プロセス内の append は即時に通知され、他プロセスからの追記は
+        poll_interval ごとのサイズ確認で検出する。
+
+        Args:
+            run_id: 追従対象のRun ID
+            offset: 読み込み開始位置（replay_from と同じバイトオフセット）
+            max_batch: 1バッチあたりの最大イベント数
+            poll_interval: 他プロセスの追記を確認する間隔（秒）
+            heartbeat: 指定時、この秒数イベントがなければ空バッチを返す
+
+        Returns:
+            (イベント, 直後のバイトオフセット) のリストを返す非同期イテレータ
+
+        Raises:
+            ValueError: offsetがファイル範囲外または行頭でない場合（呼び出し時に検証）
+        """
+        events_file = self._get_events_file(run_id)
+        _validate_offset(events_file, offset)
+        return tail_events(
+            events_file,
+            offset,
+            _read_events_from,
+            max_batch=max_batch,
+            poll_interval=poll_interval,
+            heartbeat=heartbeat,
+        )
+
+    def get_last_hash(self, run_id: str) -> str | None:
+        """最後のイベントのハッシュを取得（ファイル末尾のみ読み込む）
+
+        Args:
+            run_id: Run ID
+
+        Returns:
+            最後のイベントのハッシュ、または存在しない場合はNone
+        """
+        events_file = self._get_events_file(run_id)
+        if not events_file.exists():
+            return None
+
+        with portalocker.Lock(events_file, mode="rb", timeout=10) as f:
+            f.seek(0, 2)
+            file_size = f.tell()
+            if file_size == 0:
+                return None
+            return self._find_last_hash_from_tail(f, file_size)
+
+    def catalog_version(self) -> str:
+        """Run一覧のバージョン文字列を取得
+
+        全Runのイベントファイルのサイズと更新時刻から算出する。
+        いずれかのRunにイベントが追記されると値が変わるため、
+        一覧系エンドポイントのETagに使用できる。
+
+        Returns:
+            SHA-256ハッシュ（16進文字列）
+        """
+        digest = hashlib.sha256()
+        for run_id in self.list_runs():
+            stat = (self.vault_path / run_id / "events.jsonl").stat()
+            digest.update(f"{run_id}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
     def get_last_event(self, run_id: str) -> BaseEvent | None:
         """最後のイベントを取得
 
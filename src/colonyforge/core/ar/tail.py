@@ -0,0 +1,138 @@
+"""イベントログの追従（tail）
+
+JSONLイベントログへの追記を検出し、新規イベントをバッチ単位で配信する。
+同一プロセス内の append は AppendNotifier 経由で即時に通知され、
+他プロセスからの追記はファイルサイズのポーリングで検出する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+from collections.abc import AsyncGenerator, Callable, Generator, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..events import BaseEvent
+
+EventReader = Callable[[Path, int], Generator[tuple["BaseEvent", int], None, None]]
+
+
+class AppendNotifier:
+    """イベントファイルへの追記通知
+
+    append はスレッドから呼ばれることもあるため、待機側のイベントループへは
+    call_soon_threadsafe で通知する。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    @staticmethod
+    def _key(path: Path | str) -> str:
+        return str(Path(path).resolve())
+
+    def notify(self, path: Path | str) -> None:
+        """追記を通知する"""
+        with self._lock:
+            waiters = list(self._waiters.get(self._key(path), ()))
+        for loop, signal in waiters:
+            with contextlib.suppress(RuntimeError):  # ループ終了済み
+                loop.call_soon_threadsafe(signal.set)
+
+    @contextlib.contextmanager
+    def subscribe(self, path: Path | str) -> Iterator[asyncio.Event]:
+        """追記時にセットされる asyncio.Event を登録する（実行中のループ内で使用）"""
+        key = self._key(path)
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(entry)
+                    if not waiters:
+                        del self._waiters[key]
+
+    def subscriber_count(self, path: Path | str) -> int:
+        """登録中の待機者数を取得"""
+        with self._lock:
+            return len(self._waiters.get(self._key(path), ()))
+
+
+_notifier = AppendNotifier()
+
+
+def get_append_notifier() -> AppendNotifier:
+    """プロセス共通の AppendNotifier を取得"""
+    return _notifier
+
+
+def _read_batch(
+    reader: EventReader, events_file: Path, offset: int, max_batch: int
+) -> list[tuple[BaseEvent, int]]:
+    """offset以降のイベントを最大 max_batch 件読み込む"""
+    try:
+        if events_file.stat().st_size <= offset:
+            return []
+    except FileNotFoundError:
+        return []
+    with contextlib.closing(reader(events_file, offset)) as events:
+        return list(islice(events, max_batch))
+
+
+async def tail_events(
+    events_file: Path,
+    offset: int,
+    reader: EventReader,
+    *,
+    max_batch: int = 100,
+    poll_interval: float = 1.0,
+    heartbeat: float | None = None,
+) -> AsyncGenerator[list[tuple[BaseEvent, int]], None]:
+    """イベントファイルを追従し、新規イベントをバッチで返す
+
+    未読が溜まっている間は max_batch 件ずつ連続して返すため、
+    高負荷時は1バッチに複数イベントがまとまる。
+
+    Args:
+        events_file: 追従するイベントファイル
+        offset: 読み込み開始位置（行頭）
+        reader: (ファイル, offset) から (イベント, 直後のoffset) を返す関数
+        max_batch: 1バッチあたりの最大イベント数
+        poll_interval: 他プロセスの追記を確認する間隔（秒）
+        heartbeat: 指定時、この秒数イベントがなければ空バッチを返す
+
+    Yields:
+        (イベント, 直後のバイトオフセット) のリスト
+    """
+    loop = asyncio.get_running_loop()
+    with get_append_notifier().subscribe(events_file) as appended:
+        idle_since = loop.time()
+        while True:
+            # 読み込み前にクリアし、読み込み中の追記通知を取りこぼさない
+            appended.clear()
+            batch = await asyncio.to_thread(_read_batch, reader, events_file, offset, max_batch)
+            if batch:
+                offset = batch[-1][1]
+                idle_since = loop.time()
+                yield batch
+                continue
+
+            timeout = poll_interval
+            if heartbeat is not None:
+                remaining = heartbeat - (loop.time() - idle_since)
+                if remaining <= 0:
+                    idle_since = loop.time()
+                    yield []
+                    continue
+                timeout = min(timeout, remaining)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(appended.wait(), timeout)
@@ -39,10 +39,148 @@ class RateLimitConfig(BaseModel):
     max_concurrent: int = Field(default=10, ge=1, le=100, description="最大同時リクエスト数")
     burst_limit: int = Field(default=10, ge=1, le=100, description="バースト許容数")
     retry_after_429: int = Field(default=60, ge=1, description="429エラー時の待機秒数")
+    shared: bool = Field(
+        default=False,
+        description="同一ホストの全プロセス（API/MCP/Worker等）でクォータを共有する",
+    )
+    state_dir: str | None = Field(
+        default=None,
+        description="共有状態・学習したレート制限のディレクトリ（省略時は一時ディレクトリ配下）",
+    )
+    adaptive: bool = Field(
+        default=False,
+        description="429/タイムアウトとレート制限ヘッダーから実効値を学習する（AIMD）",
+    )
+
+
+class LLMCacheConfig(BaseModel):
+    """LLM応答キャッシュ（Vault/llm_cache）の設定"""
+
+    mode: Literal["auto", "always", "off"] = Field(
+        default="auto",
+        description="auto: temperature 0 のリクエストのみ / always: 常に / off: 使わない",
+    )
+    ttl_seconds: int = Field(
+        default=7 * 24 * 3600, ge=0, description="応答の有効期限（秒、0=無期限）"
+    )
+    max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        ge=1024 * 1024,
+        description="キャッシュの容量（超過分は最後に使われた時刻が古い順に削除）",
+    )
+    directory: str | None = Field(
+        default=None, description="保存先ディレクトリ（省略時は Vault/llm_cache）"
+    )
+
+
+class LLMHedgingConfig(BaseModel):
+    """遅い応答に対するフォールバックモデルへの並行送信（ヘッジ）の設定"""
+
+    enabled: bool = Field(
+        default=False,
+        description="主モデルが期限までに応答しなければ fallback_models の先頭にも送信する",
+    )
+    percentile: float = Field(
+        default=0.95,
+        gt=0.0,
+        lt=1.0,
+        description="期限に使う主モデルの応答時間の分位点（直近の応答時間から算出）",
+    )
+    min_samples: int = Field(
+        default=20, ge=1, description="分位点を使い始めるまでに必要な応答時間の件数"
+    )
+    initial_delay_seconds: float = Field(
+        default=10.0, gt=0, description="応答時間が min_samples 件たまるまでの期限（秒）"
+    )
+    max_hedge_ratio: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="追加送信の上限（リクエスト数に対する割合。超える場合はヘッジしない）",
+    )
+
+
+class LLMTelemetryConfig(BaseModel):
+    """LLM呼び出しのテレメトリ設定"""
+
+    enabled: bool = Field(
+        default=True,
+        description="順番待ち・応答時間・トークン数・推定コストをヒストグラムに集計する",
+    )
+    record_events: bool = Field(
+        default=False,
+        description="Run が分かる呼び出しを llm.response イベントとして Akashic Record に書き込む",
+    )
+
+
+class ReplayDistributionConfig(BaseModel):
+    """再生プロバイダーが模擬する値の分布（平均と標準偏差）"""
+
+    distribution: Literal["fixed", "uniform", "normal", "lognormal"] = Field(
+        default="fixed", description="分布（fixed は常に mean）"
+    )
+    mean: float = Field(default=0.0, ge=0.0, description="平均")
+    stddev: float = Field(default=0.0, ge=0.0, description="標準偏差")
+
+
+class LLMReplayConfig(BaseModel):
+    """オフライン再生プロバイダー（provider: replay）の設定
+
+    記録済みのリクエストと応答の組を返し、応答時間とトークン生成速度を模擬する。
+    """
+
+    fixtures: list[str] = Field(
+        default_factory=list,
+        description="記録を読み込む JSONL ファイル（1行に request と response の組）",
+    )
+    runs: list[str] = Field(
+        default_factory=list,
+        description="記録を読み込む Run ID（Akashic Record の llm.request / llm.response）",
+    )
+    vault_path: str | None = Field(
+        default=None, description="runs を読む Vault（省略時は全体設定の Vault）"
+    )
+    on_miss: Literal["cycle", "error"] = Field(
+        default="cycle",
+        description="一致する記録がない場合（cycle: 記録を順に返す / error: 例外）",
+    )
+    first_token_ms: ReplayDistributionConfig = Field(
+        default_factory=lambda: ReplayDistributionConfig(
+            distribution="lognormal", mean=400.0, stddev=200.0
+        ),
+        description="最初のトークンまでの時間（ミリ秒）",
+    )
+    tokens_per_second: ReplayDistributionConfig = Field(
+        default_factory=lambda: ReplayDistributionConfig(
+            distribution="normal", mean=60.0, stddev=10.0
+        ),
+        description="出力トークンの生成速度（0 なら待たない）",
+    )
+    seed: int = Field(default=0, description="応答時間の乱数のシード")
+
+
+class ContextCompactionConfig(BaseModel):
+    """AgentRunner の会話履歴の圧縮設定"""
+
+    enabled: bool = Field(default=True, description="会話履歴を圧縮するか")
+    max_tool_result_chars: int = Field(
+        default=8000,
+        ge=500,
+        description="これを超えるツール出力は先頭・末尾の抜粋と参照に置き換える（文字数）",
+    )
+    token_budget: int = Field(
+        default=32000,
+        ge=1000,
+        description="履歴の見積もりトークン数の上限（超えると古いターンを要約に置き換える）",
+    )
+    keep_recent_turns: int = Field(
+        default=4, ge=1, description="要約せずにそのまま残す直近のターン数"
+    )
 
 
 # LiteLLM対応プロバイダー一覧
 # 「litellm_proxy」は LiteLLM Proxy 経由でモデルを呼び出す際に使用
+# 「replay」は記録済みの応答を返すオフライン再生プロバイダー（負荷試験・回帰試験用）
 LLM_PROVIDERS = Literal[
     "openai",
     "azure",
@@ -57,6 +195,7 @@ LLM_PROVIDERS = Literal[
     "groq",
     "deepseek",
     "litellm_proxy",
+    "replay",
 ]
 
 
@@ -87,6 +226,34 @@ class LLMConfig(BaseModel):
         default_factory=list,
         description="フォールバックモデルリスト（例: ['anthropic/claude-3-haiku-20240307']）",
     )
+    cache: LLMCacheConfig = Field(default_factory=LLMCacheConfig)
+    coalesce: bool = Field(
+        default=True,
+        description="同時に送られた同一リクエストを1回のプロバイダー呼び出しにまとめる",
+    )
+    stream: bool = Field(
+        default=False,
+        description="AgentRunner が応答をストリーミングで受け取り、途中経過を発行する",
+    )
+    prompt_caching: bool = Field(
+        default=True,
+        description=(
+            "プロンプト先頭（ツール定義とシステムプロンプト）にプロバイダーの"
+            "キャッシュ指示を付ける（明示的な指示が必要な Claude 系のみ。"
+            "OpenAI などは同じ先頭を自動でキャッシュする）"
+        ),
+    )
+    candidate_sampling: Literal["auto", "n", "parallel"] = Field(
+        default="auto",
+        description=(
+            "複数候補の生成方法（n: プロバイダーの n パラメーターで1回のリクエスト、"
+            "parallel: 同じリクエストを並行送信、auto: モデルが n に対応していれば n）"
+        ),
+    )
+    compaction: ContextCompactionConfig = Field(default_factory=ContextCompactionConfig)
+    hedging: LLMHedgingConfig = Field(default_factory=LLMHedgingConfig)
+    replay: LLMReplayConfig = Field(default_factory=LLMReplayConfig)
+    telemetry: LLMTelemetryConfig = Field(default_factory=LLMTelemetryConfig)
 
 
 class AgentLLMConfig(BaseModel):
@@ -151,6 +318,15 @@ class AgentLLMConfig(BaseModel):
             fallback_models=self.fallback_models
             if self.fallback_models is not None
             else global_llm.fallback_models,
+            cache=global_llm.cache,
+            coalesce=global_llm.coalesce,
+            stream=global_llm.stream,
+            candidate_sampling=global_llm.candidate_sampling,
+            prompt_caching=global_llm.prompt_caching,
+            compaction=global_llm.compaction,
+            hedging=global_llm.hedging,
+            replay=global_llm.replay,
+            telemetry=global_llm.telemetry,
         )
 
 
@@ -174,12 +350,49 @@ class CORSConfig(BaseModel):
     allow_headers: list[str] = Field(default=["*"])
 
 
+class CompressionConfig(BaseModel):
+    """レスポンス圧縮設定"""
+
+    enabled: bool = Field(default=True, description="gzip/brotli圧縮を有効にするか")
+    minimum_size: int = Field(default=1024, ge=0, description="圧縮対象とする最小バイト数")
+    gzip_level: int = Field(default=6, ge=1, le=9, description="gzip圧縮レベル")
+    brotli_quality: int = Field(
+        default=4, ge=0, le=11, description="brotli品質（brotliパッケージ導入時のみ）"
+    )
+
+
+class ActivityHistoryConfig(BaseModel):
+    """アクティビティ履歴（Vault/activity/history.ring）の設定"""
+
+    enabled: bool = Field(default=True, description="アクティビティをリングファイルに記録するか")
+    max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=64 * 1024,
+        description="リングファイルの容量（超過分は古い順に上書き）",
+    )
+
+
+class ActivityCoalescingConfig(BaseModel):
+    """高頻度の途中経過（task.progress / llm.stream）をまとめて配信する設定"""
+
+    enabled: bool = Field(default=True, description="時間窓ごとにまとめて配信するか")
+    window_ms: int = Field(
+        default=100,
+        ge=1,
+        le=10_000,
+        description="エージェント・種別ごとにまとめる時間窓（ミリ秒）",
+    )
+
+
 class ServerConfig(BaseModel):
     """サーバー設定"""
 
     host: str = Field(default="0.0.0.0")
     port: int = Field(default=8000, ge=1, le=65535)
     cors: CORSConfig = Field(default_factory=CORSConfig)
+    compression: CompressionConfig = Field(default_factory=CompressionConfig)
+    activity_history: ActivityHistoryConfig = Field(default_factory=ActivityHistoryConfig)
+    activity_coalescing: ActivityCoalescingConfig = Field(default_factory=ActivityCoalescingConfig)
 
 
 class LoggingConfig(BaseModel):
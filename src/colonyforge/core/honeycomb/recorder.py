@@ -165,12 +165,16 @@ class EpisodeRecorder:
         return None
 
     def _count_tokens(self, events: list[Any]) -> int:
-        """イベントからトークン使用量を算出"""
+        """イベントからトークン使用量を算出
+
+        llm.response はLLMテレメトリが呼び出しごとに書き込むイベント
+        （llm.telemetry.record_events）。
+        """
         total = 0
         for event in events:
             if event.type == EventType.WORKER_COMPLETED:
                 total += event.payload.get("token_count", 0)
-            elif event.type == EventType.WORKER_PROGRESS:
+            elif event.type in (EventType.WORKER_PROGRESS, EventType.LLM_RESPONSE):
                 total += event.payload.get("tokens_used", 0)
         return total
 
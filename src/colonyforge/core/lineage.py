@@ -1,14 +1,19 @@
-"""Lineage - 因果リンク（親イベント）の自動解決
+"""Lineage - 因果リンク（親イベント）の自動解決と探索
 
 GitHub Issue #16: P1-15: Lineage 親イベント自動設定
 
-イベント作成時に自動的に親イベントを設定する機能を提供。
+イベント作成時に自動的に親イベントを設定する機能と、
+LineageIndex を用いた Run・Hive・Honeycomb 横断の因果探索を提供。
 """
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal
 
+from colonyforge.core.ar.lineage_index import LineageIndex, LineageNode
 from colonyforge.core.events import BaseEvent, EventType
 
 if TYPE_CHECKING:
@@ -118,3 +123,182 @@ class LineageResolver:
             if event.type == EventType.TASK_COMPLETED and event.run_id == run_id:
                 parents.append(event.id)
         return parents
+
+
+# =============================================================================
+# Vault横断の Lineage 探索とグラフエクスポート
+# =============================================================================
+
+
+LineageDirection = Literal["ancestors", "descendants", "both"]
+
+
+@dataclass(frozen=True)
+class LineageStep:
+    """探索で到達した1ノード
+
+    Attributes:
+        node: 到達したノード
+        depth: 起点からの距離
+        via: 到達に使ったノードID（起点はNone）
+        direction: 探索方向（"ancestors" | "descendants"）
+    """
+
+    node: LineageNode
+    depth: int
+    via: str | None
+    direction: str
+
+
+class LineageTraversal:
+    """起点ノードからの幅優先探索
+
+    イテレートすると到達順に LineageStep をストリーミングで返す。
+    深さ・ノード数の予算を超えた場合は探索を打ち切り、
+    イテレーション完了後に truncated が True になる。
+    """
+
+    def __init__(
+        self,
+        index: LineageIndex,
+        root_id: str,
+        direction: LineageDirection = "ancestors",
+        max_depth: int = 10,
+        max_nodes: int = 1000,
+    ):
+        self._index = index
+        self.root_id = root_id
+        self.direction = direction
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[LineageStep]:
+        root = self._index.get(self.root_id)
+        if root is None:
+            return
+        yield LineageStep(node=root, depth=0, via=None, direction="root")
+
+        emitted = 1
+        seen: set[str] = {self.root_id}
+        directions = ["ancestors", "descendants"] if self.direction == "both" else [self.direction]
+
+        for direction in directions:
+            neighbors = (
+                self._index.parents_of if direction == "ancestors" else self._index.children_of
+            )
+            queue: deque[tuple[str, int]] = deque([(self.root_id, 0)])
+            while queue:
+                current_id, depth = queue.popleft()
+                next_ids = [nid for nid in neighbors(current_id) if nid in self._index]
+                if depth >= self.max_depth:
+                    if any(nid not in seen for nid in next_ids):
+                        self.truncated = True
+                    continue
+                for next_id in next_ids:
+                    if next_id in seen:
+                        continue
+                    if emitted >= self.max_nodes:
+                        self.truncated = True
+                        return
+                    seen.add(next_id)
+                    emitted += 1
+                    node = self._index.get(next_id)
+                    assert node is not None  # nid in self._index を確認済み
+                    yield LineageStep(
+                        node=node, depth=depth + 1, via=current_id, direction=direction
+                    )
+                    queue.append((next_id, depth + 1))
+
+
+@dataclass
+class LineageSubgraph:
+    """探索結果のサブグラフ
+
+    Attributes:
+        root_id: 起点ノードID
+        nodes: ノードID → ノード
+        edges: (親ID, 子ID) の一覧
+        truncated: 予算超過で打ち切られたか
+    """
+
+    root_id: str
+    nodes: dict[str, LineageNode] = field(default_factory=dict)
+    edges: list[tuple[str, str]] = field(default_factory=list)
+    truncated: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSONエクスポート用の辞書に変換"""
+        return {
+            "root": self.root_id,
+            "nodes": [node.to_dict() for node in self.nodes.values()],
+            "edges": [{"source": src, "target": dst} for src, dst in self.edges],
+            "truncated": self.truncated,
+        }
+
+    def to_dot(self) -> str:
+        """Graphviz DOT形式に変換（親 → 子の向き）"""
+
+        def quote(value: str) -> str:
+            return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+        lines = ["digraph lineage {", "  rankdir=LR;", "  node [shape=box];"]
+        for node in self.nodes.values():
+            label = f"{node.node_type}\\n{node.scope}:{node.scope_id}\\n{node.node_id}"
+            attrs = f"label={quote(label)}"
+            if node.node_id == self.root_id:
+                attrs += ", style=bold"
+            lines.append(f"  {quote(node.node_id)} [{attrs}];")
+        for src, dst in self.edges:
+            lines.append(f"  {quote(src)} -> {quote(dst)};")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+class LineageGraph:
+    """Vault横断の Lineage クエリエンジン
+
+    LineageIndex 上で Run・Hive・Honeycomb エピソードを跨いで
+    親子リンクを辿る。「この成果物はなぜ存在するのか」を
+    ancestors 方向の探索で回答する。
+    """
+
+    def __init__(self, index: LineageIndex):
+        self.index = index
+
+    def traverse(
+        self,
+        node_id: str,
+        direction: LineageDirection = "ancestors",
+        max_depth: int = 10,
+        max_nodes: int = 1000,
+    ) -> LineageTraversal:
+        """起点ノードからの探索を開始（遅延評価）"""
+        return LineageTraversal(self.index, node_id, direction, max_depth, max_nodes)
+
+    def subgraph(
+        self,
+        node_id: str,
+        direction: LineageDirection = "both",
+        max_depth: int = 10,
+        max_nodes: int = 1000,
+    ) -> LineageSubgraph | None:
+        """起点ノード周辺のサブグラフを構築
+
+        Returns:
+            サブグラフ（起点ノードが存在しない場合はNone）
+        """
+        if node_id not in self.index:
+            return None
+
+        traversal = self.traverse(node_id, direction, max_depth, max_nodes)
+        result = LineageSubgraph(root_id=node_id)
+        for step in traversal:
+            result.nodes[step.node.node_id] = step.node
+        result.truncated = traversal.truncated
+
+        for child_id in result.nodes:
+            for parent_id in self.index.parents_of(child_id):
+                if parent_id in result.nodes:
+                    result.edges.append((parent_id, child_id))
+        return result
@@ -6,9 +6,14 @@ Token Bucket方式 + 並行リクエスト制限を実装。
 
 import asyncio
 import time
+from collections import deque
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from enum import StrEnum
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .adaptive_rate_limit import AdaptiveLimits
 
 
 class RateLimitStrategy(StrEnum):
@@ -35,6 +40,15 @@ class RateLimitConfig:
         max_concurrent: Max concurrent in-flight requests.
         retry_after_429: Default back-off seconds on HTTP 429.
         burst_limit: Token-bucket burst capacity.
+        shared: Share the bucket and concurrency slots with every process
+            on this host that uses the same limiter key (see
+            ``shared_rate_limiter.SharedRateLimiter``).
+        state_dir: Directory for the shared state files and the learned
+            adaptive limits (default: ``<tmp>/colonyforge-ratelimit``).
+        adaptive: Learn the effective limits from provider responses
+            (AIMD on 429s/timeouts, rate-limit headers as the ceiling) and
+            persist them per limiter key (see
+            ``adaptive_rate_limit.AdaptiveLimits``).
     """
 
     requests_per_minute: int = 60
@@ -43,6 +57,9 @@ class RateLimitConfig:
     max_concurrent: int = 10
     retry_after_429: float = 60.0
     burst_limit: int = 10
+    shared: bool = False
+    state_dir: str | None = None
+    adaptive: bool = False
 
 
 @dataclass
@@ -59,6 +76,19 @@ class RateLimitState:
     current_concurrent: int = 0
 
 
+@dataclass(frozen=True)
+class TokenReservation:
+    """トークン/分の枠の予約
+
+    Attributes:
+        tokens: 予約したトークン数
+        minute_start: 予約した分ウィンドウの開始時刻
+    """
+
+    tokens: int
+    minute_start: float
+
+
 class RateLimiter:
     """レートリミッター
 
@@ -80,12 +110,13 @@ class RateLimiter:
         self._config = config or RateLimitConfig()
         self._state = RateLimitState(tokens=float(self._config.burst_limit))
         self._lock = asyncio.Lock()
-        self._semaphore = asyncio.Semaphore(self._config.max_concurrent)
+        self._slot_waiters: deque[asyncio.Future[None]] = deque()
         self._waiters: list[asyncio.Event] = []
+        self._adaptive: AdaptiveLimits | None = None
 
     @property
     def config(self) -> RateLimitConfig:
-        """設定を取得"""
+        """設定を取得（適応型の場合は学習後の実効値）"""
         return self._config
 
     def _refill_tokens(self) -> None:
@@ -132,37 +163,47 @@ class RateLimiter:
         """
         while True:
             async with self._lock:
-                self._reset_minute_window()
-                self._reset_day_window()
-                self._refill_tokens()
-
-                # 日次制限チェック
-                if (
-                    self._config.requests_per_day > 0
-                    and self._state.request_count_day >= self._config.requests_per_day
-                ):
-                    raise RateLimitExceededError(
-                        "Daily request limit exceeded",
-                        retry_after=self._seconds_until_day_reset(),
-                    )
-
-                # トークンが足りない場合は待機時間を計算
-                if self._state.tokens < tokens:
-                    wait_time = self._calculate_wait_time(tokens)
-                else:
-                    wait_time = 0.0
-
-                if wait_time <= 0:
-                    # トークン消費して終了
-                    self._state.tokens -= tokens
-                    self._state.request_count_minute += 1
-                    self._state.request_count_day += 1
-                    return
+                wait_time = self._take_tokens(tokens)
+            if wait_time <= 0:
+                return
 
             # ロックを解放した状態でsleep
             await asyncio.sleep(wait_time)
             # ループ先頭でロック再取得・再チェック
 
+    def _take_tokens(self, tokens: int) -> float:
+        """トークンを消費する（ロック保持中に呼ぶ）
+
+        Returns:
+            消費できた場合は0、トークンが足りない場合は必要な待機秒数
+
+        Raises:
+            RateLimitExceededError: 日次制限を超えた場合
+        """
+        self._reset_minute_window()
+        self._reset_day_window()
+        self._refill_tokens()
+
+        # 日次制限チェック
+        if (
+            self._config.requests_per_day > 0
+            and self._state.request_count_day >= self._config.requests_per_day
+        ):
+            raise RateLimitExceededError(
+                "Daily request limit exceeded",
+                retry_after=self._seconds_until_day_reset(),
+            )
+
+        # トークンが足りない場合は待機時間を計算
+        wait_time = self._calculate_wait_time(tokens) if self._state.tokens < tokens else 0.0
+
+        if wait_time <= 0:
+            # トークン消費して終了
+            self._state.tokens -= tokens
+            self._state.request_count_minute += 1
+            self._state.request_count_day += 1
+        return wait_time
+
     def _calculate_wait_time(self, tokens: int) -> float:
         """必要な待機時間を計算"""
         needed = tokens - self._state.tokens
@@ -184,52 +225,106 @@ class RateLimiter:
                 await make_request()
         """
         await self.wait()
-        await self._semaphore.acquire()
-        self._state.current_concurrent += 1
+        await self._acquire_slot()
         return RateLimitContext(self)
 
+    async def _acquire_slot(self) -> None:
+        """並行リクエストスロットを確保
+
+        上限は適応型の学習で変わるため、Semaphore ではなく待機キューで管理する。
+        """
+        if not self._slot_waiters and self._state.current_concurrent < self._config.max_concurrent:
+            self._state.current_concurrent += 1
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._slot_waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # スロットを受け取った直後にキャンセルされた
+                self.release()
+            else:
+                self._slot_waiters.remove(waiter)
+            raise
+
     def release(self) -> None:
         """並行リクエストスロットを解放"""
-        self._semaphore.release()
         self._state.current_concurrent -= 1
+        self._wake_slot_waiters()
+
+    def _wake_slot_waiters(self) -> None:
+        """空いたスロットを待機中のリクエストに先着順で渡す"""
+        while self._slot_waiters and self._state.current_concurrent < self._config.max_concurrent:
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                self._state.current_concurrent += 1
+                waiter.set_result(None)
 
     async def acquire_with_tokens(self, llm_tokens: int) -> "RateLimitContext":
         """LLMトークン数を考慮してレート制限を取得
 
         ロックを保持したままsleepしないよう、待機時間の算出後にロックを
         解放してからsleepし、再取得して再チェックするループ構成。
+        予約はトークン/分の上限で頭打ちにする（1件で上限を超える見積もりでも
+        ウィンドウが空けば通す）。応答後に RateLimitContext.reconcile で
+        実際の使用量に補正できる。
 
         Args:
             llm_tokens: LLM APIで使用するトークン数（推定）
         """
-        wait_time = 0.0
+        llm_tokens = min(llm_tokens, self._config.tokens_per_minute)
         while True:
             async with self._lock:
-                self._reset_minute_window()
-
-                # トークン/分の制限チェック
-                if self._state.token_count_minute + llm_tokens > self._config.tokens_per_minute:
-                    wait_time = 60.0 - (time.monotonic() - self._state.minute_start)
-                    if wait_time > 0:
-                        # ロック外でsleepするためにbreakせずcontinue
-                        pass
-                    else:
-                        self._reset_minute_window()
-                        self._state.token_count_minute += llm_tokens
-                        break
-                else:
-                    self._state.token_count_minute += llm_tokens
-                    break
+                wait_time = self._reserve_llm_tokens(llm_tokens)
+            if wait_time <= 0:
+                break
 
             # ロックを解放した状態でsleep
             await asyncio.sleep(wait_time)
             # ループ先頭でロック再取得・再チェック
 
-        return await self.acquire()
+        reservation = TokenReservation(llm_tokens, self._state.minute_start)
+        try:
+            await self.wait()
+        except RateLimitExceededError:
+            self.reconcile_tokens(reservation, 0)
+            raise
+        await self._acquire_slot()
+        return RateLimitContext(self, reservation)
+
+    def _reserve_llm_tokens(self, llm_tokens: int) -> float:
+        """トークン/分の枠を予約する（ロック保持中に呼ぶ）
+
+        Returns:
+            予約できた場合は0、枠が空くまでの待機秒数
+        """
+        self._reset_minute_window()
+
+        # トークン/分の制限チェック
+        if self._state.token_count_minute + llm_tokens > self._config.tokens_per_minute:
+            wait_time = 60.0 - (time.monotonic() - self._state.minute_start)
+            if wait_time > 0:
+                return wait_time
+            self._reset_minute_window()
+        self._state.token_count_minute += llm_tokens
+        return 0.0
+
+    def reconcile_tokens(self, reservation: TokenReservation, actual_tokens: int) -> None:
+        """予約したトークン数を実際の使用量で補正する
+
+        予約後に分ウィンドウが切り替わっていた場合、予約分は前のウィンドウで
+        計上済みのため、超過分のみを現在のウィンドウに加算する。
+        """
+        self._reset_minute_window()
+        delta = actual_tokens - reservation.tokens
+        if self._state.minute_start != reservation.minute_start:
+            delta = max(delta, 0)
+        self._state.token_count_minute = max(0, self._state.token_count_minute + delta)
 
     def get_stats(self) -> dict[str, Any]:
         """現在の統計を取得"""
-        return {
+        stats: dict[str, Any] = {
             "tokens_available": self._state.tokens,
             "requests_this_minute": self._state.request_count_minute,
             "requests_today": self._state.request_count_day,
@@ -237,6 +332,9 @@ class RateLimiter:
             "current_concurrent": self._state.current_concurrent,
             "max_concurrent": self._config.max_concurrent,
         }
+        if self._adaptive is not None:
+            stats["adaptive"] = self._adaptive.snapshot()
+        return stats
 
     async def handle_429(self, retry_after: float | None = None) -> None:
         """429エラー（Rate Limit）を処理
@@ -246,18 +344,79 @@ class RateLimiter:
         """
         wait_time = retry_after or self._config.retry_after_429
 
-        # トークンをゼロにリセット
+        # トークンをゼロにリセット（適応型なら実効値も下げる）
         async with self._lock:
-            self._state.tokens = 0.0
+            self.record_throttle()
 
         await asyncio.sleep(wait_time)
 
+    # --- 適応型（AIMD） ---
+
+    def attach_adaptive(self, adaptive: "AdaptiveLimits") -> None:
+        """適応型の学習を有効にし、学習済みの実効値を適用する"""
+        self._adaptive = adaptive
+        self._apply_adaptive()
+
+    def _apply_adaptive(self) -> None:
+        assert self._adaptive is not None
+        self._config = self._adaptive.apply_to(self._config)
+        self._wake_slot_waiters()
+
+    def record_success(self, headers: Mapping[str, Any] | None = None) -> None:
+        """成功した応答を記録する（適応型でなければ何もしない）
+
+        Args:
+            headers: 応答のレート制限ヘッダー（上限と残量の学習に使用）
+        """
+        if self._adaptive is None:
+            return
+        from .adaptive_rate_limit import parse_rate_limit_headers
+
+        parsed = parse_rate_limit_headers(headers)
+        if self._adaptive.on_success(parsed):
+            self._apply_adaptive()
+        if parsed.remaining_requests == 0:
+            # 残量がなければ次の補充まで待たせる
+            self._drain_tokens()
+
+    def record_throttle(self, headers: Mapping[str, Any] | None = None) -> None:
+        """429 / タイムアウトを記録する
+
+        バケットを空にし、適応型なら補充レートと同時実行数を乗算的に下げる。
+        待機はしない（待機が必要な場合は handle_429 を使う）。
+
+        Args:
+            headers: エラー応答のレート制限ヘッダー（あれば上限の学習に使用）
+        """
+        if self._adaptive is not None:
+            from .adaptive_rate_limit import parse_rate_limit_headers
+
+            if self._adaptive.on_congestion(parse_rate_limit_headers(headers)):
+                self._apply_adaptive()
+        self._drain_tokens()
+
+    def _drain_tokens(self) -> None:
+        """バケットを空にする（ロック保持中に呼ぶ）"""
+        self._state.tokens = 0.0
+
 
 class RateLimitContext:
     """レート制限コンテキストマネージャー"""
 
-    def __init__(self, limiter: RateLimiter):
+    def __init__(self, limiter: RateLimiter, reservation: TokenReservation | None = None):
         self._limiter = limiter
+        self._reservation = reservation
+
+    @property
+    def reservation(self) -> TokenReservation | None:
+        """未補正のトークン予約（acquire_with_tokens で取得した場合）"""
+        return self._reservation
+
+    def reconcile(self, actual_tokens: int) -> None:
+        """予約したトークン数を実際の使用量で補正する（予約がなければ何もしない）"""
+        if self._reservation is not None:
+            self._limiter.reconcile_tokens(self._reservation, actual_tokens)
+            self._reservation = None
 
     async def __aenter__(self) -> "RateLimitContext":
         return self
@@ -340,10 +499,35 @@ def get_anthropic_rate_limit(tier: str = "1") -> RateLimitConfig:
 # --- グローバルリミッター管理 ---
 
 
+def create_rate_limiter(key: str, config: RateLimitConfig | None = None) -> RateLimiter:
+    """設定に応じたレートリミッターを生成
+
+    config.shared が真の場合は、同一ホストの他プロセスと状態を共有する
+    SharedRateLimiter を返す。config.adaptive が真の場合は、鍵ごとに保存した
+    学習済みの値から適応型の学習を始める。
+    """
+    limiter: RateLimiter
+    if config is not None and config.shared:
+        from .shared_rate_limiter import SharedRateLimiter
+
+        limiter = SharedRateLimiter(key, config)
+    else:
+        limiter = RateLimiter(config)
+    if config is not None and config.adaptive:
+        from pathlib import Path
+
+        from .adaptive_rate_limit import AdaptiveLimits, limits_file_for
+
+        state_dir = Path(config.state_dir) if config.state_dir else None
+        limiter.attach_adaptive(AdaptiveLimits(key, config, limits_file_for(key, state_dir)))
+    return limiter
+
+
 class RateLimiterRegistry:
     """レートリミッターのレジストリ
 
-    複数のLLMプロバイダー/モデルを管理。
+    複数のLLMプロバイダー/モデルを管理。プロセス内で鍵ごとに1つのリミッターを共有する。
+    プロセス間での共有は RateLimitConfig.shared で有効にする。
     """
 
     def __init__(self) -> None:
@@ -354,7 +538,7 @@ class RateLimiterRegistry:
         """リミッターを取得（なければ作成）"""
         async with self._lock:
             if key not in self._limiters:
-                self._limiters[key] = RateLimiter(config)
+                self._limiters[key] = create_rate_limiter(key, config)
             return self._limiters[key]
 
     async def get_for_openai(self, model: str) -> RateLimiter:
@@ -0,0 +1,262 @@
+"""プロセス間で共有するレートリミッター
+
+同一ホスト上の複数プロセス（APIサーバー、MCPサーバー、WorkerProcessManager の
+Worker、VLM / Agent UI サーバーなど）で、プロバイダーのクォータを
+1つのトークンバケットと同時実行スロットとして共有する。
+
+状態はリミッターの鍵ごとの小さな固定長ファイルに置き、portalocker の排他ロックの
+下で読み書きする。ロックを保持するのはトークン計算の間だけで、sleep 中は保持しない。
+時刻には time.monotonic()（ホスト内の全プロセスで共通）を使い、再起動などで
+記録された時刻が現在より未来になっている場合は状態を初期化する。
+
+同時実行スロットは (pid, 所有者ID, 取得時刻) の表で管理する。終了したプロセスの
+スロット（POSIX のみ判定）と、リース期限を過ぎたスロットは回収する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import mmap
+import os
+import re
+import secrets
+import struct
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import portalocker
+
+from .rate_limiter import RateLimitConfig, RateLimiter, TokenReservation
+
+MAGIC = b"CFRLIM1\0"
+# magic, tokens, last_refill, 分内リクエスト数, 分内トークン数, 分の開始, 日内リクエスト数, 日の開始
+_HEADER = struct.Struct("<8sddqqdqd")
+_SLOT = struct.Struct("<IId")  # pid, 所有者ID, 取得時刻
+
+# 共有できる同時実行スロットの上限
+MAX_SHARED_SLOTS = 256
+STATE_FILE_SIZE = _HEADER.size + _SLOT.size * MAX_SHARED_SLOTS
+
+# スロットを保持したまま応答がないとみなすまでの秒数（プロセス異常終了の保険）
+SLOT_LEASE_SECONDS = 900.0
+
+# スロットが空くのを待つポーリング間隔（秒）
+_SLOT_POLL_MIN = 0.01
+_SLOT_POLL_MAX = 0.25
+
+
+def default_state_dir() -> Path:
+    """共有状態ファイルの既定ディレクトリ（ホスト内の全プロセスで共通）"""
+    return Path(tempfile.gettempdir()) / "colonyforge-ratelimit"
+
+
+def state_file_for(key: str, state_dir: Path | None = None) -> Path:
+    """リミッターの鍵に対応する状態ファイルのパス"""
+    safe = re.sub(r"[^\w.-]", "_", key)
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:8]
+    return (state_dir or default_state_dir()) / f"{safe}-{digest}.ratelimit"
+
+
+def _pid_alive(pid: int) -> bool:
+    """プロセスが生存しているか（判定できない環境では True）"""
+    if pid == os.getpid() or os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedRateLimiter(RateLimiter):
+    """ホスト内のプロセス間で状態を共有するレートリミッター
+
+    RateLimiter と同じAPIで使用でき、同じ鍵・同じ状態ディレクトリを指定した
+    全プロセスで1つのクォータを分け合う。各プロセスは同じ設定値を使う前提。
+
+    Args:
+        key: リミッターの鍵（例: "openai:gpt-4o"）
+        config: レート制限設定
+        state_dir: 状態ファイルのディレクトリ（省略時は config.state_dir、
+            それも未設定なら default_state_dir()）
+    """
+
+    def __init__(
+        self,
+        key: str,
+        config: RateLimitConfig | None = None,
+        state_dir: Path | None = None,
+    ) -> None:
+        super().__init__(config)
+        if self._config.max_concurrent > MAX_SHARED_SLOTS:
+            raise ValueError(f"max_concurrent must be <= {MAX_SHARED_SLOTS} for shared limiter")
+        if state_dir is None and self._config.state_dir:
+            state_dir = Path(self._config.state_dir)
+        self.key = key
+        self.path = state_file_for(key, state_dir)
+        self._owner = secrets.randbits(32) or 1
+        self._held: list[int] = []
+        self._open()
+
+    # --- 状態ファイル ---
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, "r+b")
+        portalocker.lock(self._file, portalocker.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < STATE_FILE_SIZE:
+                self._file.truncate(STATE_FILE_SIZE)
+            self._mm = mmap.mmap(fd, STATE_FILE_SIZE)
+            if self._mm[: len(MAGIC)] != MAGIC:
+                self._initialize()
+        finally:
+            portalocker.unlock(self._file)
+
+    def close(self) -> None:
+        """状態ファイルを閉じる（保持中のスロットは解放する）"""
+        if self._mm.closed:
+            return
+        while self._held:
+            self.release()
+        self._mm.close()
+        self._file.close()
+
+    def _initialize(self) -> None:
+        """バケットを満杯、カウンターとスロットを空にした状態で書き直す"""
+        now = time.monotonic()
+        self._mm[:STATE_FILE_SIZE] = bytes(STATE_FILE_SIZE)
+        _HEADER.pack_into(
+            self._mm, 0, MAGIC, float(self._config.burst_limit), now, 0, 0, now, 0, now
+        )
+
+    def _load(self) -> None:
+        magic, tokens, last_refill, req_min, tok_min, minute_start, req_day, day_start = (
+            _HEADER.unpack_from(self._mm, 0)
+        )
+        now = time.monotonic()
+        if magic != MAGIC or max(last_refill, minute_start, day_start) > now + 1.0:
+            # 再起動で時計が巻き戻った、または壊れている
+            self._initialize()
+            return self._load()
+        state = self._state
+        state.tokens = tokens
+        state.last_refill = last_refill
+        state.request_count_minute = req_min
+        state.token_count_minute = tok_min
+        state.minute_start = minute_start
+        state.request_count_day = req_day
+        state.day_start = day_start
+        state.current_concurrent = sum(
+            1 for i in range(MAX_SHARED_SLOTS) if _SLOT.unpack_from(self._mm, self._slot(i))[0]
+        )
+
+    def _store(self) -> None:
+        state = self._state
+        _HEADER.pack_into(
+            self._mm,
+            0,
+            MAGIC,
+            state.tokens,
+            state.last_refill,
+            state.request_count_minute,
+            state.token_count_minute,
+            state.minute_start,
+            state.request_count_day,
+            state.day_start,
+        )
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """ファイルロックを取り、共有状態を読み込んで、終了時に書き戻す"""
+        portalocker.lock(self._file, portalocker.LOCK_EX)
+        try:
+            self._load()
+            yield
+            self._store()
+        finally:
+            portalocker.unlock(self._file)
+
+    # --- トークンバケット（親クラスの計算を共有状態の上で行う）---
+
+    def _take_tokens(self, tokens: int) -> float:
+        with self._locked():
+            return super()._take_tokens(tokens)
+
+    def _reserve_llm_tokens(self, llm_tokens: int) -> float:
+        with self._locked():
+            return super()._reserve_llm_tokens(llm_tokens)
+
+    def reconcile_tokens(self, reservation: TokenReservation, actual_tokens: int) -> None:
+        with self._locked():
+            super().reconcile_tokens(reservation, actual_tokens)
+
+    def _drain_tokens(self) -> None:
+        with self._locked():
+            super()._drain_tokens()
+
+    # --- 同時実行スロット ---
+
+    @staticmethod
+    def _slot(index: int) -> int:
+        return _HEADER.size + _SLOT.size * index
+
+    def _claim_slot(self) -> int | None:
+        """空きスロットを確保する（ロック保持中に呼ぶ）。上限に達していれば None"""
+        now = time.monotonic()
+        free: int | None = None
+        used = 0
+        for index in range(MAX_SHARED_SLOTS):
+            pid, _, acquired_at = _SLOT.unpack_from(self._mm, self._slot(index))
+            if pid and (now - acquired_at > SLOT_LEASE_SECONDS or not _pid_alive(pid)):
+                _SLOT.pack_into(self._mm, self._slot(index), 0, 0, 0.0)
+                pid = 0
+            if pid:
+                used += 1
+            elif free is None:
+                free = index
+        if free is None or used >= self._config.max_concurrent:
+            self._state.current_concurrent = used
+            return None
+        _SLOT.pack_into(self._mm, self._slot(free), os.getpid(), self._owner, now)
+        self._state.current_concurrent = used + 1
+        return free
+
+    async def _acquire_slot(self) -> None:
+        delay = _SLOT_POLL_MIN
+        while True:
+            with self._locked():
+                index = self._claim_slot()
+            if index is not None:
+                self._held.append(index)
+                return
+            # 他プロセスからの解放通知はないため、間隔を広げながら再確認する
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _SLOT_POLL_MAX)
+
+    def release(self) -> None:
+        """並行リクエストスロットを解放"""
+        if not self._held:
+            return
+        index = self._held.pop()
+        with self._locked():
+            pid, owner, _ = _SLOT.unpack_from(self._mm, self._slot(index))
+            if pid == os.getpid() and owner == self._owner:
+                _SLOT.pack_into(self._mm, self._slot(index), 0, 0, 0.0)
+                self._state.current_concurrent -= 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """現在の統計を取得（全プロセス合計）"""
+        with self._locked():
+            self._refill_tokens()
+            stats = super().get_stats()
+        stats["shared_state_file"] = str(self.path)
+        return stats
@@ -3,15 +3,23 @@
 OpenAI/Anthropic APIを統一インターフェースで呼び出す。
 """
 
-from .client import LLMClient, LLMResponse, Message, ToolCall
+from .client import CandidateBatch, LLMClient, LLMResponse, Message, StreamDelta, ToolCall
+from .response_cache import LLMResponseCache
 from .runner import AgentContext, AgentRunner, RunResult
+from .scheduler import LLMRequestScheduler, RequestPriority, llm_request_scope
 
 __all__ = [
+    "CandidateBatch",
     "LLMClient",
     "LLMResponse",
     "Message",
+    "StreamDelta",
     "ToolCall",
     "AgentRunner",
     "AgentContext",
     "RunResult",
+    "LLMResponseCache",
+    "LLMRequestScheduler",
+    "RequestPriority",
+    "llm_request_scope",
 ]
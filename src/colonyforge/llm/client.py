@@ -5,16 +5,32 @@ OpenAI互換のI/Oフォーマットを使用し、プロバイダー間の差
 レートリミッター統合済み。
 """
 
+import asyncio
 import json
 import logging
 import os
-from dataclasses import dataclass, field
+import time
+from collections.abc import AsyncIterator, Mapping
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
 from typing import Any, Literal
 
 import litellm
 
 from ..core.config import LLMConfig, get_settings
 from ..core.rate_limiter import RateLimitConfig, RateLimiter, get_rate_limiter_registry
+from .hedging import get_hedge_policy
+from .inflight import get_inflight_coalescer
+from .replay import get_replay_provider
+from .response_cache import LLMResponseCache, get_response_cache, make_cache_key
+from .scheduler import (
+    LLMRequestScheduler,
+    RequestPriority,
+    SchedulerSlot,
+    current_request_class,
+    get_request_scheduler,
+)
+from .telemetry import CallTimer, LLMCallRecord, current_telemetry_scope, get_llm_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +65,7 @@ class LLMResponse:
     tool_calls: list[ToolCall]
     finish_reason: str
     usage: dict[str, int] = field(default_factory=dict)
+    cached: bool = False  # 応答キャッシュから返した場合 True
 
     @property
     def has_tool_calls(self) -> bool:
@@ -56,6 +73,145 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+@dataclass
+class StreamDelta:
+    """ストリーミング応答の差分
+
+    Attributes:
+        content: 新たに届いたテキスト
+        tool_call: 引数まで受信し終えたツール呼び出し（1件ずつ）
+        response: 組み立て済みの応答（最後の差分のみ）
+    """
+
+    content: str = ""
+    tool_call: ToolCall | None = None
+    response: LLMResponse | None = None
+
+
+@dataclass
+class CandidateBatch:
+    """1つのプロンプトから生成した複数の候補（LLMClient.chat_candidates の結果）
+
+    Attributes:
+        responses: 候補の応答（生成順）
+        usage: 全候補の合計トークン使用量
+        sampling: 生成方法（"n": 1回のリクエストで n 件 / "parallel": 同じリクエストを並行送信）
+    """
+
+    responses: list[LLMResponse]
+    usage: dict[str, int] = field(default_factory=dict)
+    sampling: Literal["n", "parallel"] = "parallel"
+
+    def to_referee_candidates(self, prefix: str = "candidate") -> dict[str, dict[str, Any]]:
+        """Referee Bee（DiffTester.compare）に渡す {candidate_id: output_dict} に変換する"""
+        return {
+            f"{prefix}-{i}": {
+                "content": response.content or "",
+                "tool_calls": [
+                    {"name": tc.name, "arguments": tc.arguments} for tc in response.tool_calls
+                ],
+            }
+            for i, response in enumerate(self.responses)
+        }
+
+
+def _parse_arguments(arguments: Any) -> dict[str, Any]:
+    """ツール呼び出しの引数（JSON文字列または dict）を dict にする"""
+    if isinstance(arguments, str):
+        return json.loads(arguments) if arguments.strip() else {}
+    return dict(arguments or {})
+
+
+class StreamAssembler:
+    """LiteLLMのストリーミングチャンクから LLMResponse を組み立てる
+
+    ツール呼び出しは index ごとに名前と引数の断片を連結し、次の index が
+    始まった時点（最後の1件はストリームの終わり）で完成したものとして返す。
+    """
+
+    def __init__(self) -> None:
+        self._content: list[str] = []
+        self._calls: dict[int, dict[str, str]] = {}
+        self._emitted: set[int] = set()
+        self._finish_reason: str | None = None
+        self._usage: dict[str, int] = {}
+
+    def feed(self, chunk: Any) -> list[StreamDelta]:
+        """チャンクを取り込み、新たに確定した差分を返す"""
+        deltas: list[StreamDelta] = []
+        usage = getattr(chunk, "usage", None)
+        if usage is not None:
+            self._usage = _usage_to_dict(usage)
+        choices = getattr(chunk, "choices", None) or []
+        if not choices:
+            return deltas
+        choice = choices[0]
+        delta = choice.delta
+        if delta.content:
+            self._content.append(delta.content)
+            deltas.append(StreamDelta(content=delta.content))
+        for tc in getattr(delta, "tool_calls", None) or []:
+            index = tc.index if tc.index is not None else max(self._calls, default=-1) + 1
+            # 新しい index が始まったら、それより前のツール呼び出しは受信し終えている
+            deltas.extend(self._complete_calls(before=index))
+            entry = self._calls.setdefault(index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                entry["id"] = tc.id
+            if tc.function is not None:
+                if tc.function.name:
+                    entry["name"] = tc.function.name
+                if tc.function.arguments:
+                    entry["arguments"] += tc.function.arguments
+        if choice.finish_reason:
+            self._finish_reason = choice.finish_reason
+        return deltas
+
+    def _complete_calls(self, before: int | None = None) -> list[StreamDelta]:
+        deltas = []
+        for index in sorted(self._calls):
+            if index in self._emitted or (before is not None and index >= before):
+                continue
+            self._emitted.add(index)
+            deltas.append(StreamDelta(tool_call=self._tool_call(index)))
+        return deltas
+
+    def _tool_call(self, index: int) -> ToolCall:
+        entry = self._calls[index]
+        return ToolCall(
+            id=entry["id"], name=entry["name"], arguments=_parse_arguments(entry["arguments"])
+        )
+
+    def finish(self) -> tuple[list[StreamDelta], LLMResponse]:
+        """ストリームの終わりに、残りのツール呼び出しと組み立て済みの応答を返す"""
+        deltas = self._complete_calls()
+        response = LLMResponse(
+            content="".join(self._content) or None,
+            tool_calls=[self._tool_call(index) for index in sorted(self._calls)],
+            finish_reason=self._finish_reason or "stop",
+            usage=self._usage,
+        )
+        return deltas, response
+
+
+def _usage_to_dict(usage: Any) -> dict[str, int]:
+    """LiteLLMの usage を dict にする
+
+    プロバイダーのプロンプトキャッシュから読んだトークン数が報告されていれば
+    cached_tokens に入れる（LiteLLM が OpenAI の prompt_tokens_details.cached_tokens と
+    Anthropic の cache_read_input_tokens を prompt_tokens_details に揃える）。
+    """
+    result = {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if isinstance(cached_tokens, int) and cached_tokens > 0:
+        result["cached_tokens"] = cached_tokens
+    return result
+
+
 def _build_litellm_model_name(config: LLMConfig) -> str:
     """LiteLLM用のモデル名を構築する
 
@@ -90,6 +246,92 @@ def _build_litellm_model_name(config: LLMConfig) -> str:
     return f"{provider}/{model}"
 
 
+def _response_headers(response: Any) -> Mapping[str, Any] | None:
+    """LiteLLMの応答からプロバイダーの応答ヘッダーを取り出す"""
+    hidden = getattr(response, "_hidden_params", None)
+    headers = hidden.get("additional_headers") if isinstance(hidden, dict) else None
+    return headers if isinstance(headers, Mapping) else None
+
+
+def _error_headers(err: Exception) -> Mapping[str, Any] | None:
+    """LiteLLMの例外からプロバイダーの応答ヘッダーを取り出す"""
+    headers = getattr(getattr(err, "response", None), "headers", None)
+    return headers if isinstance(headers, Mapping) else None
+
+
+def _estimate_cost(
+    model_name: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> float:
+    """LiteLLMの料金表から推定コスト（USD）を求める（料金表にないモデルは 0）
+
+    プロンプトキャッシュから読んだトークンはキャッシュ読み出しの料金で計算する。
+    """
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cache_read_input_tokens=cached_tokens,
+        )
+    except Exception:
+        return 0.0
+    return float(prompt_cost + completion_cost)
+
+
+def _split_model_name(model_name: str) -> tuple[str, str]:
+    """LiteLLM 形式のモデル名を (provider, model) に分ける"""
+    try:
+        model, provider, _, _ = litellm.get_llm_provider(model_name)
+    except Exception:
+        provider, _, model = model_name.rpartition("/")
+    return provider, model
+
+
+def _mark_cache_prefix(
+    openai_messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]] | None]:
+    """ツール定義と先頭のシステムメッセージの末尾に cache_control を付けたコピーを返す
+
+    Anthropic はツール定義 → システムプロンプト → メッセージの順に先頭をキャッシュするため、
+    区切りは最後のツール定義と最後の先頭システムメッセージの2か所に置く。
+    """
+    control = {"type": "ephemeral"}
+    marked_tools = None
+    if tools:
+        marked_tools = [*tools[:-1], {**tools[-1], "cache_control": control}]
+    last_system = -1
+    for index, message in enumerate(openai_messages):
+        if message["role"] != "system":
+            break
+        last_system = index
+    marked = list(openai_messages)
+    if last_system >= 0:
+        message = marked[last_system]
+        marked[last_system] = {
+            **message,
+            "content": [{"type": "text", "text": message["content"], "cache_control": control}],
+        }
+    return marked, marked_tools
+
+
+def _response_to_cache(response: LLMResponse) -> dict[str, Any]:
+    """LLMResponse をキャッシュに保存する形式に変換"""
+    data = asdict(response)
+    del data["cached"]
+    return data
+
+
+def _response_from_cache(data: Mapping[str, Any]) -> LLMResponse:
+    """キャッシュの内容から LLMResponse を復元"""
+    return LLMResponse(
+        content=data.get("content"),
+        tool_calls=[ToolCall(**tc) for tc in data.get("tool_calls", [])],
+        finish_reason=data.get("finish_reason", "stop"),
+        usage=dict(data.get("usage", {})),
+        cached=True,
+    )
+
+
 class LLMClient:
     """LLMクライアント
 
@@ -100,24 +342,44 @@ class LLMClient:
         - Ollamaなどローカルモデルはapi_keyが不要（check_api_keyは常にTrue）
         - リトライ/フォールバックはLiteLLMの組込み機能で処理
         - ColonyForge独自レートリミッターとの二重保護
+        - 送信順は LLMRequestScheduler が優先度クラスと Hive/Colony 間の公平性で決める
+        - 決定的なリクエスト（既定では temperature 0）の応答は LLMResponseCache に保存し、
+          同じリクエストではプロバイダーを呼ばずに返す
+        - 同時に送られた同一リクエストは1回の送信にまとめる（config.coalesce）
+        - 主モデルの応答が遅ければ fallback_models の先頭にも送り、先に返った方を使う
+          （config.hedging）
+        - provider が replay なら LiteLLM の代わりに記録済みの応答を返す（config.replay）
+        - 送信した呼び出しの順番待ち・応答時間・トークン数・推定コストを
+          LLMTelemetry に記録する（config.telemetry）
+        - メッセージは一定のバイト列で送り（ツール呼び出しの引数はキー順）、
+          Claude 系ではツール定義と先頭のシステムプロンプトの末尾にキャッシュ指示を付ける
+          （config.prompt_caching）
     """
 
     # APIキー不要なプロバイダー
-    _NO_API_KEY_PROVIDERS = {"ollama", "ollama_chat"}
+    _NO_API_KEY_PROVIDERS = {"ollama", "ollama_chat", "replay"}
+    # プロンプトキャッシュに明示的な cache_control 指示が必要なプロバイダー（Claude 系モデル）
+    _CACHE_CONTROL_PROVIDERS = {"anthropic", "bedrock", "vertex_ai"}
 
     def __init__(
         self,
         config: LLMConfig | None = None,
         rate_limiter: RateLimiter | None = None,
+        cache: LLMResponseCache | None = None,
     ):
         """初期化
 
         Args:
             config: LLM設定（省略時はグローバル設定を使用）
             rate_limiter: レートリミッター（省略時は自動取得）
+            cache: 応答キャッシュ（省略時は config.cache から作成）
         """
         self.config = config or get_settings().llm
         self._rate_limiter = rate_limiter
+        self._limiter_injected = rate_limiter is not None
+        self._fallback_limiter: RateLimiter | None = None
+        self._scheduler: LLMRequestScheduler | None = None
+        self._cache = cache
 
     def check_api_key(self) -> bool:
         """APIキーが設定されているかチェック（起動時バリデーション用）
@@ -137,20 +399,77 @@ class LLMClient:
         """レートリミッターを取得（非同期）"""
         if self._rate_limiter is None:
             registry = get_rate_limiter_registry()
-            limiter_key = f"{self.config.provider}:{self.config.model}"
-
-            # 設定からRateLimitConfigを作成
-            rate_config = RateLimitConfig(
-                requests_per_minute=self.config.rate_limit.requests_per_minute,
-                requests_per_day=self.config.rate_limit.requests_per_day,
-                tokens_per_minute=self.config.rate_limit.tokens_per_minute,
-                max_concurrent=self.config.rate_limit.max_concurrent,
-                burst_limit=self.config.rate_limit.burst_limit,
-                retry_after_429=self.config.rate_limit.retry_after_429,
+            self._rate_limiter = await registry.get_limiter(
+                self._limiter_key, self._rate_limit_config()
             )
-            self._rate_limiter = await registry.get_limiter(limiter_key, rate_config)
         return self._rate_limiter
 
+    async def _get_fallback_limiter(self) -> RateLimiter:
+        """ヘッジ先（fallback_models の先頭）のレートリミッターを取得
+
+        主モデルとは別の provider:model の枠として、同じ上限設定で共有する。
+        """
+        if self._fallback_limiter is None:
+            provider, model = _split_model_name(self.config.fallback_models[0])
+            registry = get_rate_limiter_registry()
+            self._fallback_limiter = await registry.get_limiter(
+                f"{provider}:{model}", self._rate_limit_config()
+            )
+        return self._fallback_limiter
+
+    def _rate_limit_config(self) -> RateLimitConfig:
+        """設定からRateLimitConfigを作成"""
+        return RateLimitConfig(
+            requests_per_minute=self.config.rate_limit.requests_per_minute,
+            requests_per_day=self.config.rate_limit.requests_per_day,
+            tokens_per_minute=self.config.rate_limit.tokens_per_minute,
+            max_concurrent=self.config.rate_limit.max_concurrent,
+            burst_limit=self.config.rate_limit.burst_limit,
+            retry_after_429=self.config.rate_limit.retry_after_429,
+            shared=self.config.rate_limit.shared,
+            state_dir=self.config.rate_limit.state_dir,
+            adaptive=self.config.rate_limit.adaptive,
+        )
+
+    def _get_scheduler(self, rate_limiter: RateLimiter) -> LLMRequestScheduler:
+        """スケジューラーを取得
+
+        同じレートリミッターを使うクライアント間で1つを共有する（注入された
+        リミッターの場合はクライアントごと）。同時送出数はリミッターの
+        max_concurrent（適応型なら実効値）に合わせる。
+        """
+        if self._scheduler is None:
+
+            def capacity() -> int:
+                return rate_limiter.config.max_concurrent
+
+            if self._limiter_injected:
+                self._scheduler = LLMRequestScheduler(capacity)
+            else:
+                self._scheduler = get_request_scheduler(self._limiter_key, capacity)
+        return self._scheduler
+
+    def _get_cache(self) -> LLMResponseCache | None:
+        """このリクエストに使う応答キャッシュ（使わない場合は None）
+
+        mode が auto なら temperature 0 の場合のみ使う。
+        """
+        mode = self.config.cache.mode
+        if mode == "off" or (mode == "auto" and self.config.temperature != 0):
+            return None
+        if self._cache is None:
+            directory = self.config.cache.directory
+            self._cache = get_response_cache(
+                Path(directory) if directory else get_settings().get_vault_path() / "llm_cache",
+                max_bytes=self.config.cache.max_bytes,
+                ttl_seconds=self.config.cache.ttl_seconds,
+            )
+        return self._cache
+
+    @property
+    def _limiter_key(self) -> str:
+        return f"{self.config.provider}:{self.config.model}"
+
     async def close(self) -> None:
         """クライアントを閉じる（互換性のため保持）"""
         pass
@@ -179,6 +498,10 @@ class LLMClient:
         LiteLLMはOpenAI形式のメッセージを全プロバイダーに自動変換するため、
         ここではOpenAI形式に統一する。
 
+        メッセージの順序はそのまま保つ（途中に挿入されたシステムメッセージも動かさない）。
+        プロバイダーのプロンプトキャッシュは先頭がバイト単位で一致する場合にだけ効くため、
+        ツール呼び出しの引数はキーを並べ替えて JSON にする。
+
         Args:
             messages: ColonyForge内部のMessageリスト
 
@@ -197,7 +520,7 @@ class LLMClient:
                         "type": "function",
                         "function": {
                             "name": tc.name,
-                            "arguments": json.dumps(tc.arguments),
+                            "arguments": json.dumps(tc.arguments, sort_keys=True),
                         },
                     }
                     for tc in msg.tool_calls
@@ -205,6 +528,23 @@ class LLMClient:
             result.append(msg_dict)
         return result
 
+    @staticmethod
+    def _estimate_prompt_tokens(
+        model_name: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+    ) -> int:
+        """送信前にプロンプトのトークン数を見積もる（ツール定義を含む）
+
+        LiteLLMのトークナイザーを使い、使えないモデルでは文字数から概算する
+        （約4文字/トークン）。
+        """
+        try:
+            return int(litellm.token_counter(model=model_name, messages=messages, tools=tools))
+        except Exception:
+            text = json.dumps([messages, tools or []], ensure_ascii=False, default=str)
+            return len(text) // 4 + 1
+
     def _parse_response(self, response: litellm.ModelResponse) -> LLMResponse:
         """LiteLLMレスポンスをColonyForge内部形式に変換
 
@@ -217,7 +557,13 @@ class LLMClient:
         Returns:
             ColonyForge内部のLLMResponse
         """
-        choice = response.choices[0]
+        result = self._parse_choice(response.choices[0])
+        result.usage = self._parse_usage(response)
+        return result
+
+    @staticmethod
+    def _parse_choice(choice: Any) -> LLMResponse:
+        """レスポンスの choice 1件を LLMResponse に変換する（usage は含まない）"""
         message = choice.message
 
         tool_calls = []
@@ -234,27 +580,26 @@ class LLMClient:
                     )
                 )
 
-        # usageをdict化
-        usage = {}
-        if response.usage:
-            usage = {
-                "prompt_tokens": response.usage.prompt_tokens or 0,
-                "completion_tokens": response.usage.completion_tokens or 0,
-                "total_tokens": response.usage.total_tokens or 0,
-            }
-
         return LLMResponse(
             content=message.content,
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason or "stop",
-            usage=usage,
         )
 
+    @staticmethod
+    def _parse_usage(response: Any) -> dict[str, int]:
+        """レスポンスの usage を dict にする"""
+        if not response.usage:
+            return {}
+        return _usage_to_dict(response.usage)
+
     async def chat(
         self,
         messages: list[Message],
         tools: list[dict[str, Any]] | None = None,
         tool_choice: str | dict[str, Any] | None = None,
+        priority: RequestPriority | None = None,
+        flow: str | None = None,
     ) -> LLMResponse:
         """チャット完了を呼び出す（LiteLLM SDK経由）
 
@@ -265,64 +610,538 @@ class LLMClient:
             messages: メッセージリスト
             tools: ツール定義リスト（OpenAI形式）
             tool_choice: ツール選択（"auto", "none", etc.）
+            priority: 優先度クラス（省略時は llm_request_scope の値）
+            flow: 公平性の単位 "hive_id/colony_id"（省略時は llm_request_scope の値）
 
         Returns:
             LLM応答
         """
-        # レートリミッターを取得
+        # LiteLLM用モデル名を構築
+        model_name = _build_litellm_model_name(self.config)
+
+        # メッセージをOpenAI互換形式に変換
+        openai_messages = self._build_messages(messages)
+
+        cache = self._get_cache()
+        if cache is None and not self.config.coalesce:
+            return await self._complete(
+                model_name, openai_messages, tools, tool_choice, priority, flow
+            )
+
+        request_key = self._request_key(model_name, openai_messages, tools, tool_choice)
+
+        # 応答キャッシュ（ヒット時はレート制限・スケジューラー・送信を全て省く）
+        if cache is not None:
+            cached = cache.get(request_key)
+            if cached is not None:
+                logger.debug("LLM応答キャッシュにヒット: model=%s", model_name)
+                return _response_from_cache(cached)
+
+        async def fetch() -> LLMResponse:
+            result = await self._complete(
+                model_name, openai_messages, tools, tool_choice, priority, flow
+            )
+            if cache is not None:
+                cache.put(request_key, _response_to_cache(result), model=model_name)
+            return result
+
+        # 同じリクエストが実行中なら、その応答を待つ（送信は1回だけ）
+        if self.config.coalesce:
+            return await get_inflight_coalescer().run(request_key, fetch)
+        return await fetch()
+
+    async def chat_stream(
+        self,
+        messages: list[Message],
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str | dict[str, Any] | None = None,
+        priority: RequestPriority | None = None,
+        flow: str | None = None,
+    ) -> AsyncIterator[StreamDelta]:
+        """チャット完了をストリーミングで呼び出す
+
+        テキストは届いた順に、ツール呼び出しは引数を受信し終えたものから1件ずつ返し、
+        最後に組み立て済みの LLMResponse を response に設定した差分を返す:
+            async for delta in client.chat_stream(messages, tools):
+                if delta.content: ...
+                if delta.tool_call: ...
+                if delta.response: final = delta.response
+
+        スケジューラーの順番とレートリミッターの枠はストリームの終わりまで保持する。
+        応答キャッシュは chat と共通（ヒット時は1回で全体を返す）。同一リクエストの
+        集約は行わない。引数は chat と同じ。
+        """
+        model_name = _build_litellm_model_name(self.config)
+        openai_messages = self._build_messages(messages)
+
+        cache = self._get_cache()
+        request_key = None
+        if cache is not None:
+            request_key = self._request_key(model_name, openai_messages, tools, tool_choice)
+            cached = cache.get(request_key)
+            if cached is not None:
+                logger.debug("LLM応答キャッシュにヒット: model=%s", model_name)
+                response = _response_from_cache(cached)
+                for tool_call in response.tool_calls:
+                    yield StreamDelta(tool_call=tool_call)
+                yield StreamDelta(content=response.content or "", response=response)
+                return
+
         rate_limiter = await self._get_rate_limiter()
+        kwargs = self._build_kwargs(model_name, openai_messages, tools, tool_choice)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+        reserved = self._reserve_tokens(model_name, openai_messages, tools)
+        assembler = StreamAssembler()
+        timer = self._start_timer(flow)
+
+        async with await self._acquire_turn(rate_limiter, priority, flow, reserved):
+            slot = await rate_limiter.acquire_with_tokens(reserved)
+            async with slot:
+                timer.mark_sent()
+                try:
+                    stream = await self._call_litellm(rate_limiter, kwargs, reserved)
+                    async for chunk in stream:
+                        for delta in assembler.feed(chunk):
+                            yield delta
+                except Exception:
+                    self._record_call(timer, model_name, None, error=True)
+                    raise
+                final_deltas, result = assembler.finish()
+                self._record_call(timer, model_name, result.usage)
+                rate_limiter.record_success(_response_headers(stream))
+                if result.usage.get("total_tokens"):
+                    slot.reconcile(result.usage["total_tokens"])
+
+        if cache is not None and request_key is not None:
+            cache.put(request_key, _response_to_cache(result), model=model_name)
+        for delta in final_deltas:
+            yield delta
+        yield StreamDelta(response=result)
+
+    async def chat_candidates(
+        self,
+        messages: list[Message],
+        n: int,
+        tools: list[dict[str, Any]] | None = None,
+        tool_choice: str | dict[str, Any] | None = None,
+        priority: RequestPriority | None = None,
+        flow: str | None = None,
+    ) -> CandidateBatch:
+        """同じプロンプトから n 件の候補を生成する（N案並列生成）
 
-        # レート制限を待機
-        await rate_limiter.wait()
+        モデルが n パラメーターに対応していれば1回のリクエストで n 件を受け取り、
+        プロンプトは1回ぶんだけ送る。対応していなければ、同じメッセージ・ツール定義で
+        n 件のリクエストを並行送信する。どちらの場合もスケジューラーの順番と
+        レートリミッターの枠は1回だけ取得し、全候補ぶんのトークンをまとめて予約する。
 
-        async with await rate_limiter.acquire():
-            # LiteLLM用モデル名を構築
-            model_name = _build_litellm_model_name(self.config)
+        候補ごとに異なる応答が欲しいため、応答キャッシュと同一リクエストの集約は使わない
+        （temperature 0 では全候補がほぼ同じになる）。
 
-            # メッセージをOpenAI互換形式に変換
-            openai_messages = self._build_messages(messages)
+        Args:
+            messages: メッセージリスト
+            n: 候補数
+            tools: ツール定義リスト（OpenAI形式）
+            tool_choice: ツール選択
+            priority: 優先度クラス（省略時は llm_request_scope の値）
+            flow: 公平性の単位 "hive_id/colony_id"（省略時は llm_request_scope の値）
 
-            # LiteLLM呼び出しパラメータ
-            kwargs: dict[str, Any] = {
+        Returns:
+            n 件の候補
+        """
+        if n < 1:
+            raise ValueError(f"候補数は1以上: n={n}")
+        model_name = _build_litellm_model_name(self.config)
+        openai_messages = self._build_messages(messages)
+        rate_limiter = await self._get_rate_limiter()
+        kwargs = self._build_kwargs(model_name, openai_messages, tools, tool_choice)
+        prompt_tokens = self._estimate_prompt_tokens(model_name, openai_messages, tools)
+        sampling = self._candidate_sampling(n)
+        if sampling == "n":
+            kwargs["n"] = n
+            reserved = prompt_tokens + n * self.config.max_tokens
+        else:
+            reserved = n * (prompt_tokens + self.config.max_tokens)
+        timer = self._start_timer(flow)
+
+        async with await self._acquire_turn(rate_limiter, priority, flow, reserved):
+            slot = await rate_limiter.acquire_with_tokens(reserved)
+            async with slot:
+                timer.mark_sent()
+                try:
+                    if sampling == "n":
+                        response = await self._call_litellm(rate_limiter, kwargs, reserved)
+                        raw = [response]
+                        responses = [self._parse_choice(c) for c in response.choices]
+                        usage = self._parse_usage(response)
+                    else:
+                        raw = await asyncio.gather(
+                            *(self._call_litellm(rate_limiter, kwargs, reserved) for _ in range(n))
+                        )
+                        responses = [self._parse_response(r) for r in raw]
+                        usage = {}
+                        for result in responses:
+                            for name, count in result.usage.items():
+                                usage[name] = usage.get(name, 0) + count
+                except Exception:
+                    self._record_call(timer, model_name, None, error=True)
+                    raise
+                self._record_call(timer, model_name, usage)
+                rate_limiter.record_success(_response_headers(raw[-1]))
+                if usage.get("total_tokens"):
+                    slot.reconcile(usage["total_tokens"])
+        return CandidateBatch(responses=responses, usage=usage, sampling=sampling)
+
+    def _candidate_sampling(self, n: int) -> Literal["n", "parallel"]:
+        """複数候補の生成方法を決める（config.candidate_sampling）"""
+        mode = self.config.candidate_sampling
+        if mode != "auto":
+            return mode
+        if n == 1:
+            return "parallel"
+        try:
+            params = litellm.get_supported_openai_params(
+                model=self.config.model, custom_llm_provider=self.config.provider
+            )
+        except Exception:
+            return "parallel"
+        return "n" if params and "n" in params else "parallel"
+
+    def _request_key(
+        self,
+        model_name: str,
+        openai_messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str | dict[str, Any] | None,
+    ) -> str:
+        """応答キャッシュと同一リクエストの集約に使うキー"""
+        return make_cache_key(
+            {
                 "model": model_name,
+                "api_base": self.config.api_base,
                 "messages": openai_messages,
-                "max_tokens": self.config.max_tokens,
+                "tools": tools,
+                "tool_choice": tool_choice,
                 "temperature": self.config.temperature,
-                "num_retries": self.config.num_retries,
+                "max_tokens": self.config.max_tokens,
             }
+        )
 
-            # APIキー設定（ローカルプロバイダーはスキップ）
-            api_key = self._get_api_key()
-            if api_key:
-                kwargs["api_key"] = api_key
-
-            # カスタムAPIベースURL（Ollama, LiteLLM Proxy等）
-            if self.config.api_base:
-                kwargs["api_base"] = self.config.api_base
-
-            # ツール定義
-            if tools:
-                kwargs["tools"] = tools
-            if tool_choice:
-                kwargs["tool_choice"] = tool_choice
-
-            # フォールバック設定
-            if self.config.fallback_models:
-                kwargs["fallbacks"] = [{"model": m} for m in self.config.fallback_models]
-
-            logger.debug(
-                "LiteLLM呼び出し: model=%s, messages=%d, tools=%s",
-                model_name,
-                len(openai_messages),
-                bool(tools),
-            )
+    def _build_kwargs(
+        self,
+        model_name: str,
+        openai_messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str | dict[str, Any] | None,
+    ) -> dict[str, Any]:
+        """LiteLLM呼び出しパラメータを組み立てる"""
+        kwargs: dict[str, Any] = {
+            "model": model_name,
+            "messages": openai_messages,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "num_retries": self.config.num_retries,
+        }
+
+        # APIキー設定（ローカルプロバイダーはスキップ）
+        api_key = self._get_api_key()
+        if api_key:
+            kwargs["api_key"] = api_key
+
+        # カスタムAPIベースURL（Ollama, LiteLLM Proxy等）
+        if self.config.api_base:
+            kwargs["api_base"] = self.config.api_base
+
+        # ツール定義
+        if tools:
+            kwargs["tools"] = tools
+        if tool_choice:
+            kwargs["tool_choice"] = tool_choice
+
+        # プロンプトキャッシュの指示（応答キャッシュのキーには含めない）
+        if self._uses_cache_control(model_name):
+            kwargs["messages"], cached_tools = _mark_cache_prefix(openai_messages, tools)
+            if cached_tools:
+                kwargs["tools"] = cached_tools
+
+        # フォールバック設定
+        if self.config.fallback_models:
+            kwargs["fallbacks"] = [{"model": m} for m in self.config.fallback_models]
+        return kwargs
+
+    def _uses_cache_control(self, model_name: str) -> bool:
+        """プロンプト先頭に cache_control 指示を付けるか（config.prompt_caching）
+
+        OpenAI・DeepSeek などは同じ先頭を自動でキャッシュするため指示は不要で、
+        Claude 系（Anthropic / Bedrock / Vertex AI）で LiteLLM の料金表が
+        プロンプトキャッシュ対応としているモデルにだけ付ける。
+        """
+        if not self.config.prompt_caching:
+            return False
+        if self.config.provider not in self._CACHE_CONTROL_PROVIDERS:
+            return False
+        if "claude" not in self.config.model.lower():
+            return False
+        try:
+            return bool(litellm.utils.supports_prompt_caching(model=model_name))
+        except Exception:
+            return False
+
+    def _reserve_tokens(
+        self,
+        model_name: str,
+        openai_messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+    ) -> int:
+        """予約するトークン数
+
+        プロンプト（ツール定義を含む）と最大出力ぶんのトークンを予約し、
+        応答の usage で実際の使用量に補正する。失敗時は予約を残す（安全側）。
+        """
+        return (
+            self._estimate_prompt_tokens(model_name, openai_messages, tools)
+            + self.config.max_tokens
+        )
+
+    async def _acquire_turn(
+        self,
+        rate_limiter: RateLimiter,
+        priority: RequestPriority | None,
+        flow: str | None,
+        reserved: int,
+    ) -> SchedulerSlot:
+        """スケジューラーの順番を待つ"""
+        request_class = current_request_class()
+        scheduler = self._get_scheduler(rate_limiter)
+        return await scheduler.acquire(
+            priority or request_class.priority, flow or request_class.flow, cost=reserved
+        )
 
+    async def _complete(
+        self,
+        model_name: str,
+        openai_messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str | dict[str, Any] | None,
+        priority: RequestPriority | None,
+        flow: str | None,
+    ) -> LLMResponse:
+        """スケジューラーの順番を待ってプロバイダーに送信する"""
+        # レートリミッターを取得
+        rate_limiter = await self._get_rate_limiter()
+        kwargs = self._build_kwargs(model_name, openai_messages, tools, tool_choice)
+        reserved = self._reserve_tokens(model_name, openai_messages, tools)
+        timer = self._start_timer(flow)
+        async with await self._acquire_turn(rate_limiter, priority, flow, reserved):
+            return await self._send(rate_limiter, kwargs, reserved, timer)
+
+    async def _send(
+        self, rate_limiter: RateLimiter, kwargs: dict[str, Any], reserved: int, timer: CallTimer
+    ) -> LLMResponse:
+        """レートリミッターの枠を取得して送信する"""
+        slot = await rate_limiter.acquire_with_tokens(reserved)
+        async with slot:
+            timer.mark_sent()
             try:
-                # LiteLLM非同期呼び出し
-                response = await litellm.acompletion(**kwargs)
-            except litellm.exceptions.AuthenticationError as err:
-                raise ValueError(
-                    f"認証エラー: 環境変数 {self.config.api_key_env} を確認してください"
-                ) from err
-
-            return self._parse_response(response)
+                response, hedge_won = await self._call_hedged(rate_limiter, kwargs, reserved, timer)
+            except Exception:
+                self._record_call(timer, kwargs["model"], None, error=True)
+                raise
+            result = self._parse_response(response)
+            if hedge_won:
+                # フォールバックモデルの枠は _call_fallback で補正済み。キャンセルした
+                # 主モデルの予約はプロンプトが処理された可能性があるため残す（安全側）
+                self._record_call(
+                    timer, self.config.fallback_models[0], result.usage, fallback=True
+                )
+                return result
+            rate_limiter.record_success(_response_headers(response))
+            self._record_call(timer, kwargs["model"], result.usage)
+            if result.usage.get("total_tokens"):
+                slot.reconcile(result.usage["total_tokens"])
+            return result
+
+    @staticmethod
+    def _start_timer(flow: str | None) -> CallTimer:
+        """順番待ちの前に計時を始める"""
+        return CallTimer(flow=flow or current_request_class().flow)
+
+    def _record_call(
+        self,
+        timer: CallTimer,
+        model_name: str,
+        usage: Mapping[str, int] | None,
+        error: bool = False,
+        cancelled: bool = False,
+        fallback: bool = False,
+    ) -> None:
+        """送信した呼び出しの計測値をテレメトリに記録する（config.telemetry）
+
+        fallback なら model_name（LiteLLM 形式）のモデルの呼び出しとして記録する。
+        cancelled はヘッジで採用しなかった呼び出しで、usage には推定のプロンプトトークン数を渡す。
+        """
+        telemetry = self.config.telemetry
+        if not telemetry.enabled:
+            return
+        if fallback:
+            provider, model = _split_model_name(model_name)
+        else:
+            provider, model = self.config.provider, self.config.model
+        queue_wait, latency = timer.durations()
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = usage.get("cached_tokens", 0)
+        get_llm_telemetry().record(
+            LLMCallRecord(
+                provider=provider,
+                model=model,
+                flow=timer.flow,
+                queue_wait_seconds=queue_wait,
+                latency_seconds=latency,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+                cost_usd=_estimate_cost(model_name, prompt_tokens, completion_tokens, cached_tokens)
+                if not error
+                else 0.0,
+                error=error,
+                cancelled=cancelled,
+                scope=current_telemetry_scope(),
+            ),
+            record_event=telemetry.record_events,
+        )
+
+    async def _call_hedged(
+        self, rate_limiter: RateLimiter, kwargs: dict[str, Any], reserved: int, timer: CallTimer
+    ) -> tuple[Any, bool]:
+        """主モデルに送信し、期限までに応答がなければフォールバックモデルにも送信する
+
+        先に成功した方を採用し、もう一方はキャンセルする。両方失敗した場合は
+        主モデルの例外を送出する。ヘッジが無効、またはフォールバックモデルがなければ
+        主モデルにだけ送信する。フォールバックモデルへはそのモデルのレートリミッターの
+        枠とトークンを取得してから送る（_call_fallback）。キャンセルした側は
+        推定のプロンプトトークン数と推定コストをテレメトリに記録する。
+
+        Returns:
+            (LiteLLMのレスポンス, フォールバックモデルの応答を採用したか)
+        """
+        hedging = self.config.hedging
+        if not hedging.enabled or not self.config.fallback_models:
+            return await self._call_litellm(rate_limiter, kwargs, reserved), False
+
+        policy = get_hedge_policy(kwargs["model"], hedging)
+        policy.record_request()
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self._call_litellm(rate_limiter, kwargs, reserved))
+        tasks: list[asyncio.Future[Any]] = [primary]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=policy.deadline())
+            if not done and policy.try_hedge():
+                hedge_kwargs = self._hedge_kwargs(kwargs)
+                logger.info(
+                    "LLM応答が %.1f 秒を超えたため %s にも送信",
+                    policy.deadline(),
+                    hedge_kwargs["model"],
+                )
+                tasks.append(
+                    asyncio.ensure_future(self._call_fallback(hedge_kwargs, reserved, timer))
+                )
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 同時に返った場合は主モデルを優先する
+                for task in sorted(done, key=lambda t: t is not primary):
+                    if task.exception() is not None:
+                        continue
+                    if task is primary:
+                        policy.record_latency(time.perf_counter() - started)
+                        return task.result(), False
+                    policy.record_win()
+                    return task.result(), True
+            return primary.result(), False
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # 採用しなかった側の例外を取得済みにする
+            # キャンセルした側の接続を閉じ終えてから返す
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            if primary in unfinished:
+                self._record_call(
+                    timer, kwargs["model"], self._cancelled_usage(reserved), cancelled=True
+                )
+
+    async def _call_fallback(
+        self, hedge_kwargs: dict[str, Any], reserved: int, timer: CallTimer
+    ) -> Any:
+        """フォールバックモデルの枠とトークンを取得して送信する（ヘッジ用）
+
+        ヘッジの予算は追加送信の件数だけでなく、フォールバックモデルの
+        レート制限の範囲にも収まる。
+        """
+        limiter = await self._get_fallback_limiter()
+        slot = await limiter.acquire_with_tokens(reserved)
+        async with slot:
+            try:
+                response = await self._call_litellm(limiter, hedge_kwargs, reserved)
+            except asyncio.CancelledError:
+                self._record_call(
+                    timer,
+                    hedge_kwargs["model"],
+                    self._cancelled_usage(reserved),
+                    cancelled=True,
+                    fallback=True,
+                )
+                raise
+            limiter.record_success(_response_headers(response))
+            usage = self._parse_usage(response)
+            if usage.get("total_tokens"):
+                slot.reconcile(usage["total_tokens"])
+            return response
+
+    def _cancelled_usage(self, reserved: int) -> dict[str, int]:
+        """キャンセルした呼び出しの推定 usage（予約から最大出力ぶんを除いたプロンプト）"""
+        return {"prompt_tokens": max(0, reserved - self.config.max_tokens)}
+
+    def _hedge_kwargs(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """フォールバックモデル宛ての呼び出しパラメータ
+
+        プロバイダーが異なる場合は主モデルの APIキーと APIベースURL を渡さない
+        （LiteLLM がそのプロバイダーの環境変数を使う）。
+        """
+        hedge = {k: v for k, v in kwargs.items() if k != "fallbacks"}
+        hedge["model"] = self.config.fallback_models[0]
+        if hedge["model"].split("/")[0] != kwargs["model"].split("/")[0]:
+            hedge.pop("api_key", None)
+            hedge.pop("api_base", None)
+        return hedge
+
+    async def _call_litellm(
+        self, rate_limiter: RateLimiter, kwargs: dict[str, Any], reserved: int
+    ) -> Any:
+        """LiteLLMを呼び出す（認証エラーの変換と 429 / タイムアウトの記録）"""
+        logger.debug(
+            "LiteLLM呼び出し: model=%s, messages=%d, tools=%s, stream=%s, reserved_tokens=%d",
+            kwargs["model"],
+            len(kwargs["messages"]),
+            "tools" in kwargs,
+            kwargs.get("stream", False),
+            reserved,
+        )
+        try:
+            if self.config.provider == "replay":
+                # 記録済みの応答を返す（ネットワークなしの負荷試験・回帰試験用）
+                return await get_replay_provider(self.config.replay).acompletion(**kwargs)
+            # LiteLLM非同期呼び出し
+            return await litellm.acompletion(**kwargs)
+        except litellm.exceptions.AuthenticationError as err:
+            raise ValueError(
+                f"認証エラー: 環境変数 {self.config.api_key_env} を確認してください"
+            ) from err
+        except (litellm.exceptions.RateLimitError, litellm.exceptions.Timeout) as err:
+            # 以降のリクエストの送信レートと同時実行数を下げる（適応型の場合）
+            rate_limiter.record_throttle(_error_headers(err))
+            raise
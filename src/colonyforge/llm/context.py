@@ -0,0 +1,200 @@
+"""AgentRunner の会話履歴
+
+ツール使用の反復が続くと、全てのアシスタント応答とツール出力が履歴に残り、
+反復ごとのプロンプトが伸び続ける。ここでは次の2段階で履歴を圧縮する。
+
+- 大きなツール出力: 先頭・末尾の抜粋と参照（tool_call_id と元の長さ）に置き換える。
+  元の出力は full_outputs に保持し、LLM は read_tool_output ツールで参照から読み直せる
+- 見積もりトークン数が予算を超えたら: 直近 keep_recent_turns ターンを残し、
+  それより古いターン（アシスタント応答と対応するツール結果の組）を
+  1件の要約メッセージにまとめる
+
+トークン数はメッセージの追加時に1件ずつ見積もり、合計を逐次更新する。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+
+from ..core.config import ContextCompactionConfig
+from .client import Message
+
+# 要約に残すアシスタント応答・ツール引数の最大文字数
+SUMMARY_TEXT_CHARS = 200
+
+# メッセージ1件あたりの固定分（ロールや区切り）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 要約メッセージに残す行数の上限（超えた分は古い行から件数だけ残す）
+MAX_SUMMARY_LINES = 40
+
+SUMMARY_HEADER = "[これまでの経過の要約（古いやり取りは省略済み）]"
+
+# 抜粋に置き換えたツール出力を読み直すツールの名前
+READ_OUTPUT_TOOL = "read_tool_output"
+
+# read_tool_output の結果に付ける案内のために空けておく文字数
+READ_OUTPUT_NOTE_CHARS = 200
+
+
+def estimate_message_tokens(message: Message) -> int:
+    """メッセージのトークン数を見積もる（約4文字/トークン）"""
+    chars = len(message.content)
+    for tool_call in message.tool_calls or []:
+        chars += len(tool_call.name) + len(json.dumps(tool_call.arguments, ensure_ascii=False))
+    return chars // 4 + MESSAGE_OVERHEAD_TOKENS
+
+
+def _shorten(text: str, limit: int = SUMMARY_TEXT_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+@dataclass
+class CompactionStats:
+    """圧縮の統計"""
+
+    truncated_outputs: int = 0
+    truncated_chars: int = 0
+    summarized_turns: int = 0
+    summarized_tokens: int = 0
+
+
+@dataclass
+class ConversationContext:
+    """トークン数を逐次集計し、予算に収まるよう圧縮する会話履歴
+
+    先頭の system / user メッセージ（タスク）は常に残す。
+    """
+
+    policy: ContextCompactionConfig = field(default_factory=ContextCompactionConfig)
+    messages: list[Message] = field(default_factory=list)
+    full_outputs: dict[str, str] = field(default_factory=dict)
+    stats: CompactionStats = field(default_factory=CompactionStats)
+    _tokens: list[int] = field(default_factory=list)
+    _total: int = 0
+    _head: int = 0  # 常に残す先頭メッセージ数（タスクと要約）
+    _summary_lines: list[str] = field(default_factory=list)
+    _omitted_lines: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """履歴全体の見積もりトークン数"""
+        return self._total
+
+    def start(self, system_prompt: str, user_message: str) -> None:
+        """タスクのメッセージで履歴を始める"""
+        self.messages[:] = [
+            Message(role="system", content=system_prompt),
+            Message(role="user", content=user_message),
+        ]
+        self._tokens[:] = [estimate_message_tokens(m) for m in self.messages]
+        self._total = sum(self._tokens)
+        self._head = len(self.messages)
+        self._summary_lines.clear()
+        self._omitted_lines = 0
+
+    def append(self, message: Message) -> None:
+        """メッセージを追加する（大きなツール出力は抜粋に置き換える）"""
+        if message.role == "tool" and self.policy.enabled:
+            message = self._truncate_tool_output(message)
+        tokens = estimate_message_tokens(message)
+        self.messages.append(message)
+        self._tokens.append(tokens)
+        self._total += tokens
+
+    def _truncate_tool_output(self, message: Message) -> Message:
+        limit = self.policy.max_tool_result_chars
+        content = message.content
+        if len(content) <= limit:
+            return message
+        ref = message.tool_call_id or f"output-{len(self.full_outputs)}"
+        self.full_outputs[ref] = content
+        head = content[: limit * 3 // 4]
+        tail = content[-(limit // 4) :]
+        omitted = len(content) - len(head) - len(tail)
+        self.stats.truncated_outputs += 1
+        self.stats.truncated_chars += omitted
+        return Message(
+            role="tool",
+            tool_call_id=message.tool_call_id,
+            content=(
+                f"{head}\n\n[... 出力が長いため {omitted} 文字を省略"
+                f"（全 {len(content)} 文字、参照: {ref}。"
+                f"{READ_OUTPUT_TOOL} で全文を読める）...]\n\n{tail}"
+            ),
+        )
+
+    def read_output(self, ref: str, offset: int = 0) -> str:
+        """抜粋に置き換えたツール出力の全文を offset から読む
+
+        結果自体が再び抜粋に置き換えられないよう、1回に返すのは
+        max_tool_result_chars に収まる分だけにし、続きの offset を添える。
+        """
+        content = self.full_outputs.get(ref)
+        if content is None:
+            return json.dumps({"error": f"未知の参照: {ref}"}, ensure_ascii=False)
+        offset = max(0, offset)
+        end = offset + self.policy.max_tool_result_chars - READ_OUTPUT_NOTE_CHARS
+        chunk = content[offset:end]
+        if end >= len(content):
+            return chunk
+        return (
+            f"{chunk}\n\n[... 全 {len(content)} 文字中 {offset}〜{end} 文字目。"
+            f"続きは offset={end} で読める ...]"
+        )
+
+    def compact(self) -> bool:
+        """予算を超えていれば古いターンを要約に置き換える。置き換えた場合は True"""
+        if not self.policy.enabled or self.total_tokens <= self.policy.token_budget:
+            return False
+        turns = self._turn_starts()
+        if len(turns) <= self.policy.keep_recent_turns:
+            return False
+        cut = turns[-self.policy.keep_recent_turns]
+        body = self._head if not self._summary_lines else self._head - 1
+        dropped = self.messages[self._head : cut]
+        dropped_tokens = sum(self._tokens[self._head : cut])
+        self._summary_lines.extend(self._summarize(dropped))
+        if len(self._summary_lines) > MAX_SUMMARY_LINES:
+            overflow = len(self._summary_lines) - MAX_SUMMARY_LINES
+            self._omitted_lines += overflow
+            del self._summary_lines[:overflow]
+
+        header = [SUMMARY_HEADER]
+        if self._omitted_lines:
+            header.append(f"- （さらに古い {self._omitted_lines} 件は省略）")
+        summary = Message(role="user", content="\n".join([*header, *self._summary_lines]))
+        summary_tokens = estimate_message_tokens(summary)
+        self._total += summary_tokens - sum(self._tokens[body:cut])
+        self.messages[body:cut] = [summary]
+        self._tokens[body:cut] = [summary_tokens]
+        self._head = body + 1
+        self.stats.summarized_turns += len(turns) - self.policy.keep_recent_turns
+        self.stats.summarized_tokens += dropped_tokens
+        return True
+
+    def _turn_starts(self) -> list[int]:
+        """先頭以降の各ターン（アシスタント応答から次の応答の直前まで）の開始位置"""
+        return [
+            i for i in range(self._head, len(self.messages)) if self.messages[i].role == "assistant"
+        ]
+
+    @staticmethod
+    def _summarize(messages: list[Message]) -> list[str]:
+        """ターンを1行ずつの要約にする（LLM を使わない抽出的な要約）"""
+        results = {m.tool_call_id: m.content for m in messages if m.role == "tool"}
+        lines: list[str] = []
+        for message in messages:
+            if message.role != "assistant":
+                continue
+            if message.content.strip():
+                lines.append(f"- 応答: {_shorten(message.content)}")
+            for tool_call in message.tool_calls or []:
+                args = _shorten(json.dumps(tool_call.arguments, ensure_ascii=False), 120)
+                result = results.get(tool_call.id, "")
+                lines.append(
+                    f"- {tool_call.name}({args}) → {len(result)} 文字: {_shorten(result, 120)}"
+                )
+        return lines
@@ -0,0 +1,96 @@
+"""遅いLLM応答のヘッジ
+
+LiteLLM の fallbacks はエラー時にしか働かないため、プロバイダーが遅いだけの場合は
+エージェントがタイムアウトまで待たされる。主モデルが直近の応答時間の分位点
+（既定 p95）を過ぎても応答しなければ、同じリクエストを fallback_models の先頭にも送り、
+先に返った方を採用してもう一方をキャンセルする。
+
+- 期限は主モデルの成功した応答時間（直近 LATENCY_SAMPLE_SIZE 件）から算出する。
+  件数が min_samples に満たない間は initial_delay_seconds を使う
+- 追加送信はリクエスト数の max_hedge_ratio までに抑える（超える場合は主モデルを待つ）
+- 統計: ヘッジ率（追加送信 / リクエスト）と勝率（フォールバックが先に返った割合）
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from ..core.config import LLMHedgingConfig
+
+# 期限の算出に使う応答時間の件数
+LATENCY_SAMPLE_SIZE = 200
+
+
+class HedgePolicy:
+    """モデルごとのヘッジの期限と追加送信の予算"""
+
+    def __init__(self, config: LLMHedgingConfig) -> None:
+        self.config = config
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self._requests = 0
+        self._hedged = 0
+        self._wins = 0
+        self._over_budget = 0
+
+    def deadline(self) -> float:
+        """主モデルの応答を待つ秒数"""
+        if len(self._latencies) < self.config.min_samples:
+            return self.config.initial_delay_seconds
+        latencies = sorted(self._latencies)
+        return latencies[int(self.config.percentile * (len(latencies) - 1))]
+
+    def record_request(self) -> None:
+        """リクエストを1件数える"""
+        self._requests += 1
+
+    def record_latency(self, seconds: float) -> None:
+        """主モデルの成功した応答時間を記録する"""
+        self._latencies.append(seconds)
+
+    def try_hedge(self) -> bool:
+        """予算内なら追加送信を1件数えて True を返す"""
+        if self._hedged + 1 > self.config.max_hedge_ratio * self._requests:
+            self._over_budget += 1
+            return False
+        self._hedged += 1
+        return True
+
+    def record_win(self) -> None:
+        """フォールバックが先に返ったことを記録する"""
+        self._wins += 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """ヘッジの統計"""
+        return {
+            "requests": self._requests,
+            "hedged": self._hedged,
+            "hedge_rate": self._hedged / self._requests if self._requests else 0.0,
+            "hedge_wins": self._wins,
+            "win_rate": self._wins / self._hedged if self._hedged else 0.0,
+            "over_budget": self._over_budget,
+            "deadline_seconds": self.deadline(),
+        }
+
+
+# --- グローバル管理（モデルごとに1つ）---
+
+_policies: dict[str, HedgePolicy] = {}
+
+
+def get_hedge_policy(model: str, config: LLMHedgingConfig) -> HedgePolicy:
+    """モデルに対応するポリシーを取得（なければ作成）"""
+    policy = _policies.get(model)
+    if policy is None:
+        policy = _policies[model] = HedgePolicy(config)
+    return policy
+
+
+def get_all_hedge_stats() -> dict[str, dict[str, Any]]:
+    """全モデルのヘッジの統計を取得"""
+    return {model: policy.get_stats() for model, policy in _policies.items()}
+
+
+def reset_hedge_policies() -> None:
+    """全ポリシーを破棄する（テスト用）"""
+    _policies.clear()
@@ -0,0 +1,92 @@
+"""同一LLMリクエストの同時実行の集約
+
+同じ瞬間に送られるバイト単位で同一のリクエスト（例: 同じ計画プロンプトの再試行、
+同じ採点プロンプト）を1回のプロバイダー呼び出しにまとめ、結果を全ての待ち手に返す。
+
+- キーは応答キャッシュと同じリクエストのハッシュ（make_cache_key）
+- 最初の呼び出し元が共有タスクを作り、後続はそのタスクの完了を待つ
+- 待ち手がキャンセルされても共有タスクは続行し、待ち手が全員いなくなった時点で
+  共有タスクをキャンセルする
+- 例外も全ての待ち手に伝える（完了したキーはすぐに削除するため、次の呼び出しは再送する）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Task[T]
+    waiters: int = 0
+
+
+class InflightCoalescer:
+    """キーごとに実行中の呼び出しを1つにまとめる"""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[Any]] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """key の呼び出しが実行中ならその結果を、なければ factory() を実行して返す
+
+        集約された待ち手には結果の複製を返す（呼び出し元ごとに変更しても影響しない）。
+        """
+        call = self._calls.get(key)
+        leader = call is None
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t: self._discard(key, call))
+            self._leaders += 1
+        else:
+            self._coalesced += 1
+        call.waiters += 1
+        try:
+            result: T = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done():
+                call.waiters -= 1
+                if call.waiters == 0:
+                    call.task.cancel()
+            raise
+        return result if leader else copy.deepcopy(result)
+
+    def _discard(self, key: str, call: _Call[Any]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # 待ち手が全員キャンセルされた場合も「例外が取得されていない」警告を出さない
+            call.task.exception()
+
+    def get_stats(self) -> dict[str, Any]:
+        """集約の統計"""
+        total = self._leaders + self._coalesced
+        return {
+            "in_flight": len(self._calls),
+            "sent": self._leaders,
+            "coalesced": self._coalesced,
+            "coalesced_rate": self._coalesced / total if total else 0.0,
+        }
+
+
+_coalescer = InflightCoalescer()
+
+
+def get_inflight_coalescer() -> InflightCoalescer:
+    """プロセス共通の集約器を取得"""
+    return _coalescer
+
+
+def reset_inflight_coalescer() -> None:
+    """集約器を作り直す（テスト用）"""
+    global _coalescer
+    _coalescer = InflightCoalescer()
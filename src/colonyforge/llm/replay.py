@@ -0,0 +1,408 @@
+"""オフライン再生プロバイダー（provider: replay）
+
+記録済みのリクエストと応答の組を返す LiteLLM 互換のバックエンド。ネットワークの
+ない環境で Queen / Worker / Beekeeper のパイプライン全体を、現実的な応答時間で
+負荷試験・回帰試験するために使う。LLMClient のスケジューラー・レートリミッター・
+応答キャッシュ・ストリーミングはそのまま動く（LiteLLM の代わりにここを呼ぶだけ）。
+
+- 記録の読み込み元: JSONL ファイル（1行に {"request": ..., "response": ...}）と
+  Akashic Record の llm.request / llm.response イベント（record_exchange で書き込む）
+- 応答の選び方: メッセージとツール定義が一致する記録 → 最後のメッセージが一致する記録
+  → on_miss が cycle なら記録を順に返す。同じキーに複数の記録があれば順に使う
+- 応答時間: 最初のトークンまでの時間と出力トークンの生成速度を、設定した分布から
+  シード付きの乱数で決める（呼び出し順が同じなら毎回同じ値）
+- ツール呼び出しを含む応答は、ストリーミングでもツール呼び出しごとのチャンクで返す
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import litellm
+
+from ..core.ar import AkashicRecord
+from ..core.config import LLMReplayConfig, ReplayDistributionConfig, get_settings
+from ..core.events import BaseEvent, EventType, LLMRequestEvent, LLMResponseEvent
+from .response_cache import make_cache_key
+
+# ストリーミングで1チャンクに含める文字数（約4トークン）
+STREAM_CHUNK_CHARS = 16
+
+
+class ReplayMissError(LookupError):
+    """一致する記録がない（on_miss: error）"""
+
+
+@dataclass
+class ReplayExchange:
+    """記録済みのリクエストと応答の組
+
+    response は LLMResponse と同じ形の dict
+    （content / tool_calls[{id, name, arguments}] / finish_reason / usage）。
+    """
+
+    messages: list[dict[str, Any]]
+    response: dict[str, Any]
+    tools: list[dict[str, Any]] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSONL の1行の形式"""
+        return {
+            "request": {"messages": self.messages, "tools": self.tools},
+            "response": self.response,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ReplayExchange:
+        request = data.get("request", {})
+        return cls(
+            messages=list(request.get("messages", [])),
+            tools=request.get("tools"),
+            response=dict(data["response"]),
+        )
+
+
+def _request_key(messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None) -> str:
+    return make_cache_key({"messages": messages, "tools": tools or None})
+
+
+def _last_message_key(messages: list[dict[str, Any]]) -> str | None:
+    if not messages:
+        return None
+    last = messages[-1]
+    return make_cache_key({"role": last.get("role"), "content": last.get("content")})
+
+
+def _estimate_tokens(value: Any) -> int:
+    """文字数からトークン数を概算する（約4文字/トークン）"""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return len(text) // 4 + 1
+
+
+def load_fixture_exchanges(path: Path | str) -> list[ReplayExchange]:
+    """JSONL ファイルから記録を読み込む"""
+    exchanges = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                exchanges.append(ReplayExchange.from_dict(json.loads(line)))
+    return exchanges
+
+
+def write_fixture(path: Path | str, exchanges: Iterable[ReplayExchange]) -> int:
+    """記録を JSONL ファイルに書き出す
+
+    Returns:
+        書き出した件数
+    """
+    count = 0
+    with Path(path).open("w", encoding="utf-8") as f:
+        for exchange in exchanges:
+            f.write(json.dumps(exchange.to_dict(), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def load_ar_exchanges(ar: AkashicRecord, run_id: str) -> list[ReplayExchange]:
+    """Run の llm.request / llm.response イベントから記録を読み込む
+
+    応答は parents に含まれるリクエストと組にし、parents がなければ
+    まだ組になっていない最も古いリクエストと組にする。payload に messages や
+    response の内容がないイベント（概要だけのもの）は無視する。
+    """
+    pending: dict[str, dict[str, Any]] = {}
+    exchanges = []
+    for event in ar.replay(run_id):
+        if event.type == EventType.LLM_REQUEST and "messages" in event.payload:
+            pending[event.id] = event.payload
+        elif event.type == EventType.LLM_RESPONSE and pending:
+            if "response" not in event.payload:
+                continue
+            parent = next((p for p in event.parents if p in pending), next(iter(pending)))
+            request = pending.pop(parent)
+            exchanges.append(
+                ReplayExchange(
+                    messages=list(request["messages"]),
+                    tools=request.get("tools"),
+                    response=dict(event.payload["response"]),
+                )
+            )
+    return exchanges
+
+
+def record_exchange(
+    ar: AkashicRecord,
+    run_id: str,
+    exchange: ReplayExchange,
+    actor: str = "llm",
+) -> tuple[BaseEvent, BaseEvent]:
+    """記録を llm.request / llm.response イベントの組として Run に書き込む"""
+    request = ar.append(
+        LLMRequestEvent(
+            run_id=run_id,
+            actor=actor,
+            payload={"messages": exchange.messages, "tools": exchange.tools},
+        ),
+        run_id,
+    )
+    response = ar.append(
+        LLMResponseEvent(
+            run_id=run_id,
+            actor=actor,
+            parents=[request.id],
+            payload={"response": exchange.response},
+        ),
+        run_id,
+    )
+    return request, response
+
+
+@dataclass
+class _Timing:
+    first_token: float
+    tokens_per_second: float
+
+    def generation_seconds(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+@dataclass
+class ReplayProvider:
+    """記録を返す LiteLLM 互換のバックエンド
+
+    acompletion は litellm.acompletion と同じ引数を受け取り、ModelResponse
+    （stream=True なら ModelResponseStream の非同期イテレーター）を返す。
+    """
+
+    exchanges: list[ReplayExchange]
+    config: LLMReplayConfig = field(default_factory=LLMReplayConfig)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.config.seed)
+        self._by_request: dict[str, list[int]] = {}
+        self._by_last_message: dict[str, list[int]] = {}
+        for index, exchange in enumerate(self.exchanges):
+            key = _request_key(exchange.messages, exchange.tools)
+            self._by_request.setdefault(key, []).append(index)
+            last_key = _last_message_key(exchange.messages)
+            if last_key is not None:
+                self._by_last_message.setdefault(last_key, []).append(index)
+        self._uses: dict[str, int] = {}
+        self._cursor = 0
+        self._requests = 0
+        self._exact = 0
+        self._last_message = 0
+        self._cycled = 0
+
+    @classmethod
+    def from_config(cls, config: LLMReplayConfig) -> ReplayProvider:
+        """設定の fixtures と runs から記録を読み込む"""
+        exchanges = []
+        for path in config.fixtures:
+            exchanges.extend(load_fixture_exchanges(path))
+        if config.runs:
+            vault = (
+                Path(config.vault_path) if config.vault_path else get_settings().get_vault_path()
+            )
+            ar = AkashicRecord(vault)
+            for run_id in config.runs:
+                exchanges.extend(load_ar_exchanges(ar, run_id))
+        return cls(exchanges, config)
+
+    def _next(self, key: str, indices: list[int]) -> ReplayExchange:
+        """同じキーの記録を順に使う"""
+        use = self._uses.get(key, 0)
+        self._uses[key] = use + 1
+        return self.exchanges[indices[use % len(indices)]]
+
+    def select(
+        self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None
+    ) -> ReplayExchange:
+        """リクエストに対応する記録を選ぶ
+
+        Raises:
+            ReplayMissError: 一致する記録がなく on_miss が error、または記録が1件もない
+        """
+        self._requests += 1
+        key = _request_key(messages, tools)
+        if key in self._by_request:
+            self._exact += 1
+            return self._next(key, self._by_request[key])
+        last_key = _last_message_key(messages)
+        if last_key is not None and last_key in self._by_last_message:
+            self._last_message += 1
+            return self._next("last:" + last_key, self._by_last_message[last_key])
+        if self.config.on_miss == "error" or not self.exchanges:
+            raise ReplayMissError(f"一致する記録がありません: messages={len(messages)}")
+        self._cycled += 1
+        exchange = self.exchanges[self._cursor % len(self.exchanges)]
+        self._cursor += 1
+        return exchange
+
+    def _sample(self, dist: ReplayDistributionConfig) -> float:
+        """分布から値を1つ取る（負の値は0にする）"""
+        mean, stddev = dist.mean, dist.stddev
+        if dist.distribution == "fixed" or stddev == 0:
+            return mean
+        if dist.distribution == "uniform":
+            spread = math.sqrt(3) * stddev
+            return max(0.0, self._random.uniform(mean - spread, mean + spread))
+        if dist.distribution == "normal":
+            return max(0.0, self._random.gauss(mean, stddev))
+        if mean == 0:
+            return 0.0
+        # 平均と標準偏差が指定値になる対数正規分布のパラメーター
+        sigma2 = math.log(1 + (stddev / mean) ** 2)
+        return self._random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+    def _timing(self) -> _Timing:
+        return _Timing(
+            first_token=self._sample(self.config.first_token_ms) / 1000,
+            tokens_per_second=self._sample(self.config.tokens_per_second),
+        )
+
+    @staticmethod
+    def _usage(exchange: ReplayExchange, messages: list[dict[str, Any]]) -> dict[str, int]:
+        """記録の usage（なければ文字数から概算）"""
+        usage = exchange.response.get("usage") or {}
+        if usage.get("completion_tokens"):
+            return {
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage["completion_tokens"],
+                "total_tokens": usage.get("total_tokens", 0),
+            }
+        prompt = _estimate_tokens(messages)
+        completion = _estimate_tokens(exchange.response.get("content") or "") + sum(
+            _estimate_tokens(tc.get("arguments", {}))
+            for tc in exchange.response.get("tool_calls", [])
+        )
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+        }
+
+    @staticmethod
+    def _tool_calls(exchange: ReplayExchange) -> list[dict[str, Any]]:
+        return [
+            {
+                "id": tc.get("id") or f"call_{i}",
+                "type": "function",
+                "function": {"name": tc["name"], "arguments": json.dumps(tc.get("arguments", {}))},
+            }
+            for i, tc in enumerate(exchange.response.get("tool_calls", []))
+        ]
+
+    async def acompletion(self, **kwargs: Any) -> Any:
+        """litellm.acompletion と同じ呼び出し方で記録を返す"""
+        messages = kwargs["messages"]
+        tools = kwargs.get("tools")
+        model = kwargs.get("model", "replay")
+        if kwargs.get("stream"):
+            exchange = self.select(messages, tools)
+            return self._stream(exchange, messages, model, self._timing())
+
+        choices = []
+        total = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        delay = 0.0
+        for index in range(kwargs.get("n") or 1):
+            exchange = self.select(messages, tools)
+            usage = self._usage(exchange, messages)
+            timing = self._timing()
+            delay = max(
+                delay, timing.first_token + timing.generation_seconds(usage["completion_tokens"])
+            )
+            # n 件の候補でもプロンプトは1回ぶん
+            total["prompt_tokens"] = usage["prompt_tokens"]
+            total["completion_tokens"] += usage["completion_tokens"]
+            tool_calls = self._tool_calls(exchange)
+            choices.append(
+                {
+                    "index": index,
+                    "message": {
+                        "role": "assistant",
+                        "content": exchange.response.get("content"),
+                        "tool_calls": tool_calls or None,
+                    },
+                    "finish_reason": exchange.response.get("finish_reason")
+                    or ("tool_calls" if tool_calls else "stop"),
+                }
+            )
+        total["total_tokens"] = total["prompt_tokens"] + total["completion_tokens"]
+        await asyncio.sleep(delay)
+        return litellm.ModelResponse(choices=choices, usage=total, model=model)
+
+    async def _stream(
+        self,
+        exchange: ReplayExchange,
+        messages: list[dict[str, Any]],
+        model: str,
+        timing: _Timing,
+    ) -> AsyncIterator[Any]:
+        """記録をチャンクに分けて、生成速度に合わせて返す"""
+        usage = self._usage(exchange, messages)
+        content = exchange.response.get("content") or ""
+        tool_calls = self._tool_calls(exchange)
+        deltas: list[tuple[dict[str, Any], int]] = [
+            (
+                {"content": content[i : i + STREAM_CHUNK_CHARS]},
+                _estimate_tokens(content[i : i + STREAM_CHUNK_CHARS]),
+            )
+            for i in range(0, len(content), STREAM_CHUNK_CHARS)
+        ]
+        deltas.extend(
+            ({"tool_calls": [{"index": i, **tc}]}, _estimate_tokens(tc["function"]["arguments"]))
+            for i, tc in enumerate(tool_calls)
+        )
+        # チャンクごとの待ち時間を、応答全体の出力トークン数に合わせて配分する
+        estimated = sum(tokens for _, tokens in deltas) or 1
+        scale = usage["completion_tokens"] / estimated
+        await asyncio.sleep(timing.first_token)
+        for delta, tokens in deltas:
+            await asyncio.sleep(timing.generation_seconds(round(tokens * scale)))
+            yield litellm.ModelResponseStream(
+                choices=[{"index": 0, "delta": delta, "finish_reason": None}], model=model
+            )
+        finish_reason = exchange.response.get("finish_reason") or (
+            "tool_calls" if tool_calls else "stop"
+        )
+        yield litellm.ModelResponseStream(
+            choices=[{"index": 0, "delta": {}, "finish_reason": finish_reason}], model=model
+        )
+        yield litellm.ModelResponseStream(choices=[], usage=usage, model=model)
+
+    def get_stats(self) -> dict[str, Any]:
+        """記録の選ばれ方の統計"""
+        return {
+            "exchanges": len(self.exchanges),
+            "requests": self._requests,
+            "exact": self._exact,
+            "last_message": self._last_message,
+            "cycled": self._cycled,
+        }
+
+
+# --- グローバル管理（設定ごとに1つ）---
+
+_providers: dict[str, ReplayProvider] = {}
+
+
+def get_replay_provider(config: LLMReplayConfig) -> ReplayProvider:
+    """設定に対応する再生プロバイダーを取得（なければ記録を読み込んで作成）"""
+    key = config.model_dump_json()
+    provider = _providers.get(key)
+    if provider is None:
+        provider = _providers[key] = ReplayProvider.from_config(config)
+    return provider
+
+
+def reset_replay_providers() -> None:
+    """全プロバイダーを破棄する（テスト用）"""
+    _providers.clear()
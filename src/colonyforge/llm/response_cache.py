@@ -0,0 +1,225 @@
+"""LLM応答キャッシュ
+
+決定的なリクエスト（同じモデル・メッセージ・ツール・生成パラメータ）の応答を
+Vault 配下のディレクトリに保存し、同じリクエストでは LLM を呼ばずに返す。
+
+- キーはリクエストの正規化JSON（キー順固定）の SHA-256
+- 1応答を1ファイル（<key先頭2文字>/<key>.json）に保存し、一時ファイルからの
+  置き換えで書き込む（複数プロセスから同じディレクトリを使っても壊れない）
+- 有効期限（TTL）を過ぎた応答は読み込み時に削除する
+- 合計サイズが上限を超えたら、最後に使われた時刻（ファイルの mtime）が
+  古い順に削除する（LRU）。ヒット時に mtime を更新するため再起動後も順序を保つ
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_CACHE_TTL = 7 * 24 * 3600.0
+
+# キャッシュ形式の版（応答の保存形式を変えたら上げる）
+CACHE_FORMAT_VERSION = 1
+
+
+def make_cache_key(request: Mapping[str, Any]) -> str:
+    """リクエストの正規化JSONからキャッシュキーを求める"""
+    canonical = json.dumps(
+        {"v": CACHE_FORMAT_VERSION, **request},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """ディスク上の LLM 応答キャッシュ
+
+    Args:
+        directory: 保存先ディレクトリ
+        max_bytes: 合計サイズの上限（超過分は LRU で削除）
+        ttl_seconds: 有効期限（秒、0 以下で無期限）
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        ttl_seconds: float = DEFAULT_CACHE_TTL,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key → サイズ（使用順）
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._expired = 0
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """既存ファイルを最後に使われた順に並べて索引を作る"""
+        found: list[tuple[float, str, int]] = []
+        if self.directory.exists():
+            for path in self.directory.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        self._evict()
+
+    # --- 読み書き ---
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """キャッシュされた応答を取得（なければ None）"""
+        path = self._path(key)
+        try:
+            raw = path.read_bytes()
+            data = json.loads(raw)
+        except FileNotFoundError:
+            self._forget(key)
+            self._misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"LLM応答キャッシュを読み込めないため削除します: {path}: {e}")
+            self._remove(key)
+            self._misses += 1
+            return None
+        if self.ttl_seconds > 0 and time.time() - data.get("stored_at", 0) > self.ttl_seconds:
+            self._remove(key)
+            self._expired += 1
+            self._misses += 1
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        if key not in self._entries:
+            # 他プロセスが書き込んだ応答
+            self._entries[key] = len(raw)
+            self._bytes += len(raw)
+        self._entries.move_to_end(key)
+        self._hits += 1
+        response: dict[str, Any] = data["response"]
+        return response
+
+    def put(self, key: str, response: Mapping[str, Any], *, model: str = "") -> None:
+        """応答を保存する"""
+        payload = json.dumps(
+            {"key": key, "model": model, "stored_at": time.time(), "response": response},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"LLM応答をキャッシュできません: {path}: {e}")
+            return
+        self._forget(key)
+        self._entries[key] = len(payload)
+        self._bytes += len(payload)
+        self._stores += 1
+        self._evict()
+
+    def clear(self) -> None:
+        """全ての応答を削除する"""
+        for key in list(self._entries):
+            self._remove(key)
+
+    def _forget(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _remove(self, key: str) -> None:
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"LLM応答キャッシュを削除できません: {key}: {e}")
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    # --- 統計 ---
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> dict[str, Any]:
+        """ヒット率と使用量の統計"""
+        lookups = self._hits + self._misses
+        return {
+            "directory": str(self.directory),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "expired": self._expired,
+        }
+
+
+# --- グローバル管理（ディレクトリごとに1つ）---
+
+_caches: dict[Path, LLMResponseCache] = {}
+
+
+def get_response_cache(
+    directory: Path,
+    *,
+    max_bytes: int = DEFAULT_CACHE_BYTES,
+    ttl_seconds: float = DEFAULT_CACHE_TTL,
+) -> LLMResponseCache:
+    """ディレクトリに対応するキャッシュを取得（なければ作成）"""
+    resolved = Path(directory).resolve()
+    cache = _caches.get(resolved)
+    if cache is None:
+        cache = _caches[resolved] = LLMResponseCache(
+            resolved, max_bytes=max_bytes, ttl_seconds=ttl_seconds
+        )
+    return cache
+
+
+def get_all_cache_stats() -> dict[str, dict[str, Any]]:
+    """全キャッシュの統計を取得"""
+    return {str(path): cache.get_stats() for path, cache in _caches.items()}
+
+
+def reset_response_caches() -> None:
+    """キャッシュのインスタンスを破棄する（ファイルは残す。テスト用）"""
+    _caches.clear()
@@ -5,16 +5,23 @@ LLM + ツール実行ループを管理。
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from typing import Any
 
 from ..core.activity_bus import ActivityBus, ActivityEvent, ActivityType, AgentInfo
+from ..core.config import ContextCompactionConfig
 from ..prompts import TOOL_USE_RETRY_PROMPT
 from ..prompts.agents import get_prompt_from_config, get_system_prompt
-from .client import LLMClient, Message, ToolCall
+from ..worker_bee.tool_cache import ToolResultMemo
+from .client import CandidateBatch, LLMClient, LLMResponse, Message, ToolCall
+from .context import READ_OUTPUT_TOOL, ConversationContext
+from .scheduler import AGENT_PRIORITIES, RequestPriority
+from .telemetry import llm_telemetry_scope
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +34,11 @@ class ToolDefinition:
     description: str
     parameters: dict[str, Any]
     handler: Callable[..., Awaitable[str]]
+    # 副作用がない、または他の呼び出しと同時に実行してよいツール
+    # （1つの応答で複数呼ばれた場合に並行実行する）
+    concurrency_safe: bool = False
+    # 同じ引数なら同じ結果を返すツール（1回の run の中で結果を再利用する）
+    idempotent: bool = False
 
     def to_openai_format(self) -> dict[str, Any]:
         """OpenAI形式のツール定義に変換"""
@@ -58,14 +70,28 @@ class RunResult:
     output: str
     tool_calls_made: int = 0
     error: str | None = None
+    # 反復ごとに送信した履歴の見積もりトークン数
+    iteration_tokens: list[int] = field(default_factory=list)
+    # ツール結果のメモ化の統計（ToolResultMemo.get_stats()）
+    tool_memo_stats: dict[str, Any] = field(default_factory=dict)
 
 
 class AgentRunner:
     """エージェントランナー
 
     LLM呼び出し → ツール実行 → 結果返却のループを管理。
+    1つの応答に含まれるツール呼び出しのうち、concurrency_safe なツールが
+    連続する区間は max_parallel_tools 件まで並行実行する（結果の順序は保つ）。
+    会話履歴は ConversationContext で管理し、大きなツール出力の抜粋化と
+    古いターンの要約により、反復ごとのプロンプトがトークン予算に収まるようにする。
+    抜粋に置き換えた出力は run ごとに追加する read_tool_output ツールで全文を読み直せる。
+    idempotent なツールの結果は run ごとのメモに保持し、同じ引数の呼び出しには
+    ツールを実行せずに返す（書き込み系のツールが呼ばれたらメモを破棄する）。
     """
 
+    # 並行実行するツール呼び出し数の既定値
+    DEFAULT_MAX_PARALLEL_TOOLS = 4
+
     # Prompt sent to LLM when it fails to invoke any tool
     TOOL_USE_RETRY_PROMPT = TOOL_USE_RETRY_PROMPT
 
@@ -81,6 +107,11 @@ class AgentRunner:
         agent_info: AgentInfo | None = None,
         require_tool_use: bool = False,
         tool_use_retries: int = 3,
+        priority: RequestPriority | None = None,
+        stream: bool | None = None,
+        max_parallel_tools: int = DEFAULT_MAX_PARALLEL_TOOLS,
+        compaction: ContextCompactionConfig | None = None,
+        memoize_tools: bool = True,
     ):
         """初期化
 
@@ -95,6 +126,12 @@ class AgentRunner:
             agent_info: ActivityBus用エージェント情報（None=イベント発行しない）
             require_tool_use: Trueの場合、ツール呼び出しなしの応答を再試行する
             tool_use_retries: ツール使用再試行の最大回数
+            priority: LLMリクエストの優先度クラス（省略時は agent_type から決定）
+            stream: 応答をストリーミングで受け取り、途中経過を llm.stream として発行する
+                （省略時はクライアントの config.stream）
+            max_parallel_tools: concurrency_safe なツールを並行実行する上限（1 で逐次実行）
+            compaction: 会話履歴の圧縮設定（省略時はクライアントの config.compaction）
+            memoize_tools: idempotent なツールの結果を run の中で再利用する
         """
         self.client = client
         self.agent_type = agent_type
@@ -106,11 +143,18 @@ class AgentRunner:
         self.agent_info = agent_info
         self.require_tool_use = require_tool_use
         self.tool_use_retries = tool_use_retries
+        self.priority = priority or AGENT_PRIORITIES.get(agent_type, RequestPriority.EXECUTION)
+        self.stream = client.config.stream if stream is None else stream
+        self.compaction = client.config.compaction if compaction is None else compaction
+        self.memoize_tools = memoize_tools
+        self.max_parallel_tools = max(1, max_parallel_tools)
         self.tools: dict[str, ToolDefinition] = {}
+        self._tool_definitions: list[dict[str, Any]] | None = None
 
     def register_tool(self, tool: ToolDefinition) -> None:
         """ツールを登録"""
         self.tools[tool.name] = tool
+        self._tool_definitions = None
         logger.debug(f"ツール登録: {tool.name}")
 
     def _resolve_system_prompt(self) -> str:
@@ -133,8 +177,62 @@ class AgentRunner:
         return get_system_prompt(self.agent_type)
 
     def get_tool_definitions(self) -> list[dict[str, Any]]:
-        """OpenAI形式のツール定義リストを取得"""
-        return [tool.to_openai_format() for tool in self.tools.values()]
+        """OpenAI形式のツール定義リストを取得
+
+        変換結果はツールを登録し直すまで使い回す（毎回の呼び出しで同じリストを送り、
+        プロバイダーのプロンプトキャッシュが効く先頭を一定に保つ）。
+        """
+        if self._tool_definitions is None:
+            self._tool_definitions = [tool.to_openai_format() for tool in self.tools.values()]
+        return self._tool_definitions
+
+    def _read_output_tool(self, history: ConversationContext) -> ToolDefinition:
+        """抜粋に置き換えたツール出力を history から読み直すツール"""
+
+        async def read_tool_output(ref: str, offset: int = 0) -> str:
+            return history.read_output(ref, offset)
+
+        return ToolDefinition(
+            name=READ_OUTPUT_TOOL,
+            description=(
+                "出力が長いため抜粋に置き換えられたツール結果の全文を読む。"
+                "ref には抜粋に示された参照を、offset には読み始める文字位置を指定する"
+            ),
+            parameters={
+                "type": "object",
+                "properties": {
+                    "ref": {"type": "string", "description": "抜粋に示された参照"},
+                    "offset": {
+                        "type": "integer",
+                        "description": "読み始める文字位置（省略時は先頭）",
+                        "minimum": 0,
+                    },
+                },
+                "required": ["ref"],
+            },
+            handler=read_tool_output,
+            concurrency_safe=True,
+            idempotent=True,
+        )
+
+    def _run_tools(
+        self, history: ConversationContext
+    ) -> tuple[dict[str, ToolDefinition], list[dict[str, Any]] | None]:
+        """run で使うツールと OpenAI 形式の定義を返す
+
+        ツール出力を抜粋に置き換える設定のときは read_tool_output を末尾に加える
+        （同名のツールが登録済みならそちらを使う）。
+        """
+        if not self.tools:
+            return self.tools, None
+        definitions = self.get_tool_definitions()
+        if not self.compaction.enabled or READ_OUTPUT_TOOL in self.tools:
+            return self.tools, definitions
+        read_tool = self._read_output_tool(history)
+        return (
+            {**self.tools, READ_OUTPUT_TOOL: read_tool},
+            [*definitions, read_tool.to_openai_format()],
+        )
 
     async def _emit_activity(
         self,
@@ -154,6 +252,91 @@ class AgentRunner:
         )
         await bus.emit(event)
 
+    async def _call_llm(
+        self,
+        messages: list[Message],
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str | None,
+    ) -> LLMResponse:
+        """LLMを呼び出す
+
+        ストリーミング時は、届いたテキストと受信し終えたツール呼び出しを
+        llm.stream として発行する（ActivityBus が時間窓でまとめて配信する）。
+        """
+        flow = f"{self.hive_id}/{self.colony_id}"
+        if not self.stream:
+            return await self.client.chat(
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                priority=self.priority,
+                flow=flow,
+            )
+
+        response: LLMResponse | None = None
+        async for delta in self.client.chat_stream(
+            messages=messages,
+            tools=tools,
+            tool_choice=tool_choice,
+            priority=self.priority,
+            flow=flow,
+        ):
+            if delta.content:
+                await self._emit_activity(
+                    ActivityType.LLM_STREAM, "応答を受信中", {"delta": delta.content}
+                )
+            if delta.tool_call is not None:
+                await self._emit_activity(
+                    ActivityType.LLM_STREAM,
+                    f"ツール呼び出しを受信: {delta.tool_call.name}",
+                    {"tool_call": {"id": delta.tool_call.id, "name": delta.tool_call.name}},
+                )
+            if delta.response is not None:
+                response = delta.response
+        if response is None:
+            raise RuntimeError("LLMのストリームが応答を返さずに終了しました")
+        return response
+
+    async def propose_candidates(self, user_message: str, n: int) -> CandidateBatch:
+        """同じタスクから n 件の案を生成する（N案並列生成）
+
+        システムプロンプト・タスク・ツール定義は全候補で共通にし、
+        LLMClient.chat_candidates で1回のスケジューリングにまとめて生成する。
+        ツールは実行しない（候補は CandidateBatch.to_referee_candidates で Referee Bee に渡す）。
+
+        Args:
+            user_message: タスク
+            n: 候補数
+
+        Returns:
+            n 件の候補
+        """
+        messages = [
+            Message(role="system", content=self._resolve_system_prompt()),
+            Message(role="user", content=user_message),
+        ]
+        tool_definitions = self.get_tool_definitions() if self.tools else None
+        await self._emit_activity(
+            ActivityType.LLM_REQUEST,
+            f"LLMリクエスト (候補 {n}件)",
+            {"message_count": len(messages), "candidates": n},
+        )
+        with llm_telemetry_scope(role=self.agent_type):
+            batch = await self.client.chat_candidates(
+                messages=messages,
+                n=n,
+                tools=tool_definitions,
+                tool_choice="auto" if tool_definitions else None,
+                priority=self.priority,
+                flow=f"{self.hive_id}/{self.colony_id}",
+            )
+        await self._emit_activity(
+            ActivityType.LLM_RESPONSE,
+            f"候補 {len(batch.responses)}件",
+            {"candidates": len(batch.responses), "sampling": batch.sampling},
+        )
+        return batch
+
     async def run(
         self,
         user_message: str,
@@ -169,15 +352,24 @@ class AgentRunner:
             実行結果
         """
         context = context or AgentContext(run_id="default")
-
+        # LLM呼び出しのテレメトリにエージェント種別と Run を付ける
+        with llm_telemetry_scope(
+            role=self.agent_type,
+            run_id=context.run_id,
+            task_id=context.task_id,
+            vault_path=self.vault_path,
+        ):
+            return await self._run(user_message, context)
+
+    async def _run(self, user_message: str, context: AgentContext) -> RunResult:
+        """run の本体"""
         # メッセージ履歴を初期化
-        system_prompt = self._resolve_system_prompt()
-        messages: list[Message] = [
-            Message(role="system", content=system_prompt),
-            Message(role="user", content=user_message),
-        ]
+        history = ConversationContext(policy=self.compaction)
+        history.start(self._resolve_system_prompt(), user_message)
+        iteration_tokens: list[int] = []
+        memo = ToolResultMemo() if self.memoize_tools else None
 
-        tool_definitions = self.get_tool_definitions() if self.tools else None
+        tools, tool_definitions = self._run_tools(history)
         tool_calls_made = 0
 
         # require_tool_use 時は tool_choice="required" で LLM にツール呼び出しを強制
@@ -191,11 +383,19 @@ class AgentRunner:
         for iteration in range(self.max_iterations):
             logger.debug(f"反復 {iteration + 1}/{self.max_iterations}")
 
+            # 予算を超えていれば古いターンを要約に置き換える
+            if history.compact():
+                logger.debug(
+                    f"会話履歴を圧縮: {history.stats.summarized_turns}ターンを要約済み "
+                    f"(現在 {history.total_tokens} トークン)"
+                )
+            iteration_tokens.append(history.total_tokens)
+
             # LLM呼び出し - リクエストイベント発行
             await self._emit_activity(
                 ActivityType.LLM_REQUEST,
                 f"LLMリクエスト (反復 {iteration + 1})",
-                {"message_count": len(messages)},
+                {"message_count": len(history.messages), "context_tokens": history.total_tokens},
             )
 
             # ツールを1回以上使った後は auto に戻す
@@ -204,11 +404,7 @@ class AgentRunner:
             else:
                 current_tool_choice = initial_tool_choice
 
-            response = await self.client.chat(
-                messages=messages,
-                tools=tool_definitions,
-                tool_choice=current_tool_choice,
-            )
+            response = await self._call_llm(history.messages, tool_definitions, current_tool_choice)
 
             # LLMレスポンスイベント発行
             content_summary = (response.content or "")[:100]
@@ -226,7 +422,7 @@ class AgentRunner:
             # ツール呼び出しがある場合
             if response.has_tool_calls:
                 # アシスタントメッセージを追加
-                messages.append(
+                history.append(
                     Message(
                         role="assistant",
                         content=response.content or "",
@@ -234,13 +430,15 @@ class AgentRunner:
                     )
                 )
 
-                # 各ツールを実行
-                for tool_call in response.tool_calls:
-                    tool_result = await self._execute_tool(tool_call, context)
+                # 各ツールを実行（結果は呼び出し順に履歴へ追加）
+                tool_results = await self._execute_tool_calls(
+                    response.tool_calls, context, memo, tools
+                )
+                for tool_call, tool_result in zip(response.tool_calls, tool_results, strict=True):
                     tool_calls_made += 1
 
                     # ツール結果をメッセージに追加
-                    messages.append(
+                    history.append(
                         Message(
                             role="tool",
                             content=tool_result,
@@ -265,8 +463,8 @@ class AgentRunner:
                         f"(残り{self._tool_use_retries_left}回)"
                     )
                     # 再試行プロンプトを追加して次の反復へ
-                    messages.append(Message(role="assistant", content=response.content or ""))
-                    messages.append(Message(role="user", content=self.TOOL_USE_RETRY_PROMPT))
+                    history.append(Message(role="assistant", content=response.content or ""))
+                    history.append(Message(role="user", content=self.TOOL_USE_RETRY_PROMPT))
                     continue
                 else:
                     # 再試行回数を使い切った
@@ -278,6 +476,8 @@ class AgentRunner:
                         success=False,
                         output=response.content or "",
                         tool_calls_made=tool_calls_made,
+                        iteration_tokens=iteration_tokens,
+                        tool_memo_stats=memo.get_stats() if memo is not None else {},
                         error=(
                             "ツール呼び出し必須モードで再試行回数を超過しました。"
                             "LLMがツールを使用せずテキスト応答のみを返しました。"
@@ -289,6 +489,8 @@ class AgentRunner:
                 success=True,
                 output=response.content or "",
                 tool_calls_made=tool_calls_made,
+                iteration_tokens=iteration_tokens,
+                tool_memo_stats=memo.get_stats() if memo is not None else {},
             )
 
         # 最大反復回数に達した
@@ -296,24 +498,66 @@ class AgentRunner:
             success=False,
             output="",
             tool_calls_made=tool_calls_made,
+            iteration_tokens=iteration_tokens,
+            tool_memo_stats=memo.get_stats() if memo is not None else {},
             error=f"最大反復回数（{self.max_iterations}）に達しました",
         )
 
+    async def _execute_tool_calls(
+        self,
+        tool_calls: list[ToolCall],
+        context: AgentContext,
+        memo: ToolResultMemo | None = None,
+        tools: dict[str, ToolDefinition] | None = None,
+    ) -> list[str]:
+        """1つの応答に含まれるツール呼び出しを実行し、呼び出し順の結果を返す
+
+        concurrency_safe なツールが連続する区間はまとめて並行実行し、
+        それ以外のツールはその区間の完了を待ってから単独で実行する。
+        """
+        tools = self.tools if tools is None else tools
+        results: list[str] = []
+        semaphore = asyncio.Semaphore(self.max_parallel_tools)
+        batch: list[ToolCall] = []
+
+        async def bounded(tool_call: ToolCall) -> str:
+            async with semaphore:
+                return await self._execute_tool(tool_call, context, memo, tools)
+
+        async def run_batch() -> None:
+            if batch:
+                results.extend(await asyncio.gather(*(bounded(tc) for tc in batch)))
+                batch.clear()
+
+        for tool_call in tool_calls:
+            tool = tools.get(tool_call.name)
+            if self.max_parallel_tools > 1 and tool is not None and tool.concurrency_safe:
+                batch.append(tool_call)
+                continue
+            await run_batch()
+            results.append(await self._execute_tool(tool_call, context, memo, tools))
+        await run_batch()
+        return results
+
     async def _execute_tool(
         self,
         tool_call: ToolCall,
         context: AgentContext,
+        memo: ToolResultMemo | None = None,
+        tools: dict[str, ToolDefinition] | None = None,
     ) -> str:
         """ツールを実行
 
         Args:
             tool_call: ツール呼び出し情報
             context: 実行コンテキスト
+            memo: run ごとのツール結果のメモ（None ならメモ化しない）
+            tools: run で使うツール（省略時は登録済みのツール）
 
         Returns:
             ツール実行結果（文字列）
         """
-        tool = self.tools.get(tool_call.name)
+        tool = (self.tools if tools is None else tools).get(tool_call.name)
         if not tool:
             return json.dumps({"error": f"未知のツール: {tool_call.name}"})
 
@@ -324,18 +568,49 @@ class AgentRunner:
             {"tool_name": tool_call.name, "arguments": tool_call.arguments},
         )
 
+        if memo is not None and tool.idempotent:
+            hit, cached = memo.lookup(tool_call.name, tool_call.arguments)
+            if hit:
+                logger.info(f"ツール結果（メモ済み）: {tool_call.name}({tool_call.arguments})")
+                await self._emit_activity(
+                    ActivityType.MCP_TOOL_RESULT,
+                    f"ツール結果: {tool_call.name}（メモ済み）",
+                    {
+                        "tool_name": tool_call.name,
+                        "result_length": len(cached),
+                        "duration_ms": 0.0,
+                        "cached": True,
+                    },
+                )
+                return str(cached)
+        elif memo is not None:
+            # 書き込み中に保持した結果も古くなるため、実行の前後で破棄する
+            memo.invalidate_for(tool_call.name)
+
+        started = time.perf_counter()
         try:
             logger.info(f"ツール実行: {tool_call.name}({tool_call.arguments})")
             result = await tool.handler(**tool_call.arguments)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if memo is not None and tool.idempotent:
+                memo.store(tool_call.name, tool_call.arguments, result)
+            elif memo is not None:
+                memo.invalidate_for(tool_call.name)
             logger.info(
-                f"ツール結果: {result[:100]}..." if len(result) > 100 else f"ツール結果: {result}"
+                f"ツール結果 ({duration_ms:.0f}ms): {result[:100]}..."
+                if len(result) > 100
+                else f"ツール結果 ({duration_ms:.0f}ms): {result}"
             )
 
             # MCP_TOOL_RESULTイベント発行（成功）
             await self._emit_activity(
                 ActivityType.MCP_TOOL_RESULT,
                 f"ツール結果: {tool_call.name}",
-                {"tool_name": tool_call.name, "result_length": len(result)},
+                {
+                    "tool_name": tool_call.name,
+                    "result_length": len(result),
+                    "duration_ms": round(duration_ms, 1),
+                },
             )
 
             return result
@@ -346,9 +621,16 @@ class AgentRunner:
             await self._emit_activity(
                 ActivityType.MCP_TOOL_RESULT,
                 f"ツールエラー: {tool_call.name}",
-                {"tool_name": tool_call.name, "error": str(e)},
+                {
+                    "tool_name": tool_call.name,
+                    "error": str(e),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                },
             )
 
+            if memo is not None and not tool.idempotent:
+                memo.invalidate_for(tool_call.name)
+
             # ツール実行エラーはLLMにエラー結果として返す
             # （ツールハンドラのエラーはLLMがリカバリできるようエラー情報を返す）
             return json.dumps({"error": f"{type(e).__name__}: {e}"})
@@ -0,0 +1,275 @@
+"""LLMリクエストスケジューラー
+
+同じモデル（レートリミッターの鍵）へのリクエストを、優先度クラスと
+Hive/Colony ごとの公平性に基づいて送り出す。
+
+- 優先度クラス: interactive > planning > execution > background
+  （上位クラスが待っている間は下位クラスを送らない。ただし待ち時間が
+  aging_seconds を超えるごとに1段階ずつ繰り上げ、完全な飢餓は防ぐ）
+- 同じクラス内では、フロー（"hive_id/colony_id"）ごとに見積もりトークン数を
+  コストとした Start-time Fair Queuing で順番を決める
+- 同時に送り出す数はレートリミッターの max_concurrent（適応型なら実効値）まで
+
+リクエストの優先度とフローは LLMClient.chat の引数、または
+llm_request_scope() で設定したコンテキストから決まる。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+
+class RequestPriority(StrEnum):
+    """LLMリクエストの優先度クラス（定義順に高い）"""
+
+    INTERACTIVE = "interactive"  # ユーザーへの応答（Beekeeper）
+    PLANNING = "planning"  # タスク計画（Queen Bee）
+    EXECUTION = "execution"  # タスク実行（Worker Bee）
+    BACKGROUND = "background"  # 探索・評価（Forager / Scout など）
+
+
+PRIORITY_ORDER: tuple[RequestPriority, ...] = tuple(RequestPriority)
+_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+
+# エージェント種別ごとの既定の優先度
+AGENT_PRIORITIES: dict[str, RequestPriority] = {
+    "beekeeper": RequestPriority.INTERACTIVE,
+    "queen_bee": RequestPriority.PLANNING,
+    "worker_bee": RequestPriority.EXECUTION,
+    "forager_bee": RequestPriority.BACKGROUND,
+    "scout_bee": RequestPriority.BACKGROUND,
+}
+
+DEFAULT_FLOW = "default"
+
+# 待ち時間がこの秒数を超えるごとに優先度を1段階繰り上げる
+DEFAULT_AGING_SECONDS = 30.0
+
+# 待ち時間の統計に使う直近のサンプル数（クラスごと）
+WAIT_SAMPLE_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class RequestClass:
+    """リクエストの優先度とフロー"""
+
+    priority: RequestPriority = RequestPriority.EXECUTION
+    flow: str = DEFAULT_FLOW
+
+
+_current_request_class: ContextVar[RequestClass | None] = ContextVar(
+    "llm_request_class", default=None
+)
+
+
+def current_request_class() -> RequestClass:
+    """現在のコンテキストのリクエスト分類"""
+    return _current_request_class.get() or RequestClass()
+
+
+@contextmanager
+def llm_request_scope(
+    priority: RequestPriority | None = None, flow: str | None = None
+) -> Iterator[RequestClass]:
+    """このブロック内の LLM リクエストの優先度とフローを設定する
+
+    指定しなかった項目は外側のスコープの値を引き継ぐ。
+    """
+    outer = current_request_class()
+    scoped = RequestClass(priority or outer.priority, flow or outer.flow)
+    token = _current_request_class.set(scoped)
+    try:
+        yield scoped
+    finally:
+        _current_request_class.reset(token)
+
+
+@dataclass(eq=False)
+class _Ticket:
+    priority: RequestPriority
+    flow: str
+    start_tag: float
+    seq: int
+    enqueued_at: float
+    future: asyncio.Future[None]
+
+
+@dataclass
+class _ClassStats:
+    queued: int = 0
+    admitted: int = 0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLE_SIZE))
+
+    def snapshot(self) -> dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
+
+
+class LLMRequestScheduler:
+    """優先度と公平性に基づく LLM リクエストの送り出し
+
+    Args:
+        capacity: 同時に送り出せる数を返す関数（呼び出しごとに評価する）
+        aging_seconds: 待ち時間による優先度繰り上げの間隔（0 以下で無効）
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[], int],
+        *,
+        aging_seconds: float = DEFAULT_AGING_SECONDS,
+    ) -> None:
+        self._capacity = capacity
+        self._aging_seconds = aging_seconds
+        self._waiting: list[_Ticket] = []
+        self._in_flight = 0
+        self._seq = itertools.count()
+        # クラスごとの仮想時刻と、(クラス, フロー) ごとの最終終了タグ
+        self._virtual_time = dict.fromkeys(PRIORITY_ORDER, 0.0)
+        self._finish_tags: dict[tuple[RequestPriority, str], float] = {}
+        self._stats = {priority: _ClassStats() for priority in PRIORITY_ORDER}
+
+    @property
+    def in_flight(self) -> int:
+        """送り出し中のリクエスト数"""
+        return self._in_flight
+
+    async def acquire(
+        self,
+        priority: RequestPriority = RequestPriority.EXECUTION,
+        flow: str = DEFAULT_FLOW,
+        cost: float = 1.0,
+    ) -> SchedulerSlot:
+        """送り出しの順番を待つ
+
+        async with で使用し、ブロックを抜けると次のリクエストに順番を渡す:
+            async with await scheduler.acquire(RequestPriority.INTERACTIVE, "h-1/c-1"):
+                await make_request()
+
+        Args:
+            priority: 優先度クラス
+            flow: 公平性の単位（通常は "hive_id/colony_id"）
+            cost: リクエストのコスト（見積もりトークン数など）
+        """
+        key = (priority, flow)
+        start_tag = max(self._virtual_time[priority], self._finish_tags.get(key, 0.0))
+        self._finish_tags[key] = start_tag + max(cost, 1.0)
+        stats = self._stats[priority]
+
+        if not self._waiting and self._in_flight < self._capacity():
+            self._admit(priority, start_tag, wait=0.0)
+            return SchedulerSlot(self)
+
+        ticket = _Ticket(
+            priority=priority,
+            flow=flow,
+            start_tag=start_tag,
+            seq=next(self._seq),
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiting.append(ticket)
+        stats.queued += 1
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # 順番を受け取った直後にキャンセルされた
+                self.release()
+            else:
+                self._waiting.remove(ticket)
+                stats.queued -= 1
+            raise
+        return SchedulerSlot(self)
+
+    def release(self) -> None:
+        """送り出し枠を返し、次のリクエストに順番を渡す"""
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _admit(self, priority: RequestPriority, start_tag: float, wait: float) -> None:
+        self._in_flight += 1
+        self._virtual_time[priority] = max(self._virtual_time[priority], start_tag)
+        stats = self._stats[priority]
+        stats.admitted += 1
+        stats.waits.append(wait)
+
+    def _dispatch(self) -> None:
+        while self._waiting and self._in_flight < self._capacity():
+            now = time.monotonic()
+            ticket = min(self._waiting, key=lambda t: self._order(t, now))
+            self._waiting.remove(ticket)
+            self._stats[ticket.priority].queued -= 1
+            if ticket.future.done():
+                continue
+            self._admit(ticket.priority, ticket.start_tag, now - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def _order(self, ticket: _Ticket, now: float) -> tuple[int, float, int]:
+        rank = _RANK[ticket.priority]
+        if self._aging_seconds > 0:
+            rank = max(0, rank - int((now - ticket.enqueued_at) / self._aging_seconds))
+        return (rank, ticket.start_tag, ticket.seq)
+
+    def get_stats(self) -> dict[str, Any]:
+        """待ち行列の深さと待ち時間（秒）の統計"""
+        return {
+            "in_flight": self._in_flight,
+            "capacity": self._capacity(),
+            "queued": len(self._waiting),
+            "flows_waiting": len({t.flow for t in self._waiting}),
+            "classes": {priority.value: s.snapshot() for priority, s in self._stats.items()},
+        }
+
+
+class SchedulerSlot:
+    """送り出し枠のコンテキストマネージャー"""
+
+    def __init__(self, scheduler: LLMRequestScheduler) -> None:
+        self._scheduler = scheduler
+
+    async def __aenter__(self) -> SchedulerSlot:
+        return self
+
+    async def __aexit__(
+        self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: object
+    ) -> None:
+        self._scheduler.release()
+
+
+# --- グローバル管理（レートリミッターの鍵ごとに1つ）---
+
+_schedulers: dict[str, LLMRequestScheduler] = {}
+
+
+def get_request_scheduler(key: str, capacity: Callable[[], int]) -> LLMRequestScheduler:
+    """鍵に対応するスケジューラーを取得（なければ作成）"""
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        scheduler = _schedulers[key] = LLMRequestScheduler(capacity)
+    return scheduler
+
+
+def get_all_scheduler_stats() -> dict[str, dict[str, Any]]:
+    """全スケジューラーの統計を取得"""
+    return {key: scheduler.get_stats() for key, scheduler in _schedulers.items()}
+
+
+def reset_request_schedulers() -> None:
+    """全スケジューラーを破棄する（テスト用）"""
+    _schedulers.clear()
@@ -0,0 +1,362 @@
+"""LLM呼び出しのテレメトリ
+
+プロバイダーに送った chat 呼び出しごとに、順番待ち（スケジューラー + レートリミッター）の
+時間・プロバイダーの応答時間・プロンプト / 出力トークン数（うちプロンプトキャッシュから
+読んだトークン数）・推定コストを記録し、
+provider:model・Hive・Colony・エージェント種別ごとのヒストグラムに集計する。
+
+- 集計結果は GET /llm/metrics で JSON または Prometheus のテキスト形式で返す
+- llm.telemetry.record_events が有効なら、llm_telemetry_scope で Run が指定された
+  呼び出しを llm.response イベントとして Akashic Record に書き込む
+  （Honeycomb の cost_per_task_tokens と Sentinel Hornet のコスト監視が参照する）
+- 応答キャッシュのヒットと、実行中の同一リクエストに集約された呼び出しは
+  プロバイダーに送っていないため記録しない
+- ヘッジで採用しなかった呼び出し（キャンセル）は、そのモデルの系列に
+  推定のプロンプトトークン数と推定コストだけを記録する
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ..core.ar import AkashicRecord
+from ..core.events import LLMResponseEvent
+
+logger = logging.getLogger(__name__)
+
+# ヒストグラムのバケット上限
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+COST_BUCKETS = (0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# ヒストグラム名 → バケット上限
+HISTOGRAMS: dict[str, tuple[float, ...]] = {
+    "queue_wait_seconds": SECONDS_BUCKETS,
+    "latency_seconds": SECONDS_BUCKETS,
+    "prompt_tokens": TOKEN_BUCKETS,
+    "completion_tokens": TOKEN_BUCKETS,
+    "cached_tokens": TOKEN_BUCKETS,
+    "cost_usd": COST_BUCKETS,
+}
+
+
+class Histogram:
+    """固定バケットのヒストグラム（Prometheus の histogram と同じ累積形式で出力）"""
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # 最後は +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """(le, 累積件数) の列（最後は "+Inf"）"""
+        result = []
+        total = 0
+        for bound, count in zip((*map(str, self.bounds), "+Inf"), self._counts, strict=True):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """分位点の推定値（その分位点を含むバケットの上限。+Inf なら最大値）"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for index, count in enumerate(self._counts):
+            total += count
+            if total >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+@dataclass(frozen=True)
+class SeriesKey:
+    """集計の単位"""
+
+    model: str  # provider:model
+    hive_id: str
+    colony_id: str
+    role: str
+
+
+@dataclass
+class _Series:
+    histograms: dict[str, Histogram] = field(
+        default_factory=lambda: {name: Histogram(bounds) for name, bounds in HISTOGRAMS.items()}
+    )
+    calls: int = 0
+    errors: int = 0
+    cancelled: int = 0
+
+
+@dataclass(frozen=True)
+class TelemetryScope:
+    """このコンテキストの LLM 呼び出しに付けるエージェント種別と記録先の Run"""
+
+    role: str = "unknown"
+    run_id: str | None = None
+    task_id: str | None = None
+    vault_path: str | None = None
+
+
+_current_scope: ContextVar[TelemetryScope | None] = ContextVar("llm_telemetry_scope", default=None)
+
+
+def current_telemetry_scope() -> TelemetryScope:
+    """現在のコンテキストのテレメトリのスコープ"""
+    return _current_scope.get() or TelemetryScope()
+
+
+@contextmanager
+def llm_telemetry_scope(
+    role: str | None = None,
+    run_id: str | None = None,
+    task_id: str | None = None,
+    vault_path: str | Path | None = None,
+) -> Iterator[TelemetryScope]:
+    """このブロック内の LLM 呼び出しのエージェント種別と記録先の Run を設定する
+
+    指定しなかった項目は外側のスコープの値を引き継ぐ。
+    """
+    outer = current_telemetry_scope()
+    scoped = TelemetryScope(
+        role=role or outer.role,
+        run_id=run_id or outer.run_id,
+        task_id=task_id or outer.task_id,
+        vault_path=str(vault_path) if vault_path else outer.vault_path,
+    )
+    token = _current_scope.set(scoped)
+    try:
+        yield scoped
+    finally:
+        _current_scope.reset(token)
+
+
+@dataclass
+class CallTimer:
+    """1回の呼び出しの計時（順番待ちの開始 → 送信 → 応答）"""
+
+    flow: str
+    started: float = field(default_factory=time.perf_counter)
+    sent: float | None = None
+
+    def mark_sent(self) -> None:
+        """スケジューラーとレートリミッターの順番を得て送信した時刻を記録する"""
+        self.sent = time.perf_counter()
+
+    def durations(self) -> tuple[float, float]:
+        """(順番待ちの秒数, プロバイダーの応答時間の秒数)"""
+        now = time.perf_counter()
+        sent = self.sent if self.sent is not None else now
+        return sent - self.started, now - sent
+
+
+@dataclass
+class LLMCallRecord:
+    """1回の LLM 呼び出しの計測値"""
+
+    provider: str
+    model: str
+    flow: str
+    queue_wait_seconds: float
+    latency_seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # prompt_tokens のうちプロバイダーのキャッシュから読んだ数
+    cost_usd: float = 0.0
+    error: bool = False
+    cancelled: bool = False  # ヘッジで採用せずキャンセルした（トークン数とコストは推定値）
+    scope: TelemetryScope = field(default_factory=TelemetryScope)
+
+    @property
+    def hive_id(self) -> str:
+        return self.flow.split("/", 1)[0]
+
+    @property
+    def colony_id(self) -> str:
+        parts = self.flow.split("/", 1)
+        return parts[1] if len(parts) > 1 else ""
+
+    def to_payload(self) -> dict[str, Any]:
+        """llm.response イベントの payload"""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "role": self.scope.role,
+            "queue_wait_ms": self.queue_wait_seconds * 1000,
+            "latency_ms": self.latency_seconds * 1000,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "tokens_used": self.prompt_tokens + self.completion_tokens,
+            "cost": self.cost_usd,
+            "error": self.error,
+            "cancelled": self.cancelled,
+        }
+
+
+class LLMTelemetry:
+    """LLM 呼び出しの計測値をヒストグラムに集計する"""
+
+    def __init__(self) -> None:
+        self._series: dict[SeriesKey, _Series] = {}
+        self._ars: dict[str, AkashicRecord] = {}
+
+    def record(self, call: LLMCallRecord, record_event: bool = False) -> None:
+        """計測値を集計する（record_event なら Run の llm.response イベントも書き込む）"""
+        key = SeriesKey(
+            model=f"{call.provider}:{call.model}",
+            hive_id=call.hive_id,
+            colony_id=call.colony_id,
+            role=call.scope.role,
+        )
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        series.calls += 1
+        if call.error:
+            series.errors += 1
+        elif call.cancelled:
+            # 応答を受け取っていないため、推定のプロンプトトークン数とコストだけを集計する
+            series.cancelled += 1
+            series.histograms["prompt_tokens"].observe(call.prompt_tokens)
+            series.histograms["cost_usd"].observe(call.cost_usd)
+        else:
+            values = {
+                "queue_wait_seconds": call.queue_wait_seconds,
+                "latency_seconds": call.latency_seconds,
+                "prompt_tokens": call.prompt_tokens,
+                "completion_tokens": call.completion_tokens,
+                "cached_tokens": call.cached_tokens,
+                "cost_usd": call.cost_usd,
+            }
+            for name, value in values.items():
+                series.histograms[name].observe(value)
+        if record_event:
+            self._write_event(call)
+
+    def _write_event(self, call: LLMCallRecord) -> None:
+        scope = call.scope
+        if not scope.run_id or not scope.vault_path:
+            return
+        ar = self._ars.get(scope.vault_path)
+        if ar is None:
+            ar = self._ars[scope.vault_path] = AkashicRecord(scope.vault_path)
+        event = LLMResponseEvent(
+            run_id=scope.run_id,
+            task_id=scope.task_id,
+            colony_id=call.colony_id or None,
+            actor=scope.role,
+            payload=call.to_payload(),
+        )
+        # 安全側フォールバック: 記録の失敗で LLM 呼び出しを失敗させない
+        try:
+            ar.append(event, scope.run_id)
+        except Exception:
+            logger.warning("LLMテレメトリのイベント記録に失敗: run=%s", scope.run_id, exc_info=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        """系列ごとのヒストグラムと全体の合計"""
+        series = []
+        total_tokens = 0
+        total_cached = 0
+        total_cost = 0.0
+        for key, data in self._series.items():
+            hists = data.histograms
+            total_tokens += int(hists["prompt_tokens"].sum + hists["completion_tokens"].sum)
+            total_cached += int(hists["cached_tokens"].sum)
+            total_cost += hists["cost_usd"].sum
+            series.append(
+                {
+                    "model": key.model,
+                    "hive_id": key.hive_id,
+                    "colony_id": key.colony_id,
+                    "role": key.role,
+                    "calls": data.calls,
+                    "errors": data.errors,
+                    "cancelled": data.cancelled,
+                    **{name: hist.snapshot() for name, hist in hists.items()},
+                }
+            )
+        calls = sum(data.calls for data in self._series.values())
+        return {
+            "series": series,
+            "totals": {
+                "calls": calls,
+                "tokens": total_tokens,
+                "cached_tokens": total_cached,
+                "cost_usd": total_cost,
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus のテキスト形式（colonyforge_llm_*）"""
+        lines = [
+            "# TYPE colonyforge_llm_calls_total counter",
+            "# TYPE colonyforge_llm_errors_total counter",
+            "# TYPE colonyforge_llm_cancelled_total counter",
+        ]
+        lines.extend(f"# TYPE colonyforge_llm_{name} histogram" for name in HISTOGRAMS)
+        for key, data in self._series.items():
+            labels = (
+                f'model="{_escape(key.model)}",hive="{_escape(key.hive_id)}",'
+                f'colony="{_escape(key.colony_id)}",role="{_escape(key.role)}"'
+            )
+            lines.append(f"colonyforge_llm_calls_total{{{labels}}} {data.calls}")
+            lines.append(f"colonyforge_llm_errors_total{{{labels}}} {data.errors}")
+            lines.append(f"colonyforge_llm_cancelled_total{{{labels}}} {data.cancelled}")
+            for name, hist in data.histograms.items():
+                metric = f"colonyforge_llm_{name}"
+                for le, count in hist.cumulative():
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{metric}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# --- グローバル管理 ---
+
+_telemetry = LLMTelemetry()
+
+
+def get_llm_telemetry() -> LLMTelemetry:
+    """プロセス全体の LLM テレメトリを取得"""
+    return _telemetry
+
+
+def reset_llm_telemetry() -> None:
+    """集計をすべて破棄する（テスト用）"""
+    global _telemetry
+    _telemetry = LLMTelemetry()
@@ -200,6 +200,8 @@ READ_FILE_TOOL = ToolDefinition(
         "required": ["path"],
     },
     handler=read_file_handler,
+    concurrency_safe=True,
+    idempotent=True,
 )
 
 WRITE_FILE_TOOL = ToolDefinition(
@@ -237,6 +239,8 @@ LIST_DIRECTORY_TOOL = ToolDefinition(
         "required": [],
     },
     handler=list_directory_handler,
+    concurrency_safe=True,
+    idempotent=True,
 )
 
 RUN_COMMAND_TOOL = ToolDefinition(
@@ -9,6 +9,7 @@ from typing import Any
 
 from ...core import generate_event_id
 from ...core.events import (
+    BaseEvent,
     EventType,
     TaskAssignedEvent,
     TaskCompletedEvent,
@@ -36,6 +37,18 @@ class TaskHandlers(BaseHandler):
                 return event.id
         return None
 
+    def _index_run_events(self, run_id: str) -> tuple[str | None, dict[str, str]]:
+        """1回のリプレイで Run開始イベントID と task_id→TaskCreatedイベントID を取得"""
+        ar = self._get_ar()
+        run_started_id: str | None = None
+        created_ids: dict[str, str] = {}
+        for event in ar.replay(run_id):
+            if event.type == EventType.RUN_STARTED and run_started_id is None:
+                run_started_id = event.id
+            elif event.type == EventType.TASK_CREATED and event.task_id:
+                created_ids.setdefault(event.task_id, event.id)
+        return run_started_id, created_ids
+
     async def handle_create_task(self, args: dict[str, Any]) -> dict[str, Any]:
         """Task作成"""
         if not self._current_run_id:
@@ -206,3 +219,129 @@ class TaskHandlers(BaseHandler):
             "task_id": task_id,
             "error": args.get("error", ""),
         }
+
+    async def handle_create_tasks(self, args: dict[str, Any]) -> dict[str, Any]:
+        """Task一括作成
+
+        全件を検証してから、親イベントを1回のリプレイで解決し、
+        1回のグループ追記で記録する。
+        """
+        if not self._current_run_id:
+            return {"error": "No active run. Use start_run first."}
+
+        items = args.get("tasks")
+        if not isinstance(items, list) or not items:
+            return {"error": "tasks must be a non-empty list"}
+
+        titles: list[str] = []
+        for i, item in enumerate(items):
+            title = item.get("title", "").strip() if isinstance(item, dict) else ""
+            if not title:
+                return {"error": f"tasks[{i}].title is required and must not be empty"}
+            titles.append(title)
+
+        run_id = self._current_run_id
+        default_parents: list[str] = []
+        if any(not item.get("parents") for item in items):
+            run_started_id, _ = self._index_run_events(run_id)
+            if run_started_id:
+                default_parents = [run_started_id]
+
+        events: list[BaseEvent] = [
+            TaskCreatedEvent(
+                run_id=run_id,
+                task_id=generate_event_id(),
+                actor="copilot",
+                parents=item.get("parents") or default_parents,
+                payload={
+                    "title": title,
+                    "description": item.get("description", ""),
+                },
+            )
+            for item, title in zip(items, titles, strict=True)
+        ]
+        self._get_ar().append_many(events, run_id)
+
+        return {
+            "status": "created",
+            "tasks": [
+                {"task_id": event.task_id, "title": title}
+                for event, title in zip(events, titles, strict=True)
+            ],
+        }
+
+    async def handle_update_tasks(self, args: dict[str, Any]) -> dict[str, Any]:
+        """Task一括更新（完了/失敗/進捗）
+
+        1件でも不正な項目があれば何も記録しない。
+        """
+        if not self._current_run_id:
+            return {"error": "No active run. Use start_run first."}
+
+        updates = args.get("updates")
+        if not isinstance(updates, list) or not updates:
+            return {"error": "updates must be a non-empty list"}
+
+        for i, item in enumerate(updates):
+            if not isinstance(item, dict) or not item.get("task_id"):
+                return {"error": f"updates[{i}].task_id is required"}
+            action = item.get("action")
+            if action not in ("complete", "fail", "progress"):
+                return {"error": f"updates[{i}].action must be one of complete, fail, progress"}
+            if action == "progress":
+                progress = item.get("progress")
+                if not isinstance(progress, (int, float)) or progress < 0 or progress > 100:
+                    return {"error": f"updates[{i}].progress must be a number between 0 and 100"}
+
+        run_id = self._current_run_id
+        created_ids: dict[str, str] = {}
+        if any(not item.get("parents") for item in updates):
+            _, created_ids = self._index_run_events(run_id)
+
+        events: list[BaseEvent] = []
+        results: list[dict[str, Any]] = []
+        for item in updates:
+            task_id = item["task_id"]
+            parents = item.get("parents") or (
+                [created_ids[task_id]] if task_id in created_ids else []
+            )
+            event: BaseEvent
+            if item["action"] == "complete":
+                event = TaskCompletedEvent(
+                    run_id=run_id,
+                    task_id=task_id,
+                    actor="copilot",
+                    parents=parents,
+                    payload={"result": item.get("result", "")},
+                )
+                results.append({"task_id": task_id, "status": "completed"})
+            elif item["action"] == "fail":
+                event = TaskFailedEvent(
+                    run_id=run_id,
+                    task_id=task_id,
+                    actor="copilot",
+                    parents=parents,
+                    payload={
+                        "error": item.get("error", ""),
+                        "retryable": item.get("retryable", True),
+                    },
+                )
+                results.append({"task_id": task_id, "status": "failed"})
+            else:
+                event = TaskProgressedEvent(
+                    run_id=run_id,
+                    task_id=task_id,
+                    actor="copilot",
+                    parents=parents,
+                    payload={
+                        "progress": item["progress"],
+                        "message": item.get("message", ""),
+                    },
+                )
+                results.append(
+                    {"task_id": task_id, "status": "progressed", "progress": item["progress"]}
+                )
+            events.append(event)
+        self._get_ar().append_many(events, run_id)
+
+        return {"status": "updated", "results": results}
@@ -51,6 +51,7 @@ class ColonyForgeMCPServer:
     - start_run: 新しいRunを開始
     - get_run_status: Run状態を取得
     - create_task: Taskを作成
+    - create_tasks / update_tasks: Taskを一括作成・一括更新
     - complete_task: Taskを完了
     - fail_task: Taskを失敗
     - report_progress: 進捗を報告
@@ -171,6 +172,10 @@ class ColonyForgeMCPServer:
             return await self._task_handlers.handle_complete_task(arguments)
         elif name == "fail_task":
             return await self._task_handlers.handle_fail_task(arguments)
+        elif name == "create_tasks":
+            return await self._task_handlers.handle_create_tasks(arguments)
+        elif name == "update_tasks":
+            return await self._task_handlers.handle_update_tasks(arguments)
         # Requirement関連
         elif name == "create_requirement":
             return await self._requirement_handlers.handle_create_requirement(arguments)
@@ -101,4 +101,95 @@ def get_task_tools() -> list[Tool]:
                 "required": ["task_id", "error"],
             },
         ),
+        Tool(
+            name="create_tasks",
+            description=(
+                "複数のTaskを一括作成します。計画全体を1回で登録でき、"
+                "create_task を繰り返すより高速です。"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "tasks": {
+                        "type": "array",
+                        "minItems": 1,
+                        "maxItems": 500,
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "title": {"type": "string", "description": "タスクのタイトル"},
+                                "description": {
+                                    "type": "string",
+                                    "description": "タスクの詳細説明",
+                                },
+                                "parents": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "親イベントID（因果リンク用）",
+                                },
+                            },
+                            "required": ["title"],
+                        },
+                        "description": "作成するタスクのリスト",
+                    },
+                },
+                "required": ["tasks"],
+            },
+        ),
+        Tool(
+            name="update_tasks",
+            description=(
+                "複数のTaskを一括で完了・失敗・進捗更新します。"
+                "1件でも不正な項目があれば何も記録しません。"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "updates": {
+                        "type": "array",
+                        "minItems": 1,
+                        "maxItems": 500,
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "task_id": {"type": "string", "description": "タスクID"},
+                                "action": {
+                                    "type": "string",
+                                    "enum": ["complete", "fail", "progress"],
+                                    "description": "更新種別",
+                                },
+                                "result": {
+                                    "type": "string",
+                                    "description": "complete時の成果・結果",
+                                },
+                                "error": {"type": "string", "description": "fail時のエラー内容"},
+                                "retryable": {
+                                    "type": "boolean",
+                                    "description": "fail時にリトライ可能かどうか",
+                                    "default": True,
+                                },
+                                "progress": {
+                                    "type": "integer",
+                                    "minimum": 0,
+                                    "maximum": 100,
+                                    "description": "progress時の進捗率 (0-100)",
+                                },
+                                "message": {
+                                    "type": "string",
+                                    "description": "progress時のメッセージ",
+                                },
+                                "parents": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                    "description": "親イベントID（因果リンク用）",
+                                },
+                            },
+                            "required": ["task_id", "action"],
+                        },
+                        "description": "更新内容のリスト",
+                    },
+                },
+                "required": ["updates"],
+            },
+        ),
     ]
@@ -15,6 +15,7 @@ ROLE_ICONS: dict[str, str] = {
 ACTIVITY_ICONS: dict[str, str] = {
     "llm.request": "🧠",
     "llm.response": "💬",
+    "llm.stream": "💭",
     "mcp.tool_call": "🔧",
     "mcp.tool_result": "📦",
     "agent.started": "▶️ ",
@@ -14,6 +14,7 @@ from pydantic import BaseModel, ConfigDict, Field
 
 from colonyforge.core import generate_event_id
 from colonyforge.llm.client import LLMClient, Message
+from colonyforge.llm.scheduler import RequestPriority
 from colonyforge.prompts import TASK_DECOMPOSITION_SYSTEM
 
 if TYPE_CHECKING:
@@ -132,7 +133,7 @@ class TaskPlanner:
             ValidationError: レスポンスがスキーマに適合しない場合
         """
         messages = self._build_messages(goal, context or {})
-        response = await self._client.chat(messages)
+        response = await self._client.chat(messages, priority=RequestPriority.PLANNING)
         return self._parse_response(response.content or "")
 
     def _build_messages(self, goal: str, context: dict[str, Any]) -> list[Message]:
@@ -88,9 +88,8 @@ class TaskRunnerMixin:
                 "assigned_worker": worker.worker_id,
             },
         )
-        self.ar.append(task_event, run_id)
 
-        # TaskAssignedイベントを発行
+        # TaskAssignedイベントを発行（作成と割り当ては1回のロックでまとめて記録）
         assign_event = TaskAssignedEvent(
             id=generate_event_id(),
             run_id=run_id,
@@ -100,7 +99,7 @@ class TaskRunnerMixin:
                 "worker_id": worker.worker_id,
             },
         )
-        self.ar.append(assign_event, run_id)
+        self.ar.append_many([task_event, assign_event], run_id)
 
         # Worker BeeでLLM実行
         try:
@@ -0,0 +1,88 @@
+"""1回の実行内でのツール結果のメモ化
+
+Worker Bee は1回のタスク実行の中で、同じファイルの再読み込みや同じ状態照会のように、
+同じ読み取り専用ツールを同じ引数で何度も呼ぶことがある。
+冪等（idempotent）と宣言されたツールの結果を (ツール名, 正規化した引数) をキーに保持し、
+2回目以降はツールを実行せずに返す。
+
+書き込み系のツール（ActionClass が SAFE より上）が呼ばれたら、保持している結果は
+古くなっている可能性があるため全て破棄する。危険度は TrustManager と同じ
+ツール名→ActionClass の分類を使い、未知のツールは DANGEROUS とみなす。
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any
+
+from .trust import ActionClass, create_default_tool_classes
+
+
+def make_tool_key(name: str, arguments: dict[str, Any]) -> str | None:
+    """ツール名と引数からキーを作る（JSON にできない引数は None = メモ化しない）"""
+    try:
+        canonical = json.dumps(arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return f"{name}:{canonical}"
+
+
+class ToolResultMemo:
+    """1回の実行の間だけ有効なツール結果のメモ"""
+
+    def __init__(self, tool_classes: dict[str, ActionClass] | None = None) -> None:
+        self._tool_classes = (
+            tool_classes if tool_classes is not None else create_default_tool_classes()
+        )
+        self._results: dict[str, Any] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get_tool_class(self, name: str) -> ActionClass:
+        """ツールの危険度（未知のツールは DANGEROUS）"""
+        return self._tool_classes.get(name, ActionClass.DANGEROUS)
+
+    def lookup(self, name: str, arguments: dict[str, Any]) -> tuple[bool, Any]:
+        """保持している結果を探す
+
+        Returns:
+            (見つかったか, 結果の複製)
+        """
+        key = make_tool_key(name, arguments)
+        if key is None or key not in self._results:
+            self._misses += 1
+            return False, None
+        self._hits += 1
+        return True, copy.deepcopy(self._results[key])
+
+    def store(self, name: str, arguments: dict[str, Any], result: Any) -> None:
+        """結果を保持する"""
+        key = make_tool_key(name, arguments)
+        if key is not None:
+            self._results[key] = copy.deepcopy(result)
+
+    def invalidate_for(self, name: str) -> bool:
+        """name が書き込み系のツールなら保持している結果を全て破棄する
+
+        Returns:
+            破棄した場合 True
+        """
+        if self.get_tool_class(name) <= ActionClass.SAFE:
+            return False
+        if self._results:
+            self._results.clear()
+            self._invalidations += 1
+        return True
+
+    def get_stats(self) -> dict[str, Any]:
+        """メモの統計"""
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._results),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else 0.0,
+            "invalidations": self._invalidations,
+        }
@@ -13,6 +13,8 @@ from typing import Any
 
 from ulid import ULID
 
+from .tool_cache import ToolResultMemo
+
 
 class ToolExecutionError(Exception):
     """ツール実行時のエラー."""
@@ -57,6 +59,7 @@ class ToolDefinition:
     requires_confirmation: bool = False
     timeout_seconds: float = 30.0
     sandbox: bool = True  # サンドボックス内実行
+    idempotent: bool = False  # 同じ引数なら同じ結果（run ごとのメモで再利用できる）
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
@@ -160,8 +163,13 @@ class ToolExecutor:
         tool_id: str,
         arguments: dict[str, Any],
         worker_id: str = "",
+        memo: ToolResultMemo | None = None,
     ) -> ToolResult:
-        """ツールを実行"""
+        """ツールを実行
+
+        memo を渡すと、idempotent なツールは同じ引数の結果をメモから返し
+        （metadata["cached"] が True）、それ以外の書き込み系ツールはメモを破棄する。
+        """
         tool = self._tools.get(tool_id)
         if not tool:
             return ToolResult(
@@ -178,6 +186,19 @@ class ToolExecutor:
                 error=f"No handler for tool: {tool_id}",
             )
 
+        if memo is not None and tool.idempotent:
+            hit, output = memo.lookup(tool.name, arguments)
+            if hit:
+                return ToolResult(
+                    tool_id=tool_id,
+                    status=ToolStatus.COMPLETED,
+                    output=output,
+                    metadata={"cached": True},
+                )
+        elif memo is not None:
+            # 書き込み中に保持した結果も古くなるため、実行の前後で破棄する
+            memo.invalidate_for(tool.name)
+
         invocation = ToolInvocation(
             tool_id=tool_id,
             worker_id=worker_id,
@@ -211,6 +232,8 @@ class ToolExecutor:
 
             result.output = output
             result.status = ToolStatus.COMPLETED
+            if memo is not None and tool.idempotent:
+                memo.store(tool.name, arguments, output)
 
         except TimeoutError:
             result.status = ToolStatus.TIMEOUT
@@ -220,6 +243,8 @@ class ToolExecutor:
             raise ToolExecutionError(str(exc), tool_id=tool_id) from exc
 
         finally:
+            if memo is not None and not tool.idempotent:
+                memo.invalidate_for(tool.name)
             result.completed_at = datetime.now()
             if result.started_at:
                 delta = result.completed_at - result.started_at
@@ -240,6 +265,7 @@ class ToolExecutor:
         name: str,
         arguments: dict[str, Any],
         worker_id: str = "",
+        memo: ToolResultMemo | None = None,
     ) -> ToolResult:
         """名前でツールを実行"""
         tool = self.get_tool_by_name(name)
@@ -248,7 +274,7 @@ class ToolExecutor:
                 status=ToolStatus.FAILED,
                 error=f"Tool not found: {name}",
             )
-        return await self.execute(tool.tool_id, arguments, worker_id)
+        return await self.execute(tool.tool_id, arguments, worker_id, memo)
 
     def get_result(self, result_id: str) -> ToolResult | None:
         """実行結果取得"""
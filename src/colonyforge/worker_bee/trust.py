@@ -305,15 +305,18 @@ def create_default_tool_classes() -> dict[str, ActionClass]:
         # SAFE: 読み取り専用
         "read_file": ActionClass.SAFE,
         "list_dir": ActionClass.SAFE,
+        "list_directory": ActionClass.SAFE,
         "search": ActionClass.SAFE,
         "get_status": ActionClass.SAFE,
         # CAREFUL: 軽微な変更
         "create_file": ActionClass.CAREFUL,
         "edit_file": ActionClass.CAREFUL,
+        "write_file": ActionClass.CAREFUL,
         "mkdir": ActionClass.CAREFUL,
         # DANGEROUS: 重大な変更
         "delete_file": ActionClass.DANGEROUS,
         "execute_command": ActionClass.DANGEROUS,
+        "run_command": ActionClass.DANGEROUS,
         "http_request": ActionClass.DANGEROUS,
         # CRITICAL: 回復困難
         "rm_rf": ActionClass.CRITICAL,
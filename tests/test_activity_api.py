@@ -22,6 +22,7 @@ from colonyforge.core.activity_bus import (
     ActivityType,
     AgentInfo,
     AgentRole,
+    OverflowPolicy,
 )
 
 
@@ -42,6 +43,8 @@ def client(tmp_path):
     mock_s = MagicMock()
     mock_s.get_vault_path.return_value = tmp_path / "Vault"
     mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
 
     with (
         patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -164,6 +167,60 @@ class TestActivityHierarchy:
         data = response.json()
         assert "hive-1" in data["hierarchy"]
 
+    @pytest.mark.asyncio
+    async def test_hierarchy_not_modified(self, client):
+        """ETag が一致すれば 304、エージェントが増えれば新しい版を返す"""
+        # Arrange
+        bus = ActivityBus.get_instance()
+        await bus.emit(ActivityEvent(ActivityType.AGENT_STARTED, _make_agent(), "started"))
+        etag = client.get("/activity/hierarchy").headers["etag"]
+
+        # Act
+        unchanged = client.get("/activity/hierarchy", headers={"If-None-Match": etag})
+        await bus.emit(ActivityEvent(ActivityType.AGENT_STARTED, _make_agent(agent_id="w-2"), "s"))
+        changed = client.get("/activity/hierarchy", headers={"If-None-Match": etag})
+
+        # Assert
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.json()["version"] == 2
+        assert len(changed.json()["hierarchy"]["hive-1"]["colonies"]["colony-1"]["workers"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_hierarchy_delta_since_version(self, client):
+        """since_version 以降の変更のみを返し、最新なら changed=False を返す"""
+        # Arrange
+        bus = ActivityBus.get_instance()
+        await bus.emit(ActivityEvent(ActivityType.AGENT_STARTED, _make_agent(), "started"))
+        await bus.emit(ActivityEvent(ActivityType.AGENT_COMPLETED, _make_agent(), "completed"))
+
+        # Act
+        delta = client.get("/activity/hierarchy", params={"since_version": 1})
+        latest = client.get("/activity/hierarchy", params={"since_version": 2})
+        future = client.get("/activity/hierarchy", params={"since_version": 99})
+        revalidated = client.get(
+            "/activity/hierarchy",
+            params={"since_version": 2},
+            headers={"If-None-Match": latest.headers["etag"]},
+        )
+
+        # Assert
+        assert delta.json() == {
+            "version": 2,
+            "since_version": 1,
+            "changed": True,
+            "changes": [{"version": 2, "op": "removed", "agent": _make_agent().to_dict()}],
+        }
+        assert latest.status_code == 200
+        assert latest.json() == {
+            "version": 2,
+            "since_version": 2,
+            "changed": False,
+            "changes": [],
+        }
+        assert future.json() == {"version": 2, "hierarchy": {}}
+        assert revalidated.status_code == 304
+
 
 # =============================================================================
 # GET /activity/agents テスト
@@ -425,6 +482,101 @@ class TestActivityStream:
         # Assert: ハンドラが解除されている
         assert len(bus._subscribers) == initial_count
 
+    @pytest.mark.asyncio
+    async def test_stream_ends_when_disconnected_on_overflow(self):
+        """overflow=disconnect で受信が追いつかない場合はストリームを終了する
+
+        切断後はActivityBusから購読が解除され、クライアントは再接続して replay する。
+        """
+        from colonyforge.api.routes.activity import stream_events
+
+        # Arrange
+        bus = ActivityBus.get_instance()
+        response = await stream_events(replay=0, queue_size=2, overflow=OverflowPolicy.DISCONNECT)
+        gen = response.body_iterator
+        next_task = asyncio.create_task(gen.__anext__())
+        await asyncio.sleep(0.05)
+
+        # Act: 1件目を受信させた後、読まずに溢れさせる
+        await bus.emit(_make_event(summary="first"))
+        first = await asyncio.wait_for(next_task, timeout=2.0)
+        for i in range(3):
+            await bus.emit(_make_event(summary=f"burst-{i}"))
+        chunk = await asyncio.wait_for(gen.__anext__(), timeout=2.0)
+
+        # Assert
+        assert "first" in first
+        assert chunk == ": disconnected (overflow)\n\n"
+        with pytest.raises(StopAsyncIteration):
+            await gen.__anext__()
+        assert bus.get_subscriber_stats() == []
+
+    @pytest.mark.asyncio
+    async def test_stream_applies_server_side_filter(self):
+        """フィルタに一致しないイベントは replay・配信とも送らない"""
+        from colonyforge.api.routes.activity import stream_events
+
+        # Arrange
+        bus = ActivityBus.get_instance()
+        queen = _make_agent(role=AgentRole.QUEEN_BEE, agent_id="q-1")
+        await bus.emit(_make_event(summary="old-worker"))
+        await bus.emit(_make_event(agent=queen, summary="old-queen"))
+        response = await stream_events(replay=10, role=[AgentRole.QUEEN_BEE])
+        gen = response.body_iterator
+
+        # Act
+        replayed = await gen.__anext__()
+        next_task = asyncio.create_task(gen.__anext__())
+        await asyncio.sleep(0.05)
+        await bus.emit(_make_event(summary="new-worker"))
+        await bus.emit(_make_event(agent=queen, summary="new-queen"))
+        live = await asyncio.wait_for(next_task, timeout=2.0)
+        await gen.aclose()
+
+        # Assert
+        assert "old-queen" in replayed
+        assert "new-queen" in live
+
+    def test_stream_rejects_unknown_role(self, client):
+        """未知のロール指定は422"""
+        # Act
+        response = client.get("/activity/stream", params={"role": "drone"})
+
+        # Assert
+        assert response.status_code == 422
+
+
+class TestActivitySubscribers:
+    """GET /activity/subscribers テスト"""
+
+    @pytest.mark.asyncio
+    async def test_subscribers_report_metrics(self, client):
+        """購読ごとの遅延・破棄数を返す"""
+        # Arrange
+        bus = ActivityBus.get_instance()
+        bus.open_subscription("sse", max_queue=2, policy=OverflowPolicy.DROP_NEWEST)
+        for i in range(3):
+            await bus.emit(_make_event(summary=f"e{i}"))
+
+        # Act
+        response = client.get("/activity/subscribers")
+
+        # Assert
+        assert response.status_code == 200
+        [stats] = response.json()["subscribers"]
+        assert stats["name"] == "sse"
+        assert stats["lag"] == 2
+        assert stats["dropped"] == 1
+        assert stats["policy"] == "drop_newest"
+
+    def test_stream_rejects_unknown_policy(self, client):
+        """未知の overflow 指定は422"""
+        # Act
+        response = client.get("/activity/stream", params={"overflow": "block"})
+
+        # Assert
+        assert response.status_code == 422
+
 
 # =============================================================================
 # POST /activity/emit テスト
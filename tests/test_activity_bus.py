@@ -14,9 +14,12 @@ import pytest
 from colonyforge.core.activity_bus import (
     ActivityBus,
     ActivityEvent,
+    ActivityFilter,
+    ActivitySubscription,
     ActivityType,
     AgentInfo,
     AgentRole,
+    OverflowPolicy,
 )
 
 # =============================================================================
@@ -251,6 +254,7 @@ class TestActivityBus:
 
         # Act
         await bus.emit(event)
+        await bus.flush()
 
         # Assert
         assert len(received) == 1
@@ -283,6 +287,7 @@ class TestActivityBus:
 
         # Act
         await bus.emit(event)
+        await bus.flush()
 
         # Assert
         assert len(received_a) == 1
@@ -498,16 +503,17 @@ class TestActivityBus:
 
         # Act
         await bus.emit(event)
+        await bus.flush()
 
         # Assert: エラーハンドラがあっても正常ハンドラは動作
         assert len(received) == 1
 
     @pytest.mark.asyncio
     async def test_emit_parallel_execution(self):
-        """emitがサブスクライバーを並列実行する
+        """emitはハンドラーを待たず、サブスクライバーは並列に処理される
 
-        遅いハンドラーが他のハンドラーをブロックしないことを確認。
-        並列実行なら合計時間は最も遅いハンドラーの時間に近い。
+        遅いハンドラーが発行側や他のハンドラーをブロックしないことを確認。
+        並列実行なら全処理の完了時間は最も遅いハンドラーの時間に近い。
         """
         import time
 
@@ -536,9 +542,13 @@ class TestActivityBus:
         # Act
         start = time.monotonic()
         await bus.emit(event)
+        emit_elapsed = time.monotonic() - start
+        await bus.flush()
         elapsed = time.monotonic() - start
 
-        # Assert: 両方のハンドラーが完了している
+        # Assert: emit は遅いハンドラーを待たずに戻る
+        assert emit_elapsed < 0.1, f"emitは即座に戻るべき（実際: {emit_elapsed:.3f}秒）"
+        # 両方のハンドラーが完了している
         assert len(timestamps) == 2
         # 並列実行なら0.2秒強で完了（逐次なら0.2秒以上 + fast_handler分）
         assert elapsed < 0.4, f"並列実行なら0.4秒未満で完了すべき（実際: {elapsed:.3f}秒）"
@@ -579,6 +589,7 @@ class TestActivityBus:
         activity_bus.HANDLER_TIMEOUT = 0.1
         try:
             await bus.emit(event)
+            await bus.flush()
         finally:
             activity_bus.HANDLER_TIMEOUT = original_timeout
 
@@ -667,3 +678,576 @@ class TestActivityBusConfigurable:
 
         # Assert
         assert bus._max_recent_events == 100
+
+
+# =============================================================================
+# 有界キューとバックプレッシャーのテスト
+# =============================================================================
+
+
+def _event(summary: str) -> ActivityEvent:
+    agent = AgentInfo(agent_id="w-1", role=AgentRole.WORKER_BEE, hive_id="h-1")
+    return ActivityEvent(activity_type=ActivityType.LLM_REQUEST, agent=agent, summary=summary)
+
+
+class TestSubscriptionBackpressure:
+    """購読ごとの有界キューと溢れ時の方針のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_latest(self):
+        """DROP_OLDEST は古い未配信イベントを捨て、最新を残す"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("slow", max_queue=3, policy=OverflowPolicy.DROP_OLDEST)
+
+        # Act
+        for i in range(5):
+            await bus.emit(_event(f"e{i}"))
+        received = [(await sub.get()).summary for _ in range(3)]
+
+        # Assert
+        assert received == ["e2", "e3", "e4"]
+        assert sub.dropped == 2
+        assert sub.delivered == 3
+
+    @pytest.mark.asyncio
+    async def test_drop_newest_keeps_earliest(self):
+        """DROP_NEWEST は満杯時に新しいイベントを捨てる"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("slow", max_queue=3, policy=OverflowPolicy.DROP_NEWEST)
+
+        # Act
+        for i in range(5):
+            await bus.emit(_event(f"e{i}"))
+        received = [(await sub.get()).summary for _ in range(3)]
+
+        # Assert
+        assert received == ["e0", "e1", "e2"]
+        assert sub.dropped == 2
+
+    @pytest.mark.asyncio
+    async def test_disconnect_removes_subscription(self):
+        """DISCONNECT は溢れた購読を切断し、消費側には None を返す"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("slow", max_queue=2, policy=OverflowPolicy.DISCONNECT)
+        other = bus.open_subscription("fast", max_queue=10)
+
+        # Act
+        for i in range(3):
+            await bus.emit(_event(f"e{i}"))
+
+        # Assert
+        assert sub.closed
+        assert await sub.get() is None
+        assert bus._subscribers == [other]
+        assert other.lag == 3
+
+    @pytest.mark.asyncio
+    async def test_emit_does_not_wait_for_blocked_handler(self):
+        """ハンドラーが停止していても emit は待たず、キューは上限で止まる"""
+        # Arrange
+        bus = ActivityBus()
+        release = asyncio.Event()
+
+        async def blocked(event: ActivityEvent) -> None:
+            await release.wait()
+
+        sub = bus.subscribe(blocked, max_queue=10)
+
+        # Act
+        for i in range(100):
+            await asyncio.wait_for(bus.emit(_event(f"e{i}")), timeout=0.1)
+        await asyncio.sleep(0)
+        stats = bus.get_subscriber_stats()
+        release.set()
+        await bus.flush()
+
+        # Assert
+        assert stats[0]["lag"] <= 10
+        assert stats[0]["dropped"] >= 89
+        assert sub.delivered + sub.dropped == 100
+        bus.close()
+
+    @pytest.mark.asyncio
+    async def test_stats_report_lag_and_peak(self):
+        """メトリクスに未配信数・最大遅延・配信数が含まれる"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("sse", max_queue=10)
+        for i in range(4):
+            await bus.emit(_event(f"e{i}"))
+
+        # Act
+        await sub.get()
+        stats = bus.get_subscriber_stats()
+
+        # Assert
+        assert stats == [
+            {
+                "name": "sse",
+                "policy": "drop_oldest",
+                "max_queue": 10,
+                "lag": 3,
+                "peak_lag": 4,
+                "delivered": 1,
+                "dropped": 0,
+                "closed": False,
+                "filter": {},
+            }
+        ]
+
+    def test_invalid_queue_size_rejected(self):
+        """max_queue が1未満なら ValueError"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ActivitySubscription("x", max_queue=0)
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_by_subscription(self):
+        """購読オブジェクトで解除すると消費側に None が返る"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("sse")
+
+        # Act
+        bus.unsubscribe(sub)
+
+        # Assert
+        assert bus.get_subscriber_stats() == []
+        assert await sub.get() is None
+
+
+# =============================================================================
+# 購読フィルタのテスト
+# =============================================================================
+
+
+def _agent_event(
+    activity_type: ActivityType = ActivityType.LLM_REQUEST,
+    *,
+    agent_id: str = "w-1",
+    role: AgentRole = AgentRole.WORKER_BEE,
+    hive_id: str = "h-1",
+    colony_id: str | None = "c-1",
+    event_id: str | None = None,
+) -> ActivityEvent:
+    agent = AgentInfo(agent_id=agent_id, role=role, hive_id=hive_id, colony_id=colony_id)
+    event = ActivityEvent(activity_type=activity_type, agent=agent, summary=agent_id)
+    if event_id is not None:
+        event.event_id = event_id
+    return event
+
+
+class TestActivityFilterRouting:
+    """購読フィルタとルーティング表のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_routes_only_matching_hive(self):
+        """hive_ids を指定した購読には一致するHiveのイベントだけが届く"""
+        # Arrange
+        bus = ActivityBus()
+        alpha = bus.open_subscription(
+            "a", activity_filter=ActivityFilter(hive_ids=frozenset({"h-a"}))
+        )
+        everything = bus.open_subscription("all")
+
+        # Act
+        await bus.emit(_agent_event(hive_id="h-a"))
+        await bus.emit(_agent_event(hive_id="h-b"))
+
+        # Assert
+        assert alpha.lag == 1
+        assert (await alpha.get()).agent.hive_id == "h-a"
+        assert everything.lag == 2
+
+    @pytest.mark.asyncio
+    async def test_conditions_are_anded_values_are_ored(self):
+        """項目間はAND、同一項目の複数値はORで判定する"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription(
+            "tools",
+            activity_filter=ActivityFilter(
+                colony_ids=frozenset({"c-1", "c-2"}),
+                activity_types=frozenset(
+                    {ActivityType.MCP_TOOL_CALL, ActivityType.MCP_TOOL_RESULT}
+                ),
+            ),
+        )
+
+        # Act
+        await bus.emit(_agent_event(ActivityType.MCP_TOOL_CALL, colony_id="c-1"))
+        await bus.emit(_agent_event(ActivityType.MCP_TOOL_RESULT, colony_id="c-2"))
+        await bus.emit(_agent_event(ActivityType.LLM_REQUEST, colony_id="c-1"))
+        await bus.emit(_agent_event(ActivityType.MCP_TOOL_CALL, colony_id="c-3"))
+
+        # Assert
+        assert sub.lag == 2
+
+    @pytest.mark.asyncio
+    async def test_route_matches_predicate(self):
+        """ルーティング表の結果が各購読の述語判定と一致する"""
+        # Arrange
+        bus = ActivityBus()
+        filters = [
+            ActivityFilter(),
+            ActivityFilter(hive_ids=frozenset({"h-1"})),
+            ActivityFilter(roles=frozenset({AgentRole.QUEEN_BEE})),
+            ActivityFilter(agent_ids=frozenset({"w-2", "q-1"})),
+            ActivityFilter(
+                hive_ids=frozenset({"h-2"}), activity_types=frozenset({ActivityType.LLM_RESPONSE})
+            ),
+            ActivityFilter(colony_ids=frozenset({"c-2"}), sample_rate=0.5),
+        ]
+        subs = [bus.open_subscription(f"s{i}", activity_filter=f) for i, f in enumerate(filters)]
+        events = [
+            _agent_event(t, agent_id=a, role=r, hive_id=h, colony_id=c, event_id=f"{h}{c}{a}{t}")
+            for t in (ActivityType.LLM_REQUEST, ActivityType.LLM_RESPONSE)
+            for a, r in (
+                ("w-1", AgentRole.WORKER_BEE),
+                ("w-2", AgentRole.WORKER_BEE),
+                ("q-1", AgentRole.QUEEN_BEE),
+            )
+            for h in ("h-1", "h-2")
+            for c in ("c-1", "c-2", None)
+        ]
+
+        # Act
+        for event in events:
+            await bus.emit(event)
+
+        # Assert
+        for sub, activity_filter in zip(subs, filters, strict=True):
+            assert sub.lag == sum(activity_filter.matches(e) for e in events), sub.name
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_routes(self):
+        """解除した購読はルーティング表からも除かれる"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription(
+            "a", activity_filter=ActivityFilter(hive_ids=frozenset({"h-1"}))
+        )
+        bus.unsubscribe(sub)
+        other = bus.open_subscription(
+            "b", activity_filter=ActivityFilter(hive_ids=frozenset({"h-1"}))
+        )
+
+        # Act
+        await bus.emit(_agent_event(hive_id="h-1"))
+
+        # Assert
+        assert bus._routes.route(_agent_event(hive_id="h-1")) == [other]
+        assert other.lag == 1
+
+    @pytest.mark.asyncio
+    async def test_sampling_keeps_about_rate_and_lifecycle(self):
+        """サンプリングはおおよそ指定率で間引き、ライフサイクルは常に残す"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription(
+            "sampled", max_queue=10_000, activity_filter=ActivityFilter(sample_rate=0.1)
+        )
+
+        # Act
+        for i in range(2000):
+            await bus.emit(_agent_event(event_id=f"ev-{i}"))
+        sampled = sub.lag
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, event_id="start"))
+
+        # Assert
+        assert 120 <= sampled <= 280
+        assert sub.lag == sampled + 1
+
+    def test_invalid_sample_rate(self):
+        """sample_rate が (0, 1] の範囲外なら ValueError"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ActivityFilter(sample_rate=0.0)
+
+    def test_filter_to_dict(self):
+        """指定された条件のみ辞書に含まれる"""
+        # Act
+        d = ActivityFilter(roles=frozenset({AgentRole.QUEEN_BEE}), sample_rate=0.25).to_dict()
+
+        # Assert
+        assert d == {"role": ["queen_bee"], "sample_rate": 0.25}
+
+
+class TestIncrementalHierarchy:
+    """階層の差分更新とバージョンのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_completion_prunes_empty_colony_and_hive(self):
+        """最後のエージェントが終了したColony・Hiveは階層から消える"""
+        # Arrange
+        bus = ActivityBus()
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, agent_id="w-1"))
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, agent_id="w-2", colony_id="c-2"))
+
+        # Act
+        await bus.emit(_agent_event(ActivityType.AGENT_COMPLETED, agent_id="w-1"))
+        after_first = bus.get_hierarchy()
+        await bus.emit(_agent_event(ActivityType.AGENT_COMPLETED, agent_id="w-2", colony_id="c-2"))
+
+        # Assert
+        assert list(after_first["h-1"]["colonies"]) == ["c-2"]
+        assert bus.get_hierarchy() == {}
+
+    @pytest.mark.asyncio
+    async def test_version_advances_only_on_changes(self):
+        """開始・終了で進み、通常イベントや同一内容の再開始では進まない"""
+        # Arrange
+        bus = ActivityBus()
+
+        # Act
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED))
+        started = bus.hierarchy_version
+        await bus.emit(_agent_event(ActivityType.LLM_REQUEST))
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED))
+        await bus.emit(_agent_event(ActivityType.AGENT_COMPLETED, agent_id="unknown"))
+
+        # Assert
+        assert started == 1
+        assert bus.hierarchy_version == 1
+
+    @pytest.mark.asyncio
+    async def test_restart_with_new_colony_moves_agent(self):
+        """同じエージェントが別Colonyで開始し直すと移動として記録される"""
+        # Arrange
+        bus = ActivityBus()
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, colony_id="c-1"))
+
+        # Act
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, colony_id="c-2"))
+        changes = bus.get_hierarchy_changes(1)
+
+        # Assert
+        assert list(bus.get_hierarchy()["h-1"]["colonies"]) == ["c-2"]
+        assert [(c["op"], c["agent"]["colony_id"]) for c in changes] == [
+            ("removed", "c-1"),
+            ("added", "c-2"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_changes_since_version(self):
+        """指定バージョンより後の変更のみ、古い順に返す"""
+        # Arrange
+        bus = ActivityBus()
+        for i in range(3):
+            await bus.emit(_agent_event(ActivityType.AGENT_STARTED, agent_id=f"w-{i}"))
+        await bus.emit(_agent_event(ActivityType.AGENT_COMPLETED, agent_id="w-0"))
+
+        # Act
+        changes = bus.get_hierarchy_changes(2)
+
+        # Assert
+        assert [(c["version"], c["op"], c["agent"]["agent_id"]) for c in changes] == [
+            (3, "added", "w-2"),
+            (4, "removed", "w-0"),
+        ]
+        assert bus.get_hierarchy_changes(4) == []
+        assert bus.get_hierarchy_changes(5) is None
+
+    @pytest.mark.asyncio
+    async def test_changes_unavailable_after_log_rotation(self):
+        """変更記録から溢れた古いバージョンは None（全体の取り直し）"""
+        # Arrange
+        bus = ActivityBus()
+        for i in range(1100):
+            await bus.emit(_agent_event(ActivityType.AGENT_STARTED, agent_id=f"w-{i}"))
+
+        # Act & Assert
+        assert bus.get_hierarchy_changes(0) is None
+        assert len(bus.get_hierarchy_changes(1000)) == 100
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_cached_per_version(self):
+        """同じバージョンの間はJSON化した階層を使い回す"""
+        # Arrange
+        bus = ActivityBus()
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED))
+
+        # Act
+        first = bus.get_hierarchy_snapshot()
+        second = bus.get_hierarchy_snapshot()
+        await bus.emit(_agent_event(ActivityType.AGENT_STARTED, agent_id="w-2"))
+        third = bus.get_hierarchy_snapshot()
+
+        # Assert
+        assert first is second
+        assert first[1]["h-1"]["colonies"]["c-1"]["workers"] == [
+            {"agent_id": "w-1", "role": "worker_bee", "hive_id": "h-1", "colony_id": "c-1"}
+        ]
+        assert third[0] == 2
+        assert len(third[1]["h-1"]["colonies"]["c-1"]["workers"]) == 2
+
+
+def _drain(sub: ActivitySubscription) -> list[ActivityEvent]:
+    events = []
+    while not sub._queue.empty():
+        event = sub._queue.get_nowait()
+        if event is not None:
+            events.append(event)
+    return events
+
+
+class TestActivityCoalescing:
+    """途中経過（task.progress / llm.stream）の時間窓によるまとめ配信のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_burst_is_merged_into_latest_state(self):
+        """窓内の連続した進捗は、最初の1件と最新状態の1件にまとまる"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=0.05)
+        sub = bus.open_subscription("s")
+
+        # Act
+        for i in range(10):
+            event = _agent_event(ActivityType.TASK_PROGRESS)
+            event.summary = f"{i * 10}%"
+            event.detail = {"progress": i * 10}
+            await bus.emit(event)
+        immediate = _drain(sub)
+        await asyncio.sleep(0.1)
+        merged = _drain(sub)
+
+        # Assert
+        assert [e.summary for e in immediate] == ["0%"]
+        assert len(merged) == 1
+        assert merged[0].summary == "90%"
+        assert merged[0].detail == {"progress": 90, "coalesced": 9}
+
+    @pytest.mark.asyncio
+    async def test_stream_deltas_are_concatenated(self):
+        """ストリーミングの差分テキストは欠けずに連結される"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=0.05)
+        sub = bus.open_subscription("s")
+        tokens = ["Hel", "lo", ", ", "wor", "ld"]
+
+        # Act
+        for token in tokens:
+            event = _agent_event(ActivityType.LLM_STREAM)
+            event.detail = {"delta": token}
+            await bus.emit(event)
+        await bus.flush()
+
+        # Assert
+        events = _drain(sub)
+        assert "".join(e.detail["delta"] for e in events) == "Hello, world"
+        assert events[-1].detail["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_final_progress_flushes_and_is_delivered_immediately(self):
+        """最終版の進捗は保留中のものを先に配信した上で即座に届く"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=10.0)
+        sub = bus.open_subscription("s")
+        for progress in (10, 20, 30):
+            event = _agent_event(ActivityType.TASK_PROGRESS)
+            event.detail = {"progress": progress}
+            await bus.emit(event)
+
+        # Act
+        final = _agent_event(ActivityType.TASK_PROGRESS)
+        final.detail = {"progress": 100}
+        await bus.emit(final)
+
+        # Assert
+        assert [e.detail["progress"] for e in _drain(sub)] == [10, 30, 100]
+
+    @pytest.mark.asyncio
+    async def test_other_event_of_same_agent_flushes_pending_first(self):
+        """同じエージェントの他種別イベントの前に保留中の途中経過が配信される"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=10.0)
+        sub = bus.open_subscription("s")
+        for token in ("a", "b", "c"):
+            event = _agent_event(ActivityType.LLM_STREAM)
+            event.detail = {"delta": token}
+            await bus.emit(event)
+
+        # Act
+        await bus.emit(_agent_event(ActivityType.LLM_RESPONSE))
+        await bus.emit(_agent_event(ActivityType.AGENT_COMPLETED))
+
+        # Assert
+        events = _drain(sub)
+        assert [e.activity_type for e in events] == [
+            ActivityType.LLM_STREAM,
+            ActivityType.LLM_STREAM,
+            ActivityType.LLM_RESPONSE,
+            ActivityType.AGENT_COMPLETED,
+        ]
+        assert events[1].detail == {"delta": "bc", "coalesced": 2}
+        assert bus._coalesce == {}
+
+    @pytest.mark.asyncio
+    async def test_agents_are_coalesced_independently(self):
+        """別エージェントの途中経過はまとめられない"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=10.0)
+        sub = bus.open_subscription("s")
+
+        # Act
+        for agent_id in ("w-1", "w-2", "w-3"):
+            await bus.emit(_agent_event(ActivityType.TASK_PROGRESS, agent_id=agent_id))
+
+        # Assert
+        assert [e.agent.agent_id for e in _drain(sub)] == ["w-1", "w-2", "w-3"]
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self):
+        """既定（窓 0）では全ての途中経過をそのまま配信する"""
+        # Arrange
+        bus = ActivityBus()
+        sub = bus.open_subscription("s")
+
+        # Act
+        for _ in range(5):
+            await bus.emit(_agent_event(ActivityType.TASK_PROGRESS))
+
+        # Assert
+        assert sub.lag == 5
+
+    @pytest.mark.asyncio
+    async def test_frame_rate_is_bounded(self):
+        """どれだけ頻繁に送っても、窓あたりの配信数は一定以下に抑えられる"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=0.02)
+        sub = bus.open_subscription("s", max_queue=10_000)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 0.2
+        sent = 0
+
+        # Act
+        while loop.time() < deadline:
+            await bus.emit(_agent_event(ActivityType.LLM_STREAM))
+            sent += 1
+            await asyncio.sleep(0)
+        await bus.flush()
+
+        # Assert
+        events = _drain(sub)
+        assert sent > 100
+        assert len(events) <= 0.2 / 0.02 + 3
+        assert sum(e.detail.get("coalesced", 1) for e in events) == sent
+
+    @pytest.mark.asyncio
+    async def test_set_window_to_zero_flushes_pending(self):
+        """窓を 0 に変更すると保留中の途中経過が配信される"""
+        # Arrange
+        bus = ActivityBus(coalesce_window=10.0)
+        sub = bus.open_subscription("s")
+        for _ in range(3):
+            await bus.emit(_agent_event(ActivityType.TASK_PROGRESS))
+
+        # Act
+        bus.set_coalesce_window(0)
+
+        # Assert
+        assert sub.lag == 2
+        assert bus.coalesce_window == 0
@@ -0,0 +1,396 @@
+"""アクティビティ履歴（リングファイル）のテスト
+
+ActivityHistory の追記・折り返し・索引・再オープンと、
+ActivityBus / SSE（Last-Event-ID, since）からの再生を検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from colonyforge.core.activity_bus import (
+    ActivityBus,
+    ActivityEvent,
+    ActivityType,
+    AgentInfo,
+    AgentRole,
+)
+from colonyforge.core.activity_history import (
+    HEADER_SIZE,
+    MIN_HISTORY_BYTES,
+    ActivityHistory,
+)
+
+
+def _event(summary: str, *, agent_id: str = "w-1", size: int = 0, at: datetime | None = None):
+    agent = AgentInfo(agent_id=agent_id, role=AgentRole.WORKER_BEE, hive_id="h-1")
+    event = ActivityEvent(
+        activity_type=ActivityType.LLM_REQUEST,
+        agent=agent,
+        summary=summary,
+        detail={"pad": "x" * size} if size else {},
+    )
+    if at is not None:
+        event.timestamp = at.isoformat()
+    return event
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = ActivityHistory(tmp_path / "activity" / "history.ring", max_bytes=MIN_HISTORY_BYTES)
+    yield h
+    h.close()
+
+
+class TestActivityHistory:
+    """ActivityHistory の基本動作"""
+
+    def test_append_and_get_roundtrip(self, history):
+        """追記したイベントを通番で取り出せる"""
+        # Arrange
+        event = _event("hello")
+        event.detail = {"nested": {"n": 1}, "text": "日本語"}
+
+        # Act
+        seq = history.append(event)
+        restored = history.get(seq)
+
+        # Assert
+        assert seq == 1
+        assert restored.to_dict() == event.to_dict()
+        assert restored.seq == 1
+
+    def test_wraps_and_evicts_oldest(self, history):
+        """容量を超えると古い順に上書きされ、残りは連続した通番で読める"""
+        # Act
+        for i in range(300):
+            history.append(_event(f"e{i}", size=1000))
+
+        # Assert
+        assert history.first_seq > 1
+        assert history.last_seq == 300
+        seqs = [seq for seq, _ in history.read_after(0)]
+        assert seqs == list(range(history.first_seq, 301))
+        assert history.get(300).summary == "e299"
+        assert history.get(1) is None
+
+    def test_random_sizes_survive_many_wraps(self, history):
+        """ランダムな大きさで何周も折り返しても内容が一致する"""
+        # Arrange
+        rng = random.Random(42)
+
+        # Act
+        for i in range(3000):
+            history.append(_event(f"e{i}", size=rng.randint(0, 4000)))
+
+        # Assert
+        restored = list(history.read_after(0))
+        assert restored
+        assert all(event.summary == f"e{seq - 1}" for seq, event in restored)
+        assert restored[-1][0] == 3000
+
+    def test_reopen_rebuilds_index(self, tmp_path):
+        """再オープン後も通番・時刻・エージェントの索引が使える"""
+        # Arrange
+        path = tmp_path / "history.ring"
+        h = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES)
+        for i in range(150):
+            h.append(_event(f"e{i}", agent_id=f"a{i % 3}", size=800))
+        first, last = h.first_seq, h.last_seq
+        h.close()
+
+        # Act
+        reopened = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES)
+        by_agent = [e.summary for _, e in reopened.read_after(0, agent_ids=["a1"])]
+        next_seq = reopened.append(_event("after-reopen"))
+        reopened.close()
+
+        # Assert
+        assert (reopened.first_seq, reopened.last_seq) == (first, last + 1)
+        assert by_agent and all(int(s[1:]) % 3 == 1 for s in by_agent)
+        assert next_seq == last + 1
+
+    def test_capacity_change_recreates_file(self, tmp_path):
+        """容量が変わった場合は作り直す"""
+        # Arrange
+        path = tmp_path / "history.ring"
+        h = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES)
+        h.append(_event("old"))
+        h.close()
+
+        # Act
+        resized = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES * 2)
+
+        # Assert
+        assert len(resized) == 0
+        assert path.stat().st_size == HEADER_SIZE + MIN_HISTORY_BYTES * 2
+        resized.close()
+
+    def test_corrupted_records_are_discarded(self, tmp_path):
+        """レコードが破損していれば履歴を破棄して継続する"""
+        # Arrange
+        path = tmp_path / "history.ring"
+        h = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES)
+        for i in range(3):
+            h.append(_event(f"e{i}"))
+        h.close()
+        with open(path, "r+b") as f:
+            f.seek(HEADER_SIZE + 4)
+            f.write(b"\xff" * 8)
+
+        # Act
+        reopened = ActivityHistory(path, max_bytes=MIN_HISTORY_BYTES)
+        seq = reopened.append(_event("fresh"))
+
+        # Assert
+        assert [e.summary for _, e in reopened.read_after(0)] == ["fresh"]
+        assert seq == 4
+        reopened.close()
+
+    def test_seq_at_time(self, history):
+        """時刻から再生開始の通番を求める"""
+        # Arrange
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+        for i in range(10):
+            history.append(_event(f"e{i}", at=base + timedelta(minutes=i)))
+
+        # Act & Assert
+        assert history.seq_at(base + timedelta(minutes=4)) == 5
+        assert history.seq_at(base + timedelta(minutes=3, seconds=30)) == 5
+        assert history.seq_at(base + timedelta(hours=1)) == 11
+
+    def test_read_after_with_agents_and_limit(self, history):
+        """エージェント索引と件数上限で絞り込める"""
+        # Arrange
+        for i in range(10):
+            history.append(_event(f"e{i}", agent_id="a" if i % 2 else "b"))
+
+        # Act
+        page = list(history.read_after(3, agent_ids=["a"], limit=2))
+
+        # Assert
+        assert [seq for seq, _ in page] == [4, 6]
+
+    def test_too_small_capacity_rejected(self, tmp_path):
+        """最小容量未満は ValueError"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ActivityHistory(tmp_path / "h.ring", max_bytes=1024)
+
+
+class TestActivityBusHistory:
+    """ActivityBus と履歴の連携"""
+
+    async def test_emit_assigns_sequence(self, history):
+        """履歴設定時は emit で通番が付く"""
+        # Arrange
+        bus = ActivityBus()
+        bus.attach_history(history)
+        event = _event("seq")
+
+        # Act
+        await bus.emit(event)
+
+        # Assert
+        assert event.seq == history.last_seq == 1
+
+    async def test_history_failure_does_not_block_emit(self, history):
+        """記録できないイベントでも配信は継続する"""
+        # Arrange
+        bus = ActivityBus()
+        bus.attach_history(history)
+        sub = bus.open_subscription("s")
+        event = _event("huge", size=MIN_HISTORY_BYTES)
+
+        # Act
+        await bus.emit(event)
+
+        # Assert
+        assert event.seq is None
+        assert sub.lag == 1
+
+
+@pytest.fixture
+def history_bus(tmp_path):
+    """履歴付きのシングルトン ActivityBus"""
+    ActivityBus.reset()
+    bus = ActivityBus.get_instance()
+    bus.attach_history(ActivityHistory(tmp_path / "history.ring", max_bytes=MIN_HISTORY_BYTES))
+    yield bus
+    ActivityBus.reset()
+
+
+def _frames(chunks: list[str]) -> list[tuple[int, dict]]:
+    result = []
+    for chunk in chunks:
+        data_line, id_line = chunk.rstrip("\n").split("\n")
+        result.append((int(id_line.removeprefix("id: ")), json.loads(data_line[6:])))
+    return result
+
+
+class TestStreamResume:
+    """SSE の履歴再生のテスト"""
+
+    async def test_resumes_after_last_event_id(self, history_bus):
+        """Last-Event-ID より後を、メモリ上の保持数を超えて再生する"""
+        from colonyforge.api.routes.activity import stream_events
+
+        # Arrange
+        for i in range(300):
+            await history_bus.emit(_event(f"e{i}"))
+
+        # Act
+        response = await stream_events(last_event_id="120")
+        gen = response.body_iterator
+        chunks = [await gen.__anext__() for _ in range(180)]
+        await gen.aclose()
+
+        # Assert
+        frames = _frames(chunks)
+        assert [seq for seq, _ in frames] == list(range(121, 301))
+        assert frames[0][1]["summary"] == "e120"
+
+    async def test_live_events_follow_replay_without_gap(self, history_bus):
+        """再生の後に購読後のイベントが重複・欠落なく続く"""
+        from colonyforge.api.routes.activity import stream_events
+
+        # Arrange
+        for i in range(3):
+            await history_bus.emit(_event(f"e{i}"))
+        response = await stream_events(last_event_id="1")
+        gen = response.body_iterator
+        replayed = [await gen.__anext__() for _ in range(2)]
+        next_task = asyncio.create_task(gen.__anext__())
+        await asyncio.sleep(0.05)
+
+        # Act
+        await history_bus.emit(_event("live"))
+        live = await asyncio.wait_for(next_task, timeout=2.0)
+        await gen.aclose()
+
+        # Assert
+        assert [seq for seq, _ in _frames([*replayed, live])] == [2, 3, 4]
+
+    async def test_since_with_agent_filter(self, history_bus):
+        """since とエージェント指定で履歴を絞り込んで再生する"""
+        from colonyforge.api.routes.activity import stream_events
+
+        # Arrange
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+        for i in range(20):
+            await history_bus.emit(
+                _event(f"e{i}", agent_id=f"a{i % 2}", at=base + timedelta(seconds=i))
+            )
+
+        # Act
+        response = await stream_events(since=base + timedelta(seconds=10), agent_id=["a1"])
+        gen = response.body_iterator
+        chunks = [await gen.__anext__() for _ in range(5)]
+        await gen.aclose()
+
+        # Assert
+        assert [f["summary"] for _, f in _frames(chunks)] == ["e11", "e13", "e15", "e17", "e19"]
+
+    async def test_invalid_last_event_id_is_400(self, history_bus):
+        """数値でない Last-Event-ID は400"""
+        from colonyforge.api.routes.activity import stream_events
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_events(last_event_id="abc")
+        assert exc_info.value.status_code == 400
+
+
+class TestServerLifespan:
+    """API サーバー起動時の履歴の作成と時間窓の設定のテスト"""
+
+    @staticmethod
+    def _start(settings) -> bool:
+        """lifespan の中で履歴が付いていたかを返す"""
+        from unittest.mock import patch
+
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+
+        ActivityBus.reset()
+        try:
+            with (
+                patch("colonyforge.api.server.get_settings", return_value=settings),
+                patch("colonyforge.api.helpers.get_settings", return_value=settings),
+                TestClient(app),
+            ):
+                return ActivityBus.get_instance().history is not None
+        finally:
+            ActivityBus.reset()
+
+    def test_history_created_under_vault(self, tmp_path):
+        """設定が有効なら Vault/activity/history.ring に作る"""
+        from colonyforge.core.config import ColonyForgeSettings
+
+        # Arrange
+        settings = ColonyForgeSettings()
+        settings.hive.vault_path = str(tmp_path / "Vault")
+        settings.server.activity_history.max_bytes = MIN_HISTORY_BYTES
+
+        # Act
+        attached = self._start(settings)
+
+        # Assert
+        assert attached
+        assert (tmp_path / "Vault" / "activity" / "history.ring").exists()
+
+    def test_no_history_when_disabled(self, tmp_path):
+        """設定で無効にすると履歴を作らない"""
+        from colonyforge.core.config import ColonyForgeSettings
+
+        # Arrange
+        settings = ColonyForgeSettings()
+        settings.hive.vault_path = str(tmp_path / "Vault")
+        settings.server.activity_history.enabled = False
+        settings.server.activity_coalescing.enabled = False
+
+        # Act
+        attached = self._start(settings)
+
+        # Assert
+        assert not attached
+        assert not (tmp_path / "Vault" / "activity" / "history.ring").exists()
+
+    def test_coalescing_window_from_settings(self, tmp_path):
+        """途中経過をまとめる時間窓は起動時の設定から読み、終了時に戻す"""
+        from unittest.mock import patch
+
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+        from colonyforge.core.config import ColonyForgeSettings
+
+        # Arrange
+        settings = ColonyForgeSettings()
+        settings.hive.vault_path = str(tmp_path / "Vault")
+        settings.server.activity_history.enabled = False
+        settings.server.activity_coalescing.window_ms = 250
+        ActivityBus.reset()
+
+        # Act
+        try:
+            with (
+                patch("colonyforge.api.server.get_settings", return_value=settings),
+                patch("colonyforge.api.helpers.get_settings", return_value=settings),
+                TestClient(app),
+            ):
+                during = ActivityBus.get_instance().coalesce_window
+            after = ActivityBus.get_instance().coalesce_window
+        finally:
+            ActivityBus.reset()
+
+        # Assert
+        assert during == 0.25
+        assert after == 0
@@ -18,6 +18,7 @@ from colonyforge.core.activity_bus import (
     AgentInfo,
     AgentRole,
 )
+from colonyforge.core.config import LLMConfig
 from colonyforge.llm.client import LLMClient, LLMResponse, ToolCall
 from colonyforge.llm.runner import AgentRunner, ToolDefinition
 
@@ -37,7 +38,7 @@ def reset_activity_bus():
 @pytest.fixture
 def mock_client():
     """モックLLMクライアント"""
-    client = MagicMock(spec=LLMClient)
+    client = MagicMock(spec=LLMClient, config=LLMConfig())
     client.chat = AsyncMock()
     client.close = AsyncMock()
     return client
@@ -94,6 +95,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Say hello")
+        await ActivityBus.get_instance().flush()
 
         # Assert: LLM_REQUESTイベントが発行されている
         llm_requests = [e for e in collected_events if e.activity_type == ActivityType.LLM_REQUEST]
@@ -113,6 +115,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Say hello")
+        await ActivityBus.get_instance().flush()
 
         # Assert: LLM_RESPONSEイベントが発行されている
         llm_responses = [
@@ -134,6 +137,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Question?")
+        await ActivityBus.get_instance().flush()
 
         # Assert: 概要にコンテンツが含まれる
         llm_responses = [
@@ -177,6 +181,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Read test.txt")
+        await ActivityBus.get_instance().flush()
 
         # Assert: MCP_TOOL_CALLイベントが発行されている
         tool_calls = [e for e in collected_events if e.activity_type == ActivityType.MCP_TOOL_CALL]
@@ -213,6 +218,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Use my_tool")
+        await ActivityBus.get_instance().flush()
 
         # Assert: MCP_TOOL_RESULTイベントが発行されている
         tool_results = [
@@ -250,6 +256,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Use fail_tool")
+        await ActivityBus.get_instance().flush()
 
         # Assert: エラー情報を含むMCP_TOOL_RESULTイベント
         tool_results = [
@@ -271,6 +278,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Say hello")
+        await ActivityBus.get_instance().flush()
 
         # Assert: イベントは発行されない
         assert len(collected_events) == 0
@@ -332,6 +340,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Use both tools")
+        await ActivityBus.get_instance().flush()
 
         # Assert: 各ツールにTOOL_CALL + TOOL_RESULT
         tool_calls = [e for e in collected_events if e.activity_type == ActivityType.MCP_TOOL_CALL]
@@ -371,6 +380,7 @@ class TestAgentRunnerActivityEmission:
 
         # Act
         await runner.run("Test")
+        await ActivityBus.get_instance().flush()
 
         # Assert: 順序チェック
         types = [e.activity_type for e in collected_events]
@@ -0,0 +1,293 @@
+"""適応型レート制限（AIMD）のテスト
+
+ヘッダーの読み取り、乗算的な低下と加算的な回復、学習値の永続化、
+RateLimiter への適用（補充レートと同時実行数の変更）を検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from colonyforge.core import adaptive_rate_limit
+from colonyforge.core.adaptive_rate_limit import (
+    AdaptiveLimits,
+    RateLimitHeaders,
+    limits_file_for,
+    parse_rate_limit_headers,
+)
+from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter, create_rate_limiter
+
+
+@pytest.fixture
+def no_cooldown(monkeypatch):
+    """連続した低下を許可する"""
+    monkeypatch.setattr(adaptive_rate_limit, "DECREASE_COOLDOWN", 0.0)
+
+
+class TestParseRateLimitHeaders:
+    """parse_rate_limit_headers のテスト"""
+
+    def test_openai_headers_forwarded_by_litellm(self):
+        """LiteLLM が llm_provider- を付けて転送した OpenAI のヘッダーを読む"""
+        # Act
+        parsed = parse_rate_limit_headers(
+            {
+                "llm_provider-x-ratelimit-limit-requests": "500",
+                "x-ratelimit-remaining-requests": "499",
+                "x-ratelimit-limit-tokens": "30000",
+                "x-ratelimit-remaining-tokens": "29000",
+            }
+        )
+
+        # Assert
+        assert parsed == RateLimitHeaders(
+            limit_requests=500,
+            remaining_requests=499,
+            limit_tokens=30000,
+            remaining_tokens=29000,
+        )
+
+    def test_anthropic_headers_and_retry_after(self):
+        """Anthropic のヘッダーと retry-after-ms を読む"""
+        # Act
+        parsed = parse_rate_limit_headers(
+            {
+                "llm_provider-anthropic-ratelimit-requests-limit": "50",
+                "llm_provider-anthropic-ratelimit-tokens-limit": "40000",
+                "retry-after-ms": "1500",
+            }
+        )
+
+        # Assert
+        assert parsed.limit_requests == 50
+        assert parsed.limit_tokens == 40000
+        assert parsed.retry_after == 1.5
+
+    @pytest.mark.parametrize("headers", [None, {}, {"x-ratelimit-limit-requests": "n/a"}, "x"])
+    def test_missing_or_invalid_headers(self, headers):
+        """ヘッダーがない・数値でない場合は何も読み取らない"""
+        # Act & Assert
+        assert parse_rate_limit_headers(headers) == RateLimitHeaders()
+
+
+class TestAdaptiveLimits:
+    """AdaptiveLimits の学習のテスト"""
+
+    def test_congestion_halves_rate_and_concurrency(self, no_cooldown):
+        """429 で補充レートと同時実行数が半分になり、下限で止まる"""
+        # Arrange
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=60, max_concurrent=8))
+
+        # Act
+        limits.on_congestion()
+        first = (limits.requests_per_minute, limits.concurrency)
+        for _ in range(20):
+            limits.on_congestion()
+
+        # Assert
+        assert first == (30.0, 4.0)
+        assert (limits.requests_per_minute, limits.concurrency) == (1.0, 1.0)
+
+    def test_cooldown_ignores_burst_of_failures(self):
+        """同時に失敗した複数のリクエストでは1回だけ下げる"""
+        # Arrange
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=60, max_concurrent=8))
+
+        # Act
+        changed = [limits.on_congestion() for _ in range(5)]
+
+        # Assert
+        assert changed == [True, False, False, False, False]
+        assert limits.requests_per_minute == 30.0
+
+    def test_success_recovers_additively_up_to_ceiling(self, no_cooldown):
+        """成功のたびに加算的に戻り、設定値を超えない"""
+        # Arrange
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=100, max_concurrent=4))
+        limits.on_congestion()
+
+        # Act
+        limits.on_success(RateLimitHeaders())
+        after_one = limits.requests_per_minute
+        for _ in range(100):
+            limits.on_success(RateLimitHeaders())
+
+        # Assert
+        assert after_one == 55.0
+        assert limits.requests_per_minute == 100.0
+        assert limits.concurrency == 4.0
+
+    def test_header_limit_becomes_ceiling(self):
+        """ヘッダーの上限が設定値より大きければ、そこまで回復する"""
+        # Arrange
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=60))
+        headers = RateLimitHeaders(limit_requests=500, limit_tokens=200_000)
+
+        # Act
+        for _ in range(40):
+            limits.on_success(headers)
+
+        # Assert
+        assert limits.max_requests_per_minute == 500.0
+        assert limits.requests_per_minute == 500.0
+        assert limits.tokens_per_minute == 200_000
+
+    def test_lower_header_limit_clamps_immediately(self):
+        """ヘッダーの上限が設定値より小さければ即座に従う"""
+        # Arrange
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=600))
+
+        # Act
+        changed = limits.on_success(RateLimitHeaders(limit_requests=50))
+
+        # Assert
+        assert changed
+        assert limits.requests_per_minute == 50.0
+
+    def test_learned_limits_survive_restart(self, tmp_path):
+        """学習値は保存され、同じ鍵で再作成すると引き継がれる"""
+        # Arrange
+        path = limits_file_for("openai:gpt-4o", tmp_path)
+        config = RateLimitConfig(requests_per_minute=60, max_concurrent=8)
+        limits = AdaptiveLimits("openai:gpt-4o", config, path)
+        limits.on_success(RateLimitHeaders(limit_requests=500, limit_tokens=150_000))
+        limits.on_congestion()
+
+        # Act
+        restored = AdaptiveLimits("openai:gpt-4o", config, path)
+
+        # Assert
+        assert json.loads(path.read_text())["key"] == "openai:gpt-4o"
+        assert restored.max_requests_per_minute == 500.0
+        assert restored.requests_per_minute == limits.requests_per_minute
+        assert restored.concurrency == limits.concurrency
+        assert restored.tokens_per_minute == 150_000
+
+    def test_corrupted_file_falls_back_to_config(self, tmp_path):
+        """保存ファイルが壊れていれば設定値から始める"""
+        # Arrange
+        path = limits_file_for("k", tmp_path)
+        path.write_text("{broken")
+
+        # Act
+        limits = AdaptiveLimits("k", RateLimitConfig(requests_per_minute=60), path)
+
+        # Assert
+        assert limits.requests_per_minute == 60.0
+
+
+class TestAdaptiveRateLimiter:
+    """RateLimiter への適用のテスト"""
+
+    @pytest.fixture
+    def limiter(self, tmp_path):
+        config = RateLimitConfig(
+            requests_per_minute=600, max_concurrent=4, adaptive=True, state_dir=str(tmp_path)
+        )
+        return create_rate_limiter("test:model", config)
+
+    def test_factory_attaches_adaptive(self, limiter):
+        """adaptive=True なら学習状態が統計に含まれる"""
+        # Act
+        stats = limiter.get_stats()
+
+        # Assert
+        assert stats["adaptive"]["requests_per_minute"] == 600.0
+
+    def test_plain_limiter_ignores_feedback(self):
+        """適応型でなければ成功は何も変えず、429 はバケットを空にするだけ"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(requests_per_minute=600, max_concurrent=4))
+
+        # Act
+        limiter.record_success({"x-ratelimit-limit-requests": "10"})
+        limiter.record_throttle()
+
+        # Assert
+        assert limiter.config.requests_per_minute == 600
+        assert limiter.config.max_concurrent == 4
+        assert limiter.get_stats()["tokens_available"] == 0.0
+
+    async def test_throttle_reduces_concurrency_slots(self, limiter):
+        """429 の後は同時実行数が減り、回復すると待機中のリクエストが進む"""
+        # Arrange
+        limiter.record_throttle({"retry-after": "1"})
+        first = await limiter.acquire()
+        second = await limiter.acquire()
+
+        # Act
+        third = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.02)
+        blocked = not third.done()
+        for _ in range(3):
+            limiter.record_success()
+        ctx = await asyncio.wait_for(third, timeout=1.0)
+
+        # Assert
+        assert blocked
+        assert limiter.config.max_concurrent >= 3
+        for c in (first, second, ctx):
+            await c.__aexit__(None, None, None)
+        assert limiter.get_stats()["current_concurrent"] == 0
+
+    async def test_throttle_slows_refill(self, limiter):
+        """429 の後は補充レートが下がり、バケットも空になる"""
+        # Act
+        limiter.record_throttle()
+
+        # Assert
+        assert limiter.config.requests_per_minute == 300
+        assert limiter._calculate_wait_time(1) == pytest.approx(0.2, abs=0.01)
+
+    def test_exhausted_remaining_drains_bucket(self, limiter):
+        """残りリクエスト数が0なら次の補充まで待たせる"""
+        # Act
+        limiter.record_success({"x-ratelimit-remaining-requests": "0"})
+
+        # Assert
+        assert limiter.get_stats()["tokens_available"] == 0.0
+
+    async def test_cancelled_waiter_does_not_leak_slot(self, limiter):
+        """スロット待ちをキャンセルしても枠が失われない"""
+        # Arrange
+        held = [await limiter.acquire() for _ in range(4)]
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+
+        # Act
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        for ctx in held:
+            await ctx.__aexit__(None, None, None)
+
+        # Assert
+        assert limiter.get_stats()["current_concurrent"] == 0
+        ctx = await asyncio.wait_for(limiter.acquire(), timeout=1.0)
+        await ctx.__aexit__(None, None, None)
+
+    def test_converges_to_real_quota(self, tmp_path, no_cooldown):
+        """実際の上限を超えると 429 になる相手に対して、上限付近で落ち着く"""
+        # Arrange: 設定は 600 rpm だが実際の上限は 120 rpm（ヘッダーなし）
+        limiter = create_rate_limiter(
+            "sim:model",
+            RateLimitConfig(requests_per_minute=600, adaptive=True, state_dir=str(tmp_path)),
+        )
+        real_quota = 120
+        history = []
+
+        # Act: 1分ごとに、実効レートが上限を超えていれば 429、そうでなければ成功
+        for _ in range(200):
+            if limiter.config.requests_per_minute > real_quota:
+                limiter.record_throttle()
+            else:
+                limiter.record_success()
+            history.append(limiter.config.requests_per_minute)
+
+        # Assert: 後半は上限の半分から上限の間を往復する
+        tail = history[100:]
+        assert max(tail) <= real_quota + 30
+        assert sum(tail) / len(tail) >= real_quota * 0.6
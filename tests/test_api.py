@@ -25,6 +25,8 @@ def client(tmp_path):
     mock_s = MagicMock()
     mock_s.get_vault_path.return_value = tmp_path / "Vault"
     mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
 
     with (
         patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -1074,6 +1076,8 @@ class TestLifespanRunRecovery:
         mock_s = MagicMock()
         mock_s.get_vault_path.return_value = vault_path
         mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
 
         with (
             patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -1207,6 +1211,8 @@ class TestListRunsEdgeCases:
         mock_s = MagicMock()
         mock_s.get_vault_path.return_value = vault_path
         mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
 
         with (
             patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -1243,6 +1249,8 @@ class TestLifespanNoRuns:
         mock_s = MagicMock()
         mock_s.get_vault_path.return_value = vault_path
         mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
 
         with (
             patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -1288,6 +1296,8 @@ class TestLifespanNoRuns:
         mock_s = MagicMock()
         mock_s.get_vault_path.return_value = vault_path
         mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
 
         with (
             patch("colonyforge.api.server.get_settings", return_value=mock_s),
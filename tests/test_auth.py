@@ -37,6 +37,8 @@ def _make_mock_settings(tmp_path, *, auth_enabled: bool):
     mock_s = MagicMock()
     mock_s.get_vault_path.return_value = tmp_path / "Vault"
     mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
     mock_s.auth.enabled = auth_enabled
     mock_s.auth.api_key_env = "COLONYFORGE_API_KEY"
     return mock_s
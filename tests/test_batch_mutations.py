@@ -0,0 +1,339 @@
+"""一括変更（バッチ）のテスト
+
+AkashicRecord.append_many のハッシュ連鎖、Task/確認要請の一括エンドポイント、
+MCP の create_tasks / update_tasks を検証する。
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from colonyforge.core import AkashicRecord
+from colonyforge.core.events import RunStartedEvent, TaskCreatedEvent
+
+
+class TestAppendMany:
+    """AkashicRecord.append_many のテスト"""
+
+    def test_chains_prev_hash_across_batch(self, tmp_path):
+        """バッチ内のイベントが既存の末尾から順にハッシュ連鎖する"""
+        # Arrange
+        ar = AkashicRecord(tmp_path / "Vault")
+        first = ar.append(RunStartedEvent(id="e0", run_id="r1", payload={"goal": "g"}))
+        batch = [TaskCreatedEvent(id=f"e{i}", run_id="r1", task_id=f"t{i}") for i in (1, 2, 3)]
+
+        # Act
+        written = ar.append_many(batch, "r1")
+
+        # Assert
+        assert written[0].prev_hash == first.hash
+        assert written[1].prev_hash == written[0].hash
+        assert written[2].prev_hash == written[1].hash
+        assert ar.verify_chain("r1") == (True, None)
+        assert [e.id for e in ar.replay("r1")] == ["e0", "e1", "e2", "e3"]
+
+    def test_following_append_continues_chain(self, tmp_path):
+        """一括追記後の単発追記もチェーンを継続する"""
+        # Arrange
+        ar = AkashicRecord(tmp_path / "Vault")
+        written = ar.append_many(
+            [
+                RunStartedEvent(id="e0", run_id="r1", payload={"goal": "g"}),
+                TaskCreatedEvent(id="e1", run_id="r1", task_id="t1"),
+            ]
+        )
+
+        # Act
+        last = ar.append(TaskCreatedEvent(id="e2", run_id="r1", task_id="t2"))
+
+        # Assert
+        assert last.prev_hash == written[-1].hash
+        assert ar.verify_chain("r1") == (True, None)
+
+    def test_mixed_run_ids_rejected(self, tmp_path):
+        """run_id 未指定で異なるRunのイベントが混在すると ValueError"""
+        # Arrange
+        ar = AkashicRecord(tmp_path / "Vault")
+        events = [
+            TaskCreatedEvent(id="a", run_id="r1", task_id="t1"),
+            TaskCreatedEvent(id="b", run_id="r2", task_id="t2"),
+        ]
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ar.append_many(events)
+        assert ar.list_runs() == []
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Vault を一時ディレクトリに向けた APIクライアント"""
+    from colonyforge.api.dependencies import AppState
+    from colonyforge.api.helpers import clear_active_runs, set_ar
+    from colonyforge.api.server import app
+
+    vault = tmp_path / "Vault"
+    AppState.reset()
+    set_ar(None)
+    clear_active_runs()
+    mock_s = MagicMock()
+    mock_s.get_vault_path.return_value = vault
+    mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
+
+    with (
+        patch("colonyforge.api.server.get_settings", return_value=mock_s),
+        patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+        TestClient(app) as test_client,
+    ):
+        yield test_client
+
+    AppState.reset()
+
+
+@pytest.fixture
+def run_id(client):
+    """開始済みのRun"""
+    return client.post("/runs", json={"goal": "一括テスト"}).json()["run_id"]
+
+
+class TestBatchCreateTasks:
+    """POST /runs/{run_id}/tasks:batch のテスト"""
+
+    def test_creates_all_tasks(self, client, run_id):
+        """全タスクが作成され、一覧に反映される"""
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/tasks:batch",
+            json={"tasks": [{"title": f"タスク{i}"} for i in range(5)]},
+        )
+
+        # Assert
+        assert response.status_code == 201
+        created = response.json()
+        assert [t["title"] for t in created] == [f"タスク{i}" for i in range(5)]
+        listed = client.get(f"/runs/{run_id}/tasks").json()
+        assert {t["task_id"] for t in listed} == {t["task_id"] for t in created}
+
+    def test_empty_batch_is_422(self, client, run_id):
+        """空のバッチはバリデーションエラー"""
+        # Act
+        response = client.post(f"/runs/{run_id}/tasks:batch", json={"tasks": []})
+
+        # Assert
+        assert response.status_code == 422
+
+    def test_unknown_run_is_404(self, client):
+        """存在しないRunは404"""
+        # Act
+        response = client.post("/runs/missing/tasks:batch", json={"tasks": [{"title": "x"}]})
+
+        # Assert
+        assert response.status_code == 404
+
+
+class TestBatchUpdateTasks:
+    """POST /runs/{run_id}/tasks:batchUpdate のテスト"""
+
+    @pytest.fixture
+    def task_ids(self, client, run_id):
+        response = client.post(
+            f"/runs/{run_id}/tasks:batch",
+            json={"tasks": [{"title": "A"}, {"title": "B"}, {"title": "C"}]},
+        )
+        return [t["task_id"] for t in response.json()]
+
+    def test_applies_mixed_updates(self, client, run_id, task_ids):
+        """完了・失敗・進捗を1リクエストで反映する"""
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/tasks:batchUpdate",
+            json={
+                "updates": [
+                    {"task_id": task_ids[0], "action": "complete", "result": {"ok": True}},
+                    {"task_id": task_ids[1], "action": "fail", "error": "boom"},
+                    {"task_id": task_ids[2], "action": "progress", "progress": 40},
+                ]
+            },
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == [
+            "completed",
+            "failed",
+            "updated",
+        ]
+        states = {t["task_id"]: t for t in client.get(f"/runs/{run_id}/tasks").json()}
+        assert states[task_ids[0]]["state"] == "completed"
+        assert states[task_ids[1]]["state"] == "failed"
+        assert states[task_ids[2]]["progress"] == 40
+
+    def test_missing_task_writes_nothing(self, client, run_id, task_ids):
+        """存在しないタスクを含む場合は404で、何も記録しない"""
+        # Arrange
+        before = len(client.get(f"/runs/{run_id}/events").json())
+
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/tasks:batchUpdate",
+            json={
+                "updates": [
+                    {"task_id": task_ids[0], "action": "complete"},
+                    {"task_id": "nope", "action": "complete"},
+                ]
+            },
+        )
+
+        # Assert
+        assert response.status_code == 404
+        assert "nope" in response.json()["detail"]
+        assert len(client.get(f"/runs/{run_id}/events").json()) == before
+
+    @pytest.mark.parametrize(
+        "update",
+        [
+            {"action": "fail"},
+            {"action": "progress"},
+            {"action": "progress", "progress": 101},
+            {"action": "unknown"},
+        ],
+    )
+    def test_invalid_update_is_422(self, client, run_id, task_ids, update):
+        """必須項目の欠落や不正な action はバリデーションエラー"""
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/tasks:batchUpdate",
+            json={"updates": [{"task_id": task_ids[0], **update}]},
+        )
+
+        # Assert
+        assert response.status_code == 422
+
+
+class TestBatchResolveRequirements:
+    """POST /runs/{run_id}/requirements:batchResolve のテスト"""
+
+    @pytest.fixture
+    def requirement_ids(self, client, run_id):
+        return [
+            client.post(f"/runs/{run_id}/requirements", json={"description": f"確認{i}"}).json()[
+                "id"
+            ]
+            for i in range(2)
+        ]
+
+    def test_resolves_all(self, client, run_id, requirement_ids):
+        """全確認要請を承認/却下できる"""
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/requirements:batchResolve",
+            json={
+                "decisions": [
+                    {"requirement_id": requirement_ids[0], "approved": True},
+                    {"requirement_id": requirement_ids[1], "approved": False, "comment": "NG"},
+                ]
+            },
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert [r["approved"] for r in response.json()["results"]] == [True, False]
+        pending = client.get(f"/runs/{run_id}/requirements", params={"pending_only": True})
+        assert pending.json() == []
+
+    def test_missing_requirement_writes_nothing(self, client, run_id, requirement_ids):
+        """存在しない確認要請を含む場合は404で、何も記録しない"""
+        # Act
+        response = client.post(
+            f"/runs/{run_id}/requirements:batchResolve",
+            json={
+                "decisions": [
+                    {"requirement_id": requirement_ids[0], "approved": True},
+                    {"requirement_id": "nope", "approved": True},
+                ]
+            },
+        )
+
+        # Assert
+        assert response.status_code == 404
+        pending = client.get(f"/runs/{run_id}/requirements", params={"pending_only": True})
+        assert len(pending.json()) == 2
+
+
+@pytest.fixture
+def mcp_server(tmp_path):
+    """テスト用MCPサーバー"""
+    from colonyforge.mcp_server.server import ColonyForgeMCPServer
+
+    with patch("colonyforge.mcp_server.server.get_settings") as mock_settings:
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = tmp_path / "Vault"
+        mock_settings.return_value = mock_s
+        yield ColonyForgeMCPServer()
+
+
+class TestMCPBatchTools:
+    """MCP create_tasks / update_tasks のテスト"""
+
+    async def test_create_and_update_tasks(self, mcp_server):
+        """一括作成したタスクを一括更新できる"""
+        # Arrange
+        await mcp_server._run_handlers.handle_start_run({"goal": "g"})
+        handlers = mcp_server._task_handlers
+        created = await handlers.handle_create_tasks(
+            {"tasks": [{"title": "A"}, {"title": "B", "description": "詳細"}]}
+        )
+        ids = [t["task_id"] for t in created["tasks"]]
+
+        # Act
+        result = await handlers.handle_update_tasks(
+            {
+                "updates": [
+                    {"task_id": ids[0], "action": "complete", "result": "done"},
+                    {"task_id": ids[1], "action": "progress", "progress": 50},
+                ]
+            }
+        )
+
+        # Assert
+        assert created["status"] == "created"
+        assert result["status"] == "updated"
+        assert [r["status"] for r in result["results"]] == ["completed", "progressed"]
+        ar = mcp_server._get_ar()
+        events = list(ar.replay(mcp_server._current_run_id))
+        created_by_task = {e.task_id: e.id for e in events if e.type.value == "task.created"}
+        completed = [e for e in events if e.type.value == "task.completed"]
+        assert completed[0].parents == [created_by_task[ids[0]]]
+        assert ar.verify_chain(mcp_server._current_run_id) == (True, None)
+
+    async def test_invalid_item_writes_nothing(self, mcp_server):
+        """不正な項目を含む一括作成は何も記録しない"""
+        # Arrange
+        await mcp_server._run_handlers.handle_start_run({"goal": "g"})
+        run_id = mcp_server._current_run_id
+        before = len(list(mcp_server._get_ar().replay(run_id)))
+
+        # Act
+        result = await mcp_server._task_handlers.handle_create_tasks(
+            {"tasks": [{"title": "A"}, {"title": "  "}]}
+        )
+
+        # Assert
+        assert "error" in result
+        assert "tasks[1]" in result["error"]
+        assert len(list(mcp_server._get_ar().replay(run_id))) == before
+
+    async def test_requires_active_run(self, mcp_server):
+        """Run未開始ではエラーを返す"""
+        # Act
+        result = await mcp_server._task_handlers.handle_update_tasks(
+            {"updates": [{"task_id": "t", "action": "complete"}]}
+        )
+
+        # Assert
+        assert "error" in result
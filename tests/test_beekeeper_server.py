@@ -618,9 +618,10 @@ class TestBeekeeperAgentRunnerPromptContext:
         # Arrange: LLMクライアントをモックで事前設定
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         beekeeper._llm_client = mock_client
 
@@ -642,9 +643,10 @@ class TestBeekeeperAgentRunnerPromptContext:
         from unittest.mock import AsyncMock, MagicMock
 
         from colonyforge.core.activity_bus import AgentRole
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         beekeeper._llm_client = mock_client
 
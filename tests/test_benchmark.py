@@ -344,3 +344,707 @@ class TestHoneycombStoreBenchmark:
         # Act & Assert
         episodes = benchmark(lambda: store.replay_colony("colony-a"))
         assert len(episodes) == 125
+
+
+# =========================================================================
+# 7. Lineage 横断探索ベンチマーク
+# =========================================================================
+
+
+@pytest.mark.benchmark
+class TestLineageGraphBenchmark:
+    """Vault横断 Lineage 探索のパフォーマンス"""
+
+    @pytest.fixture
+    def chained_vault(self, tmp_path):
+        """各イベントが直前のイベントを親に持ち、Runも前Runの完了に連鎖するVault
+
+        100 Run x 22イベント = 計2,200イベント。
+        """
+        vault_path = tmp_path / "Vault"
+        ar = AkashicRecord(vault_path)
+        prev_id: str | None = None
+        for r in range(100):
+            run_id = f"run-{r:03d}"
+            for event in _make_run_events(run_id, task_count=10):
+                if prev_id is not None:
+                    event = event.model_copy(update={"parents": [prev_id]})
+                ar.append(event, run_id)
+                prev_id = event.id
+        return vault_path, prev_id
+
+    def test_index_sync_cold(self, benchmark, chained_vault):
+        """索引の初回構築（2,200イベント）"""
+        from colonyforge.core.ar.lineage_index import LineageIndex
+
+        vault_path, _ = chained_vault
+
+        def cold_sync():
+            import shutil
+
+            shutil.rmtree(vault_path / "_lineage", ignore_errors=True)
+            return LineageIndex(vault_path).sync()
+
+        # Act & Assert
+        assert benchmark(cold_sync) == 2200
+
+    def test_ancestors_across_100_runs(self, benchmark, chained_vault):
+        """100 Run を跨いだ ancestors 探索（索引ロード済み）"""
+        from colonyforge.core.ar.lineage_index import LineageIndex
+        from colonyforge.core.lineage import LineageGraph
+
+        vault_path, last_end = chained_vault
+        index = LineageIndex(vault_path)
+        index.sync()
+        graph = LineageGraph(index)
+
+        # Act & Assert
+        subgraph = benchmark(lambda: graph.subgraph(last_end, "ancestors", 1000, 100_000))
+        assert subgraph is not None
+        assert len(subgraph.nodes) == 1001
+        assert subgraph.truncated is True
+
+
+# =========================================================================
+# 8. 大量イベントレスポンスのシリアライズ・圧縮ベンチマーク
+# =========================================================================
+
+
+@pytest.mark.benchmark
+class TestBulkEventResponseBenchmark:
+    """10,000件のイベント一覧レスポンスのシリアライズ時間と転送バイト数
+
+    extra_info に非圧縮/gzipのバイト数を記録する。
+    """
+
+    @pytest.fixture(scope="class")
+    def event_responses(self):
+        """10,000件の EventResponse"""
+        from colonyforge.api.event_stream import event_to_response
+
+        events = _make_run_events("run-bulk", task_count=5000)
+        return [event_to_response(e) for e in events[:10_000]]
+
+    def test_standard_encoder(self, benchmark, event_responses):
+        """従来経路: jsonable_encoder + json.dumps"""
+        import json
+
+        from fastapi.encoders import jsonable_encoder
+
+        def encode():
+            return json.dumps(jsonable_encoder(event_responses), ensure_ascii=False).encode()
+
+        # Act
+        body = benchmark(encode)
+
+        # Assert
+        benchmark.extra_info["bytes"] = len(body)
+        assert len(event_responses) == 10_000
+
+    def test_pydantic_core_dump_json(self, benchmark, event_responses):
+        """高速経路: TypeAdapter.dump_json（pydantic-core）"""
+        from colonyforge.api.serialization import EVENT_LIST_ADAPTER
+
+        # Act
+        body = benchmark(EVENT_LIST_ADAPTER.dump_json, event_responses)
+
+        # Assert
+        benchmark.extra_info["bytes"] = len(body)
+        assert body.startswith(b"[{")
+
+    def test_gzip_wire_size(self, benchmark, event_responses):
+        """gzip（既定レベル6）による転送バイト数"""
+        import gzip
+
+        from colonyforge.api.serialization import EVENT_LIST_ADAPTER
+
+        body = EVENT_LIST_ADAPTER.dump_json(event_responses)
+
+        # Act
+        compressed = benchmark(gzip.compress, body, 6)
+
+        # Assert
+        benchmark.extra_info["bytes_raw"] = len(body)
+        benchmark.extra_info["bytes_gzip"] = len(compressed)
+        assert len(compressed) < len(body) // 5
+
+
+# =========================================================================
+# 9. アクティビティ購読のルーティングベンチマーク
+# =========================================================================
+
+
+@pytest.mark.benchmark
+class TestActivityRoutingBenchmark:
+    """500購読（各エージェント1件に絞り込み）に対する配信先決定の時間
+
+    ルーティング表と、購読ごとに述語を評価する素朴な方法を比較する。
+    extra_info に1イベントあたりの配信先数を記録する。
+    """
+
+    @pytest.fixture(scope="class")
+    def routed_bus(self):
+        """エージェントごとに絞り込んだ500購読を持つ ActivityBus"""
+        from colonyforge.core.activity_bus import ActivityBus, ActivityFilter
+
+        bus = ActivityBus()
+        for i in range(500):
+            bus.open_subscription(
+                f"monitor-{i}",
+                activity_filter=ActivityFilter(agent_ids=frozenset({f"worker-{i % 50}"})),
+            )
+        return bus
+
+    @pytest.fixture(scope="class")
+    def activity_event(self):
+        from colonyforge.core.activity_bus import (
+            ActivityEvent,
+            ActivityType,
+            AgentInfo,
+            AgentRole,
+        )
+
+        agent = AgentInfo(agent_id="worker-7", role=AgentRole.WORKER_BEE, hive_id="h-1")
+        return ActivityEvent(activity_type=ActivityType.LLM_REQUEST, agent=agent, summary="s")
+
+    def test_routing_table(self, benchmark, routed_bus, activity_event):
+        """ルーティング表による配信先決定"""
+        # Act
+        targets = benchmark(routed_bus._routes.route, activity_event)
+
+        # Assert
+        benchmark.extra_info["targets"] = len(targets)
+        assert len(targets) == 10
+
+    def test_predicate_loop(self, benchmark, routed_bus, activity_event):
+        """比較用: 全購読に対する述語ループ"""
+
+        def route():
+            return [s for s in routed_bus._subscribers if s.activity_filter.matches(activity_event)]
+
+        # Act
+        targets = benchmark(route)
+
+        # Assert
+        benchmark.extra_info["targets"] = len(targets)
+        assert len(targets) == 10
+
+
+# =============================================================================
+# 10. アクティビティ階層（多数のWorker）ベンチマーク
+# =============================================================================
+
+
+@pytest.mark.benchmark
+class TestActivityHierarchyBenchmark:
+    """5000 Worker 稼働中の階層取得の時間
+
+    バージョンごとにキャッシュされたスナップショット、直前のバージョンからの差分、
+    比較用に全エージェントからの組み立て直し（従来の毎回の処理に相当）を測る。
+    """
+
+    @pytest.fixture(scope="class")
+    def crowded_bus(self):
+        """50 Colony × 100 Worker が稼働中の ActivityBus"""
+        import asyncio
+
+        from colonyforge.core.activity_bus import (
+            ActivityBus,
+            ActivityEvent,
+            ActivityType,
+            AgentInfo,
+            AgentRole,
+        )
+
+        async def start_all(bus: ActivityBus) -> None:
+            for i in range(5000):
+                agent = AgentInfo(
+                    agent_id=f"worker-{i}",
+                    role=AgentRole.WORKER_BEE,
+                    hive_id="h-1",
+                    colony_id=f"c-{i % 50}",
+                )
+                await bus.emit(ActivityEvent(ActivityType.AGENT_STARTED, agent, "started"))
+
+        bus = ActivityBus()
+        asyncio.run(start_all(bus))
+        return bus
+
+    def test_cached_snapshot(self, benchmark, crowded_bus):
+        """変更がない間のスナップショット取得"""
+        # Act
+        version, hierarchy = benchmark(crowded_bus.get_hierarchy_snapshot)
+
+        # Assert
+        assert version == 5000
+        assert len(hierarchy["h-1"]["colonies"]) == 50
+
+    def test_delta_since_previous_version(self, benchmark, crowded_bus):
+        """直前のバージョンからの差分取得"""
+        # Act
+        changes = benchmark(crowded_bus.get_hierarchy_changes, 4999)
+
+        # Assert
+        assert len(changes) == 1
+
+    def test_full_rebuild(self, benchmark, crowded_bus):
+        """比較用: 階層の組み立てとJSON化を毎回行う"""
+        from colonyforge.core.activity_bus import _serialize_tree
+
+        # Act
+        hierarchy = benchmark(lambda: _serialize_tree(crowded_bus.get_hierarchy()))
+
+        # Assert
+        assert sum(len(c["workers"]) for c in hierarchy["h-1"]["colonies"].values()) == 5000
+
+
+# =============================================================================
+# 11. プロセス間共有レートリミッターのベンチマーク
+# =============================================================================
+
+# 子プロセス: 指定時刻から duration 秒の間 wait() を繰り返し、通過数を出力する
+_RATE_LIMIT_CHILD = """
+import asyncio, sys, time
+from colonyforge.core.rate_limiter import RateLimitConfig, create_rate_limiter
+
+state_dir, shared, start_at, duration = sys.argv[1:]
+config = RateLimitConfig(
+    requests_per_minute=600, burst_limit=5, shared=shared == "1", state_dir=state_dir
+)
+
+async def main():
+    limiter = create_rate_limiter("bench:model", config)
+    while time.time() < float(start_at):
+        await asyncio.sleep(0.005)
+    end = float(start_at) + float(duration)
+    count = 0
+    while True:
+        await limiter.wait()
+        if time.time() >= end:
+            break
+        count += 1
+    print(count)
+
+asyncio.run(main())
+"""
+
+
+@pytest.mark.benchmark
+class TestSharedRateLimiterBenchmark:
+    """4プロセスが同じクォータ（600 req/min、バースト5）で3秒間リクエストした合計
+
+    プロセス内リミッターではプロセス数倍に膨らみ、共有リミッターでは
+    バースト + レート × 時間（35件）以内に収まることを示す。
+    extra_info に合計件数と合計レート（req/s）を記録する。
+    """
+
+    PROCESSES = 4
+    DURATION = 3.0
+    LIMIT = 5 + 10 * DURATION
+
+    def _run(self, state_dir, shared: bool) -> int:
+        import subprocess
+        import sys
+        import time
+
+        start_at = time.time() + 2.5
+        procs = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    _RATE_LIMIT_CHILD,
+                    str(state_dir),
+                    "1" if shared else "0",
+                    str(start_at),
+                    str(self.DURATION),
+                ],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(self.PROCESSES)
+        ]
+        return sum(int(proc.communicate(timeout=60)[0].split()[-1]) for proc in procs)
+
+    def test_shared_limiter(self, benchmark, tmp_path):
+        """共有リミッター: 合計がクォータ内に収まる"""
+        # Act
+        total = benchmark.pedantic(self._run, args=(tmp_path, True), rounds=1, iterations=1)
+
+        # Assert
+        benchmark.extra_info["requests"] = total
+        benchmark.extra_info["aggregate_rps"] = total / self.DURATION
+        assert total <= self.LIMIT
+
+    def test_process_local_limiter(self, benchmark, tmp_path):
+        """比較用: プロセスごとのリミッターではクォータを超える"""
+        # Act
+        total = benchmark.pedantic(self._run, args=(tmp_path, False), rounds=1, iterations=1)
+
+        # Assert
+        benchmark.extra_info["requests"] = total
+        benchmark.extra_info["aggregate_rps"] = total / self.DURATION
+        assert total > self.LIMIT
+
+
+# =============================================================================
+# 12. LLMリクエストスケジューラー（優先度）のベンチマーク
+# =============================================================================
+
+
+@pytest.mark.benchmark
+class TestLLMSchedulerBenchmark:
+    """大量のバックグラウンド要求の中でのユーザー向け要求の待ち時間
+
+    同時実行4、1リクエスト5msの疑似LLMに、8フローから400件のバックグラウンド
+    要求を一度に積み、その間に20件のユーザー向け要求を10ms間隔で送る。
+    優先度付きでは待ち時間がほぼ1リクエスト分に収まり、単一の FIFO では
+    積まれた要求の消化を待つことを示す。extra_info に p95（ms）を記録する。
+    """
+
+    BACKGROUND = 400
+    INTERACTIVE = 20
+
+    @pytest.fixture(autouse=True)
+    def _preload(self):
+        # colonyforge.llm の import（LiteLLM の読み込み）を計測に含めない
+        import colonyforge.llm.scheduler  # noqa: F401
+
+    def _run(self, prioritized: bool) -> float:
+        import asyncio
+        import time
+
+        from colonyforge.llm.scheduler import LLMRequestScheduler, RequestPriority
+
+        async def main() -> float:
+            scheduler = LLMRequestScheduler(lambda: 4)
+            waits: list[float] = []
+
+            async def request(priority: RequestPriority, flow: str, record: bool) -> None:
+                start = time.perf_counter()
+                async with await scheduler.acquire(priority, flow):
+                    if record:
+                        waits.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.005)
+
+            # 比較用の FIFO は、全要求を同じクラス・同じフローに入れる
+            background = RequestPriority.BACKGROUND
+            interactive = RequestPriority.INTERACTIVE if prioritized else background
+            tasks = [
+                asyncio.create_task(
+                    request(background, f"hive-{i % 8}/c" if prioritized else "all", False)
+                )
+                for i in range(self.BACKGROUND)
+            ]
+            for _ in range(self.INTERACTIVE):
+                await asyncio.sleep(0.01)
+                flow = "beekeeper/0" if prioritized else "all"
+                tasks.append(asyncio.create_task(request(interactive, flow, True)))
+            await asyncio.gather(*tasks)
+            waits.sort()
+            return waits[int(0.95 * (len(waits) - 1))]
+
+        return asyncio.run(main())
+
+    def test_prioritized(self, benchmark):
+        """優先度付き: ユーザー向け要求の p95 待ち時間が小さい"""
+        # Act
+        p95 = benchmark.pedantic(self._run, args=(True,), rounds=1, iterations=1)
+
+        # Assert
+        benchmark.extra_info["interactive_wait_p95_ms"] = p95 * 1000
+        assert p95 < 0.05
+
+    def test_fifo_baseline(self, benchmark):
+        """比較用: FIFO ではバックログの消化を待つ"""
+        # Act
+        p95 = benchmark.pedantic(self._run, args=(False,), rounds=1, iterations=1)
+
+        # Assert
+        benchmark.extra_info["interactive_wait_p95_ms"] = p95 * 1000
+        assert p95 > 0.1
+
+
+# =============================================================================
+# 13. ツール呼び出しの並行実行のベンチマーク
+# =============================================================================
+
+
+@pytest.mark.benchmark
+class TestParallelToolCallsBenchmark:
+    """1つの応答に含まれる遅いツール呼び出しの合計実行時間
+
+    50ms かかる読み取りツールを1応答で6回呼ぶ。concurrency_safe なら
+    並行実行（上限4）で約2回分、そうでなければ6回分の時間がかかることを示す。
+    extra_info に経過時間（ms）を記録する。
+    """
+
+    CALLS = 6
+    DELAY = 0.05
+
+    @pytest.fixture(autouse=True)
+    def _preload(self):
+        # colonyforge.llm の import（LiteLLM の読み込み）を計測に含めない
+        import colonyforge.llm.runner  # noqa: F401
+
+    def _run(self, concurrency_safe: bool) -> float:
+        import asyncio
+        import time
+        from unittest.mock import MagicMock
+
+        from colonyforge.llm.client import ToolCall
+        from colonyforge.llm.runner import AgentContext, AgentRunner, ToolDefinition
+
+        async def read(path: str) -> str:
+            await asyncio.sleep(self.DELAY)
+            return path
+
+        runner = AgentRunner(MagicMock())
+        runner.register_tool(
+            ToolDefinition(
+                name="read",
+                description="read",
+                parameters={"type": "object", "properties": {"path": {"type": "string"}}},
+                handler=read,
+                concurrency_safe=concurrency_safe,
+            )
+        )
+        calls = [
+            ToolCall(id=f"tc-{i}", name="read", arguments={"path": f"f{i}"})
+            for i in range(self.CALLS)
+        ]
+
+        async def main() -> float:
+            start = time.perf_counter()
+            await runner._execute_tool_calls(calls, AgentContext(run_id="bench"))
+            return time.perf_counter() - start
+
+        return asyncio.run(main())
+
+    def test_parallel(self, benchmark):
+        """並行実行: 上限4で約2回分の時間"""
+        # Act
+        elapsed = benchmark.pedantic(self._run, args=(True,), rounds=3, iterations=1)
+
+        # Assert
+        benchmark.extra_info["elapsed_ms"] = elapsed * 1000
+        assert elapsed < self.DELAY * 3
+
+    def test_sequential_baseline(self, benchmark):
+        """比較用: 逐次実行では呼び出し数ぶんの時間"""
+        # Act
+        elapsed = benchmark.pedantic(self._run, args=(False,), rounds=3, iterations=1)
+
+        # Assert
+        benchmark.extra_info["elapsed_ms"] = elapsed * 1000
+        assert elapsed >= self.DELAY * self.CALLS
+
+
+# =============================================================================
+# 14. 複数候補の生成（N案並列生成）のベンチマーク
+# =============================================================================
+
+
+@pytest.mark.benchmark
+class TestCandidateGenerationBenchmark:
+    """N件の候補を得るまでの経過時間と送信したプロンプトの量
+
+    1リクエスト50msの疑似LLM（同時実行の上限4）で12件の候補を生成する。
+    独立した12回の会話では上限4で3巡かかりプロンプトも12回送るが、
+    n サンプリングでは1回のリクエストで済むことを示す。
+    extra_info に経過時間（ms）と送信したプロンプトのメッセージ数を記録する。
+    """
+
+    N = 12
+    DELAY = 0.05
+
+    @pytest.fixture(autouse=True)
+    def _preload(self):
+        # colonyforge.llm の import（LiteLLM の読み込み）を計測に含めない
+        import colonyforge.llm.client  # noqa: F401
+
+    def _run(self, batched: bool) -> tuple[float, int]:
+        import asyncio
+        import os
+        import time
+        from types import SimpleNamespace
+        from unittest.mock import patch
+
+        from colonyforge.core.config import LLMCacheConfig, LLMConfig
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient, Message
+
+        sent_messages = 0
+
+        async def completion(**kwargs):
+            nonlocal sent_messages
+            sent_messages += len(kwargs["messages"])
+            await asyncio.sleep(self.DELAY)
+            choice = SimpleNamespace(
+                message=SimpleNamespace(content="案", tool_calls=None), finish_reason="stop"
+            )
+            return SimpleNamespace(choices=[choice] * kwargs.get("n", 1), usage=None)
+
+        os.environ.setdefault("BENCH_API_KEY", "sk-bench")
+        config = LLMConfig(
+            api_key_env="BENCH_API_KEY",
+            temperature=0.8,
+            coalesce=False,
+            candidate_sampling="n",
+            cache=LLMCacheConfig(mode="off"),
+        )
+        limiter = RateLimiter(RateLimitConfig(max_concurrent=4, requests_per_minute=10_000))
+        messages = [
+            Message(role="system", content="あなたは Worker Bee です。"),
+            Message(role="user", content="ログイン画面を実装する案を出して"),
+        ]
+
+        async def main() -> float:
+            client = LLMClient(config, rate_limiter=limiter)
+            start = time.perf_counter()
+            if batched:
+                await client.chat_candidates(messages, n=self.N)
+            else:
+                await asyncio.gather(*(client.chat(messages) for _ in range(self.N)))
+            return time.perf_counter() - start
+
+        with patch("colonyforge.llm.client.litellm.acompletion", side_effect=completion):
+            elapsed = asyncio.run(main())
+        return elapsed, sent_messages
+
+    def test_batched(self, benchmark):
+        """n サンプリング: 1回のリクエストで全候補"""
+        # Act
+        elapsed, sent = benchmark.pedantic(self._run, args=(True,), rounds=3, iterations=1)
+
+        # Assert
+        benchmark.extra_info["elapsed_ms"] = elapsed * 1000
+        benchmark.extra_info["sent_messages"] = sent
+        assert elapsed < self.DELAY * 2
+        assert sent == 2
+
+    def test_independent_baseline(self, benchmark):
+        """比較用: 独立した N 回の会話"""
+        # Act
+        elapsed, sent = benchmark.pedantic(self._run, args=(False,), rounds=3, iterations=1)
+
+        # Assert
+        benchmark.extra_info["elapsed_ms"] = elapsed * 1000
+        benchmark.extra_info["sent_messages"] = sent
+        assert elapsed >= self.DELAY * 3
+        assert sent == 2 * self.N
+
+
+# =============================================================================
+# 15. オフライン再生プロバイダーによるエージェント実行のベンチマーク
+# =============================================================================
+
+
+@pytest.mark.benchmark
+class TestReplayAgentBenchmark:
+    """記録済みの応答でエージェントを同時に走らせたときの経過時間
+
+    ツール呼び出し1回と最終回答の2往復を記録した JSONL を再生し、12体の
+    AgentRunner を同時実行する（同時実行の上限4）。応答時間は最初のトークンまで
+    平均40msの対数正規分布、生成速度は平均400トークン/秒の正規分布で模擬する。
+    スケジューラー・レートリミッターを含めて、ネットワークなしで計測できることを示す。
+    extra_info に経過時間（ms）と再生した応答の件数を記録する。
+    """
+
+    AGENTS = 12
+
+    @pytest.fixture(autouse=True)
+    def _preload(self):
+        # colonyforge.llm の import（LiteLLM の読み込み）を計測に含めない
+        import colonyforge.llm.client  # noqa: F401
+
+    @pytest.fixture
+    def fixture_path(self, tmp_path):
+        from colonyforge.llm.replay import ReplayExchange, write_fixture
+
+        task = {"role": "user", "content": "a.py を読んで要約して"}
+        call = {"id": "call_1", "name": "read_file", "arguments": {"path": "a.py"}}
+        path = tmp_path / "session.jsonl"
+        write_fixture(
+            path,
+            [
+                ReplayExchange(
+                    [task], {"content": "", "tool_calls": [call], "finish_reason": "tool_calls"}
+                ),
+                ReplayExchange(
+                    [task, {"role": "tool", "content": "print('hi')", "tool_call_id": "call_1"}],
+                    {"content": "hi と表示する" * 20, "tool_calls": [], "finish_reason": "stop"},
+                ),
+            ],
+        )
+        return path
+
+    def _run(self, fixture_path) -> tuple[float, dict]:
+        import asyncio
+        import time
+        from unittest.mock import AsyncMock
+
+        from colonyforge.core.config import (
+            LLMCacheConfig,
+            LLMConfig,
+            LLMReplayConfig,
+            ReplayDistributionConfig,
+        )
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm import replay
+        from colonyforge.llm.client import LLMClient
+        from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+        replay.reset_replay_providers()
+        config = LLMConfig(
+            provider="replay",
+            model="recorded",
+            # 全エージェントが同じプロンプトを送るため、集約せず1体ずつ再生する
+            coalesce=False,
+            cache=LLMCacheConfig(mode="off"),
+            replay=LLMReplayConfig(
+                fixtures=[str(fixture_path)],
+                first_token_ms=ReplayDistributionConfig(
+                    distribution="lognormal", mean=40.0, stddev=20.0
+                ),
+                tokens_per_second=ReplayDistributionConfig(
+                    distribution="normal", mean=400.0, stddev=50.0
+                ),
+            ),
+        )
+        limiter = RateLimiter(RateLimitConfig(max_concurrent=4, requests_per_minute=10_000))
+
+        async def main() -> float:
+            client = LLMClient(config, rate_limiter=limiter)
+            runners = []
+            for _ in range(self.AGENTS):
+                runner = AgentRunner(client)
+                runner.register_tool(
+                    ToolDefinition(
+                        name="read_file",
+                        description="read",
+                        parameters={"type": "object", "properties": {}},
+                        handler=AsyncMock(return_value="print('hi')"),
+                    )
+                )
+                runners.append(runner)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(r.run("a.py を読んで要約して") for r in runners))
+            assert all(r.success for r in results)
+            return time.perf_counter() - start
+
+        elapsed = asyncio.run(main())
+        return elapsed, replay.get_replay_provider(config.replay).get_stats()
+
+    def test_concurrent_agents(self, benchmark, fixture_path):
+        """12体のエージェントを記録済みの応答で同時実行"""
+        # Act
+        elapsed, stats = benchmark.pedantic(self._run, args=(fixture_path,), rounds=3, iterations=1)
+
+        # Assert
+        benchmark.extra_info["elapsed_ms"] = elapsed * 1000
+        benchmark.extra_info["replayed"] = stats["requests"]
+        assert stats["requests"] == 2 * self.AGENTS
+        assert stats["cycled"] == 0
+        # 同時実行の上限4で 24 往復（1往復 数十ms）を捌く
+        assert elapsed >= 0.02 * 2 * self.AGENTS / 4
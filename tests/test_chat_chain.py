@@ -14,6 +14,7 @@ import pytest
 
 from colonyforge.beekeeper import BeekeeperMCPServer
 from colonyforge.core import AkashicRecord
+from colonyforge.core.config import LLMConfig
 from colonyforge.llm.client import LLMResponse, ToolCall
 
 
@@ -52,7 +53,7 @@ def _inject_mock_llm(beekeeper: BeekeeperMCPServer, responses: list[LLMResponse]
     AgentRunner → LLMClient.chat() が呼ばれるたびに
     responses リストから順番に返す。
     """
-    mock_client = MagicMock()
+    mock_client = MagicMock(config=LLMConfig())
     mock_client.chat = AsyncMock(side_effect=responses)
     mock_client.close = AsyncMock()
     beekeeper._llm_client = mock_client
@@ -138,7 +139,7 @@ class TestChatChainSimple:
         """
         # Arrange: chatが例外を投げるモック
         beekeeper = BeekeeperMCPServer(ar=ar)
-        mock_client = MagicMock()
+        mock_client = MagicMock(config=LLMConfig())
         mock_client.chat = AsyncMock(side_effect=RuntimeError("API key invalid"))
         mock_client.close = AsyncMock()
         beekeeper._llm_client = mock_client
@@ -409,7 +410,7 @@ class TestChatChainSessionState:
         """
         # Arrange
         beekeeper = BeekeeperMCPServer(ar=ar)
-        mock_client = MagicMock()
+        mock_client = MagicMock(config=LLMConfig())
         mock_client.chat = AsyncMock(side_effect=RuntimeError("Network error"))
         mock_client.close = AsyncMock()
         beekeeper._llm_client = mock_client
@@ -506,6 +506,52 @@ class TestRunChat:
         # Assert: closeは呼ばれる
         mock_beekeeper.close.assert_awaited_once()
 
+    def test_run_chat_prints_streamed_text(self, capsys):
+        """Beekeeperのストリーミング中の応答テキストを届いた順に表示する"""
+        from colonyforge.core.activity_bus import (
+            ActivityBus,
+            ActivityEvent,
+            ActivityType,
+            AgentInfo,
+            AgentRole,
+        )
+
+        # Arrange
+        args = Namespace(message="ストリーミング")
+        beekeeper = AgentInfo(agent_id="beekeeper", role=AgentRole.BEEKEEPER, hive_id="0")
+
+        async def dispatch_tool(name, arguments):
+            for delta in ("こんに", "ちは"):
+                await ActivityBus.get_instance().emit(
+                    ActivityEvent(
+                        activity_type=ActivityType.LLM_STREAM,
+                        agent=beekeeper,
+                        summary="応答を受信中",
+                        detail={"delta": delta},
+                    )
+                )
+            return {"status": "success", "actions_taken": 0, "response": "こんにちは"}
+
+        mock_beekeeper = AsyncMock()
+        mock_beekeeper.dispatch_tool.side_effect = dispatch_tool
+        mock_beekeeper.close = AsyncMock()
+        ActivityBus.reset()
+
+        with (
+            patch("colonyforge.core.get_settings") as mock_get_settings,
+            patch("colonyforge.core.AkashicRecord"),
+            patch("colonyforge.beekeeper.BeekeeperMCPServer", return_value=mock_beekeeper),
+        ):
+            mock_get_settings.return_value = MagicMock()
+
+            # Act
+            run_chat(args)
+        ActivityBus.reset()
+
+        # Assert
+        captured = capsys.readouterr()
+        assert "こんにちは\n" + "-" * 50 in captured.out
+
     def test_chat_command_dispatched(self):
         """chatコマンドがrun_chatに正しくディスパッチされる"""
         # Arrange
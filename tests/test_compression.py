@@ -0,0 +1,235 @@
+"""レスポンス圧縮と高速シリアライズのテスト
+
+CompressionMiddleware のエンコーディング選択、fast_json_response、
+イベントの JSON Lines エクスポートを検証する。
+"""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from colonyforge.api.compression import CompressionMiddleware, _accepted_encodings
+from colonyforge.api.models import EventResponse
+from colonyforge.api.serialization import EVENT_LIST_ADAPTER, fast_json_response
+from colonyforge.core import AkashicRecord
+from colonyforge.core.events import RunStartedEvent, TaskCreatedEvent
+
+
+@pytest.fixture
+def compressed_client():
+    """CompressionMiddleware のみを適用した最小アプリ"""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    async def large() -> PlainTextResponse:
+        return PlainTextResponse("x" * 5000)
+
+    @app.get("/small")
+    async def small() -> PlainTextResponse:
+        return PlainTextResponse("tiny")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        return StreamingResponse(iter(["z" * 3000, "w" * 3000]), media_type="text/plain")
+
+    @app.get("/encoded")
+    async def encoded() -> PlainTextResponse:
+        return PlainTextResponse("x" * 5000, headers={"Content-Encoding": "identity"})
+
+    @app.get("/sse")
+    async def sse() -> StreamingResponse:
+        return StreamingResponse(
+            iter(["data: " + "y" * 500 + "\n\n"]), media_type="text/event-stream"
+        )
+
+    return TestClient(app)
+
+
+class TestAcceptEncoding:
+    """Accept-Encoding の解釈テスト"""
+
+    def test_parses_q_values(self):
+        """q=0 のエンコーディングは除外される"""
+        # Act
+        encodings = _accepted_encodings("br;q=0, gzip;q=0.8, identity")
+
+        # Assert
+        assert encodings == {"gzip", "identity"}
+
+    def test_empty_header(self):
+        """空ヘッダーは空集合"""
+        # Act & Assert
+        assert _accepted_encodings("") == set()
+
+
+class TestCompressionMiddleware:
+    """CompressionMiddleware のテスト"""
+
+    def test_gzip_for_large_response(self, compressed_client):
+        """閾値を超えるレスポンスは gzip 圧縮される"""
+        # Act
+        response = compressed_client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 5000
+        assert response.text == "x" * 5000
+
+    def test_streaming_response_compressed_per_chunk(self, compressed_client):
+        """複数チャンクのレスポンスは Content-Length なしで圧縮して流す"""
+        # Act
+        response = compressed_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert response.text == "z" * 3000 + "w" * 3000
+
+    def test_already_encoded_response_passed_through(self, compressed_client):
+        """Content-Encoding 付きのレスポンスは再圧縮しない"""
+        # Act
+        response = compressed_client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "identity"
+        assert response.text == "x" * 5000
+
+    def test_small_response_not_compressed(self, compressed_client):
+        """閾値未満は圧縮しない"""
+        # Act
+        response = compressed_client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+
+    def test_identity_when_not_accepted(self, compressed_client):
+        """gzip を受理しないクライアントには非圧縮で返す"""
+        # Act
+        response = compressed_client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+
+    def test_event_stream_not_compressed(self, compressed_client):
+        """SSE はバッファリングを避けるため圧縮しない"""
+        # Act
+        response = compressed_client.get("/sse", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+
+    def test_brotli_preferred_when_available(self, compressed_client):
+        """brotli 導入時は br が優先される"""
+        # Arrange
+        pytest.importorskip("brotli")
+
+        # Act
+        response = compressed_client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "br"
+        assert response.text == "x" * 5000
+
+    def test_falls_back_to_gzip_without_brotli(self, compressed_client):
+        """brotli 未導入時は br を要求されても gzip で返す"""
+        # Act
+        with patch("colonyforge.api.compression.brotli", None):
+            response = compressed_client.get("/large", headers={"Accept-Encoding": "br, gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+
+
+class TestFastSerialization:
+    """fast_json_response のテスト"""
+
+    def test_matches_model_dump(self):
+        """標準のシリアライズと同じJSONを返す"""
+        # Arrange
+        events = [
+            EventResponse(
+                id=f"e{i}",
+                type="task.created",
+                timestamp="2026-01-01T00:00:00Z",
+                actor="a",
+                payload={"n": i, "title": "日本語"},
+                hash="h",
+                prev_hash=None,
+                parents=[],
+            )
+            for i in range(3)
+        ]
+
+        # Act
+        response = fast_json_response(EVENT_LIST_ADAPTER, events, headers={"ETag": '"x"'})
+
+        # Assert
+        assert response.media_type == "application/json"
+        assert response.headers["etag"] == '"x"'
+        assert json.loads(response.body) == [e.model_dump(mode="json") for e in events]
+
+
+class TestEventExport:
+    """GET /runs/{run_id}/events/export のテスト"""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        from colonyforge.api.dependencies import AppState
+        from colonyforge.api.helpers import clear_active_runs, set_ar
+        from colonyforge.api.server import app
+
+        vault = tmp_path / "Vault"
+        ar = AkashicRecord(vault)
+        ar.append(RunStartedEvent(id="e0", run_id="r1", payload={"goal": "g"}))
+        for i in range(1, 2500):
+            ar.append(TaskCreatedEvent(id=f"e{i}", run_id="r1", task_id=f"t{i}"))
+
+        AppState.reset()
+        set_ar(None)
+        clear_active_runs()
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = vault
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            yield client
+
+        AppState.reset()
+
+    def test_exports_all_events_as_ndjson(self, client):
+        """チャンク境界を跨いで全イベントを JSON Lines で返す"""
+        # Act
+        response = client.get("/runs/r1/events/export")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 2500
+        assert lines[0]["id"] == "e0"
+        assert lines[-1]["id"] == "e2499"
+
+    def test_events_list_uses_fast_path(self, client):
+        """イベント一覧は従来と同じ形式・ヘッダーで返る"""
+        # Act
+        response = client.get("/runs/r1/events", params={"limit": 10000})
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()) == 2500
+        assert set(response.json()[0]) == set(EventResponse.model_fields)
+        assert "etag" in response.headers
+        assert "x-next-cursor" in response.headers
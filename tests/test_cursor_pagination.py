@@ -0,0 +1,251 @@
+"""カーソルページングと ETag/304 のテスト
+
+イベント・Run・Hive・Colony 一覧の増分取得と条件付きGETを検証する。
+"""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from colonyforge.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from colonyforge.core import AkashicRecord
+from colonyforge.core.ar.hive_storage import HiveStore
+from colonyforge.core.events import (
+    ColonyCreatedEvent,
+    HiveCreatedEvent,
+    RunStartedEvent,
+    TaskCreatedEvent,
+)
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Run x3（イベント5件ずつ）と Hive x3（Colony x3）を含むVault"""
+    vault_path = tmp_path / "Vault"
+    ar = AkashicRecord(vault_path)
+    for run_id in ("r1", "r2", "r3"):
+        ar.append(RunStartedEvent(id=f"{run_id}-e0", run_id=run_id, payload={"goal": "g"}))
+        for i in range(1, 5):
+            ar.append(TaskCreatedEvent(id=f"{run_id}-e{i}", run_id=run_id, task_id=f"t{i}"))
+
+    hive_store = HiveStore(vault_path)
+    for hive_id in ("h1", "h2", "h3"):
+        hive_store.append(HiveCreatedEvent(payload={"hive_id": hive_id, "name": hive_id}), hive_id)
+    for colony_id in ("c3", "c1", "c2"):
+        hive_store.append(
+            ColonyCreatedEvent(
+                payload={"hive_id": "h1", "colony_id": colony_id, "name": colony_id}
+            ),
+            "h1",
+        )
+    return vault_path
+
+
+@pytest.fixture
+def client(vault):
+    from colonyforge.api.dependencies import AppState
+    from colonyforge.api.helpers import clear_active_runs, set_ar, set_hive_store
+    from colonyforge.api.server import app
+
+    AppState.reset()
+    set_ar(None)
+    set_hive_store(HiveStore(vault))
+    clear_active_runs()
+
+    mock_s = MagicMock()
+    mock_s.get_vault_path.return_value = vault
+    mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
+
+    with (
+        patch("colonyforge.api.server.get_settings", return_value=mock_s),
+        patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+        TestClient(app) as client,
+    ):
+        yield client
+
+    AppState.reset()
+
+
+class TestPaginationHelpers:
+    """pagination モジュールのテスト"""
+
+    def test_cursor_roundtrip(self):
+        """カーソルのエンコード/デコードが往復する"""
+        # Act
+        cursor = encode_cursor({"after": "x", "o": 12})
+
+        # Assert
+        assert decode_cursor(cursor) == {"after": "x", "o": 12}
+
+    def test_invalid_cursor_raises_400(self):
+        """不正なカーソルは400"""
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("!!not-base64!!")
+        assert exc_info.value.status_code == 400
+
+    def test_paginate_returns_next_cursor(self):
+        """件数上限を超える場合のみ次ページのカーソルを返す"""
+        # Arrange
+        items = ["a", "b", "c", "d"]
+
+        # Act
+        page, cursor = paginate(items, str, None, 2)
+        rest, last_cursor = paginate(items, str, decode_cursor(cursor)["after"], 2)
+
+        # Assert
+        assert page == ["a", "b"]
+        assert rest == ["c", "d"]
+        assert last_cursor is None
+
+
+class TestEventsCursor:
+    """GET /runs/{run_id}/events の増分取得テスト"""
+
+    def test_cursor_returns_only_new_events(self, client, vault):
+        """カーソル指定で追記分のみ取得できる"""
+        # Arrange
+        first = client.get("/runs/r1/events")
+        cursor = first.headers[NEXT_CURSOR_HEADER]
+        AkashicRecord(vault).append(TaskCreatedEvent(id="r1-e5", run_id="r1", task_id="t5"))
+
+        # Act
+        response = client.get("/runs/r1/events", params={"cursor": cursor})
+
+        # Assert
+        assert len(first.json()) == 5
+        assert [e["id"] for e in response.json()] == ["r1-e5"]
+
+    def test_cursor_without_new_events_is_empty(self, client):
+        """追記がなければ空を返しカーソルは進まない"""
+        # Arrange
+        cursor = client.get("/runs/r1/events").headers[NEXT_CURSOR_HEADER]
+
+        # Act
+        response = client.get("/runs/r1/events", params={"cursor": cursor})
+
+        # Assert
+        assert response.json() == []
+        assert response.headers[NEXT_CURSOR_HEADER] == cursor
+
+    def test_limit_pages_through_events(self, client):
+        """limit とカーソルで全イベントを順に辿れる"""
+        # Act
+        ids: list[str] = []
+        cursor = None
+        for _ in range(3):
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            response = client.get("/runs/r1/events", params=params)
+            ids.extend(e["id"] for e in response.json())
+            cursor = response.headers[NEXT_CURSOR_HEADER]
+
+        # Assert
+        assert ids == [f"r1-e{i}" for i in range(5)]
+
+    def test_after_event_id(self, client):
+        """after 指定でそのイベントより後を取得"""
+        # Act
+        response = client.get("/runs/r1/events", params={"after": "r1-e2"})
+
+        # Assert
+        assert [e["id"] for e in response.json()] == ["r1-e3", "r1-e4"]
+
+    def test_after_unknown_event_is_404(self, client):
+        """存在しない after は404"""
+        # Act
+        response = client.get("/runs/r1/events", params={"after": "missing"})
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_cursor_not_on_line_boundary_is_400(self, client):
+        """行境界でないオフセットのカーソルは400"""
+        # Act
+        response = client.get("/runs/r1/events", params={"cursor": encode_cursor({"o": 3})})
+
+        # Assert
+        assert response.status_code == 400
+
+    def test_etag_returns_304_until_appended(self, client, vault):
+        """ETag一致で304、追記後は200"""
+        # Arrange
+        etag = client.get("/runs/r1/events").headers["ETag"]
+
+        # Act
+        not_modified = client.get("/runs/r1/events", headers={"If-None-Match": etag})
+        AkashicRecord(vault).append(TaskCreatedEvent(id="r1-e5", run_id="r1", task_id="t5"))
+        modified = client.get("/runs/r1/events", headers={"If-None-Match": etag})
+
+        # Assert
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert modified.status_code == 200
+        assert modified.headers["ETag"] != etag
+
+
+class TestListCursor:
+    """Run・Hive・Colony 一覧のページングテスト"""
+
+    def test_runs_paginated(self, client):
+        """Run一覧をID昇順でページングできる"""
+        # Act
+        first = client.get("/runs", params={"active_only": False, "limit": 2})
+        second = client.get(
+            "/runs",
+            params={"active_only": False, "limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+        )
+
+        # Assert
+        assert [r["run_id"] for r in first.json()] == ["r1", "r2"]
+        assert [r["run_id"] for r in second.json()] == ["r3"]
+        assert NEXT_CURSOR_HEADER not in second.headers
+
+    def test_runs_etag_changes_on_append(self, client, vault):
+        """Runのイベント追記でETagが変わる"""
+        # Arrange
+        etag = client.get("/runs", params={"active_only": False}).headers["ETag"]
+
+        # Act
+        cached = client.get("/runs", params={"active_only": False}, headers={"If-None-Match": etag})
+        AkashicRecord(vault).append(TaskCreatedEvent(id="r2-e5", run_id="r2", task_id="t5"))
+        changed = client.get(
+            "/runs", params={"active_only": False}, headers={"If-None-Match": etag}
+        )
+
+        # Assert
+        assert cached.status_code == 304
+        assert changed.status_code == 200
+
+    def test_hives_after(self, client):
+        """after 指定でHive一覧を途中から取得"""
+        # Act
+        response = client.get("/hives", params={"after": "h1"})
+
+        # Assert
+        assert [h["hive_id"] for h in response.json()] == ["h2", "h3"]
+        assert "ETag" in response.headers
+
+    def test_colonies_sorted_and_paginated(self, client):
+        """Colony一覧がID昇順でページングされる"""
+        # Act
+        first = client.get("/hives/h1/colonies", params={"limit": 2})
+        etag = first.headers["ETag"]
+        cached = client.get(
+            "/hives/h1/colonies", params={"limit": 2}, headers={"If-None-Match": etag}
+        )
+
+        # Assert
+        assert [c["colony_id"] for c in first.json()] == ["c1", "c2"]
+        assert first.headers[NEXT_CURSOR_HEADER]
+        assert cached.status_code == 304
@@ -0,0 +1,242 @@
+"""イベントログ追従（tail）とSSE配信のテスト
+
+AkashicRecord / HiveStore の tail、SSEフレーム整形、
+Last-Event-ID による再開を検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from colonyforge.api.event_stream import format_sse_batch, resolve_stream_offset
+from colonyforge.api.pagination import decode_cursor, encode_cursor
+from colonyforge.core import AkashicRecord
+from colonyforge.core.ar.hive_storage import HiveStore
+from colonyforge.core.ar.tail import get_append_notifier
+from colonyforge.core.events import HiveCreatedEvent, RunStartedEvent, TaskCreatedEvent
+
+
+def _make_request(headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def ar(tmp_path):
+    """イベント3件を持つRun r1"""
+    record = AkashicRecord(tmp_path / "Vault")
+    record.append(RunStartedEvent(id="e0", run_id="r1", payload={"goal": "g"}))
+    record.append(TaskCreatedEvent(id="e1", run_id="r1", task_id="t1"))
+    record.append(TaskCreatedEvent(id="e2", run_id="r1", task_id="t2"))
+    return record
+
+
+class TestTail:
+    """AkashicRecord.tail / HiveStore.tail のテスト"""
+
+    async def test_existing_events_are_batched(self, ar):
+        """既存イベントが max_batch 件ずつまとめて返る"""
+        # Arrange
+        tail = ar.tail("r1", max_batch=2)
+
+        # Act
+        first = await anext(tail)
+        second = await anext(tail)
+        await tail.aclose()
+
+        # Assert
+        assert [e.id for e, _ in first] == ["e0", "e1"]
+        assert [e.id for e, _ in second] == ["e2"]
+
+    async def test_append_wakes_tail_immediately(self, ar):
+        """同一プロセス内の append はポーリングを待たずに通知される"""
+        # Arrange
+        tail = ar.tail("r1", poll_interval=60.0)
+        await anext(tail)
+        pending = asyncio.ensure_future(anext(tail))
+        await asyncio.sleep(0.05)
+
+        # Act
+        ar.append(TaskCreatedEvent(id="e3", run_id="r1", task_id="t3"))
+        batch = await asyncio.wait_for(pending, timeout=5.0)
+        await tail.aclose()
+
+        # Assert
+        assert [e.id for e, _ in batch] == ["e3"]
+
+    async def test_external_append_detected_by_polling(self, ar, tmp_path):
+        """通知のない外部プロセスの追記もポーリングで検出する"""
+        # Arrange
+        tail = ar.tail("r1", poll_interval=0.05)
+        await anext(tail)
+        event = TaskCreatedEvent(id="ext", run_id="r1", task_id="tx")
+        events_file = tmp_path / "Vault" / "r1" / "events.jsonl"
+
+        # Act
+        with open(events_file, "a", encoding="utf-8") as f:
+            f.write(event.to_jsonl() + "\n")
+        batch = await asyncio.wait_for(anext(tail), timeout=5.0)
+        await tail.aclose()
+
+        # Assert
+        assert [e.id for e, _ in batch] == ["ext"]
+
+    async def test_resume_from_offset(self, ar):
+        """バッチのオフセットから再開すると続きのみ返る"""
+        # Arrange
+        tail = ar.tail("r1", max_batch=1)
+        _, offset = (await anext(tail))[-1]
+        await tail.aclose()
+
+        # Act
+        resumed = ar.tail("r1", offset)
+        batch = await anext(resumed)
+        await resumed.aclose()
+
+        # Assert
+        assert [e.id for e, _ in batch] == ["e1", "e2"]
+
+    async def test_heartbeat_yields_empty_batch(self, ar):
+        """イベントがない間は heartbeat ごとに空バッチを返す"""
+        # Arrange
+        tail = ar.tail("r1", heartbeat=0.05)
+        await anext(tail)
+
+        # Act
+        batch = await asyncio.wait_for(anext(tail), timeout=5.0)
+        await tail.aclose()
+
+        # Assert
+        assert batch == []
+
+    async def test_close_releases_subscription(self, ar, tmp_path):
+        """aclose で追記通知の購読が解除される"""
+        # Arrange
+        events_file = tmp_path / "Vault" / "r1" / "events.jsonl"
+        tail = ar.tail("r1")
+        await anext(tail)
+        subscribed = get_append_notifier().subscriber_count(events_file)
+
+        # Act
+        await tail.aclose()
+
+        # Assert
+        assert subscribed == 1
+        assert get_append_notifier().subscriber_count(events_file) == 0
+
+    def test_invalid_offset_raises_on_call(self, ar):
+        """行頭でないオフセットは呼び出し時に ValueError"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            ar.tail("r1", 3)
+
+    async def test_hive_tail(self, tmp_path):
+        """HiveStore も同様に追従できる"""
+        # Arrange
+        store = HiveStore(tmp_path / "Vault")
+        store.append(HiveCreatedEvent(id="h-created", payload={"hive_id": "h1"}), "h1")
+        tail = store.tail("h1", poll_interval=60.0)
+        await anext(tail)
+        pending = asyncio.ensure_future(anext(tail))
+        await asyncio.sleep(0.05)
+
+        # Act
+        store.append(HiveCreatedEvent(id="h-second", payload={"hive_id": "h1"}), "h1")
+        batch = await asyncio.wait_for(pending, timeout=5.0)
+        await tail.aclose()
+
+        # Assert
+        assert [e.id for e, _ in batch] == ["h-second"]
+
+
+class TestSSEFormat:
+    """SSEフレームとカーソル解決のテスト"""
+
+    async def test_frame_contains_batch_and_cursor(self, ar):
+        """1フレームに複数イベントと再開用カーソルを含む"""
+        # Arrange
+        tail = ar.tail("r1")
+        batch = await anext(tail)
+        await tail.aclose()
+
+        # Act
+        frame = format_sse_batch(batch)
+
+        # Assert
+        lines = frame.rstrip("\n").split("\n")
+        assert lines[0].startswith("id: ")
+        assert lines[1] == "event: events"
+        data = json.loads(lines[2].removeprefix("data: "))
+        assert [e["id"] for e in data] == ["e0", "e1", "e2"]
+        assert decode_cursor(lines[0].removeprefix("id: ")) == {"o": batch[-1][1]}
+
+    def test_last_event_id_takes_precedence(self):
+        """Last-Event-ID ヘッダーがクエリのカーソルより優先される"""
+        # Arrange
+        request = _make_request({"Last-Event-ID": encode_cursor({"o": 42})})
+
+        # Act
+        offset = resolve_stream_offset(request, encode_cursor({"o": 7}))
+
+        # Assert
+        assert offset == 42
+
+    def test_no_cursor_starts_from_beginning(self):
+        """カーソルなしは先頭から"""
+        # Act & Assert
+        assert resolve_stream_offset(_make_request(), None) == 0
+
+    def test_invalid_last_event_id_is_400(self):
+        """不正な Last-Event-ID は400"""
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            resolve_stream_offset(_make_request({"Last-Event-ID": encode_cursor({"x": 1})}), None)
+        assert exc_info.value.status_code == 400
+
+
+class TestStreamEndpoint:
+    """GET /runs/{run_id}/events/stream のテスト"""
+
+    @pytest.fixture(autouse=True)
+    def _use_ar(self, ar):
+        from colonyforge.api.helpers import set_ar
+
+        set_ar(ar)
+        yield
+        set_ar(None)
+
+    async def test_resumes_from_last_event_id(self, ar):
+        """Last-Event-ID 以降のイベントのみ配信する"""
+        # Arrange
+        from colonyforge.api.routes.events import stream_events
+
+        offset = [o for _, o in ar.replay_from("r1")][0]
+        request = _make_request({"Last-Event-ID": encode_cursor({"o": offset})})
+
+        # Act
+        response = await stream_events(request, "r1", cursor=None, max_batch=100)
+        body = response.body_iterator
+        frame = await anext(body)
+        await body.aclose()
+
+        # Assert
+        assert response.media_type == "text/event-stream"
+        data = json.loads(frame.split("data: ", 1)[1])
+        assert [e["id"] for e in data] == ["e1", "e2"]
+
+    async def test_invalid_offset_is_400(self):
+        """行頭でないカーソルは400"""
+        # Arrange
+        from colonyforge.api.routes.events import stream_events
+
+        # Act & Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_events(
+                _make_request(), "r1", cursor=encode_cursor({"o": 3}), max_batch=100
+            )
+        assert exc_info.value.status_code == 400
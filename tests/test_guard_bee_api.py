@@ -23,6 +23,8 @@ def client(tmp_path):
     mock_s = MagicMock()
     mock_s.get_vault_path.return_value = tmp_path / "Vault"
     mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
 
     with (
         patch("colonyforge.api.server.get_settings", return_value=mock_s),
@@ -308,6 +308,8 @@ def api_client(tmp_path):
     mock_s = MagicMock()
     mock_s.get_vault_path.return_value = tmp_path / "Vault"
     mock_s.server.cors.enabled = False
+    mock_s.server.activity_history.enabled = False
+    mock_s.server.activity_coalescing.enabled = False
     mock_s.auth.enabled = False
 
     with (
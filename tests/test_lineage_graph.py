@@ -0,0 +1,355 @@
+"""Vault横断 Lineage 索引・探索のテスト
+
+Run・Hive・Honeycomb エピソードを跨いだ因果リンクの索引化、
+深さ/ノード数予算付きの探索、DOT/JSONエクスポート、APIエンドポイントを検証する。
+"""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from colonyforge.core import AkashicRecord
+from colonyforge.core.ar.hive_storage import HiveStore
+from colonyforge.core.ar.lineage_index import LineageIndex
+from colonyforge.core.events import (
+    ColonyCreatedEvent,
+    HiveCreatedEvent,
+    RunCompletedEvent,
+    RunStartedEvent,
+    TaskCompletedEvent,
+    TaskCreatedEvent,
+)
+from colonyforge.core.honeycomb.models import Episode, Outcome
+from colonyforge.core.honeycomb.store import HoneycombStore
+from colonyforge.core.lineage import LineageGraph
+
+
+@pytest.fixture
+def vault(tmp_path):
+    """Hive → Colony → Run x2 → Episode x2 を含むVault"""
+    vault_path = tmp_path / "Vault"
+    ar = AkashicRecord(vault_path)
+    hive_store = HiveStore(vault_path)
+    honeycomb = HoneycombStore(vault_path)
+
+    hive_store.append(
+        HiveCreatedEvent(id="hive-created", payload={"hive_id": "h1", "name": "H"}), "h1"
+    )
+    hive_store.append(
+        ColonyCreatedEvent(
+            id="colony-created", payload={"hive_id": "h1", "colony_id": "c1", "name": "C"}
+        ),
+        "h1",
+    )
+
+    # Run 1
+    ar.append(RunStartedEvent(id="r1-start", run_id="r1", payload={"colony_id": "c1", "goal": "g"}))
+    ar.append(TaskCreatedEvent(id="r1-task", run_id="r1", task_id="t1", parents=["r1-start"]))
+    ar.append(TaskCompletedEvent(id="r1-done", run_id="r1", task_id="t1", parents=["r1-task"]))
+    ar.append(RunCompletedEvent(id="r1-end", run_id="r1", parents=["r1-done"]))
+
+    # Run 2: Run 1 の成果に明示的に依存する
+    ar.append(
+        RunStartedEvent(id="r2-start", run_id="r2", payload={"colony_id": "c1"}, parents=["r1-end"])
+    )
+    ar.append(TaskCreatedEvent(id="r2-task", run_id="r2", task_id="t1", parents=["r2-start"]))
+
+    honeycomb.append(
+        Episode(episode_id="ep1", run_id="r1", colony_id="c1", outcome=Outcome.FAILURE)
+    )
+    honeycomb.append(
+        Episode(
+            episode_id="ep2",
+            run_id="r2",
+            colony_id="c1",
+            outcome=Outcome.SUCCESS,
+            parent_episode_ids=["ep1"],
+        )
+    )
+    return vault_path
+
+
+class TestLineageIndex:
+    """LineageIndex の索引化テスト"""
+
+    def test_sync_indexes_runs_hives_and_episodes(self, vault):
+        """全ソースのノードが索引化される"""
+        # Arrange
+        index = LineageIndex(vault)
+
+        # Act
+        loaded = index.sync()
+
+        # Assert
+        assert loaded == 10
+        assert index.get("r1-start").scope == "run"
+        assert index.get("colony-created").scope == "hive"
+        assert index.get("ep2").node_type == "episode"
+
+    def test_refs_resolve_to_anchor_events(self, vault):
+        """論理参照がアンカーイベントに解決される"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+
+        # Assert: Run開始 → Colony作成 → Hive作成
+        assert "colony-created" in index.parents_of("r1-start")
+        assert index.parents_of("colony-created") == ["hive-created"]
+        # エピソード → Runの最新イベント + 前回エピソード
+        assert index.parents_of("ep2") == ["ep1", "r2-task"]
+        assert "ep1" in index.children_of("r1-end")
+
+    def test_refresh_is_incremental(self, vault):
+        """2回目以降は追記分のみ索引化する"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+
+        # Act
+        AkashicRecord(vault).append(
+            TaskCompletedEvent(id="r2-done", run_id="r2", task_id="t1", parents=["r2-task"])
+        )
+        indexed = index.refresh()
+        loaded = index.load()
+
+        # Assert
+        assert indexed == 1
+        assert loaded == 1
+        # Runのアンカーが最新イベントに移動する
+        assert "r2-done" in index.parents_of("ep2")
+        assert "ep2" in index.children_of("r2-done")
+        assert "ep2" not in index.children_of("r2-task")
+
+    def test_index_is_shared_across_instances(self, vault):
+        """永続化された索引を別インスタンスから読み込める"""
+        # Arrange
+        LineageIndex(vault).sync()
+
+        # Act
+        other = LineageIndex(vault)
+        indexed = other.refresh()
+        loaded = other.load()
+
+        # Assert
+        assert indexed == 0
+        assert loaded == 10
+
+    def test_partial_line_is_deferred(self, vault):
+        """書き込み途中の行は次回まで索引化しない"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        events_file = vault / "r2" / "events.jsonl"
+        line = json.dumps({"id": "late", "type": "task.progressed", "parents": ["r2-task"]})
+
+        # Act
+        with open(events_file, "a", encoding="utf-8") as f:
+            f.write(line[:10])
+        first = index.refresh()
+        with open(events_file, "a", encoding="utf-8") as f:
+            f.write(line[10:] + "\n")
+        second = index.refresh()
+        index.load()
+
+        # Assert
+        assert first == 0
+        assert second == 1
+        assert index.parents_of("late") == ["r2-task"]
+
+    def test_rebuilds_when_index_file_removed(self, vault):
+        """索引本体が消えた場合は全ソースを再走査する"""
+        # Arrange
+        LineageIndex(vault).sync()
+        (vault / "_lineage" / "index.jsonl").unlink()
+
+        # Act
+        index = LineageIndex(vault)
+        loaded = index.sync()
+
+        # Assert
+        assert loaded == 10
+
+    def test_lineage_dir_not_listed_as_run(self, vault):
+        """索引ディレクトリはRunとして扱われない"""
+        # Arrange
+        LineageIndex(vault).sync()
+
+        # Act
+        runs = AkashicRecord(vault).list_runs()
+
+        # Assert
+        assert runs == ["r1", "r2"]
+
+
+class TestLineageGraph:
+    """LineageGraph の探索テスト"""
+
+    def test_ancestors_cross_runs_and_hives(self, vault):
+        """ancestors探索がRun・Colony・Hiveを跨ぐ"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        graph = LineageGraph(index)
+
+        # Act
+        ids = [step.node.node_id for step in graph.traverse("r2-task", max_depth=20)]
+
+        # Assert
+        assert ids[0] == "r2-task"
+        assert {"r2-start", "r1-end", "r1-start", "colony-created", "hive-created"} <= set(ids)
+
+    def test_descendants_reach_episodes(self, vault):
+        """descendants探索がエピソードに到達する"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        graph = LineageGraph(index)
+
+        # Act
+        ids = {step.node.node_id for step in graph.traverse("ep1", direction="descendants")}
+
+        # Assert
+        assert ids == {"ep1", "ep2"}
+
+    def test_max_depth_truncates(self, vault):
+        """深さ予算を超えると truncated になる"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        traversal = LineageGraph(index).traverse("r2-task", max_depth=1)
+
+        # Act
+        steps = list(traversal)
+
+        # Assert
+        assert [s.node.node_id for s in steps] == ["r2-task", "r2-start"]
+        assert traversal.truncated is True
+
+    def test_max_nodes_truncates(self, vault):
+        """ノード数予算を超えると打ち切られる"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        traversal = LineageGraph(index).traverse("r2-task", max_depth=50, max_nodes=3)
+
+        # Act
+        steps = list(traversal)
+
+        # Assert
+        assert len(steps) == 3
+        assert traversal.truncated is True
+
+    def test_unknown_root_yields_nothing(self, vault):
+        """存在しない起点は空"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+        graph = LineageGraph(index)
+
+        # Act & Assert
+        assert list(graph.traverse("missing")) == []
+        assert graph.subgraph("missing") is None
+
+    def test_subgraph_edges_and_exports(self, vault):
+        """サブグラフのエッジとDOT/JSONエクスポート"""
+        # Arrange
+        index = LineageIndex(vault)
+        index.sync()
+
+        # Act
+        subgraph = LineageGraph(index).subgraph("r1-end", direction="both")
+        data = subgraph.to_dict()
+        dot = subgraph.to_dot()
+
+        # Assert
+        assert ("r1-done", "r1-end") in subgraph.edges
+        assert ("r1-end", "r2-start") in subgraph.edges
+        assert ("r1-end", "ep1") in subgraph.edges
+        assert data["root"] == "r1-end"
+        assert {"source": "r1-done", "target": "r1-end"} in data["edges"]
+        assert dot.startswith("digraph lineage {")
+        assert '"r1-done" -> "r1-end";' in dot
+
+
+class TestLineageAPI:
+    """/lineage エンドポイントのテスト"""
+
+    @pytest.fixture
+    def client(self, vault):
+        from colonyforge.api.dependencies import AppState
+        from colonyforge.api.helpers import clear_active_runs, set_ar
+        from colonyforge.api.server import app
+
+        AppState.reset()
+        set_ar(None)
+        clear_active_runs()
+
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = vault
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            yield client
+
+        AppState.reset()
+
+    def test_get_graph_json(self, client):
+        """JSON形式でサブグラフを取得"""
+        # Act
+        response = client.get("/lineage/ep2", params={"direction": "ancestors"})
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        node_ids = {n["id"] for n in data["nodes"]}
+        assert {"ep2", "ep1", "r2-task", "r1-end", "hive-created"} <= node_ids
+        assert data["truncated"] is False
+
+    def test_get_graph_not_found(self, client):
+        """存在しないノードは404"""
+        # Act
+        response = client.get("/lineage/missing")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_export_dot(self, client):
+        """DOT形式でエクスポート"""
+        # Act
+        response = client.get("/lineage/r1-end/dot")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/vnd.graphviz")
+        assert "digraph lineage" in response.text
+
+    def test_stream_ndjson(self, client):
+        """NDJSONで到達順にストリーミング"""
+        # Act
+        response = client.get("/lineage/r2-task/stream", params={"max_depth": 1})
+
+        # Assert
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["id"] == "r2-task"
+        assert lines[0]["depth"] == 0
+        assert lines[1]["via"] == "r2-task"
+        assert lines[-1] == {"done": True, "truncated": True}
+
+    def test_stream_not_found(self, client):
+        """存在しないノードのストリームは404"""
+        # Act
+        response = client.get("/lineage/missing/stream")
+
+        # Assert
+        assert response.status_code == 404
@@ -6,6 +6,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from colonyforge.core.config import LLMConfig
 from colonyforge.llm.client import (
     LLMClient,
     LLMResponse,
@@ -315,7 +316,7 @@ class TestAgentRunner:
     @pytest.fixture
     def mock_client(self):
         """モックLLMクライアント"""
-        client = MagicMock(spec=LLMClient)
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
         client.chat = AsyncMock()
         client.close = AsyncMock()
         return client
@@ -446,6 +447,123 @@ class TestAgentRunner:
         assert result.tool_calls_made == 1
 
 
+class TestParallelToolCalls:
+    """AgentRunner のツール並行実行のテスト"""
+
+    @pytest.fixture
+    def mock_client(self):
+        """モックLLMクライアント"""
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
+        client.chat = AsyncMock()
+        return client
+
+    @staticmethod
+    def _slow_tool(name, log, *, concurrency_safe, delay=0.05):
+        """開始・終了を log に記録する遅いツール"""
+        import asyncio
+
+        from colonyforge.llm.runner import ToolDefinition
+
+        async def handler(key: str) -> str:
+            log.append(f"start:{key}")
+            await asyncio.sleep(delay)
+            log.append(f"end:{key}")
+            return f"{name}:{key}"
+
+        return ToolDefinition(
+            name=name,
+            description=name,
+            parameters={"type": "object", "properties": {"key": {"type": "string"}}},
+            handler=handler,
+            concurrency_safe=concurrency_safe,
+        )
+
+    @staticmethod
+    def _calls(*specs):
+        return [
+            ToolCall(id=f"tc-{i}", name=name, arguments={"key": key})
+            for i, (name, key) in enumerate(specs)
+        ]
+
+    async def test_safe_tools_run_concurrently_in_order(self, mock_client):
+        """concurrency_safe なツールは並行実行し、結果は呼び出し順に履歴へ入る"""
+        import time
+
+        # Arrange
+        log: list[str] = []
+        runner = AgentRunner(mock_client)
+        runner.register_tool(self._slow_tool("read", log, concurrency_safe=True))
+        calls = self._calls(("read", "a"), ("read", "b"), ("read", "c"))
+
+        # Act
+        started = time.perf_counter()
+        results = await runner._execute_tool_calls(calls, AgentContext(run_id="r"))
+        elapsed = time.perf_counter() - started
+
+        # Assert
+        assert results == ["read:a", "read:b", "read:c"]
+        assert log[:3] == ["start:a", "start:b", "start:c"]
+        assert elapsed < 0.12
+
+    async def test_unsafe_tool_is_a_barrier(self, mock_client):
+        """副作用のあるツールは前の並行区間の完了後に単独で実行する"""
+        # Arrange
+        log: list[str] = []
+        runner = AgentRunner(mock_client)
+        runner.register_tool(self._slow_tool("read", log, concurrency_safe=True))
+        runner.register_tool(self._slow_tool("write", log, concurrency_safe=False, delay=0))
+        calls = self._calls(("read", "a"), ("read", "b"), ("write", "w"), ("read", "c"))
+
+        # Act
+        results = await runner._execute_tool_calls(calls, AgentContext(run_id="r"))
+
+        # Assert
+        assert results == ["read:a", "read:b", "write:w", "read:c"]
+        assert log.index("start:w") > max(log.index("end:a"), log.index("end:b"))
+        assert log.index("start:c") > log.index("end:w")
+
+    async def test_concurrency_is_bounded(self, mock_client):
+        """同時に実行するのは max_parallel_tools 件まで"""
+        # Arrange
+        log: list[str] = []
+        runner = AgentRunner(mock_client, max_parallel_tools=2)
+        runner.register_tool(self._slow_tool("read", log, concurrency_safe=True, delay=0.01))
+        calls = self._calls(*[("read", str(i)) for i in range(5)])
+
+        # Act
+        await runner._execute_tool_calls(calls, AgentContext(run_id="r"))
+
+        # Assert
+        running = peak = 0
+        for entry in log:
+            running += 1 if entry.startswith("start") else -1
+            peak = max(peak, running)
+        assert peak == 2
+
+    async def test_tool_result_reports_duration(self, mock_client):
+        """ツール結果のイベントに実行時間（ms）を含める"""
+        from colonyforge.core.activity_bus import ActivityType, AgentInfo, AgentRole
+
+        # Arrange
+        runner = AgentRunner(
+            mock_client,
+            agent_info=AgentInfo(agent_id="w", role=AgentRole.WORKER_BEE, hive_id="h"),
+        )
+        runner.register_tool(self._slow_tool("read", [], concurrency_safe=True, delay=0.02))
+        runner._emit_activity = AsyncMock()
+
+        # Act
+        await runner._execute_tool_calls(self._calls(("read", "a")), AgentContext(run_id="r"))
+
+        # Assert
+        result_events = [
+            c.args
+            for c in runner._emit_activity.await_args_list
+            if c.args[0] == ActivityType.MCP_TOOL_RESULT
+        ]
+        assert result_events[0][2]["duration_ms"] >= 15
+
+
 class TestAgentContext:
     """AgentContextクラスのテスト"""
 
@@ -491,7 +609,7 @@ class TestAgentRunnerPromptIntegration:
     @pytest.fixture
     def mock_client(self):
         """モックLLMクライアント"""
-        client = MagicMock(spec=LLMClient)
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
         client.chat = AsyncMock()
         client.close = AsyncMock()
         return client
@@ -822,16 +940,12 @@ class TestLLMClient:
 
     @pytest.fixture
     def mock_rate_limiter(self):
-        """モックレートリミッター"""
-        limiter = AsyncMock()
-        limiter.wait = AsyncMock()
-        limiter.acquire = AsyncMock()
-        # context manager をモック
-        ctx = AsyncMock()
-        ctx.__aenter__ = AsyncMock(return_value=None)
-        ctx.__aexit__ = AsyncMock(return_value=False)
-        limiter.acquire.return_value = ctx
-        limiter.handle_429 = AsyncMock()
+        """レート制限のフィードバックを記録するレートリミッター"""
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+
+        limiter = RateLimiter(RateLimitConfig())
+        limiter.record_success = MagicMock(wraps=limiter.record_success)  # type: ignore[method-assign]
+        limiter.record_throttle = MagicMock(wraps=limiter.record_throttle)  # type: ignore[method-assign]
         return limiter
 
     @pytest.fixture
@@ -1020,6 +1134,114 @@ class TestLLMClient:
             assert call_kwargs["tools"] == tools
             assert call_kwargs["tool_choice"] == "auto"
 
+    @pytest.mark.asyncio
+    async def test_chat_reserves_and_reconciles_tokens(self, llm_config, monkeypatch):
+        """送信前に見積もりを予約し、応答の usage で補正する（リクエストは1件として計上）"""
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+
+        # Arrange
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=100_000, burst_limit=5))
+        client = LLMClient(config=llm_config, rate_limiter=limiter)
+        reserved: list[int] = []
+        original = limiter.acquire_with_tokens
+
+        async def spy(llm_tokens: int):
+            reserved.append(llm_tokens)
+            return await original(llm_tokens)
+
+        with (
+            patch.object(limiter, "acquire_with_tokens", side_effect=spy),
+            patch(
+                "colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock
+            ) as mock_acomp,
+        ):
+            mock_acomp.return_value = _make_mock_model_response(content="OK")
+
+            # Act
+            await client.chat([Message(role="user", content="hello " * 200)])
+
+        # Assert
+        stats = limiter.get_stats()
+        assert reserved[0] > llm_config.max_tokens + 100
+        assert stats["tokens_this_minute"] == 15
+        assert stats["requests_this_minute"] == 1
+        assert stats["current_concurrent"] == 0
+
+    @pytest.mark.asyncio
+    async def test_chat_reports_rate_limit_feedback(self, client, mock_rate_limiter, monkeypatch):
+        """成功時は応答ヘッダーを、429 時はエラー応答のヘッダーをリミッターに渡す"""
+        import httpx
+        import litellm
+
+        # Arrange
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+        ok = _make_mock_model_response(content="OK")
+        ok._hidden_params = {"additional_headers": {"x-ratelimit-limit-requests": "500"}}
+        throttled = litellm.exceptions.RateLimitError(
+            "slow down",
+            llm_provider="openai",
+            model="gpt-4o",
+            response=httpx.Response(
+                429,
+                headers={"retry-after": "2"},
+                request=httpx.Request("POST", "https://api.openai.com"),
+            ),
+        )
+
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock
+        ) as mock_acomp:
+            mock_acomp.side_effect = [ok, throttled]
+
+            # Act
+            await client.chat([Message(role="user", content="Hi")])
+            with pytest.raises(litellm.exceptions.RateLimitError):
+                await client.chat([Message(role="user", content="Hi")])
+
+        # Assert
+        mock_rate_limiter.record_success.assert_called_once_with(
+            {"x-ratelimit-limit-requests": "500"}
+        )
+        (headers,), _ = mock_rate_limiter.record_throttle.call_args
+        assert headers["retry-after"] == "2"
+
+    def test_estimate_includes_tools(self):
+        """ツール定義もプロンプトのトークン数に含める"""
+        # Arrange
+        messages = [{"role": "user", "content": "Read the file"}]
+        tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "read_file",
+                    "description": "Read a file from the workspace and return its content",
+                    "parameters": {"type": "object", "properties": {"path": {"type": "string"}}},
+                },
+            }
+        ]
+
+        # Act
+        without_tools = LLMClient._estimate_prompt_tokens("openai/gpt-4o", messages, None)
+        with_tools = LLMClient._estimate_prompt_tokens("openai/gpt-4o", messages, tools)
+
+        # Assert
+        assert with_tools > without_tools
+
+    def test_estimate_falls_back_to_character_count(self):
+        """トークナイザーが使えない場合は文字数から概算する"""
+        # Arrange
+        messages = [{"role": "user", "content": "x" * 400}]
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.token_counter", side_effect=ValueError("unknown")
+        ):
+            estimate = LLMClient._estimate_prompt_tokens("custom/model", messages, None)
+
+        # Assert
+        assert 100 <= estimate <= 130
+
     @pytest.mark.asyncio
     async def test_chat_message_with_tool_call_id(self, client, monkeypatch):
         """tool_call_idを含むメッセージが正しく変換される"""
@@ -1397,7 +1619,7 @@ class TestAgentRunnerRequireToolUse:
     @pytest.fixture
     def mock_client(self):
         """モックLLMクライアント"""
-        client = MagicMock(spec=LLMClient)
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
         client.chat = AsyncMock()
         client.close = AsyncMock()
         return client
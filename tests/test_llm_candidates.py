@@ -0,0 +1,213 @@
+"""複数候補の生成（N案並列生成）のテスト
+
+LLMClient.chat_candidates の n サンプリングと並行送信、生成方法の自動判定、
+AgentRunner.propose_candidates と Referee Bee への受け渡しを検証する。
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.core.config import LLMConfig
+from colonyforge.llm.client import CandidateBatch, LLMClient, LLMResponse, Message, ToolCall
+from colonyforge.referee_bee import DiffTester
+
+
+def _choice(content: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        message=SimpleNamespace(content=content, tool_calls=None), finish_reason="stop"
+    )
+
+
+def _usage(prompt: int, completion: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion
+    )
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    from colonyforge.core.config import LLMCacheConfig, LLMConfig
+    from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+
+    monkeypatch.setenv("TEST_API_KEY", "sk-test")
+
+    def make(sampling: str) -> LLMClient:
+        config = LLMConfig(
+            provider="openai",
+            model="gpt-4o",
+            api_key_env="TEST_API_KEY",
+            temperature=0.8,
+            candidate_sampling=sampling,
+            cache=LLMCacheConfig(mode="always"),
+        )
+        return LLMClient(config, rate_limiter=RateLimiter(RateLimitConfig()))
+
+    return make
+
+
+@pytest.fixture
+def mock_acompletion():
+    calls: list[int] = []
+
+    async def completion(**kwargs):
+        n = kwargs.get("n", 1)
+        calls.append(n)
+        start = sum(calls) - n
+        return SimpleNamespace(
+            choices=[_choice(f"案{start + i}") for i in range(n)],
+            usage=_usage(100, 20 * n),
+        )
+
+    with patch(
+        "colonyforge.llm.client.litellm.acompletion",
+        new_callable=AsyncMock,
+        side_effect=completion,
+    ) as mock_acomp:
+        yield mock_acomp
+
+
+class TestChatCandidates:
+    """LLMClient.chat_candidates のテスト"""
+
+    async def test_n_sampling_sends_one_request(self, make_client, mock_acompletion):
+        """n 対応なら1回のリクエストで n 件を受け取る"""
+        # Arrange
+        client = make_client("n")
+
+        # Act
+        batch = await client.chat_candidates([Message(role="user", content="案を出して")], n=5)
+
+        # Assert
+        assert mock_acompletion.await_count == 1
+        assert mock_acompletion.call_args.kwargs["n"] == 5
+        assert [r.content for r in batch.responses] == [f"案{i}" for i in range(5)]
+        assert batch.sampling == "n"
+        assert batch.usage == {"prompt_tokens": 100, "completion_tokens": 100, "total_tokens": 200}
+
+    async def test_parallel_fallback_shares_one_reservation(self, make_client, mock_acompletion):
+        """n 非対応なら同じリクエストを並行送信し、レート制限の枠は1回だけ取る"""
+        # Arrange
+        client = make_client("parallel")
+
+        # Act
+        batch = await client.chat_candidates([Message(role="user", content="案を出して")], n=4)
+
+        # Assert
+        assert mock_acompletion.await_count == 4
+        assert all("n" not in c.kwargs for c in mock_acompletion.call_args_list)
+        messages = [c.kwargs["messages"] for c in mock_acompletion.call_args_list]
+        assert all(m is messages[0] for m in messages)
+        assert len(batch.responses) == 4
+        assert batch.sampling == "parallel"
+        assert batch.usage["prompt_tokens"] == 400
+        stats = client._rate_limiter.get_stats()
+        assert stats["requests_this_minute"] == 1
+        assert stats["current_concurrent"] == 0
+
+    async def test_candidates_bypass_cache(self, make_client, mock_acompletion):
+        """同じプロンプトでも毎回生成する（応答キャッシュを使わない）"""
+        # Arrange
+        client = make_client("n")
+        messages = [Message(role="user", content="案を出して")]
+
+        # Act
+        await client.chat_candidates(messages, n=2)
+        await client.chat_candidates(messages, n=2)
+
+        # Assert
+        assert mock_acompletion.await_count == 2
+
+    @pytest.mark.parametrize(
+        ("params", "expected"),
+        [(["temperature", "n"], "n"), (["temperature"], "parallel"), (None, "parallel")],
+    )
+    def test_auto_detects_n_support(self, make_client, params, expected):
+        """auto ではモデルが n に対応しているかで生成方法を選ぶ"""
+        # Arrange
+        client = make_client("auto")
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.get_supported_openai_params", return_value=params
+        ):
+            sampling = client._candidate_sampling(5)
+
+        # Assert
+        assert sampling == expected
+
+    async def test_rejects_zero_candidates(self, make_client):
+        """候補数が0以下ならエラー"""
+        # Act / Assert
+        with pytest.raises(ValueError, match="候補数"):
+            await make_client("n").chat_candidates([Message(role="user", content="x")], n=0)
+
+
+class TestCandidateBatch:
+    """CandidateBatch のテスト"""
+
+    def test_to_referee_candidates_feeds_diff_tester(self):
+        """Referee Bee の DiffTester にそのまま渡せる形に変換する"""
+        # Arrange
+        call = ToolCall(id="c1", name="write_file", arguments={"path": "a.py"})
+        batch = CandidateBatch(
+            responses=[
+                LLMResponse(content="A", tool_calls=[], finish_reason="stop"),
+                LLMResponse(content="A", tool_calls=[], finish_reason="stop"),
+                LLMResponse(content="", tool_calls=[call], finish_reason="tool_calls"),
+            ]
+        )
+
+        # Act
+        candidates = batch.to_referee_candidates("worker")
+        results = DiffTester().compare(candidates, "同じタスク")
+
+        # Assert
+        assert list(candidates) == ["worker-0", "worker-1", "worker-2"]
+        assert candidates["worker-2"]["tool_calls"] == [
+            {"name": "write_file", "arguments": {"path": "a.py"}}
+        ]
+        assert DiffTester().consistency_ratio(results) == pytest.approx(1 / 3)
+
+
+class TestProposeCandidates:
+    """AgentRunner.propose_candidates のテスト"""
+
+    async def test_shares_prompt_and_tools(self):
+        """システムプロンプト・タスク・ツール定義を共通にして1回で生成する"""
+        from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+        # Arrange
+        batch = CandidateBatch(
+            responses=[
+                LLMResponse(content=f"案{i}", tool_calls=[], finish_reason="stop") for i in range(3)
+            ],
+            sampling="n",
+        )
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
+        client.chat_candidates = AsyncMock(return_value=batch)
+        runner = AgentRunner(client, hive_id="h1", colony_id="c1")
+        runner.register_tool(
+            ToolDefinition(
+                name="read_file",
+                description="read",
+                parameters={"type": "object", "properties": {}},
+                handler=AsyncMock(),
+            )
+        )
+
+        # Act
+        result = await runner.propose_candidates("ログイン画面を作る", n=3)
+
+        # Assert
+        assert result is batch
+        kwargs = client.chat_candidates.call_args.kwargs
+        assert kwargs["n"] == 3
+        assert [m.role for m in kwargs["messages"]] == ["system", "user"]
+        assert kwargs["messages"][1].content == "ログイン画面を作る"
+        assert kwargs["tools"][0]["function"]["name"] == "read_file"
+        assert kwargs["tool_choice"] == "auto"
+        assert kwargs["flow"] == "h1/c1"
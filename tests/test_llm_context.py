@@ -0,0 +1,308 @@
+"""会話履歴の圧縮のテスト
+
+ツール出力の抜粋化、古いターンの要約、トークン数の逐次集計と、
+AgentRunner の長いツール使用ループでプロンプトが伸び続けないことを検証する。
+"""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from colonyforge.core.config import ContextCompactionConfig, LLMConfig
+from colonyforge.llm.client import LLMClient, LLMResponse, Message, ToolCall
+from colonyforge.llm.context import (
+    READ_OUTPUT_TOOL,
+    SUMMARY_HEADER,
+    ConversationContext,
+    estimate_message_tokens,
+)
+from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+
+def _policy(**overrides) -> ContextCompactionConfig:
+    values = {"max_tool_result_chars": 500, "token_budget": 1000, "keep_recent_turns": 2}
+    values.update(overrides)
+    return ContextCompactionConfig(**values)
+
+
+def _add_turn(history: ConversationContext, i: int, output: str) -> None:
+    call = ToolCall(id=f"call-{i}", name="read_file", arguments={"path": f"f{i}.py"})
+    history.append(Message(role="assistant", content=f"手順{i}", tool_calls=[call]))
+    history.append(Message(role="tool", content=output, tool_call_id=call.id))
+
+
+class TestConversationContext:
+    """ConversationContext のテスト"""
+
+    def test_large_tool_output_is_truncated_with_reference(self):
+        """大きなツール出力は先頭・末尾の抜粋と参照に置き換え、全文を保持する"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+        output = "A" * 1000 + "B" * 1000
+
+        # Act
+        _add_turn(history, 0, output)
+
+        # Assert
+        content = history.messages[-1].content
+        assert content.startswith("A" * 375)
+        assert content.endswith("B" * 125)
+        assert "全 2000 文字、参照: call-0" in content
+        assert history.messages[-1].tool_call_id == "call-0"
+        assert history.full_outputs["call-0"] == output
+        assert history.stats.truncated_outputs == 1
+
+    def test_small_tool_output_is_kept(self):
+        """上限以下のツール出力はそのまま残す"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+
+        # Act
+        _add_turn(history, 0, "short")
+
+        # Assert
+        assert history.messages[-1].content == "short"
+        assert history.full_outputs == {}
+
+    def test_read_output_returns_full_text_in_pages(self):
+        """read_output は全文を上限に収まる単位で返し、続きの offset を示す"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+        output = "".join(f"{i:04d}" for i in range(500))
+        _add_turn(history, 0, output)
+
+        # Act
+        pages = []
+        offset = 0
+        while True:
+            page = history.read_output("call-0", offset)
+            assert len(page) <= history.policy.max_tool_result_chars
+            if "続きは offset=" not in page:
+                pages.append(page)
+                break
+            text, note = page.split("\n\n[... ")
+            pages.append(text)
+            offset = int(note.split("offset=")[1].split(" ")[0])
+
+        # Assert
+        assert "".join(pages) == output
+        assert len(pages) == 7
+
+    def test_read_output_unknown_ref(self):
+        """未知の参照にはエラーを返す"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+
+        # Act
+        result = history.read_output("missing")
+
+        # Assert
+        assert "未知の参照: missing" in result
+
+    def test_total_tokens_is_updated_incrementally(self):
+        """合計トークン数はメッセージごとの見積もりの和と一致する"""
+        # Arrange
+        history = ConversationContext(policy=_policy(token_budget=100_000))
+        history.start("system prompt", "task")
+
+        # Act
+        for i in range(5):
+            _add_turn(history, i, "x" * 300)
+
+        # Assert
+        assert history.total_tokens == sum(estimate_message_tokens(m) for m in history.messages)
+
+    def test_compact_summarizes_old_turns_and_keeps_recent(self):
+        """予算超過時は直近のターンを残し、古いターンを1件の要約にまとめる"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+        for i in range(10):
+            _add_turn(history, i, "y" * 480)
+
+        # Act
+        compacted = history.compact()
+
+        # Assert
+        assert compacted
+        roles = [m.role for m in history.messages]
+        assert roles == ["system", "user", "user", "assistant", "tool", "assistant", "tool"]
+        summary = history.messages[2].content
+        assert summary.startswith(SUMMARY_HEADER)
+        assert '- read_file({"path": "f0.py"}) → 480 文字' in summary
+        assert "f8.py" not in summary
+        assert [m.tool_call_id for m in history.messages if m.role == "tool"] == [
+            "call-8",
+            "call-9",
+        ]
+        assert history.total_tokens == sum(estimate_message_tokens(m) for m in history.messages)
+        assert history.stats.summarized_turns == 8
+
+    def test_repeated_compaction_merges_into_one_summary(self):
+        """2回目以降の圧縮は既存の要約に追記し、要約は1件のまま"""
+        # Arrange
+        history = ConversationContext(policy=_policy())
+        history.start("system", "task")
+        for i in range(10):
+            _add_turn(history, i, "y" * 480)
+        history.compact()
+
+        # Act
+        for i in range(10, 20):
+            _add_turn(history, i, "y" * 480)
+        history.compact()
+
+        # Assert
+        summaries = [m for m in history.messages if m.content.startswith(SUMMARY_HEADER)]
+        assert len(summaries) == 1
+        assert "f0.py" in summaries[0].content
+        assert "f17.py" in summaries[0].content
+        assert history.messages[0].content == "system"
+        assert history.messages[1].content == "task"
+
+    def test_within_budget_is_not_compacted(self):
+        """予算内、または残すターン数以下なら何もしない"""
+        # Arrange
+        history = ConversationContext(policy=_policy(token_budget=100_000))
+        history.start("system", "task")
+        for i in range(10):
+            _add_turn(history, i, "y" * 480)
+        before = list(history.messages)
+
+        # Act
+        compacted = history.compact()
+
+        # Assert
+        assert not compacted
+        assert history.messages == before
+
+    def test_disabled_policy_keeps_everything(self):
+        """enabled=False なら抜粋化も要約もしない"""
+        # Arrange
+        history = ConversationContext(policy=_policy(enabled=False))
+        history.start("system", "task")
+        for i in range(10):
+            _add_turn(history, i, "z" * 2000)
+
+        # Act
+        compacted = history.compact()
+
+        # Assert
+        assert not compacted
+        assert len(history.messages) == 22
+        assert history.messages[-1].content == "z" * 2000
+
+
+class TestRunnerCompaction:
+    """AgentRunner の会話履歴の圧縮のテスト"""
+
+    @staticmethod
+    def _runner(iterations: int, policy: ContextCompactionConfig | None) -> AgentRunner:
+        responses = [
+            LLMResponse(
+                content="",
+                tool_calls=[ToolCall(id=f"c{i}", name="dump", arguments={"i": i})],
+                finish_reason="tool_calls",
+            )
+            for i in range(iterations)
+        ]
+        responses.append(LLMResponse(content="完了", tool_calls=[], finish_reason="stop"))
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
+        client.chat = AsyncMock(side_effect=responses)
+        runner = AgentRunner(client, max_iterations=iterations + 1, compaction=policy)
+        runner.register_tool(
+            ToolDefinition(
+                name="dump",
+                description="大きな出力を返す",
+                parameters={"type": "object", "properties": {"i": {"type": "integer"}}},
+                handler=AsyncMock(return_value="log line\n" * 2000),
+            )
+        )
+        return runner
+
+    async def test_prompt_size_stays_flat_over_long_run(self):
+        """長いツール使用ループでも反復ごとの履歴トークン数は予算内で横ばいになる"""
+        # Arrange
+        policy = ContextCompactionConfig(
+            max_tool_result_chars=2000, token_budget=4000, keep_recent_turns=3
+        )
+        runner = self._runner(30, policy)
+
+        # Act
+        result = await runner.run("ログを調べて")
+
+        # Assert
+        assert result.success
+        assert len(result.iteration_tokens) == 31
+        # 圧縮なしなら 30 反復で 30 × 約520 トークンまで伸びる
+        assert max(result.iteration_tokens) <= policy.token_budget
+        assert runner.compaction.token_budget * 0.5 < min(result.iteration_tokens[15:])
+
+    async def test_uncompacted_run_grows(self):
+        """圧縮を無効にすると履歴は反復ごとに伸び続ける"""
+        # Arrange
+        runner = self._runner(10, ContextCompactionConfig(enabled=False))
+
+        # Act
+        result = await runner.run("ログを調べて")
+
+        # Assert
+        tokens = result.iteration_tokens
+        assert all(b > a for a, b in zip(tokens, tokens[1:], strict=False))
+        assert tokens[-1] > 10 * 4000
+
+    async def test_truncated_output_can_be_read_back(self):
+        """抜粋に置き換えた出力は read_tool_output で全文を読み直せる"""
+        # Arrange
+        policy = ContextCompactionConfig(max_tool_result_chars=2000)
+        runner = self._runner(1, policy)
+        responses = list(runner.client.chat.side_effect)
+        read = ToolCall(id="r0", name=READ_OUTPUT_TOOL, arguments={"ref": "c0", "offset": 1800})
+        responses.insert(1, LLMResponse(content="", tool_calls=[read], finish_reason="tool_calls"))
+        runner.client.chat = AsyncMock(side_effect=responses)
+        runner.max_iterations = len(responses)
+
+        # Act
+        result = await runner.run("ログを調べて")
+
+        # Assert
+        assert result.success
+        calls = runner.client.chat.await_args_list
+        tool_names = [t["function"]["name"] for t in calls[0].kwargs["tools"]]
+        assert tool_names == ["dump", READ_OUTPUT_TOOL]
+        messages = calls[-1].kwargs["messages"]
+        full = "log line\n" * 2000
+        assert "参照: c0" in messages[3].content
+        assert messages[5].tool_call_id == "r0"
+        assert messages[5].content.startswith(full[1800:3600])
+        assert "続きは offset=3600" in messages[5].content
+        assert READ_OUTPUT_TOOL not in runner.tools
+
+    async def test_no_read_tool_without_compaction(self):
+        """圧縮を無効にすると read_tool_output は渡さない"""
+        # Arrange
+        runner = self._runner(1, ContextCompactionConfig(enabled=False))
+
+        # Act
+        await runner.run("ログを調べて")
+
+        # Assert
+        tools = runner.client.chat.await_args_list[0].kwargs["tools"]
+        assert [t["function"]["name"] for t in tools] == ["dump"]
+
+    def test_default_follows_client_config(self):
+        """compaction を省略するとクライアントの config.compaction に従う"""
+        # Arrange
+        config = LLMConfig(compaction=ContextCompactionConfig(token_budget=5000))
+
+        # Act
+        runner = AgentRunner(LLMClient(config))
+        overridden = AgentRunner(LLMClient(config), compaction=ContextCompactionConfig())
+
+        # Assert
+        assert runner.compaction.token_budget == 5000
+        assert overridden.compaction == ContextCompactionConfig()
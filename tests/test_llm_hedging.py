@@ -0,0 +1,370 @@
+"""遅いLLM応答のヘッジのテスト
+
+HedgePolicy の期限・予算・統計と、LLMClient からフォールバックモデルへの
+並行送信、先に返った応答の採用、もう一方のキャンセルを検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.core.config import LLMHedgingConfig
+from colonyforge.llm import hedging
+from colonyforge.llm.hedging import HedgePolicy
+
+
+@pytest.fixture(autouse=True)
+def reset_policies():
+    hedging.reset_hedge_policies()
+    yield
+    hedging.reset_hedge_policies()
+
+
+class TestHedgePolicy:
+    """HedgePolicy のテスト"""
+
+    def test_initial_deadline_until_enough_samples(self):
+        """応答時間が min_samples 件たまるまでは initial_delay_seconds を使う"""
+        # Arrange
+        policy = HedgePolicy(LLMHedgingConfig(min_samples=5, initial_delay_seconds=3.0))
+
+        # Act
+        for _ in range(4):
+            policy.record_latency(0.1)
+
+        # Assert
+        assert policy.deadline() == 3.0
+
+    def test_deadline_follows_percentile(self):
+        """十分な件数があれば直近の応答時間の分位点を期限にする"""
+        # Arrange
+        policy = HedgePolicy(LLMHedgingConfig(min_samples=10, percentile=0.9))
+
+        # Act
+        for i in range(1, 101):
+            policy.record_latency(i / 100)
+
+        # Assert
+        assert policy.deadline() == pytest.approx(0.9, abs=0.01)
+
+    def test_budget_caps_extra_requests(self):
+        """追加送信はリクエスト数の max_hedge_ratio までに抑える"""
+        # Arrange
+        policy = HedgePolicy(LLMHedgingConfig(max_hedge_ratio=0.2))
+
+        # Act
+        allowed = []
+        for _ in range(10):
+            policy.record_request()
+            allowed.append(policy.try_hedge())
+
+        # Assert
+        assert sum(allowed) == 2
+        stats = policy.get_stats()
+        assert (stats["hedged"], stats["over_budget"]) == (2, 8)
+        assert stats["hedge_rate"] == pytest.approx(0.2)
+
+    def test_win_rate(self):
+        """勝率はフォールバックが先に返った件数 / 追加送信数"""
+        # Arrange
+        policy = HedgePolicy(LLMHedgingConfig(max_hedge_ratio=1.0))
+        for _ in range(4):
+            policy.record_request()
+            policy.try_hedge()
+
+        # Act
+        policy.record_win()
+
+        # Assert
+        assert policy.get_stats()["win_rate"] == pytest.approx(0.25)
+
+
+def _response(content: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=content, tool_calls=None), finish_reason="stop"
+            )
+        ],
+        usage=None,
+    )
+
+
+class TestClientHedging:
+    """LLMClient のヘッジのテスト"""
+
+    @pytest.fixture
+    def make_client(self, monkeypatch):
+        from colonyforge.core.config import LLMCacheConfig, LLMConfig
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient
+
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+
+        def make(**hedging_overrides) -> LLMClient:
+            values = {
+                "enabled": True,
+                "initial_delay_seconds": 0.02,
+                "max_hedge_ratio": 1.0,
+            }
+            values.update(hedging_overrides)
+            config = LLMConfig(
+                provider="openai",
+                model="gpt-4o",
+                api_key_env="TEST_API_KEY",
+                fallback_models=["anthropic/claude-3-haiku-20240307"],
+                coalesce=False,
+                cache=LLMCacheConfig(mode="off"),
+                hedging=LLMHedgingConfig(**values),
+            )
+            return LLMClient(config, rate_limiter=RateLimiter(RateLimitConfig()))
+
+        return make
+
+    @staticmethod
+    def _provider(delays: dict[str, float], failures: set[str] | None = None):
+        """モデルごとに応答時間を変えた疑似プロバイダー（キャンセルされたモデルを記録）"""
+        cancelled: list[str] = []
+
+        async def completion(**kwargs):
+            model = kwargs["model"]
+            try:
+                await asyncio.sleep(delays[model])
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+            if failures and model in failures:
+                raise RuntimeError(f"{model} failed")
+            return _response(model)
+
+        return completion, cancelled
+
+    async def test_slow_primary_is_hedged_and_cancelled(self, make_client):
+        """主モデルが期限を過ぎたらフォールバックにも送り、先に返った方を使う"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client()
+        completion, cancelled = self._provider(
+            {"openai/gpt-4o": 1.0, "anthropic/claude-3-haiku-20240307": 0.01}
+        )
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=completion,
+        ) as mock_acomp:
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.content == "anthropic/claude-3-haiku-20240307"
+        assert cancelled == ["openai/gpt-4o"]
+        hedge_kwargs = mock_acomp.call_args_list[1].kwargs
+        assert "api_key" not in hedge_kwargs
+        assert "fallbacks" not in hedge_kwargs
+        stats = hedging.get_all_hedge_stats()["openai/gpt-4o"]
+        assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+    async def test_fast_primary_is_not_hedged(self, make_client):
+        """期限内に応答すればフォールバックには送らない"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(initial_delay_seconds=1.0)
+        completion, _ = self._provider({"openai/gpt-4o": 0.0})
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=completion,
+        ) as mock_acomp:
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.content == "openai/gpt-4o"
+        assert mock_acomp.await_count == 1
+        stats = hedging.get_all_hedge_stats()["openai/gpt-4o"]
+        assert (stats["requests"], stats["hedged"]) == (1, 0)
+
+    async def test_primary_wins_after_hedge(self, make_client):
+        """ヘッジ後に主モデルが先に返ればフォールバックをキャンセルする"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client()
+        completion, cancelled = self._provider(
+            {"openai/gpt-4o": 0.05, "anthropic/claude-3-haiku-20240307": 1.0}
+        )
+
+        # Act
+        with patch("colonyforge.llm.client.litellm.acompletion", side_effect=completion):
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.content == "openai/gpt-4o"
+        assert cancelled == ["anthropic/claude-3-haiku-20240307"]
+        stats = hedging.get_all_hedge_stats()["openai/gpt-4o"]
+        assert (stats["hedged"], stats["hedge_wins"]) == (1, 0)
+
+    async def test_failed_hedge_falls_back_to_primary(self, make_client):
+        """フォールバックが失敗しても主モデルの応答を待つ"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client()
+        completion, _ = self._provider(
+            {"openai/gpt-4o": 0.05, "anthropic/claude-3-haiku-20240307": 0.0},
+            failures={"anthropic/claude-3-haiku-20240307"},
+        )
+
+        # Act
+        with patch("colonyforge.llm.client.litellm.acompletion", side_effect=completion):
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.content == "openai/gpt-4o"
+
+    async def test_both_failing_raises_primary_error(self, make_client):
+        """両方失敗した場合は主モデルの例外を送出する"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client()
+        completion, _ = self._provider(
+            {"openai/gpt-4o": 0.05, "anthropic/claude-3-haiku-20240307": 0.0},
+            failures={"openai/gpt-4o", "anthropic/claude-3-haiku-20240307"},
+        )
+
+        # Act / Assert
+        with (
+            patch("colonyforge.llm.client.litellm.acompletion", side_effect=completion),
+            pytest.raises(RuntimeError, match="openai/gpt-4o failed"),
+        ):
+            await client.chat([Message(role="user", content="hi")])
+
+    async def test_over_budget_waits_for_primary(self, make_client):
+        """予算を超える場合はヘッジせず主モデルを待つ"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(max_hedge_ratio=0.0)
+        completion, _ = self._provider({"openai/gpt-4o": 0.05})
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=completion,
+        ) as mock_acomp:
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.content == "openai/gpt-4o"
+        assert mock_acomp.await_count == 1
+        assert hedging.get_all_hedge_stats()["openai/gpt-4o"]["over_budget"] == 1
+
+    async def test_hedge_uses_fallback_limiter_and_telemetry(self, make_client):
+        """ヘッジはフォールバックモデルの枠を使い、テレメトリは勝った側と
+        キャンセルした側をそれぞれのモデルで記録する"""
+        from colonyforge.llm import telemetry
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        telemetry.reset_llm_telemetry()
+        client = make_client()
+        completion, _ = self._provider(
+            {"openai/gpt-4o": 1.0, "anthropic/claude-3-haiku-20240307": 0.01}
+        )
+
+        # Act
+        with patch("colonyforge.llm.client.litellm.acompletion", side_effect=completion):
+            await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        fallback_limiter = await client._get_fallback_limiter()
+        assert fallback_limiter is not await client._get_rate_limiter()
+        assert fallback_limiter.get_stats()["requests_today"] >= 1
+        series = {s["model"]: s for s in telemetry.get_llm_telemetry().snapshot()["series"]}
+        winner = series["anthropic:claude-3-haiku-20240307"]
+        loser = series["openai:gpt-4o"]
+        assert (winner["calls"], winner["cancelled"]) == (1, 0)
+        assert (loser["calls"], loser["cancelled"], loser["errors"]) == (1, 1, 0)
+        assert loser["prompt_tokens"]["sum"] > 0
+        telemetry.reset_llm_telemetry()
+
+    async def test_replay_hedge_stays_offline(self, make_client, tmp_path):
+        """provider が replay ならヘッジも記録済みの応答を返し、ネットワークに出ない"""
+        from colonyforge.core.config import LLMReplayConfig
+        from colonyforge.core.config import ReplayDistributionConfig as Dist
+        from colonyforge.llm import replay
+        from colonyforge.llm.client import Message
+        from colonyforge.llm.replay import ReplayExchange, write_fixture
+
+        # Arrange
+        replay.reset_replay_providers()
+        path = tmp_path / "llm.jsonl"
+        write_fixture(
+            path,
+            [
+                ReplayExchange(
+                    [{"role": "user", "content": "hi"}],
+                    {"content": "recorded", "tool_calls": [], "finish_reason": "stop"},
+                )
+            ],
+        )
+        client = make_client()
+        client.config = client.config.model_copy(
+            update={
+                "provider": "replay",
+                "model": "recorded",
+                "replay": LLMReplayConfig(
+                    fixtures=[str(path)],
+                    first_token_ms=Dist(mean=100.0),
+                    tokens_per_second=Dist(),
+                ),
+            }
+        )
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock
+        ) as mock_acomp:
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        mock_acomp.assert_not_awaited()
+        assert response.content == "recorded"
+        assert hedging.get_all_hedge_stats()["replay/recorded"]["hedged"] == 1
+        replay.reset_replay_providers()
+
+    def test_stats_endpoint(self, tmp_path):
+        """/llm/stats はヘッジの統計を含む"""
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+
+        # Arrange
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = tmp_path / "Vault"
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+        hedging.get_hedge_policy("openai/gpt-4o", LLMHedgingConfig()).record_request()
+
+        # Act
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            response = client.get("/llm/stats")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["hedging"]["openai/gpt-4o"]["requests"] == 1
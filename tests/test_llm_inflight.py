@@ -0,0 +1,207 @@
+"""同一LLMリクエストの集約のテスト
+
+同時実行の集約、例外の伝播、キャンセル時の扱いと、LLMClient からの利用を検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.llm.inflight import InflightCoalescer
+
+
+def _slow_factory(calls: list[str], value: object, delay: float = 0.02):
+    async def factory():
+        calls.append("sent")
+        await asyncio.sleep(delay)
+        return value
+
+    return factory
+
+
+class TestInflightCoalescer:
+    """InflightCoalescer のテスト"""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """同じキーの同時呼び出しは1回だけ実行し、全員に結果の複製を返す"""
+        # Arrange
+        coalescer = InflightCoalescer()
+        calls: list[str] = []
+        factory = _slow_factory(calls, {"content": "ok"})
+
+        # Act
+        results = await asyncio.gather(*(coalescer.run("k", factory) for _ in range(5)))
+
+        # Assert
+        assert calls == ["sent"]
+        assert all(r == {"content": "ok"} for r in results)
+        assert len({id(r) for r in results}) == 5
+        stats = coalescer.get_stats()
+        assert (stats["sent"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+    async def test_different_keys_run_separately(self):
+        """キーが違えばそれぞれ実行する"""
+        # Arrange
+        coalescer = InflightCoalescer()
+        calls: list[str] = []
+        factory = _slow_factory(calls, "ok")
+
+        # Act
+        await asyncio.gather(coalescer.run("a", factory), coalescer.run("b", factory))
+
+        # Assert
+        assert calls == ["sent", "sent"]
+
+    async def test_completed_key_is_sent_again(self):
+        """完了後の同じキーは再度実行する（結果は保持しない）"""
+        # Arrange
+        coalescer = InflightCoalescer()
+        calls: list[str] = []
+        factory = _slow_factory(calls, "ok", delay=0)
+
+        # Act
+        await coalescer.run("k", factory)
+        await coalescer.run("k", factory)
+
+        # Assert
+        assert calls == ["sent", "sent"]
+
+    async def test_error_reaches_every_waiter(self):
+        """例外は全ての待ち手に伝わる"""
+        # Arrange
+        coalescer = InflightCoalescer()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        # Act
+        results = await asyncio.gather(
+            *(coalescer.run("k", failing) for _ in range(3)), return_exceptions=True
+        )
+
+        # Assert
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """待ち手の1人がキャンセルされても他の待ち手は結果を受け取る"""
+        # Arrange
+        coalescer = InflightCoalescer()
+        calls: list[str] = []
+        factory = _slow_factory(calls, "ok", delay=0.05)
+        first = asyncio.create_task(coalescer.run("k", factory))
+        second = asyncio.create_task(coalescer.run("k", factory))
+        await asyncio.sleep(0.01)
+
+        # Act
+        first.cancel()
+        result = await second
+
+        # Assert
+        assert result == "ok"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    async def test_shared_call_cancelled_when_no_waiters_remain(self):
+        """待ち手が全員キャンセルされたら送信も取り消す"""
+        # Arrange
+        coalescer = InflightCoalescer()
+        finished: list[str] = []
+
+        async def factory():
+            await asyncio.sleep(1.0)
+            finished.append("done")
+
+        waiters = [asyncio.create_task(coalescer.run("k", factory)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        # Act
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        # Assert
+        assert finished == []
+        assert coalescer.get_stats()["in_flight"] == 0
+
+
+class TestClientCoalescing:
+    """LLMClient からの利用のテスト"""
+
+    @pytest.fixture
+    def make_client(self, monkeypatch):
+        from colonyforge.core.config import LLMCacheConfig, LLMConfig
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient
+
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+
+        def make(coalesce: bool):
+            config = LLMConfig(
+                provider="openai",
+                model="gpt-4o",
+                api_key_env="TEST_API_KEY",
+                coalesce=coalesce,
+                cache=LLMCacheConfig(mode="off"),
+            )
+            return LLMClient(config, rate_limiter=RateLimiter(RateLimitConfig()))
+
+        return make
+
+    @pytest.fixture
+    def mock_acompletion(self):
+        async def slow_completion(**kwargs):
+            await asyncio.sleep(0.02)
+            return MagicMock(
+                choices=[
+                    MagicMock(
+                        message=MagicMock(content="plan", tool_calls=None), finish_reason="stop"
+                    )
+                ],
+                usage=None,
+            )
+
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=slow_completion,
+        ) as mock_acomp:
+            yield mock_acomp
+
+    @pytest.mark.parametrize(("coalesce", "expected_calls"), [(True, 1), (False, 4)])
+    async def test_identical_concurrent_requests(
+        self, make_client, mock_acompletion, coalesce, expected_calls
+    ):
+        """coalesce が有効なら同一の同時リクエストは1回だけ送信する"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        clients = [make_client(coalesce) for _ in range(4)]
+        messages = [Message(role="user", content="plan the task")]
+
+        # Act
+        results = await asyncio.gather(*(c.chat(messages) for c in clients))
+
+        # Assert
+        assert mock_acompletion.await_count == expected_calls
+        assert [r.content for r in results] == ["plan"] * 4
+
+    async def test_different_prompts_are_not_merged(self, make_client, mock_acompletion):
+        """内容の違うリクエストはまとめない"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(True)
+
+        # Act
+        await asyncio.gather(
+            client.chat([Message(role="user", content="a")]),
+            client.chat([Message(role="user", content="b")]),
+        )
+
+        # Assert
+        assert mock_acompletion.await_count == 2
@@ -0,0 +1,246 @@
+"""プロバイダーのプロンプトキャッシュ対応のテスト
+
+先頭が一定になるメッセージの並び・ツール定義の使い回し・Claude 系への
+cache_control 指示と、キャッシュから読んだトークン数の usage / テレメトリへの反映を検証する。
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from litellm.types.utils import Usage
+
+from colonyforge.core.config import LLMCacheConfig, LLMConfig
+from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+from colonyforge.llm import telemetry
+from colonyforge.llm.client import (
+    LLMClient,
+    Message,
+    ToolCall,
+    _estimate_cost,
+    _mark_cache_prefix,
+)
+from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+TOOLS = [
+    {"type": "function", "function": {"name": "read_file", "parameters": {}}},
+    {"type": "function", "function": {"name": "list_dir", "parameters": {}}},
+]
+
+
+@pytest.fixture(autouse=True)
+def reset_telemetry():
+    telemetry.reset_llm_telemetry()
+    yield
+    telemetry.reset_llm_telemetry()
+
+
+def _client(monkeypatch, provider: str = "openai", model: str = "gpt-4o", **overrides) -> LLMClient:
+    monkeypatch.setenv("TEST_API_KEY", "sk-test")
+    config = LLMConfig(
+        provider=provider,
+        model=model,
+        api_key_env="TEST_API_KEY",
+        coalesce=False,
+        cache=LLMCacheConfig(mode="off"),
+        **overrides,
+    )
+    return LLMClient(config, rate_limiter=RateLimiter(RateLimitConfig()))
+
+
+def _response(usage: Usage) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content="ok", tool_calls=None), finish_reason="stop"
+            )
+        ],
+        usage=usage,
+    )
+
+
+def _tool(name: str) -> ToolDefinition:
+    return ToolDefinition(
+        name=name,
+        description=name,
+        parameters={"type": "object", "properties": {}},
+        handler=AsyncMock(return_value=""),
+    )
+
+
+class TestStablePrefix:
+    """先頭が一定になるメッセージの並びのテスト"""
+
+    def test_message_order_is_preserved(self, monkeypatch):
+        """途中のシステムメッセージも含めて順序は変えない"""
+        # Arrange
+        client = _client(monkeypatch)
+        messages = [
+            Message(role="user", content="a"),
+            Message(role="system", content="s1"),
+            Message(role="assistant", content="b"),
+            Message(role="system", content="s2"),
+        ]
+
+        # Act
+        built = client._build_messages(messages)
+
+        # Assert
+        assert [m["content"] for m in built] == ["a", "s1", "b", "s2"]
+
+    def test_tool_call_arguments_are_byte_stable(self, monkeypatch):
+        """ツール呼び出しの引数はキーの順序によらず同じ JSON になる"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        def build(arguments: dict) -> str:
+            message = Message(
+                role="assistant",
+                content="",
+                tool_calls=[ToolCall(id="c1", name="read_file", arguments=arguments)],
+            )
+            return client._build_messages([message])[0]["tool_calls"][0]["function"]["arguments"]
+
+        # Act / Assert
+        assert build({"path": "a", "limit": 10}) == build({"limit": 10, "path": "a"})
+
+    def test_runner_reuses_tool_definitions_until_registration(self, monkeypatch):
+        """ツール定義は登録し直すまで同じリストを使い回す"""
+        # Arrange
+        runner = AgentRunner(_client(monkeypatch))
+        runner.register_tool(_tool("read_file"))
+
+        # Act
+        first = runner.get_tool_definitions()
+        second = runner.get_tool_definitions()
+        runner.register_tool(_tool("list_dir"))
+        third = runner.get_tool_definitions()
+
+        # Assert
+        assert first is second
+        assert [t["function"]["name"] for t in third] == ["read_file", "list_dir"]
+
+
+class TestCacheControl:
+    """cache_control 指示のテスト"""
+
+    async def _sent_kwargs(self, client: LLMClient) -> dict:
+        messages = [Message(role="system", content="sys"), Message(role="user", content="hi")]
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response(Usage(prompt_tokens=10, completion_tokens=1, total_tokens=11)),
+        ) as mock_acomp:
+            await client.chat(messages, tools=TOOLS)
+        return mock_acomp.call_args.kwargs
+
+    async def test_claude_marks_tools_and_system_prompt(self, monkeypatch):
+        """Claude 系では最後のツール定義とシステムプロンプトの末尾に cache_control を付ける"""
+        # Arrange
+        client = _client(monkeypatch, provider="anthropic", model="claude-sonnet-4-20250514")
+
+        # Act
+        kwargs = await self._sent_kwargs(client)
+
+        # Assert
+        control = {"type": "ephemeral"}
+        assert "cache_control" not in kwargs["tools"][0]
+        assert kwargs["tools"][-1]["cache_control"] == control
+        assert kwargs["messages"][0]["content"] == [
+            {"type": "text", "text": "sys", "cache_control": control}
+        ]
+        assert kwargs["messages"][1] == {"role": "user", "content": "hi"}
+        assert "cache_control" not in TOOLS[-1]
+
+    def test_only_leading_system_messages_are_marked(self):
+        """途中に挿入されたシステムメッセージには指示を付けず、位置も変えない"""
+        # Arrange
+        messages = [
+            {"role": "system", "content": "sys"},
+            {"role": "user", "content": "hi"},
+            {"role": "system", "content": "note"},
+        ]
+
+        # Act
+        marked, _ = _mark_cache_prefix(messages, None)
+
+        # Assert
+        assert marked[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert marked[1:] == messages[1:]
+
+    async def test_automatic_caching_providers_are_not_marked(self, monkeypatch):
+        """OpenAI は同じ先頭を自動でキャッシュするため指示を付けない"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        # Act
+        kwargs = await self._sent_kwargs(client)
+
+        # Assert
+        assert kwargs["tools"] == TOOLS
+        assert kwargs["messages"][0] == {"role": "system", "content": "sys"}
+
+    async def test_disabled(self, monkeypatch):
+        """prompt_caching が False なら Claude 系でも指示を付けない"""
+        # Arrange
+        client = _client(
+            monkeypatch,
+            provider="anthropic",
+            model="claude-sonnet-4-20250514",
+            prompt_caching=False,
+        )
+
+        # Act
+        kwargs = await self._sent_kwargs(client)
+
+        # Assert
+        assert kwargs["messages"][0]["content"] == "sys"
+
+
+class TestCachedTokens:
+    """キャッシュから読んだトークン数のテスト"""
+
+    async def test_usage_and_telemetry_report_cached_tokens(self, monkeypatch):
+        """usage の cached_tokens とテレメトリに反映し、推定コストはキャッシュ料金で下がる"""
+        # Arrange
+        client = _client(monkeypatch)
+        usage = Usage(
+            prompt_tokens=2000,
+            completion_tokens=10,
+            total_tokens=2010,
+            prompt_tokens_details={"cached_tokens": 1536},
+        )
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response(usage),
+        ):
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert response.usage["cached_tokens"] == 1536
+        snapshot = telemetry.get_llm_telemetry().snapshot()
+        [series] = snapshot["series"]
+        assert series["cached_tokens"]["sum"] == 1536
+        assert snapshot["totals"]["cached_tokens"] == 1536
+        assert 0 < series["cost_usd"]["sum"] < _estimate_cost("openai/gpt-4o", 2000, 10)
+
+    async def test_no_cached_tokens_key_without_cache_hit(self, monkeypatch):
+        """キャッシュから読んでいなければ cached_tokens は入れない"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response(Usage(prompt_tokens=10, completion_tokens=1, total_tokens=11)),
+        ):
+            response = await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert "cached_tokens" not in response.usage
@@ -0,0 +1,343 @@
+"""オフライン再生プロバイダー（provider: replay）のテスト
+
+記録の選び方・応答時間の模擬・JSONL と Akashic Record からの読み込みと、
+LLMClient / AgentRunner を通したツール呼び出しの再生を検証する。
+"""
+
+from __future__ import annotations
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from colonyforge.core import AkashicRecord
+from colonyforge.core.config import LLMCacheConfig, LLMConfig, LLMReplayConfig
+from colonyforge.core.config import ReplayDistributionConfig as Dist
+from colonyforge.llm import replay
+from colonyforge.llm.client import LLMClient, Message
+from colonyforge.llm.replay import (
+    ReplayExchange,
+    ReplayMissError,
+    ReplayProvider,
+    load_ar_exchanges,
+    load_fixture_exchanges,
+    record_exchange,
+    write_fixture,
+)
+
+NO_DELAY = {"first_token_ms": Dist(), "tokens_per_second": Dist()}
+
+
+def _user(content: str) -> list[dict]:
+    return [{"role": "user", "content": content}]
+
+
+def _answer(content: str, **extra) -> dict:
+    return {"content": content, "tool_calls": [], "finish_reason": "stop", **extra}
+
+
+@pytest.fixture(autouse=True)
+def reset_providers():
+    replay.reset_replay_providers()
+    yield
+    replay.reset_replay_providers()
+
+
+class TestReplaySelection:
+    """記録の選び方のテスト"""
+
+    def test_exact_match_rotates_duplicates(self):
+        """同じリクエストの記録が複数あれば順に返す"""
+        # Arrange
+        provider = ReplayProvider(
+            [
+                ReplayExchange(_user("a"), _answer("1回目")),
+                ReplayExchange(_user("b"), _answer("別")),
+                ReplayExchange(_user("a"), _answer("2回目")),
+            ]
+        )
+
+        # Act
+        picked = [provider.select(_user("a")).response["content"] for _ in range(3)]
+
+        # Assert
+        assert picked == ["1回目", "2回目", "1回目"]
+        assert provider.get_stats()["exact"] == 3
+
+    def test_falls_back_to_last_message(self):
+        """全体が一致しなければ最後のメッセージが一致する記録を使う"""
+        # Arrange
+        recorded = [{"role": "system", "content": "旧プロンプト"}, *_user("a")]
+        provider = ReplayProvider([ReplayExchange(recorded, _answer("ok"))])
+
+        # Act
+        picked = provider.select([{"role": "system", "content": "新プロンプト"}, *_user("a")])
+
+        # Assert
+        assert picked.response["content"] == "ok"
+        assert provider.get_stats()["last_message"] == 1
+
+    def test_miss_cycles_through_recordings(self):
+        """一致する記録がなければ記録を順に返す"""
+        # Arrange
+        provider = ReplayProvider(
+            [ReplayExchange(_user("a"), _answer("1")), ReplayExchange(_user("b"), _answer("2"))]
+        )
+
+        # Act
+        picked = [provider.select(_user("x")).response["content"] for _ in range(3)]
+
+        # Assert
+        assert picked == ["1", "2", "1"]
+        assert provider.get_stats()["cycled"] == 3
+
+    def test_miss_raises_when_configured(self):
+        """on_miss が error なら ReplayMissError"""
+        # Arrange
+        provider = ReplayProvider(
+            [ReplayExchange(_user("a"), _answer("1"))], LLMReplayConfig(on_miss="error")
+        )
+
+        # Act / Assert
+        with pytest.raises(ReplayMissError):
+            provider.select(_user("x"))
+
+
+class TestReplayTiming:
+    """応答時間の模擬のテスト"""
+
+    def test_same_seed_same_latencies(self):
+        """シードが同じなら同じ応答時間の列になる"""
+        # Arrange
+        config = LLMReplayConfig(seed=7)
+
+        provider_a = ReplayProvider([], config)
+        provider_b = ReplayProvider([], config)
+
+        # Act
+        timings_a = [provider_a._timing() for _ in range(5)]
+        timings_b = [provider_b._timing() for _ in range(5)]
+
+        # Assert
+        assert timings_a == timings_b
+        assert all(t.first_token > 0 for t in timings_a)
+
+    @pytest.mark.parametrize("distribution", ["uniform", "normal", "lognormal"])
+    def test_distribution_mean(self, distribution):
+        """分布の平均は設定値に近い"""
+        # Arrange
+        provider = ReplayProvider([])
+        dist = Dist(distribution=distribution, mean=400.0, stddev=100.0)
+
+        # Act
+        samples = [provider._sample(dist) for _ in range(5000)]
+
+        # Assert
+        assert sum(samples) / len(samples) == pytest.approx(400.0, rel=0.05)
+        assert min(samples) >= 0
+
+    async def test_completion_waits_first_token_and_generation(self):
+        """最初のトークンまでの時間 + 出力トークン数 / 生成速度だけ待つ"""
+        # Arrange
+        provider = ReplayProvider(
+            [
+                ReplayExchange(
+                    _user("a"), _answer("x", usage={"prompt_tokens": 5, "completion_tokens": 20})
+                )
+            ],
+            LLMReplayConfig(first_token_ms=Dist(mean=50.0), tokens_per_second=Dist(mean=400.0)),
+        )
+
+        # Act
+        start = time.perf_counter()
+        response = await provider.acompletion(model="replay/m", messages=_user("a"))
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        assert elapsed >= 0.05 + 20 / 400
+        assert response.usage.completion_tokens == 20
+        assert response.usage.total_tokens == 25
+
+
+class TestReplaySources:
+    """記録の読み込みのテスト"""
+
+    def test_fixture_roundtrip(self, tmp_path):
+        """JSONL に書き出した記録を読み込める"""
+        # Arrange
+        exchanges = [
+            ReplayExchange(
+                _user("読んで"),
+                {
+                    "content": None,
+                    "tool_calls": [{"id": "c1", "name": "read_file", "arguments": {"path": "a"}}],
+                    "finish_reason": "tool_calls",
+                },
+                tools=[{"type": "function", "function": {"name": "read_file"}}],
+            )
+        ]
+        path = tmp_path / "llm.jsonl"
+
+        # Act
+        written = write_fixture(path, exchanges)
+        loaded = load_fixture_exchanges(path)
+
+        # Assert
+        assert written == 1
+        assert loaded == exchanges
+
+    def test_ar_roundtrip_pairs_by_parent(self, tmp_path):
+        """Run の llm.request / llm.response を組にして読み込む（概要だけのイベントは無視）"""
+        # Arrange
+        from colonyforge.core.events import LLMRequestEvent, LLMResponseEvent
+
+        ar = AkashicRecord(tmp_path)
+        record_exchange(ar, "run-1", ReplayExchange(_user("a"), _answer("A")))
+        ar.append(LLMRequestEvent(run_id="run-1", payload={"message_count": 1}), "run-1")
+        ar.append(LLMResponseEvent(run_id="run-1", payload={"tool_count": 0}), "run-1")
+        record_exchange(ar, "run-1", ReplayExchange(_user("b"), _answer("B")))
+
+        # Act
+        loaded = load_ar_exchanges(ar, "run-1")
+
+        # Assert
+        assert [(e.messages, e.response["content"]) for e in loaded] == [
+            (_user("a"), "A"),
+            (_user("b"), "B"),
+        ]
+
+    def test_from_config_reads_fixtures_and_runs(self, tmp_path):
+        """設定の fixtures と runs の両方から読み込む"""
+        # Arrange
+        write_fixture(tmp_path / "f.jsonl", [ReplayExchange(_user("a"), _answer("file"))])
+        record_exchange(AkashicRecord(tmp_path), "run-1", ReplayExchange(_user("b"), _answer("ar")))
+        config = LLMReplayConfig(
+            fixtures=[str(tmp_path / "f.jsonl")], runs=["run-1"], vault_path=str(tmp_path)
+        )
+
+        # Act
+        provider = replay.get_replay_provider(config)
+
+        # Assert
+        assert [e.response["content"] for e in provider.exchanges] == ["file", "ar"]
+        assert replay.get_replay_provider(config) is provider
+
+
+class TestReplayClient:
+    """LLMClient / AgentRunner からの再生のテスト"""
+
+    @pytest.fixture
+    def fixture_path(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        system = {"role": "system", "content": "あなたは Worker Bee です。"}
+        task = {"role": "user", "content": "a.py を読んで要約して"}
+        call = {"id": "call_1", "name": "read_file", "arguments": {"path": "a.py"}}
+        tool_call_message = {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [
+                {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "read_file", "arguments": '{"path": "a.py"}'},
+                }
+            ],
+        }
+        write_fixture(
+            path,
+            [
+                ReplayExchange(
+                    [system, task],
+                    {"content": "", "tool_calls": [call], "finish_reason": "tool_calls"},
+                ),
+                ReplayExchange(
+                    [
+                        system,
+                        task,
+                        tool_call_message,
+                        {"role": "tool", "content": "print('hi')", "tool_call_id": "call_1"},
+                    ],
+                    _answer("hi と表示するスクリプトです"),
+                ),
+            ],
+        )
+        return path
+
+    @staticmethod
+    def _client(fixture_path, **overrides) -> LLMClient:
+        config = LLMConfig(
+            provider="replay",
+            model="recorded",
+            api_key_env="UNSET_REPLAY_KEY",
+            cache=LLMCacheConfig(mode="off"),
+            replay=LLMReplayConfig(fixtures=[str(fixture_path)], **NO_DELAY),
+            **overrides,
+        )
+        return LLMClient(config)
+
+    async def test_chat_replays_tool_calls_without_network(self, fixture_path):
+        """API キーもネットワークもなしで記録のツール呼び出しを返す"""
+        # Arrange
+        client = self._client(fixture_path)
+        messages = [
+            Message(role="system", content="あなたは Worker Bee です。"),
+            Message(role="user", content="a.py を読んで要約して"),
+        ]
+
+        # Act
+        with patch("colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock) as acomp:
+            response = await client.chat(messages)
+
+        # Assert
+        acomp.assert_not_awaited()
+        assert client.check_api_key()
+        assert [(tc.id, tc.name, tc.arguments) for tc in response.tool_calls] == [
+            ("call_1", "read_file", {"path": "a.py"})
+        ]
+        assert response.usage["total_tokens"] > 0
+
+    async def test_chat_stream_replays_chunks(self, fixture_path):
+        """ストリーミングでは記録を分割したチャンクから同じ応答を組み立てる"""
+        # Arrange
+        client = self._client(fixture_path)
+        messages = [Message(role="user", content="x")]
+        replay.get_replay_provider(client.config.replay).exchanges[0].response["content"] = (
+            "長めの前置き。" * 10
+        )
+
+        # Act
+        deltas = [d async for d in client.chat_stream(messages)]
+
+        # Assert
+        final = deltas[-1].response
+        assert final is not None
+        assert final.content == "長めの前置き。" * 10
+        assert len([d for d in deltas if d.content]) > 1
+        assert [d.tool_call.name for d in deltas if d.tool_call] == ["read_file"]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    async def test_agent_runner_replays_session(self, fixture_path, stream):
+        """AgentRunner のツール使用ループを記録どおりに再生する（システムプロンプトは記録と異なる）"""
+        from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+        # Arrange
+        runner = AgentRunner(self._client(fixture_path, stream=stream))
+        runner.register_tool(
+            ToolDefinition(
+                name="read_file",
+                description="read",
+                parameters={"type": "object", "properties": {}},
+                handler=AsyncMock(return_value="print('hi')"),
+            )
+        )
+
+        # Act
+        result = await runner.run("a.py を読んで要約して")
+
+        # Assert
+        assert result.success
+        assert result.output == "hi と表示するスクリプトです"
+        assert result.tool_calls_made == 1
+        stats = replay.get_replay_provider(runner.client.config.replay).get_stats()
+        assert (stats["last_message"], stats["cycled"]) == (2, 0)
@@ -0,0 +1,267 @@
+"""LLM応答キャッシュのテスト
+
+キーの正規化、保存と読み込み、有効期限、容量超過時の LRU 削除、再起動後の引き継ぎと、
+LLMClient からの利用（ヒット時に送信しない・temperature による有効化）を検証する。
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.llm.response_cache import LLMResponseCache, make_cache_key
+
+RESPONSE = {
+    "content": "hello",
+    "tool_calls": [],
+    "finish_reason": "stop",
+    "usage": {"total_tokens": 12},
+}
+
+
+class TestMakeCacheKey:
+    """make_cache_key のテスト"""
+
+    def test_key_ignores_dict_order(self):
+        """辞書のキー順が違っても同じキーになる"""
+        # Act
+        a = make_cache_key({"model": "m", "messages": [{"role": "user", "content": "x"}]})
+        b = make_cache_key({"messages": [{"content": "x", "role": "user"}], "model": "m"})
+
+        # Assert
+        assert a == b
+
+    def test_key_changes_with_parameters(self):
+        """生成パラメータが違えば別のキーになる"""
+        # Act
+        a = make_cache_key({"model": "m", "temperature": 0})
+        b = make_cache_key({"model": "m", "temperature": 0.5})
+
+        # Assert
+        assert a != b
+
+
+class TestLLMResponseCache:
+    """LLMResponseCache のテスト"""
+
+    def test_put_and_get(self, tmp_path):
+        """保存した応答を取得でき、ヒット・ミスが集計される"""
+        # Arrange
+        cache = LLMResponseCache(tmp_path)
+
+        # Act
+        miss = cache.get("ab" * 32)
+        cache.put("ab" * 32, RESPONSE, model="m")
+        hit = cache.get("ab" * 32)
+
+        # Assert
+        assert miss is None
+        assert hit == RESPONSE
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_expired_entry_is_removed(self, tmp_path):
+        """有効期限を過ぎた応答はミスになり、ファイルも削除される"""
+        # Arrange
+        cache = LLMResponseCache(tmp_path, ttl_seconds=60)
+        cache.put("k1", RESPONSE)
+
+        # Act
+        with patch("colonyforge.llm.response_cache.time.time", return_value=time.time() + 61):
+            result = cache.get("k1")
+
+        # Assert
+        assert result is None
+        assert cache.get_stats()["expired"] == 1
+        assert len(cache) == 0
+        assert not list(tmp_path.glob("*/*.json"))
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """容量を超えると最後に使われた時刻が古い応答から削除する"""
+        # Arrange
+        cache = LLMResponseCache(tmp_path)
+        cache.put("k1", RESPONSE)
+        cache.put("k2", RESPONSE)
+        # stored_at の桁数でサイズが数バイト変わるため、1件の半分の余裕を持たせる
+        sizes = cache._entries
+        cache.max_bytes = sizes["k1"] + sizes["k2"] + sizes["k2"] // 2
+        cache.get("k1")
+
+        # Act
+        cache.put("k3", RESPONSE)
+
+        # Assert
+        assert cache.get("k2") is None
+        assert cache.get("k1") == RESPONSE
+        assert cache.get("k3") == RESPONSE
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_index_survives_restart(self, tmp_path):
+        """再作成しても保存済みの応答と使用順を引き継ぐ"""
+        # Arrange
+        cache = LLMResponseCache(tmp_path)
+        cache.put("k1", RESPONSE)
+        cache.put("k2", RESPONSE)
+        now = time.time()
+        os.utime(cache._path("k2"), (now - 100, now - 100))
+        size = cache._entries["k1"] + cache._entries["k2"] // 2
+
+        # Act: 1件分しか入らない容量で再作成
+        restored = LLMResponseCache(tmp_path, max_bytes=size)
+
+        # Assert: 最後に使われた時刻が古い k2 が削除される
+        assert len(restored) == 1
+        assert restored.get("k1") == RESPONSE
+        assert restored.get("k2") is None
+
+    def test_corrupted_entry_is_a_miss(self, tmp_path):
+        """壊れたファイルはミスとして扱い削除する"""
+        # Arrange
+        cache = LLMResponseCache(tmp_path)
+        cache.put("k1", RESPONSE)
+        cache._path("k1").write_text("{broken")
+
+        # Act
+        result = cache.get("k1")
+
+        # Assert
+        assert result is None
+        assert not cache._path("k1").exists()
+
+
+class TestClientCache:
+    """LLMClient からの利用のテスト"""
+
+    @pytest.fixture
+    def make_client(self, tmp_path, monkeypatch):
+        from colonyforge.core.config import LLMCacheConfig, LLMConfig
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient
+
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+
+        def make(temperature: float, mode: str = "auto") -> LLMClient:
+            config = LLMConfig(
+                provider="openai",
+                model="gpt-4o",
+                api_key_env="TEST_API_KEY",
+                temperature=temperature,
+                cache=LLMCacheConfig(mode=mode),
+            )
+            return LLMClient(
+                config,
+                rate_limiter=RateLimiter(RateLimitConfig()),
+                cache=LLMResponseCache(tmp_path),
+            )
+
+        return make
+
+    @pytest.fixture
+    def mock_acompletion(self):
+        tool_call = MagicMock(id="call-1")
+        tool_call.function.name = "read_file"
+        tool_call.function.arguments = '{"path": "a.py"}'
+        response = MagicMock(
+            choices=[
+                MagicMock(
+                    message=MagicMock(content=None, tool_calls=[tool_call]),
+                    finish_reason="tool_calls",
+                )
+            ],
+            usage=MagicMock(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        )
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock
+        ) as mock_acomp:
+            mock_acomp.return_value = response
+            yield mock_acomp
+
+    async def test_replay_without_network(self, make_client, mock_acompletion):
+        """temperature 0 の同じリクエストは送信せずにキャッシュから返す"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(temperature=0)
+        messages = [Message(role="user", content="read a.py")]
+
+        # Act
+        first = await client.chat(messages)
+        second = await client.chat(messages)
+
+        # Assert
+        assert mock_acompletion.await_count == 1
+        assert not first.cached
+        assert second.cached
+        assert second.tool_calls[0].name == "read_file"
+        assert second.tool_calls[0].arguments == {"path": "a.py"}
+        assert second.usage == first.usage
+        assert client._cache.get_stats()["hits"] == 1
+
+    async def test_different_messages_miss(self, make_client, mock_acompletion):
+        """メッセージが違えば送信する"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(temperature=0)
+
+        # Act
+        await client.chat([Message(role="user", content="a")])
+        await client.chat([Message(role="user", content="b")])
+
+        # Assert
+        assert mock_acompletion.await_count == 2
+
+    @pytest.mark.parametrize(
+        ("temperature", "mode", "expected_calls"),
+        [(0.2, "auto", 2), (0.2, "always", 1), (0, "off", 2)],
+    )
+    async def test_mode_controls_caching(
+        self, make_client, mock_acompletion, temperature, mode, expected_calls
+    ):
+        """auto は temperature 0 のみ、always は常に、off は使わない"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        client = make_client(temperature=temperature, mode=mode)
+        messages = [Message(role="user", content="hi")]
+
+        # Act
+        await client.chat(messages)
+        await client.chat(messages)
+
+        # Assert
+        assert mock_acompletion.await_count == expected_calls
+
+    def test_stats_endpoint(self, tmp_path):
+        """/llm/stats は応答キャッシュの統計を含む"""
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+        from colonyforge.llm import response_cache
+
+        # Arrange
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = tmp_path / "Vault"
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+        cache = response_cache.get_response_cache(tmp_path / "llm_cache")
+        cache.get("missing")
+
+        # Act
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            response = client.get("/llm/stats")
+        response_cache.reset_response_caches()
+
+        # Assert
+        assert response.status_code == 200
+        stats = response.json()["response_caches"][str(cache.directory)]
+        assert stats["misses"] == 1
@@ -0,0 +1,286 @@
+"""LLMリクエストスケジューラーのテスト
+
+優先度クラス、フロー間の公平性、待ち時間による繰り上げ、統計と、
+LLMClient / AgentRunner / API からの利用を検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.llm.scheduler import (
+    LLMRequestScheduler,
+    RequestClass,
+    RequestPriority,
+    current_request_class,
+    llm_request_scope,
+)
+
+
+async def _run_in_order(scheduler, requests):
+    """枠を1つ塞いだ状態で requests を並べ、解放後に送り出された順を返す"""
+    order: list[str] = []
+    blocker = await scheduler.acquire(RequestPriority.INTERACTIVE, "blocker")
+
+    async def request(name, priority, flow):
+        async with await scheduler.acquire(priority, flow):
+            order.append(name)
+
+    tasks = []
+    for name, priority, flow in requests:
+        tasks.append(asyncio.create_task(request(name, priority, flow)))
+        await asyncio.sleep(0)
+    await blocker.__aexit__(None, None, None)
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestLLMRequestScheduler:
+    """LLMRequestScheduler のテスト"""
+
+    async def test_admits_immediately_when_idle(self):
+        """空きがあれば待たずに送り出す"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 2)
+
+        # Act
+        first = await scheduler.acquire()
+        second = await scheduler.acquire()
+
+        # Assert
+        assert scheduler.in_flight == 2
+        await first.__aexit__(None, None, None)
+        await second.__aexit__(None, None, None)
+        assert scheduler.in_flight == 0
+
+    async def test_higher_priority_goes_first(self):
+        """後から来た上位クラスが先に送り出される"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 1)
+
+        # Act
+        order = await _run_in_order(
+            scheduler,
+            [
+                ("bg", RequestPriority.BACKGROUND, "h/c"),
+                ("exec", RequestPriority.EXECUTION, "h/c"),
+                ("plan", RequestPriority.PLANNING, "h/c"),
+                ("user", RequestPriority.INTERACTIVE, "h/c"),
+            ],
+        )
+
+        # Assert
+        assert order == ["user", "plan", "exec", "bg"]
+
+    async def test_flows_share_fairly_within_class(self):
+        """同じクラスでは、大量に積んだフローが他のフローを待たせない"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 1)
+        busy = [(f"a{i}", RequestPriority.EXECUTION, "hive-a/c") for i in range(5)]
+        light = [(f"b{i}", RequestPriority.EXECUTION, "hive-b/c") for i in range(2)]
+
+        # Act
+        order = await _run_in_order(scheduler, busy + light)
+
+        # Assert
+        assert order == ["a0", "b0", "a1", "b1", "a2", "a3", "a4"]
+
+    async def test_aging_prevents_starvation(self):
+        """長く待ったリクエストは上位クラスと同等に扱われる"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 1, aging_seconds=0.01)
+        blocker = await scheduler.acquire()
+        order: list[str] = []
+
+        async def request(name, priority):
+            async with await scheduler.acquire(priority, "h/c"):
+                order.append(name)
+
+        old = asyncio.create_task(request("old-bg", RequestPriority.BACKGROUND))
+        await asyncio.sleep(0.06)
+        new = asyncio.create_task(request("new-user", RequestPriority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        # Act
+        await blocker.__aexit__(None, None, None)
+        await asyncio.gather(old, new)
+
+        # Assert
+        assert order == ["old-bg", "new-user"]
+
+    async def test_capacity_is_read_dynamically(self):
+        """上限が下がると、解放されても上限まで待たせる"""
+        # Arrange
+        capacity = {"n": 2}
+        scheduler = LLMRequestScheduler(lambda: capacity["n"])
+        held = [await scheduler.acquire(), await scheduler.acquire()]
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+
+        # Act
+        capacity["n"] = 1
+        await held[0].__aexit__(None, None, None)
+        await asyncio.sleep(0)
+        blocked = not waiter.done()
+        await held[1].__aexit__(None, None, None)
+        slot = await asyncio.wait_for(waiter, timeout=1.0)
+
+        # Assert
+        assert blocked
+        await slot.__aexit__(None, None, None)
+        assert scheduler.in_flight == 0
+
+    async def test_cancelled_waiter_is_removed(self):
+        """待機中にキャンセルされたリクエストは枠を消費しない"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 1)
+        blocker = await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire(RequestPriority.BACKGROUND))
+        await asyncio.sleep(0)
+
+        # Act
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await blocker.__aexit__(None, None, None)
+
+        # Assert
+        stats = scheduler.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["queued"] == 0
+        assert stats["classes"]["background"]["queued"] == 0
+
+    async def test_stats_report_depth_and_wait(self):
+        """待ち行列の深さと待ち時間をクラスごとに集計する"""
+        # Arrange
+        scheduler = LLMRequestScheduler(lambda: 1)
+        blocker = await scheduler.acquire()
+        waiters = [
+            asyncio.create_task(scheduler.acquire(RequestPriority.BACKGROUND, f"f{i}"))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.02)
+
+        # Act
+        during = scheduler.get_stats()
+        await blocker.__aexit__(None, None, None)
+        for task in waiters:
+            slot = await task
+            await slot.__aexit__(None, None, None)
+        after = scheduler.get_stats()
+
+        # Assert
+        assert during["queued"] == 3
+        assert during["flows_waiting"] == 3
+        assert during["classes"]["background"]["queued"] == 3
+        background = after["classes"]["background"]
+        assert background["admitted"] == 3
+        assert background["wait_p95"] >= 0.02
+        assert after["classes"]["execution"]["admitted"] == 1
+
+
+class TestRequestScope:
+    """llm_request_scope のテスト"""
+
+    def test_nested_scope_inherits_unset_fields(self):
+        """指定しなかった項目は外側の値を引き継ぎ、抜けると元に戻る"""
+        # Act
+        with llm_request_scope(RequestPriority.BACKGROUND, "h-1/c-1"):
+            with llm_request_scope(RequestPriority.INTERACTIVE) as inner:
+                pass
+            outer = current_request_class()
+
+        # Assert
+        assert inner == RequestClass(RequestPriority.INTERACTIVE, "h-1/c-1")
+        assert outer == RequestClass(RequestPriority.BACKGROUND, "h-1/c-1")
+        assert current_request_class() == RequestClass()
+
+
+class TestSchedulerIntegration:
+    """LLMClient / AgentRunner / API からの利用のテスト"""
+
+    @pytest.fixture
+    def llm_config(self):
+        from colonyforge.core.config import LLMConfig
+
+        return LLMConfig(provider="openai", model="gpt-4o", api_key_env="TEST_API_KEY")
+
+    async def test_chat_uses_scope_priority(self, llm_config, monkeypatch):
+        """chat はスコープの優先度で順番を待つ"""
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient, Message
+
+        # Arrange
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+        client = LLMClient(llm_config, rate_limiter=RateLimiter(RateLimitConfig()))
+
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion", new_callable=AsyncMock
+        ) as mock_acomp:
+            mock_acomp.return_value = MagicMock(
+                choices=[MagicMock(message=MagicMock(content="ok", tool_calls=None))],
+                usage=None,
+            )
+
+            # Act
+            with llm_request_scope(RequestPriority.BACKGROUND, "h-1/c-1"):
+                await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        stats = client._scheduler.get_stats()
+        assert stats["classes"]["background"]["admitted"] == 1
+        assert stats["in_flight"] == 0
+
+    async def test_runner_passes_agent_priority(self):
+        """AgentRunner はエージェント種別の優先度とフローを渡す"""
+        from colonyforge.core.config import LLMConfig
+        from colonyforge.llm.client import LLMResponse
+        from colonyforge.llm.runner import AgentRunner
+
+        # Arrange
+        mock_client = MagicMock(config=LLMConfig())
+        mock_client.chat = AsyncMock(
+            return_value=LLMResponse(content="done", tool_calls=[], finish_reason="stop")
+        )
+        runner = AgentRunner(mock_client, agent_type="forager_bee", hive_id="h-1", colony_id="c-2")
+
+        # Act
+        await runner.run("explore")
+
+        # Assert
+        kwargs = mock_client.chat.call_args.kwargs
+        assert kwargs["priority"] == RequestPriority.BACKGROUND
+        assert kwargs["flow"] == "h-1/c-2"
+
+    def test_stats_endpoint(self, tmp_path):
+        """/llm/stats はスケジューラーとレートリミッターの統計を返す"""
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+        from colonyforge.llm import scheduler
+
+        # Arrange
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = tmp_path / "Vault"
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+        scheduler.get_request_scheduler("openai:gpt-4o", lambda: 3)
+
+        # Act
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            response = client.get("/llm/stats")
+        scheduler.reset_request_schedulers()
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["schedulers"]["openai:gpt-4o"]["capacity"] == 3
+        assert "rate_limiters" in body
@@ -0,0 +1,251 @@
+"""LLMストリーミングのテスト
+
+チャンクからの LLMResponse の組み立て、LLMClient.chat_stream、
+AgentRunner のストリーミング時の途中経過発行を検証する。
+"""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.core.activity_bus import (
+    ActivityBus,
+    ActivityEvent,
+    ActivityType,
+    AgentInfo,
+    AgentRole,
+)
+from colonyforge.llm.client import LLMResponse, StreamAssembler, StreamDelta, ToolCall
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=usage
+    )
+
+
+def _tool_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments)
+    )
+
+
+TOOL_CHUNKS = [
+    _chunk(content="読み込みます"),
+    _chunk(tool_calls=[_tool_delta(0, id="call-1", name="read_file", arguments='{"pa')]),
+    _chunk(tool_calls=[_tool_delta(0, arguments='th": "a.py"}')]),
+    _chunk(tool_calls=[_tool_delta(1, id="call-2", name="list_dir", arguments="")]),
+    _chunk(finish_reason="tool_calls"),
+    SimpleNamespace(
+        choices=[], usage=SimpleNamespace(prompt_tokens=20, completion_tokens=8, total_tokens=28)
+    ),
+]
+
+
+class TestStreamAssembler:
+    """StreamAssembler のテスト"""
+
+    def test_assembles_text(self):
+        """テキストの差分を順に返し、連結した応答を組み立てる"""
+        # Arrange
+        assembler = StreamAssembler()
+
+        # Act
+        deltas = [d for c in ("こん", "にち", "は") for d in assembler.feed(_chunk(content=c))]
+        assembler.feed(_chunk(finish_reason="stop"))
+        rest, response = assembler.finish()
+
+        # Assert
+        assert [d.content for d in deltas] == ["こん", "にち", "は"]
+        assert rest == []
+        assert response.content == "こんにちは"
+        assert response.finish_reason == "stop"
+
+    def test_tool_call_emitted_when_next_one_starts(self):
+        """ツール呼び出しは次の index が始まった時点で完成として返す"""
+        # Arrange
+        assembler = StreamAssembler()
+
+        # Act
+        fed = [assembler.feed(c) for c in TOOL_CHUNKS]
+        rest, response = assembler.finish()
+
+        # Assert: 1件目は2件目の開始時（4チャンク目）に、2件目は終了時に返る
+        assert [d.tool_call for d in fed[3]] == [
+            ToolCall(id="call-1", name="read_file", arguments={"path": "a.py"})
+        ]
+        assert [d.tool_call for d in rest] == [ToolCall(id="call-2", name="list_dir", arguments={})]
+        assert [tc.name for tc in response.tool_calls] == ["read_file", "list_dir"]
+        assert response.finish_reason == "tool_calls"
+        assert response.usage["total_tokens"] == 28
+
+
+class TestChatStream:
+    """LLMClient.chat_stream のテスト"""
+
+    @pytest.fixture
+    def client(self, monkeypatch, tmp_path):
+        from colonyforge.core.config import LLMCacheConfig, LLMConfig
+        from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+        from colonyforge.llm.client import LLMClient
+        from colonyforge.llm.response_cache import LLMResponseCache
+
+        monkeypatch.setenv("TEST_API_KEY", "sk-test")
+        config = LLMConfig(
+            provider="openai",
+            model="gpt-4o",
+            api_key_env="TEST_API_KEY",
+            temperature=0,
+            cache=LLMCacheConfig(mode="auto"),
+        )
+        return LLMClient(
+            config,
+            rate_limiter=RateLimiter(RateLimitConfig()),
+            cache=LLMResponseCache(tmp_path),
+        )
+
+    @pytest.fixture
+    def mock_acompletion(self):
+        async def streaming(**kwargs):
+            async def chunks():
+                for chunk in TOOL_CHUNKS:
+                    yield chunk
+
+            return chunks()
+
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            side_effect=streaming,
+        ) as mock_acomp:
+            yield mock_acomp
+
+    async def test_yields_deltas_then_response(self, client, mock_acompletion):
+        """差分を返した後、最後に組み立て済みの応答を返す"""
+        from colonyforge.llm.client import Message
+
+        # Act
+        deltas = [d async for d in client.chat_stream([Message(role="user", content="hi")])]
+
+        # Assert
+        kwargs = mock_acompletion.call_args.kwargs
+        assert kwargs["stream"] is True
+        assert deltas[0] == StreamDelta(content="読み込みます")
+        assert [d.tool_call.name for d in deltas if d.tool_call] == ["read_file", "list_dir"]
+        final = deltas[-1].response
+        assert final is not None
+        assert final.content == "読み込みます"
+        assert client._scheduler.get_stats()["in_flight"] == 0
+        assert client._rate_limiter.get_stats()["current_concurrent"] == 0
+
+    async def test_cached_stream_replays_without_network(self, client, mock_acompletion):
+        """キャッシュ済みの応答は送信せずに返す"""
+        from colonyforge.llm.client import Message
+
+        # Arrange
+        messages = [Message(role="user", content="hi")]
+        [d async for d in client.chat_stream(messages)]
+
+        # Act
+        deltas = [d async for d in client.chat_stream(messages)]
+
+        # Assert
+        assert mock_acompletion.await_count == 1
+        assert [d.tool_call.name for d in deltas if d.tool_call] == ["read_file", "list_dir"]
+        assert deltas[-1].response is not None
+        assert deltas[-1].response.cached
+
+
+class TestRunnerStreaming:
+    """AgentRunner のストリーミングのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def reset_bus(self):
+        ActivityBus.reset()
+        yield
+        ActivityBus.reset()
+
+    async def test_emits_stream_activity_before_response(self):
+        """届いたテキストと完成したツール呼び出しを llm.stream として発行する"""
+        from colonyforge.core.config import LLMConfig
+        from colonyforge.llm.runner import AgentRunner, ToolDefinition
+
+        # Arrange
+        first = [
+            StreamDelta(content="ファイルを"),
+            StreamDelta(content="読みます"),
+            StreamDelta(tool_call=ToolCall(id="c1", name="echo", arguments={"text": "x"})),
+        ]
+        first.append(
+            StreamDelta(
+                response=LLMResponse(
+                    content="ファイルを読みます",
+                    tool_calls=[first[2].tool_call],
+                    finish_reason="tool_calls",
+                )
+            )
+        )
+        second = [
+            StreamDelta(content="完了"),
+            StreamDelta(response=LLMResponse(content="完了", tool_calls=[], finish_reason="stop")),
+        ]
+        streams = iter([first, second])
+
+        async def chat_stream(**kwargs):
+            for delta in next(streams):
+                yield delta
+
+        client = MagicMock(config=LLMConfig())
+        client.chat_stream = chat_stream
+        agent = AgentInfo(agent_id="w-1", role=AgentRole.WORKER_BEE, hive_id="h", colony_id="c")
+        runner = AgentRunner(client, agent_info=agent, stream=True)
+        runner.register_tool(
+            ToolDefinition(
+                name="echo",
+                description="echo",
+                parameters={"type": "object", "properties": {}},
+                handler=AsyncMock(return_value="x"),
+            )
+        )
+        events: list[ActivityEvent] = []
+
+        async def collect(event: ActivityEvent) -> None:
+            events.append(event)
+
+        bus = ActivityBus.get_instance()
+        bus.subscribe(collect)
+
+        # Act
+        result = await runner.run("read")
+        await bus.flush()
+
+        # Assert
+        assert result.success
+        assert result.output == "完了"
+        kinds = [e.activity_type for e in events]
+        stream_events = [e for e in events if e.activity_type == ActivityType.LLM_STREAM]
+        assert [e.detail.get("delta") for e in stream_events if "delta" in e.detail] == [
+            "ファイルを",
+            "読みます",
+            "完了",
+        ]
+        assert stream_events[2].detail["tool_call"] == {"id": "c1", "name": "echo"}
+        assert kinds.index(ActivityType.LLM_STREAM) < kinds.index(ActivityType.LLM_RESPONSE)
+
+    def test_stream_default_follows_client_config(self):
+        """stream を省略するとクライアントの config.stream に従う"""
+        from colonyforge.core.config import LLMConfig
+        from colonyforge.llm.client import LLMClient
+        from colonyforge.llm.runner import AgentRunner
+
+        # Act
+        streaming = AgentRunner(LLMClient(LLMConfig(stream=True)))
+        plain = AgentRunner(LLMClient(LLMConfig()))
+        overridden = AgentRunner(LLMClient(LLMConfig(stream=True)), stream=False)
+
+        # Assert
+        assert (streaming.stream, plain.stream, overridden.stream) == (True, False, False)
@@ -0,0 +1,333 @@
+"""LLM呼び出しのテレメトリのテスト
+
+ヒストグラムの集計、LLMClient からの計測（順番待ち・応答時間・トークン数・コスト）、
+エージェント種別と Run の付与、llm.response イベントの書き込みと
+/llm/metrics エンドポイントを検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from colonyforge.core.config import LLMCacheConfig, LLMConfig, LLMTelemetryConfig
+from colonyforge.core.rate_limiter import RateLimitConfig, RateLimiter
+from colonyforge.llm import telemetry
+from colonyforge.llm.client import LLMClient, Message
+from colonyforge.llm.telemetry import Histogram, llm_telemetry_scope
+
+
+@pytest.fixture(autouse=True)
+def reset_telemetry():
+    telemetry.reset_llm_telemetry()
+    yield
+    telemetry.reset_llm_telemetry()
+
+
+def _response(content: str = "ok", prompt: int = 1000, completion: int = 200) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=content, tool_calls=None), finish_reason="stop"
+            )
+        ],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion
+        ),
+    )
+
+
+def _client(monkeypatch, max_concurrent: int = 10, **overrides) -> LLMClient:
+    monkeypatch.setenv("TEST_API_KEY", "sk-test")
+    config = LLMConfig(
+        provider="openai",
+        model="gpt-4o",
+        api_key_env="TEST_API_KEY",
+        coalesce=False,
+        cache=LLMCacheConfig(mode="off"),
+        **overrides,
+    )
+    limiter = RateLimiter(RateLimitConfig(max_concurrent=max_concurrent))
+    return LLMClient(config, rate_limiter=limiter)
+
+
+def _series() -> list[dict]:
+    return telemetry.get_llm_telemetry().snapshot()["series"]
+
+
+class TestHistogram:
+    """Histogram のテスト"""
+
+    def test_cumulative_buckets(self):
+        """バケットは累積件数（最後は +Inf）"""
+        # Arrange
+        hist = Histogram((1.0, 5.0))
+
+        # Act
+        for value in (0.5, 1.0, 3.0, 10.0):
+            hist.observe(value)
+
+        # Assert
+        assert hist.cumulative() == [("1.0", 2), ("5.0", 3), ("+Inf", 4)]
+        assert (hist.count, hist.sum, hist.max) == (4, 14.5, 10.0)
+
+    def test_quantile_uses_bucket_upper_bound(self):
+        """分位点はその分位点を含むバケットの上限（+Inf なら最大値）"""
+        # Arrange
+        hist = Histogram((1.0, 5.0))
+        for value in [0.5] * 90 + [3.0] * 5 + [20.0] * 5:
+            hist.observe(value)
+
+        # Act / Assert
+        assert hist.quantile(0.5) == 1.0
+        assert hist.quantile(0.95) == 5.0
+        assert hist.quantile(0.99) == 20.0
+
+
+class TestClientTelemetry:
+    """LLMClient の計測のテスト"""
+
+    async def test_chat_records_tokens_cost_and_tags(self, monkeypatch):
+        """トークン数・推定コスト・Hive/Colony/エージェント種別を記録する"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        # Act
+        with (
+            patch(
+                "colonyforge.llm.client.litellm.acompletion",
+                new_callable=AsyncMock,
+                return_value=_response(),
+            ),
+            llm_telemetry_scope(role="queen_bee"),
+        ):
+            await client.chat([Message(role="user", content="hi")], flow="h1/c1")
+
+        # Assert
+        [series] = _series()
+        assert (series["model"], series["hive_id"], series["colony_id"], series["role"]) == (
+            "openai:gpt-4o",
+            "h1",
+            "c1",
+            "queen_bee",
+        )
+        assert series["calls"] == 1
+        assert series["prompt_tokens"]["sum"] == 1000
+        assert series["completion_tokens"]["sum"] == 200
+        assert series["cost_usd"]["sum"] > 0
+        totals = telemetry.get_llm_telemetry().snapshot()["totals"]
+        assert totals["tokens"] == 1200
+
+    async def test_queue_wait_is_separated_from_latency(self, monkeypatch):
+        """同時実行の上限で待った時間は順番待ちとして、送信後の時間は応答時間として記録する"""
+        # Arrange
+        client = _client(monkeypatch, max_concurrent=1)
+
+        async def slow(**kwargs):
+            await asyncio.sleep(0.05)
+            return _response()
+
+        # Act
+        with patch("colonyforge.llm.client.litellm.acompletion", side_effect=slow):
+            await asyncio.gather(
+                client.chat([Message(role="user", content="a")]),
+                client.chat([Message(role="user", content="b")]),
+            )
+
+        # Assert
+        [series] = _series()
+        assert series["latency_seconds"]["count"] == 2
+        assert series["latency_seconds"]["sum"] >= 0.1
+        assert series["queue_wait_seconds"]["max"] >= 0.04
+
+    async def test_errors_are_counted(self, monkeypatch):
+        """失敗した呼び出しはエラー数に数え、ヒストグラムには入れない"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        # Act
+        with (
+            patch(
+                "colonyforge.llm.client.litellm.acompletion",
+                new_callable=AsyncMock,
+                side_effect=RuntimeError("boom"),
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        [series] = _series()
+        assert (series["calls"], series["errors"]) == (1, 1)
+        assert series["latency_seconds"]["count"] == 0
+
+    async def test_stream_is_recorded(self, monkeypatch):
+        """ストリーミングもストリームの終わりに記録する"""
+        # Arrange
+        client = _client(monkeypatch)
+
+        async def chunks():
+            yield SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        delta=SimpleNamespace(content="hi", tool_calls=None), finish_reason="stop"
+                    )
+                ],
+                usage=None,
+            )
+            yield SimpleNamespace(
+                choices=[],
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12),
+            )
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=chunks(),
+        ):
+            [d async for d in client.chat_stream([Message(role="user", content="hi")])]
+
+        # Assert
+        [series] = _series()
+        assert series["completion_tokens"]["sum"] == 2
+
+    async def test_disabled(self, monkeypatch):
+        """telemetry.enabled が False なら記録しない"""
+        # Arrange
+        client = _client(monkeypatch, telemetry=LLMTelemetryConfig(enabled=False))
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response(),
+        ):
+            await client.chat([Message(role="user", content="hi")])
+
+        # Assert
+        assert _series() == []
+
+
+class TestTelemetryEvents:
+    """llm.response イベントの書き込みのテスト"""
+
+    async def test_agent_run_writes_events_for_honeycomb(self, monkeypatch, tmp_path):
+        """record_events なら Run に llm.response を書き、Honeycomb のトークン数に反映される"""
+        from colonyforge.core import AkashicRecord
+        from colonyforge.core.events import EventType
+        from colonyforge.core.honeycomb.recorder import EpisodeRecorder
+        from colonyforge.core.honeycomb.store import HoneycombStore
+        from colonyforge.llm.runner import AgentContext, AgentRunner
+
+        # Arrange
+        client = _client(monkeypatch, telemetry=LLMTelemetryConfig(record_events=True))
+        runner = AgentRunner(client, agent_type="worker_bee", vault_path=str(tmp_path))
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response("完了", prompt=300, completion=50),
+        ):
+            await runner.run("タスク", AgentContext(run_id="run-1", task_id="t-1"))
+
+        # Assert
+        ar = AkashicRecord(tmp_path)
+        [event] = [e for e in ar.replay("run-1") if e.type == EventType.LLM_RESPONSE]
+        assert event.actor == "worker_bee"
+        assert event.task_id == "t-1"
+        assert event.payload["tokens_used"] == 350
+        assert event.payload["latency_ms"] >= 0
+        recorder = EpisodeRecorder(HoneycombStore(tmp_path), ar)
+        assert recorder._count_tokens(list(ar.replay("run-1"))) == 350
+
+    async def test_no_events_by_default(self, monkeypatch, tmp_path):
+        """record_events が False（既定）ならイベントは書かない"""
+        from colonyforge.core import AkashicRecord
+        from colonyforge.llm.runner import AgentContext, AgentRunner
+
+        # Arrange
+        runner = AgentRunner(_client(monkeypatch), vault_path=str(tmp_path))
+
+        # Act
+        with patch(
+            "colonyforge.llm.client.litellm.acompletion",
+            new_callable=AsyncMock,
+            return_value=_response(),
+        ):
+            await runner.run("タスク", AgentContext(run_id="run-1"))
+
+        # Assert
+        assert AkashicRecord(tmp_path).count_events("run-1") == 0
+        assert _series()[0]["role"] == "worker_bee"
+
+
+class TestMetricsEndpoint:
+    """/llm/metrics のテスト"""
+
+    @pytest.fixture
+    def api(self, tmp_path):
+        from fastapi.testclient import TestClient
+
+        from colonyforge.api.server import app
+
+        mock_s = MagicMock()
+        mock_s.get_vault_path.return_value = tmp_path / "Vault"
+        mock_s.server.cors.enabled = False
+        mock_s.server.activity_history.enabled = False
+        mock_s.server.activity_coalescing.enabled = False
+        with (
+            patch("colonyforge.api.server.get_settings", return_value=mock_s),
+            patch("colonyforge.api.helpers.get_settings", return_value=mock_s),
+            TestClient(app) as client,
+        ):
+            yield client
+
+    @staticmethod
+    def _record() -> None:
+        telemetry.get_llm_telemetry().record(
+            telemetry.LLMCallRecord(
+                provider="openai",
+                model="gpt-4o",
+                flow="h1/c1",
+                queue_wait_seconds=0.2,
+                latency_seconds=1.5,
+                prompt_tokens=100,
+                completion_tokens=20,
+                scope=telemetry.TelemetryScope(role="beekeeper"),
+            )
+        )
+
+    def test_json(self, api):
+        """既定では系列ごとのヒストグラムを JSON で返す"""
+        # Arrange
+        self._record()
+
+        # Act
+        response = api.get("/llm/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        [series] = response.json()["series"]
+        assert series["role"] == "beekeeper"
+        assert series["latency_seconds"]["buckets"]["2.5"] == 1
+        assert series["latency_seconds"]["buckets"]["1.0"] == 0
+
+    def test_prometheus(self, api):
+        """format=prometheus ならテキスト形式で返す"""
+        # Arrange
+        self._record()
+
+        # Act
+        response = api.get("/llm/metrics", params={"format": "prometheus"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        labels = 'model="openai:gpt-4o",hive="h1",colony="c1",role="beekeeper"'
+        assert f"colonyforge_llm_calls_total{{{labels}}} 1" in response.text
+        assert f'colonyforge_llm_latency_seconds_bucket{{{labels},le="+Inf"}} 1' in response.text
@@ -140,6 +140,7 @@ class TestFormatEvent:
         expected_types = [
             "llm.request",
             "llm.response",
+            "llm.stream",
             "mcp.tool_call",
             "mcp.tool_result",
             "agent.started",
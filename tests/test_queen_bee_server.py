@@ -292,10 +292,11 @@ class TestClose:
         """closeでLLMクライアントも閉じられる（L555-556）"""
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
         # Arrange: LLMクライアントをモックで設定
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.close = AsyncMock()
         queen_bee._llm_client = mock_client
 
@@ -390,9 +391,10 @@ class TestQueenBeeAgentRunnerPromptContext:
         # Arrange: LLMクライアントをモックで事前設定
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         queen_bee._llm_client = mock_client
 
@@ -411,9 +413,10 @@ class TestQueenBeeAgentRunnerPromptContext:
         from unittest.mock import AsyncMock, MagicMock
 
         from colonyforge.core.activity_bus import AgentRole
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         queen_bee._llm_client = mock_client
 
@@ -443,10 +446,11 @@ class TestPlanTasksDependsOn:
         """
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
         # Arrange: LLMが依存関係付きのタスクを返すようモック
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         import json
 
         response_content = json.dumps(
@@ -481,10 +485,11 @@ class TestPlanTasksDependsOn:
         """
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
         # Arrange: LLM呼び出しが失敗
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock(side_effect=RuntimeError("API error"))
         queen_bee._llm_client = mock_client
 
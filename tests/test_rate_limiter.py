@@ -608,6 +608,101 @@ class TestRateLimiterWait:
         mock_sleep.assert_called()
 
 
+class TestTokenReservation:
+    """トークン/分の予約と補正のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_acquire_with_tokens_uses_one_request_token(self):
+        """acquire_with_tokens はリクエストトークンを1つだけ消費する"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(requests_per_minute=60, burst_limit=3))
+
+        # Act
+        async with await limiter.acquire_with_tokens(100):
+            pass
+
+        # Assert
+        stats = limiter.get_stats()
+        assert stats["requests_this_minute"] == 1
+        assert stats["tokens_available"] == pytest.approx(2.0, abs=0.1)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_refunds_unused_tokens(self):
+        """実際の使用量が予約より少なければ差分を戻す"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=1000))
+        ctx = await limiter.acquire_with_tokens(800)
+
+        # Act
+        async with ctx:
+            ctx.reconcile(300)
+
+        # Assert
+        assert limiter.get_stats()["tokens_this_minute"] == 300
+        assert ctx.reservation is None
+
+    @pytest.mark.asyncio
+    async def test_reconcile_adds_overuse(self):
+        """予約を超えて使用した分は加算される"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=1000))
+        ctx = await limiter.acquire_with_tokens(100)
+
+        # Act
+        async with ctx:
+            ctx.reconcile(250)
+            ctx.reconcile(999)  # 2回目以降は無視
+
+        # Assert
+        assert limiter.get_stats()["tokens_this_minute"] == 250
+
+    @pytest.mark.asyncio
+    async def test_reconcile_after_window_switch_counts_only_overuse(self):
+        """予約後にウィンドウが切り替わった場合は超過分のみ新しいウィンドウに計上する"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=1000))
+        refund = await limiter.acquire_with_tokens(500)
+        overuse = await limiter.acquire_with_tokens(100)
+        limiter._state.minute_start -= 61.0
+
+        # Act
+        refund.reconcile(200)
+        overuse.reconcile(300)
+
+        # Assert
+        assert limiter.get_stats()["tokens_this_minute"] == 200
+        limiter.release()
+        limiter.release()
+
+    @pytest.mark.asyncio
+    async def test_oversized_estimate_is_capped(self):
+        """上限を超える見積もりでも空のウィンドウなら待たずに通す"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(tokens_per_minute=1000))
+
+        # Act
+        ctx = await asyncio.wait_for(limiter.acquire_with_tokens(50_000), timeout=1.0)
+
+        # Assert
+        assert ctx.reservation is not None
+        assert ctx.reservation.tokens == 1000
+        limiter.release()
+
+    @pytest.mark.asyncio
+    async def test_daily_limit_releases_reservation(self):
+        """日次上限で失敗した場合は予約を戻す"""
+        # Arrange
+        limiter = RateLimiter(RateLimitConfig(requests_per_day=1, tokens_per_minute=1000))
+        await limiter.wait()
+
+        # Act
+        with pytest.raises(RateLimitExceededError):
+            await limiter.acquire_with_tokens(400)
+
+        # Assert
+        assert limiter.get_stats()["tokens_this_minute"] == 0
+
+
 class TestRateLimiterConcurrency:
     """RateLimiterの並行性テスト
 
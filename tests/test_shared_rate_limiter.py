@@ -0,0 +1,274 @@
+"""プロセス間共有レートリミッターのテスト
+
+同じ状態ファイルを指す複数の SharedRateLimiter（プロセスの代わり）と、
+実際の子プロセスを使って、トークンバケットと同時実行スロットが共有されることを検証する。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from colonyforge.core.rate_limiter import (
+    RateLimitConfig,
+    RateLimiter,
+    RateLimiterRegistry,
+    create_rate_limiter,
+)
+from colonyforge.core.shared_rate_limiter import (
+    _HEADER,
+    SharedRateLimiter,
+    state_file_for,
+)
+
+
+@pytest.fixture
+def make_limiter(tmp_path):
+    """同じ鍵・同じディレクトリの SharedRateLimiter を生成（別プロセス相当）"""
+    created: list[SharedRateLimiter] = []
+
+    def factory(**overrides) -> SharedRateLimiter:
+        config = RateLimitConfig(**{"requests_per_minute": 60, "burst_limit": 3, **overrides})
+        limiter = SharedRateLimiter("openai:gpt-4o", config, state_dir=tmp_path)
+        created.append(limiter)
+        return limiter
+
+    yield factory
+    for limiter in created:
+        limiter.close()
+
+
+class TestSharedTokenBucket:
+    """共有トークンバケットのテスト"""
+
+    async def test_bucket_is_shared_between_instances(self, make_limiter):
+        """一方が消費したトークンは他方から見ても減っている"""
+        # Arrange
+        a, b = make_limiter(), make_limiter()
+
+        # Act
+        await a.wait()
+        await a.wait()
+        await b.wait()
+
+        # Assert
+        assert b._take_tokens(1) > 0
+        assert a.get_stats()["requests_this_minute"] == 3
+
+    async def test_429_drains_bucket_for_all(self, make_limiter):
+        """429 を受けたプロセスがバケットを空にすると全員が待つ"""
+        # Arrange
+        a, b = make_limiter(), make_limiter()
+
+        # Act
+        await a.handle_429(retry_after=0.001)
+
+        # Assert
+        assert b._take_tokens(1) > 0
+
+    async def test_daily_limit_is_shared(self, make_limiter):
+        """日次上限も全プロセスの合計で判定する"""
+        from colonyforge.core.rate_limiter import RateLimitExceededError
+
+        # Arrange
+        a, b = make_limiter(requests_per_day=2), make_limiter(requests_per_day=2)
+        await a.wait()
+        await b.wait()
+
+        # Act & Assert
+        with pytest.raises(RateLimitExceededError):
+            await a.wait()
+
+    async def test_llm_tokens_per_minute_shared(self, make_limiter):
+        """トークン/分の枠も共有される"""
+        # Arrange
+        a = make_limiter(tokens_per_minute=1000)
+        b = make_limiter(tokens_per_minute=1000)
+        async with await a.acquire_with_tokens(800):
+            pass
+
+        # Act & Assert
+        assert b._reserve_llm_tokens(300) > 0
+        assert b._reserve_llm_tokens(200) == 0
+
+    async def test_reconcile_is_visible_to_others(self, make_limiter):
+        """一方の補正（未使用分の返却）が他方の予約に反映される"""
+        # Arrange
+        a = make_limiter(tokens_per_minute=1000)
+        b = make_limiter(tokens_per_minute=1000)
+        ctx = await a.acquire_with_tokens(900)
+
+        # Act
+        async with ctx:
+            ctx.reconcile(100)
+
+        # Assert
+        assert b._reserve_llm_tokens(800) == 0
+
+    def test_future_timestamps_reset_state(self, make_limiter):
+        """記録時刻が未来（再起動で時計が戻った）なら状態を初期化する"""
+        # Arrange
+        a = make_limiter()
+        future = time.monotonic() + 10_000
+        _HEADER.pack_into(a._mm, 0, b"CFRLIM1\0", 0.0, future, 5, 0, future, 5, future)
+
+        # Act
+        stats = a.get_stats()
+
+        # Assert
+        assert stats["tokens_available"] == pytest.approx(3.0, abs=0.1)
+        assert stats["requests_this_minute"] == 0
+
+
+class TestSharedSlots:
+    """同時実行スロットのテスト"""
+
+    async def test_concurrency_limit_spans_instances(self, make_limiter):
+        """上限に達すると、他方が解放するまで取得できない"""
+        # Arrange
+        a, b = make_limiter(max_concurrent=2), make_limiter(max_concurrent=2)
+        ctx_a = await a.acquire()
+        ctx_b = await b.acquire()
+
+        # Act
+        third = asyncio.create_task(b.acquire())
+        await asyncio.sleep(0.05)
+        blocked = not third.done()
+        await ctx_a.__aexit__(None, None, None)
+        ctx_c = await asyncio.wait_for(third, timeout=2.0)
+
+        # Assert
+        assert blocked
+        assert b.get_stats()["current_concurrent"] == 2
+        await ctx_b.__aexit__(None, None, None)
+        await ctx_c.__aexit__(None, None, None)
+        assert a.get_stats()["current_concurrent"] == 0
+
+    @pytest.mark.skipif(os.name == "nt", reason="PID の生存確認は POSIX のみ")
+    async def test_slots_of_dead_process_are_reclaimed(self, make_limiter):
+        """終了したプロセスが保持していたスロットは回収される"""
+        # Arrange
+        a = make_limiter(max_concurrent=1)
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        from colonyforge.core.shared_rate_limiter import _SLOT
+
+        _SLOT.pack_into(a._mm, a._slot(0), proc.pid, 1, time.monotonic())
+
+        # Act
+        ctx = await asyncio.wait_for(a.acquire(), timeout=1.0)
+
+        # Assert
+        assert a.get_stats()["current_concurrent"] == 1
+        await ctx.__aexit__(None, None, None)
+
+    def test_too_many_slots_rejected(self, tmp_path):
+        """共有スロット数の上限を超える設定は ValueError"""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            SharedRateLimiter("k", RateLimitConfig(max_concurrent=1000), state_dir=tmp_path)
+
+
+class TestSharedLimiterFactory:
+    """設定からの生成のテスト"""
+
+    async def test_registry_creates_shared_limiter(self, tmp_path):
+        """shared=True ならレジストリは SharedRateLimiter を返す"""
+        # Arrange
+        registry = RateLimiterRegistry()
+        config = RateLimitConfig(shared=True, state_dir=str(tmp_path))
+
+        # Act
+        limiter = await registry.get_limiter("anthropic:claude", config)
+
+        # Assert
+        assert isinstance(limiter, SharedRateLimiter)
+        assert limiter.path == state_file_for("anthropic:claude", tmp_path)
+        assert limiter.path.exists()
+        limiter.close()
+
+    def test_local_by_default(self):
+        """既定ではプロセス内のリミッター"""
+        # Act
+        limiter = create_rate_limiter("k", RateLimitConfig())
+
+        # Assert
+        assert type(limiter) is RateLimiter
+
+
+# 子プロセス: 指定時刻から duration 秒の間 wait() を繰り返し、通過時刻を出力する
+CHILD_SCRIPT = """
+import asyncio, json, sys, time
+from pathlib import Path
+from colonyforge.core.rate_limiter import RateLimitConfig, create_rate_limiter
+
+state_dir, shared, rpm, burst, start_at, duration = sys.argv[1:]
+config = RateLimitConfig(
+    requests_per_minute=int(rpm), burst_limit=int(burst),
+    shared=shared == "1", state_dir=state_dir,
+)
+
+async def main():
+    limiter = create_rate_limiter("bench:model", config)
+    while time.time() < float(start_at):
+        await asyncio.sleep(0.005)
+    end = float(start_at) + float(duration)
+    passed = []
+    while True:
+        await limiter.wait()
+        now = time.time()
+        if now >= end:
+            break
+        passed.append(now)
+    print(json.dumps(passed))
+
+asyncio.run(main())
+"""
+
+
+def run_processes(
+    state_dir, *, processes: int, shared: bool, rpm: int, burst: int, duration: float
+) -> list[float]:
+    """子プロセスを同時に走らせ、全プロセスの通過時刻をまとめて返す"""
+    start_at = time.time() + 2.5  # 全プロセスの import 完了を待って同時に開始
+    procs = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                CHILD_SCRIPT,
+                str(state_dir),
+                "1" if shared else "0",
+                str(rpm),
+                str(burst),
+                str(start_at),
+                str(duration),
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(processes)
+    ]
+    passed: list[float] = []
+    for proc in procs:
+        out, _ = proc.communicate(timeout=60)
+        passed.extend(json.loads(out.strip().splitlines()[-1]))
+    return passed
+
+
+class TestMultiProcess:
+    """実プロセスでの共有のテスト"""
+
+    def test_aggregate_rate_within_limit(self, tmp_path):
+        """3プロセス合計の通過数がバースト + レート × 時間以内に収まる"""
+        # Act
+        passed = run_processes(tmp_path, processes=3, shared=True, rpm=600, burst=5, duration=1.0)
+
+        # Assert: 10 req/s × 1秒 + バースト5（プロセス単位なら最大3倍）
+        assert 5 <= len(passed) <= 16
@@ -0,0 +1,244 @@
+"""ツール結果のメモ化のテスト
+
+ToolResultMemo のキー・無効化・統計と、ToolExecutor / AgentRunner からの利用を検証する。
+"""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock
+
+from colonyforge.core.config import LLMConfig
+from colonyforge.llm.client import LLMClient, LLMResponse, ToolCall
+from colonyforge.llm.runner import AgentContext, AgentRunner
+from colonyforge.llm.runner import ToolDefinition as AgentToolDefinition
+from colonyforge.worker_bee.tool_cache import ToolResultMemo, make_tool_key
+from colonyforge.worker_bee.tools import ToolDefinition, ToolExecutor
+from colonyforge.worker_bee.trust import ActionClass
+
+
+class TestToolResultMemo:
+    """ToolResultMemo のテスト"""
+
+    def test_key_ignores_argument_order(self):
+        """引数の順序が違っても同じキーになる"""
+        # Act
+        a = make_tool_key("search", {"query": "x", "limit": 5})
+        b = make_tool_key("search", {"limit": 5, "query": "x"})
+
+        # Assert
+        assert a == b
+        assert make_tool_key("search", {"query": "y", "limit": 5}) != a
+
+    def test_unserializable_arguments_are_not_memoized(self):
+        """JSON にできない引数はメモ化しない"""
+        # Arrange
+        memo = ToolResultMemo()
+        args = {"obj": object()}
+
+        # Act
+        memo.store("read_file", args, "content")
+        hit, _ = memo.lookup("read_file", args)
+
+        # Assert
+        assert not hit
+
+    def test_hit_returns_copy(self):
+        """ヒット時は結果の複製を返す（呼び出し側の変更がメモに残らない）"""
+        # Arrange
+        memo = ToolResultMemo()
+        memo.store("get_status", {}, {"state": "idle"})
+
+        # Act
+        _, first = memo.lookup("get_status", {})
+        first["state"] = "changed"
+        hit, second = memo.lookup("get_status", {})
+
+        # Assert
+        assert hit
+        assert second == {"state": "idle"}
+
+    def test_write_class_tool_invalidates(self):
+        """SAFE より上のツールでメモを破棄し、SAFE のツールでは破棄しない"""
+        # Arrange
+        memo = ToolResultMemo()
+        memo.store("read_file", {"path": "a.py"}, "old")
+
+        # Act
+        kept = memo.invalidate_for("search")
+        hit_after_safe, _ = memo.lookup("read_file", {"path": "a.py"})
+        dropped = memo.invalidate_for("edit_file")
+        hit_after_write, _ = memo.lookup("read_file", {"path": "a.py"})
+
+        # Assert
+        assert (kept, hit_after_safe) == (False, True)
+        assert (dropped, hit_after_write) == (True, False)
+        assert memo.get_stats()["invalidations"] == 1
+
+    def test_unknown_tool_is_treated_as_dangerous(self):
+        """分類にないツールは DANGEROUS とみなしてメモを破棄する"""
+        # Arrange
+        memo = ToolResultMemo(tool_classes={"read_file": ActionClass.SAFE})
+        memo.store("read_file", {"path": "a.py"}, "old")
+
+        # Act
+        memo.invalidate_for("deploy")
+
+        # Assert
+        assert memo.get_tool_class("deploy") == ActionClass.DANGEROUS
+        assert memo.get_stats()["entries"] == 0
+
+    def test_stats(self):
+        """ヒット・ミス数とヒット率を集計する"""
+        # Arrange
+        memo = ToolResultMemo()
+        memo.store("read_file", {"path": "a.py"}, "x")
+
+        # Act
+        memo.lookup("read_file", {"path": "a.py"})
+        memo.lookup("read_file", {"path": "a.py"})
+        memo.lookup("read_file", {"path": "b.py"})
+        memo.lookup("read_file", {"path": "c.py"})
+
+        # Assert
+        stats = memo.get_stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 1)
+        assert stats["hit_rate"] == 0.5
+
+
+class TestToolExecutorMemo:
+    """ToolExecutor のメモ化のテスト"""
+
+    async def test_idempotent_tool_runs_once_per_memo(self):
+        """idempotent なツールは同じ引数なら2回目以降メモから返す"""
+        # Arrange
+        executor = ToolExecutor()
+        calls: list[str] = []
+
+        def read(path: str) -> str:
+            calls.append(path)
+            return f"content of {path}"
+
+        tool = ToolDefinition(name="read_file", idempotent=True)
+        executor.register_tool(tool, read)
+        memo = ToolResultMemo()
+
+        # Act
+        first = await executor.execute(tool.tool_id, {"path": "a.py"}, memo=memo)
+        second = await executor.execute_by_name("read_file", {"path": "a.py"}, memo=memo)
+        without_memo = await executor.execute(tool.tool_id, {"path": "a.py"})
+
+        # Assert
+        assert calls == ["a.py", "a.py"]
+        assert second.output == first.output
+        assert second.metadata == {"cached": True}
+        assert without_memo.metadata == {}
+
+    async def test_write_tool_invalidates_memo(self):
+        """書き込み系ツールの実行後は読み直す"""
+        # Arrange
+        executor = ToolExecutor()
+        files = {"a.py": "v1"}
+        reader = ToolDefinition(name="read_file", idempotent=True)
+        writer = ToolDefinition(name="edit_file")
+        executor.register_tool(reader, lambda path: files[path])
+        executor.register_tool(writer, lambda path, content: files.update({path: content}))
+        memo = ToolResultMemo()
+
+        # Act
+        before = await executor.execute(reader.tool_id, {"path": "a.py"}, memo=memo)
+        await executor.execute(writer.tool_id, {"path": "a.py", "content": "v2"}, memo=memo)
+        after = await executor.execute(reader.tool_id, {"path": "a.py"}, memo=memo)
+
+        # Assert
+        assert (before.output, after.output) == ("v1", "v2")
+        assert "cached" not in after.metadata
+
+
+class TestAgentRunnerMemo:
+    """AgentRunner のメモ化のテスト"""
+
+    @staticmethod
+    def _runner(responses: list[LLMResponse], **kwargs) -> AgentRunner:
+        client = MagicMock(spec=LLMClient, config=LLMConfig())
+        client.chat = AsyncMock(side_effect=responses)
+        return AgentRunner(client, **kwargs)
+
+    @staticmethod
+    def _tool_response(*calls: tuple[str, dict]) -> LLMResponse:
+        return LLMResponse(
+            content="",
+            tool_calls=[
+                ToolCall(id=f"c{i}", name=name, arguments=args)
+                for i, (name, args) in enumerate(calls)
+            ],
+            finish_reason="tool_calls",
+        )
+
+    async def test_repeated_reads_hit_memo_until_write(self):
+        """同じ読み込みはメモから返し、書き込み後は再実行する"""
+        # Arrange
+        files = {"a.py": "v1"}
+        read = AsyncMock(side_effect=lambda path: files[path])
+
+        async def write(path: str, content: str) -> str:
+            files[path] = content
+            return "ok"
+
+        runner = self._runner(
+            [
+                self._tool_response(("read_file", {"path": "a.py"})),
+                self._tool_response(("read_file", {"path": "a.py"})),
+                self._tool_response(("write_file", {"path": "a.py", "content": "v2"})),
+                self._tool_response(("read_file", {"path": "a.py"})),
+                LLMResponse(content="完了", tool_calls=[], finish_reason="stop"),
+            ]
+        )
+        schema = {"type": "object", "properties": {}}
+        runner.register_tool(
+            AgentToolDefinition("read_file", "read", schema, read, idempotent=True)
+        )
+        runner.register_tool(AgentToolDefinition("write_file", "write", schema, write))
+
+        # Act
+        result = await runner.run("a.py を更新")
+
+        # Assert
+        assert result.success
+        assert read.await_count == 2
+        stats = result.tool_memo_stats
+        assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+
+    async def test_memo_is_per_run(self):
+        """メモは run ごとに作り直す"""
+        # Arrange
+        read = AsyncMock(return_value="content")
+        runner = self._runner(
+            [
+                self._tool_response(("read_file", {"path": "a.py"})),
+                LLMResponse(content="1", tool_calls=[], finish_reason="stop"),
+                self._tool_response(("read_file", {"path": "a.py"})),
+                LLMResponse(content="2", tool_calls=[], finish_reason="stop"),
+            ]
+        )
+        runner.register_tool(AgentToolDefinition("read_file", "read", {}, read, idempotent=True))
+
+        # Act
+        await runner.run("1回目")
+        await runner.run("2回目")
+
+        # Assert
+        assert read.await_count == 2
+
+    async def test_memoize_disabled(self):
+        """memoize_tools=False なら毎回実行する"""
+        # Arrange
+        read = AsyncMock(return_value="content")
+        runner = self._runner([], memoize_tools=False)
+        runner.register_tool(AgentToolDefinition("read_file", "read", {}, read, idempotent=True))
+        call = ToolCall(id="c", name="read_file", arguments={"path": "a.py"})
+
+        # Act
+        await runner._execute_tool_calls([call, call], AgentContext(run_id="r"))
+
+        # Assert
+        assert read.await_count == 2
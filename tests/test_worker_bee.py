@@ -2159,9 +2159,10 @@ class TestWorkerBeeAgentRunnerPromptContext:
         # Arrange: LLMクライアントをモックで事前設定
         from unittest.mock import AsyncMock, MagicMock
 
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         worker_bee._llm_client = mock_client
 
@@ -2180,9 +2181,10 @@ class TestWorkerBeeAgentRunnerPromptContext:
         from unittest.mock import AsyncMock, MagicMock
 
         from colonyforge.core.activity_bus import AgentRole
+        from colonyforge.core.config import LLMConfig
         from colonyforge.llm.client import LLMClient
 
-        mock_client = MagicMock(spec=LLMClient)
+        mock_client = MagicMock(spec=LLMClient, config=LLMConfig())
         mock_client.chat = AsyncMock()
         worker_bee._llm_client = mock_client
 